@@ -0,0 +1,376 @@
+"""baseline
+
+Revision ID: 0001
+Revises: 
+Create Date: 2026-10-19 12:30:31.915388
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('companies',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(), nullable=True),
+    sa.Column('code', sa.String(), nullable=True),
+    sa.Column('first_name', sa.String(), nullable=True),
+    sa.Column('last_name', sa.String(), nullable=True),
+    sa.Column('address', sa.String(), nullable=True),
+    sa.Column('city', sa.String(), nullable=True),
+    sa.Column('postal_code', sa.String(), nullable=True),
+    sa.Column('province', sa.String(), nullable=True),
+    sa.Column('phone', sa.String(), nullable=True),
+    sa.Column('email_contact', sa.String(), nullable=True),
+    sa.Column('logo_url', sa.String(), nullable=True),
+    sa.Column('status', sa.Enum('ACTIVE', 'SUSPENDED', 'DELETED_PENDING', name='companystatus'), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('last_payment_date', sa.Date(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_companies_code'), 'companies', ['code'], unique=True)
+    op.create_index(op.f('ix_companies_id'), 'companies', ['id'], unique=False)
+    op.create_index(op.f('ix_companies_name'), 'companies', ['name'], unique=False)
+
+    op.create_table('plans',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(), nullable=True),
+    sa.Column('mp_preapproval_plan_id', sa.String(), nullable=True),
+    sa.Column('price', sa.Numeric(precision=10, scale=2), nullable=True),
+    sa.Column('currency', sa.String(), nullable=True),
+    sa.Column('interval', sa.String(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('mp_preapproval_plan_id')
+    )
+    op.create_index(op.f('ix_plans_id'), 'plans', ['id'], unique=False)
+    op.create_index(op.f('ix_plans_name'), 'plans', ['name'], unique=True)
+
+    op.create_table('payments',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('company_id', sa.Integer(), nullable=True),
+    sa.Column('amount', sa.Numeric(precision=10, scale=2), nullable=True),
+    sa.Column('payment_date', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('payment_method', sa.String(), nullable=True),
+    sa.Column('transaction_id', sa.String(), nullable=True),
+    sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('transaction_id')
+    )
+    op.create_index(op.f('ix_payments_id'), 'payments', ['id'], unique=False)
+
+    op.create_table('sectors',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('company_id', sa.Integer(), nullable=True),
+    sa.Column('name', sa.String(), nullable=True),
+    sa.Column('description', sa.String(), nullable=True),
+    sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_sectors_id'), 'sectors', ['id'], unique=False)
+    op.create_index(op.f('ix_sectors_name'), 'sectors', ['name'], unique=False)
+
+    op.create_table('spare_part_categories',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('company_id', sa.Integer(), nullable=True),
+    sa.Column('name', sa.String(), nullable=True),
+    sa.Column('description', sa.String(), nullable=True),
+    sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_spare_part_categories_id'), 'spare_part_categories', ['id'], unique=False)
+    op.create_index(op.f('ix_spare_part_categories_name'), 'spare_part_categories', ['name'], unique=False)
+
+    op.create_table('subscriptions',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('company_id', sa.Integer(), nullable=True),
+    sa.Column('plan_id', sa.Integer(), nullable=True),
+    sa.Column('mp_preapproval_id', sa.String(), nullable=True),
+    sa.Column('status', sa.String(), nullable=True),
+    sa.Column('current_period_end', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ),
+    sa.ForeignKeyConstraint(['plan_id'], ['plans.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('company_id')
+    )
+    op.create_index(op.f('ix_subscriptions_id'), 'subscriptions', ['id'], unique=False)
+    op.create_index(op.f('ix_subscriptions_mp_preapproval_id'), 'subscriptions', ['mp_preapproval_id'], unique=True)
+
+    op.create_table('suppliers',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('company_id', sa.Integer(), nullable=True),
+    sa.Column('name', sa.String(), nullable=True),
+    sa.Column('address', sa.String(), nullable=True),
+    sa.Column('city', sa.String(), nullable=True),
+    sa.Column('phone', sa.String(), nullable=True),
+    sa.Column('email', sa.String(), nullable=True),
+    sa.Column('contact_name', sa.String(), nullable=True),
+    sa.Column('contact_phone', sa.String(), nullable=True),
+    sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_suppliers_id'), 'suppliers', ['id'], unique=False)
+    op.create_index(op.f('ix_suppliers_name'), 'suppliers', ['name'], unique=False)
+
+    op.create_table('users',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('email', sa.String(), nullable=True),
+    sa.Column('hashed_password', sa.String(), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=True),
+    sa.Column('company_id', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_users_email'), 'users', ['email'], unique=True)
+    op.create_index(op.f('ix_users_id'), 'users', ['id'], unique=False)
+
+    op.create_table('assets',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('company_id', sa.Integer(), nullable=True),
+    sa.Column('sector_id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(), nullable=True),
+    sa.Column('brand', sa.String(), nullable=True),
+    sa.Column('model', sa.String(), nullable=True),
+    sa.Column('serial_number', sa.String(), nullable=True),
+    sa.Column('purchase_date', sa.Date(), nullable=True),
+    sa.Column('status', sa.String(), nullable=True),
+    sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ),
+    sa.ForeignKeyConstraint(['sector_id'], ['sectors.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_assets_id'), 'assets', ['id'], unique=False)
+    op.create_index(op.f('ix_assets_name'), 'assets', ['name'], unique=False)
+
+    op.create_table('spare_parts',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('company_id', sa.Integer(), nullable=True),
+    sa.Column('category_id', sa.Integer(), nullable=True),
+    sa.Column('name', sa.String(), nullable=True),
+    sa.Column('internal_code', sa.String(), nullable=True),
+    sa.Column('cost', sa.Numeric(precision=10, scale=2), nullable=True),
+    sa.Column('currency', sa.String(), nullable=True),
+    sa.Column('stock', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['category_id'], ['spare_part_categories.id'], ),
+    sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_spare_parts_id'), 'spare_parts', ['id'], unique=False)
+    op.create_index(op.f('ix_spare_parts_name'), 'spare_parts', ['name'], unique=False)
+
+    op.create_table('stock_purchase_orders',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('company_id', sa.Integer(), nullable=True),
+    sa.Column('supplier_id', sa.Integer(), nullable=True),
+    sa.Column('order_number', sa.String(), nullable=True),
+    sa.Column('order_date', sa.Date(), nullable=True),
+    sa.Column('delivery_date', sa.Date(), nullable=True),
+    sa.Column('total_amount', sa.Numeric(precision=10, scale=2), nullable=True),
+    sa.Column('observations', sa.String(), nullable=True),
+    sa.Column('status', sa.Enum('PENDIENTE', 'PARCIALMENTE_RECIBIDO', 'COMPLETADA', 'CANCELADA', name='purchaseorderstatus'), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ),
+    sa.ForeignKeyConstraint(['supplier_id'], ['suppliers.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_stock_purchase_orders_id'), 'stock_purchase_orders', ['id'], unique=False)
+    op.create_index(op.f('ix_stock_purchase_orders_order_number'), 'stock_purchase_orders', ['order_number'], unique=False)
+
+    op.create_table('supplier_categories',
+    sa.Column('supplier_id', sa.Integer(), nullable=True),
+    sa.Column('category_id', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['category_id'], ['spare_part_categories.id'], ),
+    sa.ForeignKeyConstraint(['supplier_id'], ['suppliers.id'], )
+    )
+    op.create_table('workers',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('company_id', sa.Integer(), nullable=True),
+    sa.Column('sector_id', sa.Integer(), nullable=True),
+    sa.Column('first_name', sa.String(), nullable=True),
+    sa.Column('last_name', sa.String(), nullable=True),
+    sa.Column('rut_dni', sa.String(), nullable=True),
+    sa.Column('email', sa.String(), nullable=True),
+    sa.Column('phone', sa.String(), nullable=True),
+    sa.Column('job_title', sa.String(), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=True),
+    sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ),
+    sa.ForeignKeyConstraint(['sector_id'], ['sectors.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_workers_first_name'), 'workers', ['first_name'], unique=False)
+    op.create_index(op.f('ix_workers_id'), 'workers', ['id'], unique=False)
+    op.create_index(op.f('ix_workers_last_name'), 'workers', ['last_name'], unique=False)
+
+    op.create_table('preventive_plans',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('company_id', sa.Integer(), nullable=True),
+    sa.Column('asset_id', sa.Integer(), nullable=True),
+    sa.Column('name', sa.String(), nullable=True),
+    sa.Column('frequency_type', sa.Enum('DIARIA', 'SEMANAL', 'MENSUAL', 'ANUAL', name='frequencytype'), nullable=True),
+    sa.Column('frequency_value', sa.Integer(), nullable=True),
+    sa.Column('last_run', sa.Date(), nullable=True),
+    sa.Column('next_run', sa.Date(), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=True),
+    sa.ForeignKeyConstraint(['asset_id'], ['assets.id'], ),
+    sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_preventive_plans_id'), 'preventive_plans', ['id'], unique=False)
+    op.create_index(op.f('ix_preventive_plans_name'), 'preventive_plans', ['name'], unique=False)
+
+    op.create_table('stock_purchase_order_items',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('purchase_order_id', sa.Integer(), nullable=True),
+    sa.Column('spare_part_id', sa.Integer(), nullable=True),
+    sa.Column('description', sa.String(), nullable=True),
+    sa.Column('quantity', sa.Integer(), nullable=True),
+    sa.Column('unit_price', sa.Numeric(precision=10, scale=2), nullable=True),
+    sa.Column('total_price', sa.Numeric(precision=10, scale=2), nullable=True),
+    sa.Column('received_quantity', sa.Integer(), nullable=True),
+    sa.Column('received_date', sa.Date(), nullable=True),
+    sa.ForeignKeyConstraint(['purchase_order_id'], ['stock_purchase_orders.id'], ),
+    sa.ForeignKeyConstraint(['spare_part_id'], ['spare_parts.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_stock_purchase_order_items_id'), 'stock_purchase_order_items', ['id'], unique=False)
+
+    op.create_table('tools',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('company_id', sa.Integer(), nullable=True),
+    sa.Column('name', sa.String(), nullable=True),
+    sa.Column('code', sa.String(), nullable=True),
+    sa.Column('brand', sa.String(), nullable=True),
+    sa.Column('status', sa.String(), nullable=True),
+    sa.Column('current_worker_id', sa.Integer(), nullable=True),
+    sa.Column('current_sector_id', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ),
+    sa.ForeignKeyConstraint(['current_sector_id'], ['sectors.id'], ),
+    sa.ForeignKeyConstraint(['current_worker_id'], ['workers.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_tools_id'), 'tools', ['id'], unique=False)
+    op.create_index(op.f('ix_tools_name'), 'tools', ['name'], unique=False)
+
+    op.create_table('preventive_tasks',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('plan_id', sa.Integer(), nullable=True),
+    sa.Column('description', sa.String(), nullable=True),
+    sa.Column('estimated_time', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['plan_id'], ['preventive_plans.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_preventive_tasks_id'), 'preventive_tasks', ['id'], unique=False)
+
+    op.create_table('work_orders',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('company_id', sa.Integer(), nullable=True),
+    sa.Column('asset_id', sa.Integer(), nullable=True),
+    sa.Column('sector_id', sa.Integer(), nullable=True),
+    sa.Column('plan_id', sa.Integer(), nullable=True),
+    sa.Column('ticket_number', sa.String(), nullable=True),
+    sa.Column('type', sa.Enum('PREVENTIVO', 'CORRECTIVO', name='workordertype'), nullable=True),
+    sa.Column('status', sa.Enum('PENDIENTE', 'ASIGNADA', 'EN_PROGRESO', 'PAUSADA', 'COMPLETADA', 'CANCELADA', name='workorderstatus'), nullable=True),
+    sa.Column('priority', sa.String(), nullable=True),
+    sa.Column('description', sa.String(), nullable=True),
+    sa.Column('observations', sa.String(), nullable=True),
+    sa.Column('requested_by_id', sa.Integer(), nullable=True),
+    sa.Column('assigned_to_id', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('assigned_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('start_date', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('end_date', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['asset_id'], ['assets.id'], ),
+    sa.ForeignKeyConstraint(['assigned_to_id'], ['workers.id'], ),
+    sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ),
+    sa.ForeignKeyConstraint(['plan_id'], ['preventive_plans.id'], ),
+    sa.ForeignKeyConstraint(['requested_by_id'], ['workers.id'], ),
+    sa.ForeignKeyConstraint(['sector_id'], ['sectors.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_work_orders_id'), 'work_orders', ['id'], unique=False)
+    op.create_index(op.f('ix_work_orders_ticket_number'), 'work_orders', ['ticket_number'], unique=True)
+
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_work_orders_ticket_number'), 'work_orders')
+    op.drop_index(op.f('ix_work_orders_id'), 'work_orders')
+    op.drop_table('work_orders')
+
+    op.drop_index(op.f('ix_preventive_tasks_id'), 'preventive_tasks')
+    op.drop_table('preventive_tasks')
+
+    op.drop_index(op.f('ix_tools_name'), 'tools')
+    op.drop_index(op.f('ix_tools_id'), 'tools')
+    op.drop_table('tools')
+
+    op.drop_index(op.f('ix_stock_purchase_order_items_id'), 'stock_purchase_order_items')
+    op.drop_table('stock_purchase_order_items')
+
+    op.drop_index(op.f('ix_preventive_plans_name'), 'preventive_plans')
+    op.drop_index(op.f('ix_preventive_plans_id'), 'preventive_plans')
+    op.drop_table('preventive_plans')
+
+    op.drop_index(op.f('ix_workers_last_name'), 'workers')
+    op.drop_index(op.f('ix_workers_id'), 'workers')
+    op.drop_index(op.f('ix_workers_first_name'), 'workers')
+    op.drop_table('workers')
+
+    op.drop_table('supplier_categories')
+    op.drop_index(op.f('ix_stock_purchase_orders_order_number'), 'stock_purchase_orders')
+    op.drop_index(op.f('ix_stock_purchase_orders_id'), 'stock_purchase_orders')
+    op.drop_table('stock_purchase_orders')
+
+    op.drop_index(op.f('ix_spare_parts_name'), 'spare_parts')
+    op.drop_index(op.f('ix_spare_parts_id'), 'spare_parts')
+    op.drop_table('spare_parts')
+
+    op.drop_index(op.f('ix_assets_name'), 'assets')
+    op.drop_index(op.f('ix_assets_id'), 'assets')
+    op.drop_table('assets')
+
+    op.drop_index(op.f('ix_users_id'), 'users')
+    op.drop_index(op.f('ix_users_email'), 'users')
+    op.drop_table('users')
+
+    op.drop_index(op.f('ix_suppliers_name'), 'suppliers')
+    op.drop_index(op.f('ix_suppliers_id'), 'suppliers')
+    op.drop_table('suppliers')
+
+    op.drop_index(op.f('ix_subscriptions_mp_preapproval_id'), 'subscriptions')
+    op.drop_index(op.f('ix_subscriptions_id'), 'subscriptions')
+    op.drop_table('subscriptions')
+
+    op.drop_index(op.f('ix_spare_part_categories_name'), 'spare_part_categories')
+    op.drop_index(op.f('ix_spare_part_categories_id'), 'spare_part_categories')
+    op.drop_table('spare_part_categories')
+
+    op.drop_index(op.f('ix_sectors_name'), 'sectors')
+    op.drop_index(op.f('ix_sectors_id'), 'sectors')
+    op.drop_table('sectors')
+
+    op.drop_index(op.f('ix_payments_id'), 'payments')
+    op.drop_table('payments')
+
+    op.drop_index(op.f('ix_plans_name'), 'plans')
+    op.drop_index(op.f('ix_plans_id'), 'plans')
+    op.drop_table('plans')
+
+    op.drop_index(op.f('ix_companies_name'), 'companies')
+    op.drop_index(op.f('ix_companies_id'), 'companies')
+    op.drop_index(op.f('ix_companies_code'), 'companies')
+    op.drop_table('companies')
+
+    # Postgres keeps enum types around after their tables are gone
+    for enum_name in ['workorderstatus', 'workordertype', 'frequencytype', 'purchaseorderstatus', 'companystatus']:
+        sa.Enum(name=enum_name).drop(op.get_bind(), checkfirst=True)
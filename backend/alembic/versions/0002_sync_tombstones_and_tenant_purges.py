@@ -0,0 +1,75 @@
+"""sync tombstones and tenant purges
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19 12:30:47.012852
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, Sequence[str], None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SYNCED_TABLES = ['assets', 'tools', 'spare_parts', 'preventive_plans', 'work_orders']
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('tenant_purges',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('company_id', sa.Integer(), nullable=True),
+    sa.Column('status', sa.Enum('PENDING', 'EXPORTING', 'DELETING', 'DONE', name='purgestatus'), nullable=True),
+    sa.Column('step', sa.Integer(), nullable=True),
+    sa.Column('rows_deleted', sa.Integer(), nullable=True),
+    sa.Column('export_path', sa.String(), nullable=True),
+    sa.Column('started_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_tenant_purges_company_id'), 'tenant_purges', ['company_id'], unique=True)
+    op.create_index(op.f('ix_tenant_purges_id'), 'tenant_purges', ['id'], unique=False)
+
+    op.create_table('sync_tombstones',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('company_id', sa.Integer(), nullable=True),
+    sa.Column('entity_type', sa.String(), nullable=True),
+    sa.Column('entity_id', sa.Integer(), nullable=True),
+    sa.Column('deleted_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_sync_tombstones_company_id'), 'sync_tombstones', ['company_id'], unique=False)
+    op.create_index(op.f('ix_sync_tombstones_deleted_at'), 'sync_tombstones', ['deleted_at'], unique=False)
+    op.create_index(op.f('ix_sync_tombstones_id'), 'sync_tombstones', ['id'], unique=False)
+
+    # Existing rows start out as changed "now", which a client's first full pull picks up anyway
+    for table in SYNCED_TABLES:
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.add_column(sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True))
+            batch_op.create_index(batch_op.f(f'ix_{table}_updated_at'), ['updated_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in reversed(SYNCED_TABLES):
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_index(batch_op.f(f'ix_{table}_updated_at'))
+            batch_op.drop_column('updated_at')
+
+    op.drop_index(op.f('ix_sync_tombstones_id'), 'sync_tombstones')
+    op.drop_index(op.f('ix_sync_tombstones_deleted_at'), 'sync_tombstones')
+    op.drop_index(op.f('ix_sync_tombstones_company_id'), 'sync_tombstones')
+    op.drop_table('sync_tombstones')
+
+    op.drop_index(op.f('ix_tenant_purges_id'), 'tenant_purges')
+    op.drop_index(op.f('ix_tenant_purges_company_id'), 'tenant_purges')
+    op.drop_table('tenant_purges')
+    sa.Enum(name='purgestatus').drop(op.get_bind(), checkfirst=True)
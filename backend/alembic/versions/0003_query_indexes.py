@@ -0,0 +1,98 @@
+"""query indexes
+
+Indexes for the filters the routers actually run: every tenant query is led by
+company_id, plus the status/date/FK filters of list, dashboard and sync endpoints.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 12:35:02.118640
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, Sequence[str], None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+OPEN_WORK_ORDERS = "status IN ('PENDIENTE', 'ASIGNADA', 'EN_PROGRESO', 'PAUSADA')"
+OPEN_PURCHASE_ORDERS = "status IN ('PENDIENTE', 'PARCIALMENTE_RECIBIDO')"
+
+# (name, table, columns, extra kwargs)
+INDEXES = [
+    ('ix_users_company_id', 'users', ['company_id'], {}),
+    ('ix_payments_company_id', 'payments', ['company_id'], {}),
+    ('ix_sectors_company_id', 'sectors', ['company_id'], {}),
+    ('ix_workers_company_id', 'workers', ['company_id'], {}),
+    ('ix_tools_company_id', 'tools', ['company_id'], {}),
+    ('ix_spare_part_categories_company_id', 'spare_part_categories', ['company_id'], {}),
+    ('ix_suppliers_company_id', 'suppliers', ['company_id'], {}),
+    ('ix_spare_parts_company_id', 'spare_parts', ['company_id'], {}),
+    ('ix_supplier_categories_supplier_id', 'supplier_categories', ['supplier_id'], {}),
+    ('ix_supplier_categories_category_id', 'supplier_categories', ['category_id'], {}),
+    ('ix_assets_company_id_sector_id', 'assets', ['company_id', 'sector_id'], {}),
+    ('ix_preventive_plans_asset_id', 'preventive_plans', ['asset_id'], {}),
+    ('ix_preventive_plans_company_id_is_active_next_run', 'preventive_plans', ['company_id', 'is_active', 'next_run'], {}),
+    ('ix_preventive_tasks_plan_id', 'preventive_tasks', ['plan_id'], {}),
+    ('ix_work_orders_plan_id', 'work_orders', ['plan_id'], {}),
+    ('ix_work_orders_company_id_created_at', 'work_orders', ['company_id', 'created_at'], {}),
+    ('ix_work_orders_company_id_asset_id', 'work_orders', ['company_id', 'asset_id'], {}),
+    ('ix_work_orders_company_id_type_created_at', 'work_orders', ['company_id', 'type', 'created_at'], {}),
+    ('ix_work_orders_company_id_assigned_to_id', 'work_orders', ['company_id', 'assigned_to_id'], {}),
+    ('ix_work_orders_company_id_status_open', 'work_orders', ['company_id', 'status'],
+     {'postgresql_where': sa.text(OPEN_WORK_ORDERS), 'sqlite_where': sa.text(OPEN_WORK_ORDERS)}),
+    ('ix_stock_purchase_orders_company_id_order_date', 'stock_purchase_orders', ['company_id', 'order_date'], {}),
+    ('ix_stock_purchase_orders_company_id_supplier_id', 'stock_purchase_orders', ['company_id', 'supplier_id'], {}),
+    ('ix_stock_purchase_orders_company_id_order_number', 'stock_purchase_orders', ['company_id', 'order_number'],
+     {'postgresql_ops': {'order_number': 'text_pattern_ops'}}),
+    ('ix_stock_purchase_orders_company_id_order_date_open', 'stock_purchase_orders', ['company_id', 'order_date'],
+     {'postgresql_where': sa.text(OPEN_PURCHASE_ORDERS), 'sqlite_where': sa.text(OPEN_PURCHASE_ORDERS)}),
+    ('ix_stock_purchase_order_items_purchase_order_id', 'stock_purchase_order_items', ['purchase_order_id'], {}),
+    ('ix_stock_purchase_order_items_spare_part_id', 'stock_purchase_order_items', ['spare_part_id'], {}),
+    # /sync reads one company's rows by updated_at; replaces the cross-tenant updated_at indexes
+    ('ix_assets_company_id_updated_at', 'assets', ['company_id', 'updated_at'], {}),
+    ('ix_tools_company_id_updated_at', 'tools', ['company_id', 'updated_at'], {}),
+    ('ix_spare_parts_company_id_updated_at', 'spare_parts', ['company_id', 'updated_at'], {}),
+    ('ix_preventive_plans_company_id_updated_at', 'preventive_plans', ['company_id', 'updated_at'], {}),
+    ('ix_work_orders_company_id_updated_at', 'work_orders', ['company_id', 'updated_at'], {}),
+    ('ix_sync_tombstones_company_id_deleted_at', 'sync_tombstones', ['company_id', 'deleted_at'], {}),
+]
+
+# Superseded by the composites above: (name, table, columns)
+REPLACED_INDEXES = [
+    ('ix_assets_updated_at', 'assets', ['updated_at']),
+    ('ix_tools_updated_at', 'tools', ['updated_at']),
+    ('ix_spare_parts_updated_at', 'spare_parts', ['updated_at']),
+    ('ix_preventive_plans_updated_at', 'preventive_plans', ['updated_at']),
+    ('ix_work_orders_updated_at', 'work_orders', ['updated_at']),
+    ('ix_sync_tombstones_company_id', 'sync_tombstones', ['company_id']),
+    ('ix_sync_tombstones_deleted_at', 'sync_tombstones', ['deleted_at']),
+]
+
+
+def _concurrently() -> dict:
+    # Build indexes without blocking writes on live Postgres tables
+    return {'postgresql_concurrently': True} if op.get_bind().dialect.name == 'postgresql' else {}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, columns, kwargs in INDEXES:
+            op.create_index(name, table, columns, unique=False, **kwargs, **_concurrently())
+        for name, table, columns in REPLACED_INDEXES:
+            op.drop_index(name, table_name=table, **_concurrently())
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, columns in REPLACED_INDEXES:
+            op.create_index(name, table, columns, unique=False, **_concurrently())
+        for name, table, columns, kwargs in reversed(INDEXES):
+            op.drop_index(name, table_name=table, **_concurrently())
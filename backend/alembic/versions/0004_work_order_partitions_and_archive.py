@@ -0,0 +1,134 @@
+"""work order partitions and archive
+
+On Postgres, work_orders becomes a table range-partitioned by month on created_at,
+with a DEFAULT partition as a safety net. Future partitions are created ahead of
+time by app.services.partitions. Other databases keep a plain table.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19 12:41:10.532019
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, Sequence[str], None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+OPEN_WORK_ORDERS = "status IN ('PENDIENTE', 'ASIGNADA', 'EN_PROGRESO', 'PAUSADA')"
+
+# Every work_orders index except the ticket number one: (name, columns, extra kwargs)
+WORK_ORDER_INDEXES = [
+    ('ix_work_orders_id', ['id'], {}),
+    ('ix_work_orders_plan_id', ['plan_id'], {}),
+    ('ix_work_orders_company_id_created_at', ['company_id', 'created_at'], {}),
+    ('ix_work_orders_company_id_asset_id', ['company_id', 'asset_id'], {}),
+    ('ix_work_orders_company_id_type_created_at', ['company_id', 'type', 'created_at'], {}),
+    ('ix_work_orders_company_id_assigned_to_id', ['company_id', 'assigned_to_id'], {}),
+    ('ix_work_orders_company_id_updated_at', ['company_id', 'updated_at'], {}),
+    ('ix_work_orders_company_id_status_open', ['company_id', 'status'], {'postgresql_where': sa.text(OPEN_WORK_ORDERS)}),
+]
+
+# (column, referenced table)
+WORK_ORDER_FKS = [
+    ('company_id', 'companies'),
+    ('asset_id', 'assets'),
+    ('sector_id', 'sectors'),
+    ('plan_id', 'preventive_plans'),
+    ('requested_by_id', 'workers'),
+    ('assigned_to_id', 'workers'),
+]
+
+# Monthly partitions from the oldest work order up to three months ahead
+CREATE_MONTHLY_PARTITIONS = """
+DO $$
+DECLARE
+    month date := date_trunc('month', coalesce((SELECT min(created_at) FROM work_orders), now()))::date;
+    last_month date := (date_trunc('month', now()) + interval '3 months')::date;
+BEGIN
+    WHILE month <= last_month LOOP
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF work_orders_new FOR VALUES FROM (%L) TO (%L)',
+            'work_orders_p' || to_char(month, 'YYYYMM'), month, (month + interval '1 month')::date
+        );
+        month := (month + interval '1 month')::date;
+    END LOOP;
+END $$;
+"""
+
+
+def _rebuild_work_orders(partitioned: bool) -> None:
+    """
+    Copies work_orders into a new table (partitioned or plain) and swaps it in.
+    Keeps the id sequence, so ids keep counting from where they were.
+    """
+    op.execute("UPDATE work_orders SET created_at = now() WHERE created_at IS NULL")
+    op.execute("ALTER SEQUENCE work_orders_id_seq OWNED BY NONE")
+    if partitioned:
+        op.execute("CREATE TABLE work_orders_new (LIKE work_orders INCLUDING DEFAULTS) PARTITION BY RANGE (created_at)")
+        op.execute("ALTER TABLE work_orders_new ALTER COLUMN created_at SET NOT NULL")
+        op.execute("CREATE TABLE work_orders_default PARTITION OF work_orders_new DEFAULT")
+        op.execute(CREATE_MONTHLY_PARTITIONS)
+    else:
+        op.execute("CREATE TABLE work_orders_new (LIKE work_orders INCLUDING DEFAULTS)")
+        op.execute("ALTER TABLE work_orders_new ALTER COLUMN created_at DROP NOT NULL")
+
+    op.execute("INSERT INTO work_orders_new SELECT * FROM work_orders")
+    op.execute("DROP TABLE work_orders")
+    op.execute("ALTER TABLE work_orders_new RENAME TO work_orders")
+    op.execute("ALTER SEQUENCE work_orders_id_seq OWNED BY work_orders.id")
+
+    # A PK or unique index on a partitioned table has to include the partition key
+    op.create_primary_key('work_orders_pkey', 'work_orders', ['id', 'created_at'] if partitioned else ['id'])
+    for column, referenced in WORK_ORDER_FKS:
+        op.create_foreign_key(f'work_orders_{column}_fkey', 'work_orders', referenced, [column], ['id'])
+    for name, columns, kwargs in WORK_ORDER_INDEXES:
+        op.create_index(name, 'work_orders', columns, unique=False, **kwargs)
+    # Weaker than before: the same ticket_number can exist twice with different created_at,
+    # so the application keeps them unique, see crud.unique_ticket_number
+    op.create_index('ix_work_orders_ticket_number', 'work_orders', ['ticket_number', 'created_at'] if partitioned else ['ticket_number'], unique=True)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('work_orders_archive',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('company_id', sa.Integer(), nullable=True),
+    sa.Column('period', sa.Date(), nullable=True),
+    sa.Column('order_count', sa.Integer(), nullable=True),
+    sa.Column('data', sa.LargeBinary(), nullable=True),
+    sa.Column('archived_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_work_orders_archive_company_id_period', 'work_orders_archive', ['company_id', 'period'], unique=False)
+    op.create_index(op.f('ix_work_orders_archive_id'), 'work_orders_archive', ['id'], unique=False)
+
+    if op.get_bind().dialect.name == 'postgresql':
+        _rebuild_work_orders(partitioned=True)
+    else:
+        with op.batch_alter_table('work_orders') as batch_op:
+            batch_op.alter_column('created_at', existing_type=sa.DateTime(timezone=True), nullable=False, existing_server_default=sa.func.now())
+            batch_op.drop_index('ix_work_orders_ticket_number')
+            batch_op.create_index('ix_work_orders_ticket_number', ['ticket_number', 'created_at'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == 'postgresql':
+        _rebuild_work_orders(partitioned=False)
+    else:
+        with op.batch_alter_table('work_orders') as batch_op:
+            batch_op.drop_index('ix_work_orders_ticket_number')
+            batch_op.create_index('ix_work_orders_ticket_number', ['ticket_number'], unique=True)
+            batch_op.alter_column('created_at', existing_type=sa.DateTime(timezone=True), nullable=True, existing_server_default=sa.func.now())
+
+    op.drop_index(op.f('ix_work_orders_archive_id'), 'work_orders_archive')
+    op.drop_index('ix_work_orders_archive_company_id_period', 'work_orders_archive')
+    op.drop_table('work_orders_archive')
@@ -0,0 +1,54 @@
+"""attachments
+
+work_order_id has no FK: work_orders is partitioned on Postgres (see 0004).
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19 12:40:11.568216
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, Sequence[str], None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('attachments',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('company_id', sa.Integer(), nullable=True),
+    sa.Column('work_order_id', sa.Integer(), nullable=True),
+    sa.Column('asset_id', sa.Integer(), nullable=True),
+    sa.Column('uploaded_by_id', sa.Integer(), nullable=True),
+    sa.Column('filename', sa.String(), nullable=True),
+    sa.Column('content_type', sa.String(), nullable=True),
+    sa.Column('size', sa.Integer(), nullable=True),
+    sa.Column('sha256', sa.String(length=64), nullable=True),
+    sa.Column('storage_key', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.ForeignKeyConstraint(['asset_id'], ['assets.id'], ),
+    sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ),
+    sa.ForeignKeyConstraint(['uploaded_by_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_attachments_company_id_asset_id', 'attachments', ['company_id', 'asset_id'], unique=False)
+    op.create_index('ix_attachments_company_id_sha256', 'attachments', ['company_id', 'sha256'], unique=False)
+    op.create_index('ix_attachments_company_id_work_order_id', 'attachments', ['company_id', 'work_order_id'], unique=False)
+    op.create_index(op.f('ix_attachments_id'), 'attachments', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_attachments_id'), 'attachments')
+    op.drop_index('ix_attachments_company_id_work_order_id', 'attachments')
+    op.drop_index('ix_attachments_company_id_sha256', 'attachments')
+    op.drop_index('ix_attachments_company_id_asset_id', 'attachments')
+    op.drop_table('attachments')
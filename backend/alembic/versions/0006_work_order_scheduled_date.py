@@ -0,0 +1,30 @@
+"""work order scheduled date
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19 12:48:31.140664
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, Sequence[str], None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # On Postgres, ADD COLUMN on the partitioned parent reaches every partition
+    op.add_column('work_orders', sa.Column('scheduled_date', sa.Date(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('work_orders') as batch_op:
+        batch_op.drop_column('scheduled_date')
@@ -0,0 +1,35 @@
+"""work order asset timeline index
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19 13:02:11.408512
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, Sequence[str], None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Serves the asset timeline and /work-orders?asset_id= newest first, so it replaces
+    # (company_id, asset_id). Not CONCURRENTLY: Postgres can't do that on a partitioned table.
+    op.create_index(
+        'ix_work_orders_asset_id_created_at', 'work_orders', ['asset_id', 'created_at', 'id'], unique=False,
+        postgresql_include=['company_id', 'plan_id']
+    )
+    op.drop_index('ix_work_orders_company_id_asset_id', table_name='work_orders')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index('ix_work_orders_company_id_asset_id', 'work_orders', ['company_id', 'asset_id'], unique=False)
+    op.drop_index('ix_work_orders_asset_id_created_at', table_name='work_orders')
@@ -0,0 +1,104 @@
+"""work order costs
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19 13:10:47.220731
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0008'
+down_revision: Union[str, Sequence[str], None] = '0007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('asset_monthly_costs',
+    sa.Column('asset_id', sa.Integer(), nullable=False),
+    sa.Column('period', sa.Date(), nullable=False),
+    sa.Column('company_id', sa.Integer(), nullable=True),
+    sa.Column('parts_cost', sa.Numeric(precision=14, scale=2), nullable=False),
+    sa.Column('labor_cost', sa.Numeric(precision=14, scale=2), nullable=False),
+    sa.Column('labor_minutes', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['asset_id'], ['assets.id'], ),
+    sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ),
+    sa.PrimaryKeyConstraint('asset_id', 'period')
+    )
+    op.create_index('ix_asset_monthly_costs_company_id_period', 'asset_monthly_costs', ['company_id', 'period'], unique=False)
+
+    op.create_table('work_order_labor',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('company_id', sa.Integer(), nullable=True),
+    sa.Column('work_order_id', sa.Integer(), nullable=False),
+    sa.Column('asset_id', sa.Integer(), nullable=True),
+    sa.Column('worker_id', sa.Integer(), nullable=True),
+    sa.Column('work_date', sa.Date(), nullable=True),
+    sa.Column('minutes', sa.Integer(), nullable=True),
+    sa.Column('hourly_rate', sa.Numeric(precision=10, scale=2), nullable=True),
+    sa.Column('total_cost', sa.Numeric(precision=12, scale=2), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.ForeignKeyConstraint(['asset_id'], ['assets.id'], ),
+    sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ),
+    sa.ForeignKeyConstraint(['worker_id'], ['workers.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_work_order_labor_company_id_work_order_id', 'work_order_labor', ['company_id', 'work_order_id'], unique=False)
+    op.create_index(op.f('ix_work_order_labor_id'), 'work_order_labor', ['id'], unique=False)
+    op.create_index(op.f('ix_work_order_labor_worker_id'), 'work_order_labor', ['worker_id'], unique=False)
+
+    op.create_table('work_order_parts',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('company_id', sa.Integer(), nullable=True),
+    sa.Column('work_order_id', sa.Integer(), nullable=False),
+    sa.Column('asset_id', sa.Integer(), nullable=True),
+    sa.Column('spare_part_id', sa.Integer(), nullable=True),
+    sa.Column('description', sa.String(), nullable=True),
+    sa.Column('quantity', sa.Integer(), nullable=True),
+    sa.Column('unit_cost', sa.Numeric(precision=10, scale=2), nullable=True),
+    sa.Column('total_cost', sa.Numeric(precision=12, scale=2), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.ForeignKeyConstraint(['asset_id'], ['assets.id'], ),
+    sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ),
+    sa.ForeignKeyConstraint(['spare_part_id'], ['spare_parts.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_work_order_parts_asset_id_created_at', 'work_order_parts', ['asset_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_work_order_parts_company_id_work_order_id', 'work_order_parts', ['company_id', 'work_order_id'], unique=False)
+    op.create_index(op.f('ix_work_order_parts_id'), 'work_order_parts', ['id'], unique=False)
+    op.create_index(op.f('ix_work_order_parts_spare_part_id'), 'work_order_parts', ['spare_part_id'], unique=False)
+
+    # On Postgres, ADD COLUMN on the partitioned parent reaches every partition
+    op.add_column('work_orders', sa.Column('parts_cost', sa.Numeric(precision=12, scale=2), server_default='0', nullable=False))
+    op.add_column('work_orders', sa.Column('labor_cost', sa.Numeric(precision=12, scale=2), server_default='0', nullable=False))
+    op.add_column('work_orders', sa.Column('labor_minutes', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('workers', sa.Column('hourly_rate', sa.Numeric(precision=10, scale=2), nullable=True))
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('workers') as batch_op:
+        batch_op.drop_column('hourly_rate')
+    with op.batch_alter_table('work_orders') as batch_op:
+        batch_op.drop_column('labor_minutes')
+        batch_op.drop_column('labor_cost')
+        batch_op.drop_column('parts_cost')
+
+    op.drop_index(op.f('ix_work_order_parts_spare_part_id'), 'work_order_parts')
+    op.drop_index(op.f('ix_work_order_parts_id'), 'work_order_parts')
+    op.drop_index('ix_work_order_parts_company_id_work_order_id', 'work_order_parts')
+    op.drop_index('ix_work_order_parts_asset_id_created_at', 'work_order_parts')
+    op.drop_table('work_order_parts')
+
+    op.drop_index(op.f('ix_work_order_labor_worker_id'), 'work_order_labor')
+    op.drop_index(op.f('ix_work_order_labor_id'), 'work_order_labor')
+    op.drop_index('ix_work_order_labor_company_id_work_order_id', 'work_order_labor')
+    op.drop_table('work_order_labor')
+
+    op.drop_index('ix_asset_monthly_costs_company_id_period', 'asset_monthly_costs')
+    op.drop_table('asset_monthly_costs')
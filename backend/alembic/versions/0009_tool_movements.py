@@ -0,0 +1,83 @@
+"""tool movements
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-19 13:24:05.871203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0009'
+down_revision: Union[str, Sequence[str], None] = '0008'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+DUE_AT_SET = "due_at IS NOT NULL"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('tool_movements',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('company_id', sa.Integer(), nullable=True),
+    sa.Column('tool_id', sa.Integer(), nullable=True),
+    sa.Column('action', sa.Enum('CHECKOUT', 'RETURN', name='toolmovementaction'), nullable=True),
+    sa.Column('worker_id', sa.Integer(), nullable=True),
+    sa.Column('sector_id', sa.Integer(), nullable=True),
+    sa.Column('work_order_id', sa.Integer(), nullable=True),
+    sa.Column('asset_id', sa.Integer(), nullable=True),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('due_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('status', sa.String(), nullable=True),
+    sa.Column('notes', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.ForeignKeyConstraint(['asset_id'], ['assets.id'], ),
+    sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ),
+    sa.ForeignKeyConstraint(['sector_id'], ['sectors.id'], ),
+    sa.ForeignKeyConstraint(['tool_id'], ['tools.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['worker_id'], ['workers.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_tool_movements_asset_id_created_at', 'tool_movements', ['asset_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_tool_movements_company_id_tool_id_created_at', 'tool_movements', ['company_id', 'tool_id', 'created_at'], unique=False)
+    op.create_index(op.f('ix_tool_movements_id'), 'tool_movements', ['id'], unique=False)
+
+    op.add_column('tools', sa.Column('checked_out_at', sa.DateTime(timezone=True), nullable=True))
+    op.add_column('tools', sa.Column('due_at', sa.DateTime(timezone=True), nullable=True))
+    op.create_index('ix_tools_company_id_current_sector_id', 'tools', ['company_id', 'current_sector_id'], unique=False)
+    op.create_index('ix_tools_company_id_current_worker_id', 'tools', ['company_id', 'current_worker_id'], unique=False)
+    op.create_index('ix_tools_company_id_due_at', 'tools', ['company_id', 'due_at'], unique=False,
+                    postgresql_where=sa.text(DUE_AT_SET), sqlite_where=sa.text(DUE_AT_SET))
+
+    # Tools already held start their history with a checkout as of their last change
+    op.execute(
+        "UPDATE tools SET checked_out_at = updated_at "
+        "WHERE current_worker_id IS NOT NULL OR current_sector_id IS NOT NULL"
+    )
+    op.execute(
+        "INSERT INTO tool_movements (company_id, tool_id, action, worker_id, sector_id, created_at) "
+        "SELECT company_id, id, 'CHECKOUT', current_worker_id, current_sector_id, checked_out_at FROM tools "
+        "WHERE checked_out_at IS NOT NULL"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_tools_company_id_due_at', 'tools')
+    op.drop_index('ix_tools_company_id_current_worker_id', 'tools')
+    op.drop_index('ix_tools_company_id_current_sector_id', 'tools')
+    with op.batch_alter_table('tools') as batch_op:
+        batch_op.drop_column('due_at')
+        batch_op.drop_column('checked_out_at')
+
+    op.drop_index(op.f('ix_tool_movements_id'), 'tool_movements')
+    op.drop_index('ix_tool_movements_company_id_tool_id_created_at', 'tool_movements')
+    op.drop_index('ix_tool_movements_asset_id_created_at', 'tool_movements')
+    op.drop_table('tool_movements')
+    sa.Enum(name='toolmovementaction').drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,60 @@
+"""jobs
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-19 13:11:40.022278
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0010'
+down_revision: Union[str, Sequence[str], None] = '0009'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+QUEUED = "status = 'QUEUED'"
+RUNNING = "status = 'RUNNING'"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('jobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('queue', sa.String(), nullable=True),
+    sa.Column('kind', sa.String(), nullable=True),
+    sa.Column('payload', sa.JSON(), nullable=True),
+    sa.Column('company_id', sa.Integer(), nullable=True),
+    sa.Column('priority', sa.Integer(), nullable=True),
+    sa.Column('status', sa.Enum('QUEUED', 'RUNNING', 'DONE', 'DEAD', name='jobstatus'), nullable=True),
+    sa.Column('attempts', sa.Integer(), nullable=True),
+    sa.Column('max_attempts', sa.Integer(), nullable=True),
+    sa.Column('run_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('locked_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('locked_by', sa.String(), nullable=True),
+    sa.Column('last_error', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('started_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_jobs_id'), 'jobs', ['id'], unique=False)
+    op.create_index('ix_jobs_queued', 'jobs', ['queue', 'priority', 'run_at', 'id'], unique=False,
+                    postgresql_where=sa.text(QUEUED), sqlite_where=sa.text(QUEUED))
+    op.create_index('ix_jobs_running_locked_at', 'jobs', ['locked_at'], unique=False,
+                    postgresql_where=sa.text(RUNNING), sqlite_where=sa.text(RUNNING))
+    op.create_index('ix_jobs_status_finished_at', 'jobs', ['status', 'finished_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_jobs_status_finished_at', 'jobs')
+    op.drop_index('ix_jobs_running_locked_at', 'jobs')
+    op.drop_index('ix_jobs_queued', 'jobs')
+    op.drop_index(op.f('ix_jobs_id'), 'jobs')
+    op.drop_table('jobs')
+    sa.Enum(name='jobstatus').drop(op.get_bind(), checkfirst=True)
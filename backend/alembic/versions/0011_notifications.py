@@ -0,0 +1,62 @@
+"""notifications
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-19 13:21:26.846263
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0011'
+down_revision: Union[str, Sequence[str], None] = '0010'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+PENDING = "status = 'PENDING'"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('notifications',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('company_id', sa.Integer(), nullable=True),
+    sa.Column('channel', sa.Enum('WHATSAPP', 'EMAIL', name='notificationchannel'), nullable=True),
+    sa.Column('recipient', sa.String(), nullable=True),
+    sa.Column('kind', sa.String(), nullable=True),
+    sa.Column('subject', sa.String(), nullable=True),
+    sa.Column('body', sa.String(), nullable=True),
+    sa.Column('dedupe_key', sa.String(), nullable=True),
+    sa.Column('status', sa.Enum('PENDING', 'SENDING', 'SENT', 'FAILED', name='notificationstatus'), nullable=True),
+    sa.Column('attempts', sa.Integer(), nullable=True),
+    sa.Column('send_after', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('locked_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('last_error', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('sent_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_notifications_id'), 'notifications', ['id'], unique=False)
+    op.create_index('ix_notifications_company_id_dedupe_key', 'notifications', ['company_id', 'dedupe_key'], unique=True)
+    op.create_index('ix_notifications_pending', 'notifications', ['channel', 'recipient', 'send_after'], unique=False,
+                    postgresql_where=sa.text(PENDING), sqlite_where=sa.text(PENDING))
+    op.create_index('ix_notifications_pending_send_after', 'notifications', ['send_after'], unique=False,
+                    postgresql_where=sa.text(PENDING), sqlite_where=sa.text(PENDING))
+    op.create_index('ix_notifications_status_created_at', 'notifications', ['status', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_notifications_status_created_at', 'notifications')
+    op.drop_index('ix_notifications_pending_send_after', 'notifications')
+    op.drop_index('ix_notifications_pending', 'notifications')
+    op.drop_index('ix_notifications_company_id_dedupe_key', 'notifications')
+    op.drop_index(op.f('ix_notifications_id'), 'notifications')
+    op.drop_table('notifications')
+    sa.Enum(name='notificationstatus').drop(op.get_bind(), checkfirst=True)
+    sa.Enum(name='notificationchannel').drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,30 @@
+"""plan limits
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2026-10-19 13:27:08.779071
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0012'
+down_revision: Union[str, Sequence[str], None] = '0011'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('plans', sa.Column('limits', sa.JSON(), nullable=True))
+
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('plans') as batch_op:
+        batch_op.drop_column('limits')
@@ -0,0 +1,37 @@
+"""rate limit buckets
+
+Revision ID: 0013
+Revises: 0012
+Create Date: 2026-10-19 13:30:43.187429
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0013'
+down_revision: Union[str, Sequence[str], None] = '0012'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('rate_limit_buckets',
+    sa.Column('key', sa.String(), nullable=False),
+    sa.Column('tokens', sa.Float(), nullable=True),
+    sa.Column('granted', sa.Integer(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('key')
+    )
+    if op.get_bind().dialect.name == "postgresql":
+        # Skips the WAL: the buckets are worth nothing after a crash
+        op.execute("ALTER TABLE rate_limit_buckets SET UNLOGGED")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('rate_limit_buckets')
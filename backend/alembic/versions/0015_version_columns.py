@@ -0,0 +1,38 @@
+"""version columns
+
+Revision ID: 0015
+Revises: 0014
+Create Date: 2026-10-19 14:20:11.482913
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0015'
+down_revision: Union[str, Sequence[str], None] = '0014'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Edited with a compare-and-swap on the version, see crud.claim_version
+TABLES = [
+    'companies', 'sectors', 'workers', 'assets', 'tools', 'spare_parts', 'suppliers',
+    'work_orders', 'stock_purchase_orders',
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # A constant default: existing rows get it without a table rewrite on Postgres
+    for table in TABLES:
+        op.add_column(table, sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in TABLES:
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column('version')
@@ -0,0 +1,54 @@
+"""asset tree
+
+Revision ID: 0016
+Revises: 0015
+Create Date: 2026-10-19 16:05:37.219604
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0016'
+down_revision: Union[str, Sequence[str], None] = '0015'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('assets') as batch_op:
+        batch_op.add_column(sa.Column('parent_id', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key('fk_assets_parent_id_assets', 'assets', ['parent_id'], ['id'], ondelete='SET NULL')
+        batch_op.create_index('ix_assets_company_id_parent_id', ['company_id', 'parent_id'], unique=False)
+
+    op.create_table('asset_tree',
+    sa.Column('ancestor_id', sa.Integer(), nullable=False),
+    sa.Column('descendant_id', sa.Integer(), nullable=False),
+    sa.Column('depth', sa.Integer(), nullable=False),
+    sa.Column('company_id', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['ancestor_id'], ['assets.id'], ),
+    sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ),
+    sa.ForeignKeyConstraint(['descendant_id'], ['assets.id'], ),
+    sa.PrimaryKeyConstraint('ancestor_id', 'descendant_id')
+    )
+    op.create_index('ix_asset_tree_descendant_id', 'asset_tree', ['descendant_id', 'ancestor_id'], unique=False)
+
+    # Every existing asset starts at the top level: only its own row
+    op.execute(
+        "INSERT INTO asset_tree (ancestor_id, descendant_id, depth, company_id) "
+        "SELECT id, id, 0, company_id FROM assets"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_asset_tree_descendant_id', 'asset_tree')
+    op.drop_table('asset_tree')
+    with op.batch_alter_table('assets') as batch_op:
+        batch_op.drop_index('ix_assets_company_id_parent_id')
+        batch_op.drop_constraint('fk_assets_parent_id_assets', type_='foreignkey')
+        batch_op.drop_column('parent_id')
@@ -0,0 +1,33 @@
+"""tenant purge current table
+
+Revision ID: 0017
+Revises: 0016
+Create Date: 2026-10-19 17:42:08.530117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0017'
+down_revision: Union[str, Sequence[str], None] = '0016'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Purges in flight restart from the first table: chunks already deleted just find nothing
+    with op.batch_alter_table('tenant_purges') as batch_op:
+        batch_op.add_column(sa.Column('current_table', sa.String(), nullable=True))
+        batch_op.drop_column('step')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('tenant_purges') as batch_op:
+        batch_op.add_column(sa.Column('step', sa.Integer(), nullable=True))
+        batch_op.drop_column('current_table')
@@ -0,0 +1,31 @@
+"""tool deleted_at
+
+Revision ID: 0018
+Revises: 0017
+Create Date: 2026-10-19 18:20:41.214803
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0018'
+down_revision: Union[str, Sequence[str], None] = '0017'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Deleting a tool now only stamps it, so its movements keep pointing at it
+    with op.batch_alter_table('tools') as batch_op:
+        batch_op.add_column(sa.Column('deleted_at', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('tools') as batch_op:
+        batch_op.drop_column('deleted_at')
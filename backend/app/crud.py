@@ -1,5 +1,10 @@
+from sqlalchemy import Boolean, Date, Integer, String, and_, bindparam, case, cast, column, func, select, text, update, values
+from fastapi import HTTPException
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
 from . import models, schemas, utils
+from types import SimpleNamespace
+from typing import Optional
 import uuid
 
 def get_user_by_email(db: Session, email: str):
@@ -30,3 +35,117 @@ def create_company_with_admin(db: Session, company: schemas.CompanyCreate):
     db.refresh(db_user)
     
     return db_company, db_user
+
+def claim_version(db: Session, obj, version: Optional[int], schema):
+    """
+    Optimistic concurrency for an edit: before the handler changes `obj`, bumps its version
+    with a compare-and-swap UPDATE that only matches the version the client edited (or, when
+    it didn't send one, the version just read). Nothing is locked while the user edits, and
+    of two racing edits exactly one gets the row; the other gets 409 with the row as it is
+    now (rendered with `schema`) to merge and send again.
+    """
+    model = type(obj)
+    expected = obj.version if version is None else version
+    claimed = db.execute(
+        update(model).where(model.id == obj.id, model.version == expected)
+        .values(version=model.version + 1).execution_options(synchronize_session=False)
+    ).rowcount
+    if not claimed:
+        db.rollback()
+        current = db.get(model, obj.id, populate_existing=True)
+        raise HTTPException(status_code=409, detail={
+            "message": "El registro fue modificado por otro usuario, revisá los cambios y volvé a guardar",
+            "current": schema.model_validate(current).model_dump(mode="json") if current else None,
+        })
+    set_committed_value(obj, "version", expected + 1)
+
+def unique_ticket_number(db: Session, base: str) -> str:
+    """
+    Returns `base`, or `base`-2, -3... if it's taken. The unique index on work_orders only
+    covers (ticket_number, created_at) since the table is partitioned, so two orders created
+    in the same second would otherwise share a number.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        # Held until commit: a concurrent request for the same number waits here, then sees this one's row
+        db.execute(text("SELECT pg_advisory_xact_lock(hashtext(:key))"), {"key": f"ticket_number:{base}"})
+    ticket_number, n = base, 1
+    while db.execute(select(models.WorkOrder.id).where(models.WorkOrder.ticket_number == ticket_number).limit(1)).first():
+        n += 1
+        ticket_number = f"{base}-{n}"
+    return ticket_number
+
+def apply_work_order_status(db_wo: models.WorkOrder, status: str):
+    # Status side effects shared by every path that changes a work order status. Stamped with
+    # the database clock, like bulk_update_work_orders, so every path records the same times
+    db_wo.status = status
+    if status == "EN_PROGRESO" and not db_wo.start_date:
+        db_wo.start_date = func.now()
+    if status == "COMPLETADA" and not db_wo.end_date:
+        db_wo.end_date = func.now()
+
+def apply_work_order_assignee(db_wo: models.WorkOrder, assigned_to_id: Optional[int]) -> bool:
+    """Reassigns the order, stamping assigned_at like the bulk path. Returns whether it changed."""
+    if assigned_to_id == db_wo.assigned_to_id:
+        return False
+    db_wo.assigned_to_id = assigned_to_id
+    if assigned_to_id is not None:
+        db_wo.assigned_at = func.now()
+    return True
+
+def bulk_update_work_orders(db: Session, company_id: int, changes: list, only_if=()) -> list:
+    """
+    Applies many work order changes with one UPDATE. Each change is a dict with id, set_assignee,
+    assigned_to_id, status, priority and optionally scheduled_date (None leaves the field as is),
+    and gets the same assigned_at/start_date/end_date side effects as apply_work_order_assignee
+    and apply_work_order_status.
+    only_if adds conditions on the work_orders table: orders that no longer meet them are left
+    alone. Returns the IDs of the orders that were updated.
+    """
+    if not changes:
+        return []
+    table = models.WorkOrder.__table__
+    keys = ["id", "set_assignee", "assigned_to_id", "status", "priority", "scheduled_date"]
+    types = [Integer, Boolean, Integer, String, String, Date]
+    rows = [(
+        c["id"], c["set_assignee"], c["assigned_to_id"],
+        c["status"].name if c["status"] else None, # Enum columns store names
+        c["priority"].value if c["priority"] else None,
+        c.get("scheduled_date")
+    ) for c in changes]
+
+    postgres = db.get_bind().dialect.name == "postgresql"
+    if postgres:
+        # UPDATE work_orders SET ... FROM (VALUES (...), (...)) AS v (id, ...) WHERE work_orders.id = v.id
+        source = values(*[column(key, type_) for key, type_ in zip(keys, types)], name="v").data(rows).c
+        params = None
+    else:
+        # SQLite can't name VALUES columns: same statement, executed once per change
+        source = SimpleNamespace(**{key: bindparam(f"v_{key}", type_=type_) for key, type_ in zip(keys, types)})
+        params = [{f"v_{key}": value for key, value in zip(keys, row)} for row in rows]
+
+    # VALUES columns with only NULLs come back as text on Postgres, hence the casts
+    new_status = cast(source.status, table.c.status.type)
+    new_assignee = cast(source.assigned_to_id, Integer)
+    # SQLite's CAST(... AS DATE) gives a number, the bound value is already a date there
+    new_scheduled_date = cast(source.scheduled_date, Date) if postgres else source.scheduled_date
+    now = func.now()
+    stmt = update(table).where(table.c.id == source.id, table.c.company_id == company_id, *only_if).values(
+        assigned_to_id=case((source.set_assignee, new_assignee), else_=table.c.assigned_to_id),
+        assigned_at=case((and_(source.set_assignee, new_assignee.is_not(None)), now), else_=table.c.assigned_at),
+        status=func.coalesce(new_status, table.c.status),
+        priority=func.coalesce(source.priority, table.c.priority),
+        scheduled_date=func.coalesce(new_scheduled_date, table.c.scheduled_date),
+        version=table.c.version + 1, # Open edit forms must not overwrite these, see claim_version
+        start_date=case(
+            (and_(source.status == models.WorkOrderStatus.EN_PROGRESO.name, table.c.start_date.is_(None)), now),
+            else_=table.c.start_date
+        ),
+        end_date=case(
+            (and_(source.status == models.WorkOrderStatus.COMPLETADA.name, table.c.end_date.is_(None)), now),
+            else_=table.c.end_date
+        ),
+    ).returning(table.c.id)
+    if params:
+        # No RETURNING with executemany on SQLite
+        return [wo_id for row in params for wo_id in db.execute(stmt, row).scalars()]
+    return list(db.execute(stmt).scalars())
@@ -1,18 +1,94 @@
-from sqlalchemy import create_engine
+from fastapi import Response
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from typing import Optional
 import os
+import time
 
 DATABASE_URL = os.getenv("DATABASE_URL", "postgresql://postgres:postgres@db:5432/mant_db")
+# Replica for reports and long lists; without it read sessions use the primary
+READ_DATABASE_URL = os.getenv("READ_DATABASE_URL")
+# After a client commits a write, its reads stay on the primary this long so
+# users see their own changes while the replica catches up
+READ_STICKY_SECONDS = float(os.getenv("READ_STICKY_SECONDS", "10"))
+# Responses to requests that committed a write carry the commit time (Unix seconds) in this
+# header, and the client sends the last one back. Any worker can then tell a read came right
+# after a write, whichever worker served the write.
+LAST_WRITE_HEADER = "X-Last-Write"
 
-engine = create_engine(DATABASE_URL)
+# Connections per process (pool + overflow). gunicorn.conf.py sets these from the database's
+# max_connections and the worker count; the defaults are SQLAlchemy's.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+
+def _create_engine(url: str):
+    if url.startswith("sqlite"):
+        return create_engine(url)
+    return create_engine(url, pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW)
+
+engine = _create_engine(DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+read_engine = _create_engine(READ_DATABASE_URL) if READ_DATABASE_URL else engine
+if read_engine is not engine and read_engine.dialect.name == "postgresql":
+    read_engine = read_engine.execution_options(postgresql_readonly=True)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine, info={"read_only": True})
+
 Base = declarative_base()
 
-def get_db():
-    db = SessionLocal()
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "alembic.ini")
+
+def schema_revisions():
+    """
+    (revision the database is at, latest revision in alembic/versions). Connects, so it
+    raises while the database is unreachable. Alembic is only imported here.
+    """
+    from alembic.config import Config
+    from alembic.runtime.migration import MigrationContext
+    from alembic.script import ScriptDirectory
+    head = ScriptDirectory.from_config(Config(ALEMBIC_INI)).get_current_head()
+    with engine.connect() as conn:
+        return MigrationContext.configure(conn).get_current_revision(), head
+
+def get_db(response: Response):
+    # The response gets LAST_WRITE_HEADER when this session commits a write
+    db = SessionLocal(info={"response": response})
     try:
         yield db
     finally:
         db.close()
+
+def read_session(last_write: Optional[float] = None):
+    """
+    Session for read-only work: the replica, or the primary within READ_STICKY_SECONDS of
+    the client's last write. Flushing from it raises, so a write can't slip into a read endpoint.
+    """
+    if last_write is not None and time.time() - last_write < READ_STICKY_SECONDS:
+        return SessionLocal(info={"read_only": True})
+    return ReadSessionLocal()
+
+@event.listens_for(SessionLocal, "do_orm_execute")
+def _note_statement_write(state):
+    if state.is_insert or state.is_update or state.is_delete:
+        state.session.info["wrote"] = True
+
+@event.listens_for(SessionLocal, "after_flush")
+def _note_flush_write(session, flush_context):
+    session.info["wrote"] = True
+
+@event.listens_for(SessionLocal, "after_commit")
+def _stamp_last_write(session):
+    response = session.info.get("response")
+    if session.info.pop("wrote", False) and response is not None:
+        response.headers[LAST_WRITE_HEADER] = f"{time.time():.3f}"
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _forget_write(session):
+    session.info.pop("wrote", None)
+
+@event.listens_for(SessionLocal, "before_flush")
+@event.listens_for(ReadSessionLocal, "before_flush")
+def _refuse_read_only_flush(session, flush_context, instances):
+    if session.info.get("read_only"):
+        raise RuntimeError("Read-only session: write through get_db / get_tenant")
@@ -1,15 +1,21 @@
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
-from typing import Annotated
+from typing import Annotated, Iterator, Optional
 from jose import JWTError, jwt
 
-from .database import get_db
+from .database import LAST_WRITE_HEADER, get_db, read_session
 from . import models, schemas, crud, utils
+from .tenancy import TenantSession
+from .services import entitlements
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
-async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)], db: Session = Depends(get_db)):
+def user_for_token(db: Session, token: str, scope: Optional[str] = None) -> models.User:
+    """
+    User a JWT was issued to, or 401. The token's scope claim must be `scope`: API tokens have
+    none, so a token issued for one use only (see routers/events.py) isn't accepted elsewhere.
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="No se pudieron validar las credenciales",
@@ -18,7 +24,7 @@ async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)], db: Se
     try:
         payload = jwt.decode(token, utils.SECRET_KEY, algorithms=[utils.ALGORITHM])
         email: str = payload.get("sub")
-        if email is None:
+        if email is None or payload.get("scope") != scope:
             raise credentials_exception
         token_data = schemas.TokenData(email=email)
     except JWTError:
@@ -28,7 +34,54 @@ async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)], db: Se
         raise credentials_exception
     return user
 
+# Plain def: FastAPI runs it in the threadpool. Its query would otherwise block the event loop
+# while waiting for a pooled connection, and then no request could finish to give one back.
+def get_current_user(token: Annotated[str, Depends(oauth2_scheme)], db: Session = Depends(get_db)):
+    return user_for_token(db, token)
+
 async def get_current_active_user(current_user: Annotated[models.User, Depends(get_current_user)]):
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Usuario inactivo")
     return current_user
+
+def get_entitled_user(
+    current_user: Annotated[models.User, Depends(get_current_active_user)],
+    db: Session = Depends(get_db)
+):
+    """
+    Active user whose company may use the app: not suspended, and subscribed or still in its
+    trial. Answers 402/403 otherwise. The check is cached per company, so a hit costs no query.
+    """
+    if current_user.company_id is not None:
+        entitlements.check(db, current_user.company_id)
+    return current_user
+
+def get_tenant(
+    current_user: Annotated[models.User, Depends(get_entitled_user)],
+    db: Session = Depends(get_db)
+) -> TenantSession:
+    return TenantSession(db, current_user.company_id)
+
+def get_read_db(
+    current_user: Annotated[models.User, Depends(get_entitled_user)],
+    request: Request
+) -> Iterator[Session]:
+    """
+    Session for endpoints that only read: the replica, unless the client's LAST_WRITE_HEADER
+    says it wrote something in the last READ_STICKY_SECONDS.
+    """
+    try:
+        last_write = float(request.headers[LAST_WRITE_HEADER])
+    except (KeyError, ValueError):
+        last_write = None
+    db = read_session(last_write)
+    try:
+        yield db
+    finally:
+        db.close()
+
+def get_read_tenant(
+    current_user: Annotated[models.User, Depends(get_entitled_user)],
+    db: Session = Depends(get_read_db)
+) -> TenantSession:
+    return TenantSession(db, current_user.company_id)
@@ -0,0 +1,186 @@
+"""
+Idempotency-Key support for mutating endpoints: a client that retries a POST after losing
+the response sends the same key, and gets the first attempt's response back instead of a
+second work order or purchase order.
+
+Routers opt in with `route_class=IdempotentRoute`. For a request with the header:
+- The key is claimed in idempotency_keys (per company) before the endpoint runs.
+- A successful (2xx) response is stored and replayed to every later request with the key,
+  marked with `Idempotent-Replayed: true`, until IDEMPOTENCY_TTL_HOURS after the first one.
+- A duplicate arriving while the first attempt is still running waits for it (polling, up
+  to IDEMPOTENCY_WAIT_SECONDS) instead of running the endpoint a second time.
+- Errors aren't stored: the claim is released, so a retry runs the endpoint again.
+- Reusing a key for a different request (method, path, query or body) is rejected.
+
+An attempt still running after IDEMPOTENCY_LOCK_SECONDS is assumed lost with its process,
+and the next request with the key takes it over. Expired keys are deleted in batches by
+the "sweep_idempotency_keys" job.
+"""
+from fastapi import HTTPException, Request, Response
+from fastapi.routing import APIRoute
+from sqlalchemy import and_, delete, or_, select, tuple_, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+import asyncio
+import hashlib
+import logging
+import os
+import time
+
+from . import models, utils
+from .database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_TTL_HOURS = float(os.getenv("IDEMPOTENCY_TTL_HOURS", "24"))
+IDEMPOTENCY_LOCK_SECONDS = float(os.getenv("IDEMPOTENCY_LOCK_SECONDS", "60"))
+IDEMPOTENCY_WAIT_SECONDS = float(os.getenv("IDEMPOTENCY_WAIT_SECONDS", "30"))
+SWEEP_BATCH_SIZE = int(os.getenv("IDEMPOTENCY_SWEEP_BATCH_SIZE", "5000"))
+
+MUTATING_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+MAX_KEY_LENGTH = 255
+
+IdempotencyKey = models.IdempotencyKey
+
+def _fingerprint(request: Request, body: bytes) -> str:
+    digest = hashlib.sha256()
+    for part in (request.method.encode(), request.url.path.encode(), request.url.query.encode()):
+        digest.update(part)
+        digest.update(b"\0")
+    digest.update(body)
+    return digest.hexdigest()
+
+def _claim(company_id: int, key: str, fingerprint: str):
+    """
+    Claims the key for this request. Returns (lock, None) when claimed, lock being the
+    locked_until that identifies the claim, otherwise (None, the key's row or None if it
+    was released in the meantime).
+    """
+    table = IdempotencyKey.__table__
+    now = datetime.now(timezone.utc)
+    lock = now + timedelta(seconds=IDEMPOTENCY_LOCK_SECONDS)
+    db = SessionLocal()
+    try:
+        insert = postgresql.insert if db.get_bind().dialect.name == "postgresql" else sqlite.insert
+        stmt = insert(table).values(
+            company_id=company_id, key=key, fingerprint=fingerprint, locked_until=lock,
+            expires_at=now + timedelta(hours=IDEMPOTENCY_TTL_HOURS),
+        )
+        # One statement claims a new key or takes over an expired or abandoned one, so two
+        # duplicates can never both get it
+        claimed = db.execute(stmt.on_conflict_do_update(
+            index_elements=[table.c.company_id, table.c.key],
+            set_={
+                "fingerprint": stmt.excluded.fingerprint, "status_code": None, "body": None,
+                "content_type": None, "locked_until": stmt.excluded.locked_until,
+                "expires_at": stmt.excluded.expires_at,
+            },
+            where=or_(table.c.expires_at < now, and_(table.c.status_code.is_(None), table.c.locked_until < now)),
+        ).returning(table.c.key)).first()
+        db.commit()
+        if claimed:
+            return lock, None
+        return None, db.execute(select(
+            table.c.fingerprint, table.c.status_code, table.c.body, table.c.content_type
+        ).where(table.c.company_id == company_id, table.c.key == key)).first()
+    finally:
+        db.close()
+
+def _finish(company_id: int, key: str, lock: datetime, response: Optional[Response]):
+    """Stores the response for replay, or with None releases the claim."""
+    claim = and_(
+        IdempotencyKey.company_id == company_id, IdempotencyKey.key == key,
+        IdempotencyKey.locked_until == lock, IdempotencyKey.status_code.is_(None),
+    )
+    db = SessionLocal()
+    try:
+        if response is None:
+            db.execute(delete(IdempotencyKey).where(claim))
+        else:
+            stored = db.execute(update(IdempotencyKey).where(claim).values(
+                status_code=response.status_code, body=bytes(response.body),
+                content_type=response.headers.get("content-type"),
+            )).rowcount
+            if not stored:
+                logger.warning(f"Idempotency key {key!r} of company {company_id} was taken over before its response was stored")
+        db.commit()
+    finally:
+        db.close()
+
+async def _acquire(company_id: int, key: str, fingerprint: str):
+    """Returns the claim's lock, or the stored row to replay."""
+    deadline = time.monotonic() + IDEMPOTENCY_WAIT_SECONDS
+    delay = 0.1
+    while True:
+        lock, row = await run_in_threadpool(_claim, company_id, key, fingerprint)
+        if lock is not None:
+            return lock, None
+        if row is not None:
+            if row.fingerprint != fingerprint:
+                raise HTTPException(status_code=422, detail="Idempotency-Key ya usada con otra solicitud")
+            if row.status_code is not None:
+                return None, row
+        if time.monotonic() >= deadline:
+            raise HTTPException(status_code=409, detail="Una solicitud con la misma Idempotency-Key todavía está en curso")
+        # Polling holds no connection while it waits
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, 0.5)
+
+class IdempotentRoute(APIRoute):
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+        if not self.methods & MUTATING_METHODS:
+            return handler
+
+        async def idempotent_handler(request: Request) -> Response:
+            key = request.headers.get("idempotency-key")
+            if key is None:
+                return await handler(request)
+            if not key or len(key) > MAX_KEY_LENGTH:
+                raise HTTPException(status_code=400, detail="Idempotency-Key inválida")
+            company_id = utils.token_company_id(request.headers.get("authorization"))
+            if company_id is None:
+                return await handler(request) # Unauthenticated: the endpoint rejects it
+
+            # Starlette keeps the body, so the endpoint still gets it
+            fingerprint = _fingerprint(request, await request.body())
+            lock, row = await _acquire(company_id, key, fingerprint)
+            if row is not None:
+                return Response(content=row.body, status_code=row.status_code, media_type=row.content_type,
+                                headers={"Idempotent-Replayed": "true"})
+
+            try:
+                response = await handler(request)
+            except BaseException:
+                # If this await is cancelled too, the claim just lapses after IDEMPOTENCY_LOCK_SECONDS
+                await run_in_threadpool(_finish, company_id, key, lock, None)
+                raise
+            # Streamed responses have no body to keep
+            keep = 200 <= response.status_code < 300 and isinstance(getattr(response, "body", None), (bytes, memoryview))
+            try:
+                await run_in_threadpool(_finish, company_id, key, lock, response if keep else None)
+            except Exception as e:
+                # The work is done and committed: return it, a retry waits out the lock
+                logger.error(f"Couldn't store the response for idempotency key {key!r}: {e}")
+            return response
+
+        return idempotent_handler
+
+def sweep(db: Session, batch_size: int = SWEEP_BATCH_SIZE) -> int:
+    """Deletes expired keys, a batch per transaction so no lock is held for long. Returns the count."""
+    total = 0
+    while True:
+        expired = select(IdempotencyKey.company_id, IdempotencyKey.key).where(
+            IdempotencyKey.expires_at < datetime.now(timezone.utc)
+        ).limit(batch_size)
+        deleted = db.execute(
+            delete(IdempotencyKey).where(tuple_(IdempotencyKey.company_id, IdempotencyKey.key).in_(expired)),
+            execution_options={"synchronize_session": False},
+        ).rowcount
+        db.commit()
+        total += deleted
+        if deleted < batch_size:
+            return total
@@ -3,19 +3,64 @@ from fastapi.staticfiles import StaticFiles
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from contextlib import asynccontextmanager
 from datetime import timedelta
 from typing import Annotated
 from jose import JWTError, jwt
+import asyncio
+import logging
+import os
 
-from .database import engine, Base, get_db
+from .database import LAST_WRITE_HEADER, engine, get_db, schema_revisions
 from . import models, schemas, crud, utils
 from .dependencies import get_current_user, get_current_active_user
-from .routers import payments, archives, preventive_plans, work_orders, settings, dashboard, stock
+from .ratelimit import TenantRateLimitMiddleware
+from .services.storage import ImmutableStaticFiles, MEDIA_ROOT, MEDIA_URL
+from .routers import payments, archives, preventive_plans, work_orders, settings, dashboard, stock, sync, attachments, scheduling, events
 
-# Create tables automatically (dev only)
-Base.metadata.create_all(bind=engine)
+# Schema is managed by Alembic migrations: run `alembic upgrade head` before starting the app
 
-app = FastAPI()
+logger = logging.getLogger(__name__)
+
+# Run the periodic job scheduler in this process. Safe in every API process: enqueue() adds a
+# job only when none of its kind is waiting. Set to 0 where another process schedules.
+RUN_SCHEDULER = os.getenv("RUN_SCHEDULER", "1") == "1"
+
+async def check_schema(app: FastAPI):
+    """
+    Waits for the database and warns when migrations are pending. Runs in the background:
+    the app starts (and answers /health) even while the database is still coming up.
+    """
+    delay = 1
+    while True:
+        try:
+            current, head = await run_in_threadpool(schema_revisions)
+        except Exception as e:
+            app.state.schema = "unavailable"
+            logger.warning(f"Database not reachable yet, retrying in {delay}s: {e.__class__.__name__}")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 30)
+            continue
+        app.state.schema = "current" if current == head else "outdated"
+        if current != head:
+            logger.warning(f"Database schema is at {current}, the code expects {head}: run `alembic upgrade head`")
+        return
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    app.state.schema = "unknown"
+    schema_check = asyncio.create_task(check_schema(app))
+    if RUN_SCHEDULER:
+        from .services import scheduler # apscheduler is only needed once the app runs
+        scheduler.start_scheduler()
+    yield
+    schema_check.cancel()
+    if RUN_SCHEDULER:
+        scheduler.stop_scheduler()
+    engine.dispose()
+
+app = FastAPI(lifespan=lifespan)
 
 app.include_router(payments.router)
 app.include_router(archives.router)
@@ -24,15 +69,25 @@ app.include_router(work_orders.router)
 app.include_router(settings.router)
 app.include_router(dashboard.router)
 app.include_router(stock.router)
+app.include_router(sync.router)
+app.include_router(attachments.router)
+app.include_router(scheduling.router)
+app.include_router(events.router)
 
 app.mount("/static", StaticFiles(directory="static"), name="static")
+# Uploaded files are stored under content hashes, so they can be cached forever
+os.makedirs(MEDIA_ROOT, exist_ok=True)
+app.mount(MEDIA_URL, ImmutableStaticFiles(directory=MEDIA_ROOT), name="media")
 
+# Added before CORS so the 429s it answers still carry the CORS headers
+app.add_middleware(TenantRateLimitMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:3000"],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[LAST_WRITE_HEADER], # Read by the frontend, see database.py
 )
 
 @app.post("/token", response_model=schemas.Token)
@@ -59,6 +114,11 @@ async def read_users_me(current_user: Annotated[models.User, Depends(get_current
 def read_root():
     return {"Hello": "World"}
 
+@app.get("/health")
+def health():
+    # schema: unknown (still checking), unavailable (database down), outdated (migrations pending) or current
+    return {"status": "ok", "schema": getattr(app.state, "schema", "unknown")}
+
 @app.post("/register", response_model=schemas.Company)
 def register_company(company: schemas.CompanyCreate, db: Session = Depends(get_db)):
     # Verificar si el email ya esta registrado (check simplificado)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, DateTime, Date, Enum, Numeric, Table
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, DateTime, Date, Enum, Float, Numeric, Table, Index, LargeBinary, JSON, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
@@ -28,6 +28,7 @@ class Company(Base):
     status = Column(Enum(CompanyStatus), default=CompanyStatus.ACTIVE)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     last_payment_date = Column(Date, nullable=True) # Null enables trial or initial state
+    version = Column(Integer, default=1, server_default="1", nullable=False) # Bumped by every edit, see crud.claim_version
     
     users = relationship("User", back_populates="company")
     payments = relationship("Payment", back_populates="company")
@@ -50,14 +51,14 @@ class User(Base):
     hashed_password = Column(String)
     is_active = Column(Boolean, default=True)
     
-    company_id = Column(Integer, ForeignKey("companies.id"), nullable=True) # Nullable only for superadmins
+    company_id = Column(Integer, ForeignKey("companies.id"), nullable=True, index=True) # Nullable only for superadmins
     company = relationship("Company", back_populates="users")
 
 class Payment(Base):
     __tablename__ = "payments"
     
     id = Column(Integer, primary_key=True, index=True)
-    company_id = Column(Integer, ForeignKey("companies.id"))
+    company_id = Column(Integer, ForeignKey("companies.id"), index=True)
     amount = Column(Numeric(10, 2))
     payment_date = Column(DateTime(timezone=True), server_default=func.now())
     payment_method = Column(String) # e.g., "stripe", "mercadopago"
@@ -74,6 +75,9 @@ class Plan(Base):
     price = Column(Numeric(10, 2))
     currency = Column(String, default="ARS") # Changed to ARS for MP/Region context
     interval = Column(String, default="month") # "month", "year"
+    # Feature limits, e.g. {"max_workers": 25, "max_assets": 250}; a missing key means unlimited
+    # and the API limits requests_per_second, burst, concurrent_requests (defaults in ratelimit.py)
+    limits = Column(JSON, nullable=True)
 
     subscriptions = relationship("Subscription", back_populates="plan")
 
@@ -97,9 +101,10 @@ class Sector(Base):
     __tablename__ = "sectors"
 
     id = Column(Integer, primary_key=True, index=True)
-    company_id = Column(Integer, ForeignKey("companies.id"))
+    company_id = Column(Integer, ForeignKey("companies.id"), index=True)
     name = Column(String, index=True)
     description = Column(String, nullable=True)
+    version = Column(Integer, default=1, server_default="1", nullable=False) # Bumped by every edit, see crud.claim_version
 
     company = relationship("Company", back_populates="sectors")
     assets = relationship("Asset", back_populates="sector")
@@ -110,7 +115,7 @@ class Worker(Base):
     __tablename__ = "workers"
 
     id = Column(Integer, primary_key=True, index=True)
-    company_id = Column(Integer, ForeignKey("companies.id"))
+    company_id = Column(Integer, ForeignKey("companies.id"), index=True)
     sector_id = Column(Integer, ForeignKey("sectors.id"), nullable=True) # Primary/Default sector
     
     first_name = Column(String, index=True)
@@ -119,7 +124,9 @@ class Worker(Base):
     email = Column(String, nullable=True)
     phone = Column(String, nullable=True)
     job_title = Column(String, nullable=True)
+    hourly_rate = Column(Numeric(10, 2), nullable=True) # Default cost of labor lines
     is_active = Column(Boolean, default=True)
+    version = Column(Integer, default=1, server_default="1", nullable=False) # Bumped by every edit, see crud.claim_version
 
     company = relationship("Company", back_populates="workers")
     sector = relationship("Sector", back_populates="workers")
@@ -127,10 +134,17 @@ class Worker(Base):
 
 class Asset(Base): # Maquinas
     __tablename__ = "assets"
+    __table_args__ = (
+        Index("ix_assets_company_id_sector_id", "company_id", "sector_id"),
+        Index("ix_assets_company_id_updated_at", "company_id", "updated_at"), # /sync
+        Index("ix_assets_company_id_parent_id", "company_id", "parent_id"), # Children of an asset
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     company_id = Column(Integer, ForeignKey("companies.id"))
     sector_id = Column(Integer, ForeignKey("sectors.id"), nullable=False) # Mandatory as requested
+    # Plant > line > machine > component; change it only through services/asset_tree.py
+    parent_id = Column(Integer, ForeignKey("assets.id", ondelete="SET NULL"), nullable=True)
 
     name = Column(String, index=True)
     brand = Column(String, nullable=True)
@@ -138,15 +152,42 @@ class Asset(Base): # Maquinas
     serial_number = Column(String, nullable=True)
     purchase_date = Column(Date, nullable=True)
     status = Column(String, default="ACTIVE") # ACTIVE, INACTIVE, MAINTENANCE
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    version = Column(Integer, default=1, server_default="1", nullable=False) # Bumped by every edit, see crud.claim_version
 
     company = relationship("Company", back_populates="assets")
     sector = relationship("Sector", back_populates="assets")
 
+class AssetTreePath(Base):
+    # Closure table of the asset hierarchy: one row per ancestor/descendant pair, each asset
+    # paired with itself at depth 0, so subtrees and ancestor chains are single index lookups.
+    __tablename__ = "asset_tree"
+    __table_args__ = (
+        Index("ix_asset_tree_descendant_id", "descendant_id", "ancestor_id"), # Ancestors of an asset
+    )
+
+    ancestor_id = Column(Integer, ForeignKey("assets.id"), primary_key=True) # Subtree of an asset: the PK prefix
+    descendant_id = Column(Integer, ForeignKey("assets.id"), primary_key=True)
+    depth = Column(Integer, nullable=False) # 0 for the asset itself, 1 for its children...
+    company_id = Column(Integer, ForeignKey("companies.id"))
+
 class Tool(Base):
     __tablename__ = "tools"
+    __table_args__ = (
+        Index("ix_tools_company_id_updated_at", "company_id", "updated_at"), # /sync
+        # Current holder lookups; the holder columns are kept by services.tools along with the ledger
+        Index("ix_tools_company_id_current_worker_id", "company_id", "current_worker_id"),
+        Index("ix_tools_company_id_current_sector_id", "company_id", "current_sector_id"),
+        # Overdue tools: only checked out tools with a due date are in it
+        Index(
+            "ix_tools_company_id_due_at", "company_id", "due_at",
+            postgresql_where=text("due_at IS NOT NULL"),
+            sqlite_where=text("due_at IS NOT NULL"),
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    company_id = Column(Integer, ForeignKey("companies.id"))
+    company_id = Column(Integer, ForeignKey("companies.id"), index=True)
     
     name = Column(String, index=True)
     code = Column(String, nullable=True) # SKU/Internal Code
@@ -156,25 +197,57 @@ class Tool(Base):
     # Assignment Logic: Can be held by Worker OR Sector
     current_worker_id = Column(Integer, ForeignKey("workers.id"), nullable=True)
     current_sector_id = Column(Integer, ForeignKey("sectors.id"), nullable=True)
+    checked_out_at = Column(DateTime(timezone=True), nullable=True)
+    due_at = Column(DateTime(timezone=True), nullable=True) # Expected return of the current checkout
+    deleted_at = Column(DateTime(timezone=True), nullable=True) # Set by DELETE: the ledger still points at the row
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    version = Column(Integer, default=1, server_default="1", nullable=False) # Bumped by every edit, see crud.claim_version
 
     company = relationship("Company", back_populates="tools")
     worker = relationship("Worker", back_populates="tools")
     sector = relationship("Sector", back_populates="tools")
 
+class ToolMovementAction(str, enum.Enum):
+    CHECKOUT = "CHECKOUT"
+    RETURN = "RETURN"
+
+class ToolMovement(Base):
+    # Append-only ledger of tool checkouts and returns. Rows are never updated:
+    # the tool's current holder lives on the tool itself.
+    __tablename__ = "tool_movements"
+    __table_args__ = (
+        Index("ix_tool_movements_company_id_tool_id_created_at", "company_id", "tool_id", "created_at"),
+        Index("ix_tool_movements_asset_id_created_at", "asset_id", "created_at", "id"), # asset timeline
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    company_id = Column(Integer, ForeignKey("companies.id"))
+    tool_id = Column(Integer, ForeignKey("tools.id"))
+    action = Column(Enum(ToolMovementAction))
+    worker_id = Column(Integer, ForeignKey("workers.id"), nullable=True) # Holder taking or giving back the tool
+    sector_id = Column(Integer, ForeignKey("sectors.id"), nullable=True)
+    work_order_id = Column(Integer, nullable=True) # No FK: work_orders is partitioned on Postgres
+    asset_id = Column(Integer, ForeignKey("assets.id"), nullable=True) # The work order's
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=True) # Who recorded it
+    due_at = Column(DateTime(timezone=True), nullable=True)
+    status = Column(String, nullable=True) # Tool status after a return, e.g. BROKEN
+    notes = Column(String, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
 from sqlalchemy import Table
 
 # Association Table for Many-to-Many
 supplier_categories = Table(
     'supplier_categories', Base.metadata,
-    Column('supplier_id', Integer, ForeignKey('suppliers.id')),
-    Column('category_id', Integer, ForeignKey('spare_part_categories.id'))
+    Column('supplier_id', Integer, ForeignKey('suppliers.id'), index=True),
+    Column('category_id', Integer, ForeignKey('spare_part_categories.id'), index=True)
 )
 
 class SparePartCategory(Base):
     __tablename__ = "spare_part_categories"
 
     id = Column(Integer, primary_key=True, index=True)
-    company_id = Column(Integer, ForeignKey("companies.id"))
+    company_id = Column(Integer, ForeignKey("companies.id"), index=True)
     name = Column(String, index=True)
     description = Column(String, nullable=True)
 
@@ -186,7 +259,7 @@ class Supplier(Base):
     __tablename__ = "suppliers"
 
     id = Column(Integer, primary_key=True, index=True)
-    company_id = Column(Integer, ForeignKey("companies.id"))
+    company_id = Column(Integer, ForeignKey("companies.id"), index=True)
     
     name = Column(String, index=True)
     address = Column(String, nullable=True)
@@ -195,15 +268,19 @@ class Supplier(Base):
     email = Column(String, nullable=True)
     contact_name = Column(String, nullable=True)
     contact_phone = Column(String, nullable=True)
+    version = Column(Integer, default=1, server_default="1", nullable=False) # Bumped by every edit, see crud.claim_version
 
     company = relationship("Company", back_populates="suppliers")
     categories = relationship("SparePartCategory", secondary=supplier_categories, back_populates="suppliers")
 
 class SparePart(Base):
     __tablename__ = "spare_parts"
+    __table_args__ = (
+        Index("ix_spare_parts_company_id_updated_at", "company_id", "updated_at"), # /sync
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    company_id = Column(Integer, ForeignKey("companies.id"))
+    company_id = Column(Integer, ForeignKey("companies.id"), index=True)
     category_id = Column(Integer, ForeignKey("spare_part_categories.id"), nullable=True)
 
     name = Column(String, index=True)
@@ -211,7 +288,9 @@ class SparePart(Base):
     cost = Column(Numeric(10, 2), default=0)
     currency = Column(String, default="ARS")
     stock = Column(Integer, default=0)
-    
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    version = Column(Integer, default=1, server_default="1", nullable=False) # Bumped by every edit, see crud.claim_version
+
     company = relationship("Company", back_populates="spare_parts")
     category = relationship("SparePartCategory", back_populates="spare_parts")
 
@@ -225,10 +304,14 @@ class FrequencyType(str, enum.Enum):
 
 class PreventivePlan(Base):
     __tablename__ = "preventive_plans"
+    __table_args__ = (
+        Index("ix_preventive_plans_company_id_is_active_next_run", "company_id", "is_active", "next_run"), # check-and-run
+        Index("ix_preventive_plans_company_id_updated_at", "company_id", "updated_at"), # /sync
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     company_id = Column(Integer, ForeignKey("companies.id"))
-    asset_id = Column(Integer, ForeignKey("assets.id"))
+    asset_id = Column(Integer, ForeignKey("assets.id"), index=True)
     
     name = Column(String, index=True)
     frequency_type = Column(Enum(FrequencyType))
@@ -237,6 +320,7 @@ class PreventivePlan(Base):
     last_run = Column(Date, nullable=True)
     next_run = Column(Date, nullable=True)
     is_active = Column(Boolean, default=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
     company = relationship("Company")
     asset = relationship("Asset")
@@ -246,10 +330,10 @@ class PreventiveTask(Base):
     __tablename__ = "preventive_tasks"
 
     id = Column(Integer, primary_key=True, index=True)
-    plan_id = Column(Integer, ForeignKey("preventive_plans.id"))
+    plan_id = Column(Integer, ForeignKey("preventive_plans.id"), index=True)
     
     description = Column(String)
-    estimated_time = Column(Integer, nullable=True) # In minutes maybe?
+    estimated_time = Column(Integer, nullable=True) # Minutes
 
     plan = relationship("PreventivePlan", back_populates="tasks")
 
@@ -265,16 +349,44 @@ class WorkOrderStatus(str, enum.Enum):
     COMPLETADA = "COMPLETADA"
     CANCELADA = "CANCELADA"
 
+class WorkOrderPriority(str, enum.Enum):
+    # Stored in a plain String column
+    BAJA = "BAJA"
+    MEDIA = "MEDIA"
+    ALTA = "ALTA"
+    CRITICA = "CRITICA"
+
 class WorkOrder(Base):
+    # On Postgres this table is range-partitioned by month on created_at (see migration 0004),
+    # so the physical PK is (id, created_at). id alone stays unique through its sequence.
+    # Other tables must not declare FKs to work_orders.id: Postgres requires the partition key in them.
     __tablename__ = "work_orders"
+    __table_args__ = (
+        Index("ix_work_orders_ticket_number", "ticket_number", "created_at", unique=True),
+        Index("ix_work_orders_company_id_created_at", "company_id", "created_at"), # lists, recent activity
+        # Asset timeline keyset pages; company_id and plan_id are filtered inside the index
+        Index(
+            "ix_work_orders_asset_id_created_at", "asset_id", "created_at", "id",
+            postgresql_include=["company_id", "plan_id"],
+        ),
+        Index("ix_work_orders_company_id_type_created_at", "company_id", "type", "created_at"), # yearly stats
+        Index("ix_work_orders_company_id_assigned_to_id", "company_id", "assigned_to_id"),
+        Index("ix_work_orders_company_id_updated_at", "company_id", "updated_at"), # /sync
+        # Dashboard counts only look at open orders, which stay a small slice of the table
+        Index(
+            "ix_work_orders_company_id_status_open", "company_id", "status",
+            postgresql_where=text("status IN ('PENDIENTE', 'ASIGNADA', 'EN_PROGRESO', 'PAUSADA')"),
+            sqlite_where=text("status IN ('PENDIENTE', 'ASIGNADA', 'EN_PROGRESO', 'PAUSADA')"),
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     company_id = Column(Integer, ForeignKey("companies.id"))
     asset_id = Column(Integer, ForeignKey("assets.id"), nullable=True) # Nullable for general maintenance?
     sector_id = Column(Integer, ForeignKey("sectors.id"), nullable=True)
-    plan_id = Column(Integer, ForeignKey("preventive_plans.id"), nullable=True) # Link to origin plan if preventive
+    plan_id = Column(Integer, ForeignKey("preventive_plans.id"), nullable=True, index=True) # Link to origin plan if preventive
 
-    ticket_number = Column(String, unique=True, index=True) # Generated ID
+    ticket_number = Column(String) # Generated ID, unique together with created_at (partition key)
     type = Column(Enum(WorkOrderType))
     status = Column(Enum(WorkOrderStatus), default=WorkOrderStatus.PENDIENTE)
     priority = Column(String, default="MEDIA") # BAJA, MEDIA, ALTA, CRITICA
@@ -285,10 +397,17 @@ class WorkOrder(Base):
     requested_by_id = Column(Integer, ForeignKey("workers.id"), nullable=True)
     assigned_to_id = Column(Integer, ForeignKey("workers.id"), nullable=True)
 
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     assigned_at = Column(DateTime(timezone=True), nullable=True)
     start_date = Column(DateTime(timezone=True), nullable=True)
     end_date = Column(DateTime(timezone=True), nullable=True)
+    scheduled_date = Column(Date, nullable=True) # Day planned by the scheduler
+    # Running totals of the part and labor lines, kept in step by services.costs
+    parts_cost = Column(Numeric(12, 2), default=0, server_default="0", nullable=False)
+    labor_cost = Column(Numeric(12, 2), default=0, server_default="0", nullable=False)
+    labor_minutes = Column(Integer, default=0, server_default="0", nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    version = Column(Integer, default=1, server_default="1", nullable=False) # Bumped by every edit, see crud.claim_version
 
     company = relationship("Company")
     asset = relationship("Asset")
@@ -298,6 +417,275 @@ class WorkOrder(Base):
     assigned_to = relationship("Worker", foreign_keys=[assigned_to_id])
 
 
+class WorkOrderArchive(Base):
+    # Closed work orders past the retention window, moved out of work_orders.
+    # Each row holds a batch of one company's orders created in the same month,
+    # as gzip-compressed JSON lines (one work order per line).
+    __tablename__ = "work_orders_archive"
+    __table_args__ = (
+        Index("ix_work_orders_archive_company_id_period", "company_id", "period"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    company_id = Column(Integer, ForeignKey("companies.id"))
+    period = Column(Date) # First day of the month the orders were created in
+    order_count = Column(Integer, default=0)
+    data = Column(LargeBinary)
+    archived_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+# --- Work Order Costs ---
+
+class WorkOrderPart(Base):
+    # Spare parts consumed by a work order. Adding a line takes the quantity out of stock.
+    # unit_cost and description are copied from the part so later price changes don't rewrite history.
+    __tablename__ = "work_order_parts"
+    __table_args__ = (
+        Index("ix_work_order_parts_company_id_work_order_id", "company_id", "work_order_id"),
+        Index("ix_work_order_parts_asset_id_created_at", "asset_id", "created_at", "id"), # asset timeline
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    company_id = Column(Integer, ForeignKey("companies.id"))
+    work_order_id = Column(Integer, nullable=False) # No FK: work_orders is partitioned on Postgres
+    asset_id = Column(Integer, ForeignKey("assets.id"), nullable=True) # The order's, at the time of use
+    spare_part_id = Column(Integer, ForeignKey("spare_parts.id"), index=True)
+
+    description = Column(String)
+    quantity = Column(Integer)
+    unit_cost = Column(Numeric(10, 2), default=0)
+    total_cost = Column(Numeric(12, 2), default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class WorkOrderLabor(Base):
+    # Time a worker spent on a work order, costed at the worker's hourly rate unless given
+    __tablename__ = "work_order_labor"
+    __table_args__ = (
+        Index("ix_work_order_labor_company_id_work_order_id", "company_id", "work_order_id"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    company_id = Column(Integer, ForeignKey("companies.id"))
+    work_order_id = Column(Integer, nullable=False) # No FK: work_orders is partitioned on Postgres
+    asset_id = Column(Integer, ForeignKey("assets.id"), nullable=True)
+    worker_id = Column(Integer, ForeignKey("workers.id"), index=True)
+
+    work_date = Column(Date)
+    minutes = Column(Integer)
+    hourly_rate = Column(Numeric(10, 2), default=0)
+    total_cost = Column(Numeric(12, 2), default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class AssetMonthlyCost(Base):
+    # Maintenance cost per asset and month, incremented and decremented with every
+    # part or labor line so cost reports read these rows instead of joining the lines.
+    __tablename__ = "asset_monthly_costs"
+    __table_args__ = (
+        Index("ix_asset_monthly_costs_company_id_period", "company_id", "period"),
+    )
+
+    asset_id = Column(Integer, ForeignKey("assets.id"), primary_key=True)
+    period = Column(Date, primary_key=True) # First day of the month
+    company_id = Column(Integer, ForeignKey("companies.id"))
+    parts_cost = Column(Numeric(14, 2), default=0, nullable=False)
+    labor_cost = Column(Numeric(14, 2), default=0, nullable=False)
+    labor_minutes = Column(Integer, default=0, nullable=False)
+
+
+# --- Attachments ---
+
+class Attachment(Base):
+    # Photo or document attached to a work order or an asset.
+    # The file lives in private storage under a content hash, so uploading the same
+    # file again (or to several orders) stores it only once per company.
+    __tablename__ = "attachments"
+    __table_args__ = (
+        Index("ix_attachments_company_id_work_order_id", "company_id", "work_order_id"),
+        Index("ix_attachments_company_id_asset_id", "company_id", "asset_id"),
+        Index("ix_attachments_company_id_sha256", "company_id", "sha256"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    company_id = Column(Integer, ForeignKey("companies.id"))
+    work_order_id = Column(Integer, nullable=True) # No FK: work_orders is partitioned on Postgres
+    asset_id = Column(Integer, ForeignKey("assets.id"), nullable=True)
+    uploaded_by_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+
+    filename = Column(String) # Original name, used for downloads
+    content_type = Column(String)
+    size = Column(Integer)
+    sha256 = Column(String(64))
+    storage_key = Column(String)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    @property
+    def has_thumbnail(self):
+        # Images get a thumbnail rendered in the background right after upload
+        return (self.content_type or "").startswith("image/")
+
+
+# --- Offline Sync ---
+
+class SyncTombstone(Base):
+    # One row per deleted synced entity so offline clients can drop their local copy
+    __tablename__ = "sync_tombstones"
+    __table_args__ = (
+        Index("ix_sync_tombstones_company_id_deleted_at", "company_id", "deleted_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    company_id = Column(Integer, ForeignKey("companies.id"))
+    entity_type = Column(String) # e.g. "work_orders", "assets" (table name of the deleted row)
+    entity_id = Column(Integer)
+    deleted_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+# --- Tenant Purge ---
+
+class PurgeStatus(str, enum.Enum):
+    PENDING = "PENDING"
+    EXPORTING = "EXPORTING"
+    DELETING = "DELETING"
+    DONE = "DONE"
+
+class TenantPurge(Base):
+    # Progress of a company data purge, kept after the company row itself is gone.
+    # No FK on company_id on purpose: the company is deleted by the purge.
+    __tablename__ = "tenant_purges"
+
+    id = Column(Integer, primary_key=True, index=True)
+    company_id = Column(Integer, unique=True, index=True)
+    status = Column(Enum(PurgeStatus), default=PurgeStatus.PENDING)
+    current_table = Column(String, nullable=True) # Table being deleted from, see purge.PURGE_ORDER
+    rows_deleted = Column(Integer, default=0)
+    export_path = Column(String, nullable=True)
+
+    started_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+
+# --- Background Jobs ---
+
+class JobStatus(str, enum.Enum):
+    QUEUED = "QUEUED"
+    RUNNING = "RUNNING"
+    DONE = "DONE"
+    DEAD = "DEAD" # Out of attempts, kept for inspection and manual retry
+
+class Job(Base):
+    # Durable queue consumed by `python -m app.worker`, see services/jobs.py.
+    # No FK on company_id: jobs such as a purge outlive the company.
+    __tablename__ = "jobs"
+    __table_args__ = (
+        # Claim order; only runnable jobs are in it, so it stays small however long the history
+        Index(
+            "ix_jobs_queued", "queue", "priority", "run_at", "id",
+            postgresql_where=text("status = 'QUEUED'"),
+            sqlite_where=text("status = 'QUEUED'"),
+        ),
+        # Jobs left RUNNING by a worker that died
+        Index(
+            "ix_jobs_running_locked_at", "locked_at",
+            postgresql_where=text("status = 'RUNNING'"),
+            sqlite_where=text("status = 'RUNNING'"),
+        ),
+        Index("ix_jobs_status_finished_at", "status", "finished_at"), # Retention cleanup
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    queue = Column(String, default="default")
+    kind = Column(String) # Handler name, see services.jobs.handler
+    payload = Column(JSON, nullable=True)
+    company_id = Column(Integer, nullable=True)
+    priority = Column(Integer, default=100) # Lower runs first
+    status = Column(Enum(JobStatus), default=JobStatus.QUEUED)
+    attempts = Column(Integer, default=0)
+    max_attempts = Column(Integer, default=5)
+    run_at = Column(DateTime(timezone=True), server_default=func.now()) # Not before; pushed back on retry
+    locked_at = Column(DateTime(timezone=True), nullable=True)
+    locked_by = Column(String, nullable=True) # host:pid of the worker running it
+    last_error = Column(String, nullable=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True) # Of the latest attempt
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+# --- Notifications ---
+
+class NotificationChannel(str, enum.Enum):
+    WHATSAPP = "WHATSAPP"
+    EMAIL = "EMAIL"
+
+class NotificationStatus(str, enum.Enum):
+    PENDING = "PENDING"
+    SENDING = "SENDING"
+    SENT = "SENT"
+    FAILED = "FAILED" # Rejected by the provider or out of attempts
+
+class Notification(Base):
+    # Outbox of messages to workers and companies, written in the transaction of the change
+    # they report and sent in digests per recipient by services/notifications.py.
+    __tablename__ = "notifications"
+    __table_args__ = (
+        # Due recipients and their pending messages; sent ones leave the index
+        Index(
+            "ix_notifications_pending", "channel", "recipient", "send_after",
+            postgresql_where=text("status = 'PENDING'"),
+            sqlite_where=text("status = 'PENDING'"),
+        ),
+        Index(
+            "ix_notifications_pending_send_after", "send_after",
+            postgresql_where=text("status = 'PENDING'"),
+            sqlite_where=text("status = 'PENDING'"),
+        ),
+        # Periodic notices (overdue, expiry) are queued once per key
+        Index("ix_notifications_company_id_dedupe_key", "company_id", "dedupe_key", unique=True),
+        Index("ix_notifications_status_created_at", "status", "created_at"), # Retention cleanup, stuck SENDING
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    company_id = Column(Integer, ForeignKey("companies.id"))
+    channel = Column(Enum(NotificationChannel))
+    recipient = Column(String) # Phone number or email address
+    kind = Column(String) # e.g. "work_order_assigned", "work_order_overdue"
+    subject = Column(String, nullable=True)
+    body = Column(String)
+    dedupe_key = Column(String, nullable=True)
+    status = Column(Enum(NotificationStatus), default=NotificationStatus.PENDING)
+    attempts = Column(Integer, default=0)
+    send_after = Column(DateTime(timezone=True), server_default=func.now()) # End of the digest window; pushed back on retry
+    locked_at = Column(DateTime(timezone=True), nullable=True)
+    last_error = Column(String, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    sent_at = Column(DateTime(timezone=True), nullable=True)
+
+# --- Rate Limits ---
+
+class RateLimitBucket(Base):
+    # Token buckets shared by all API processes (RATE_LIMIT_BACKEND=postgres, see ratelimit.py).
+    # UNLOGGED on Postgres: losing them in a crash only hands out one extra burst.
+    __tablename__ = "rate_limit_buckets"
+
+    key = Column(String, primary_key=True) # e.g. "company:12"
+    tokens = Column(Float)
+    granted = Column(Integer) # Tokens handed out by the latest take
+    updated_at = Column(DateTime(timezone=True))
+
+class IdempotencyKey(Base):
+    # First response to each Idempotency-Key, replayed to retries; see idempotency.py.
+    # No FK on company_id: the rows expire by themselves, a purge doesn't need to wait for them.
+    __tablename__ = "idempotency_keys"
+
+    company_id = Column(Integer, primary_key=True)
+    key = Column(String(255), primary_key=True)
+    fingerprint = Column(String(64)) # sha256 of method, path, query and body
+    status_code = Column(Integer, nullable=True) # Null while the first attempt is running
+    body = Column(LargeBinary, nullable=True)
+    content_type = Column(String, nullable=True)
+    locked_until = Column(DateTime(timezone=True)) # Past it, a running attempt is assumed lost
+    expires_at = Column(DateTime(timezone=True), index=True)
+
 # --- Stock & Purchase Orders ---
 
 class PurchaseOrderStatus(str, enum.Enum):
@@ -308,6 +696,20 @@ class PurchaseOrderStatus(str, enum.Enum):
 
 class PurchaseOrder(Base):
     __tablename__ = "stock_purchase_orders"
+    __table_args__ = (
+        Index("ix_stock_purchase_orders_company_id_order_date", "company_id", "order_date"),
+        Index("ix_stock_purchase_orders_company_id_supplier_id", "company_id", "supplier_id"),
+        # Order number auto-generation does a LIKE 'OC-2025-%' prefix search
+        Index(
+            "ix_stock_purchase_orders_company_id_order_number", "company_id", "order_number",
+            postgresql_ops={"order_number": "text_pattern_ops"},
+        ),
+        Index(
+            "ix_stock_purchase_orders_company_id_order_date_open", "company_id", "order_date",
+            postgresql_where=text("status IN ('PENDIENTE', 'PARCIALMENTE_RECIBIDO')"),
+            sqlite_where=text("status IN ('PENDIENTE', 'PARCIALMENTE_RECIBIDO')"),
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     company_id = Column(Integer, ForeignKey("companies.id"))
@@ -323,6 +725,7 @@ class PurchaseOrder(Base):
 
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    version = Column(Integer, default=1, server_default="1", nullable=False) # Bumped by every edit, see crud.claim_version
 
     company = relationship("Company")
     supplier = relationship("Supplier")
@@ -332,8 +735,8 @@ class PurchaseOrderItem(Base):
     __tablename__ = "stock_purchase_order_items"
 
     id = Column(Integer, primary_key=True, index=True)
-    purchase_order_id = Column(Integer, ForeignKey("stock_purchase_orders.id"))
-    spare_part_id = Column(Integer, ForeignKey("spare_parts.id"), nullable=True) # Nullable if just text desc?
+    purchase_order_id = Column(Integer, ForeignKey("stock_purchase_orders.id"), index=True)
+    spare_part_id = Column(Integer, ForeignKey("spare_parts.id"), nullable=True, index=True) # Nullable if just text desc?
 
     description = Column(String) # Backup desc or manual
     quantity = Column(Integer, default=1)
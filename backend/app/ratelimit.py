@@ -0,0 +1,191 @@
+"""
+Per-company request rate limit (token bucket) and concurrent request cap, applied as ASGI
+middleware before any route runs. The company comes from the `company_id` claim of the
+bearer token, so rejecting a request costs no query; requests without one (login, register,
+webhooks, static files) are not limited here.
+
+Limits come from the company's plan (plans.limits: requests_per_second, burst,
+concurrent_requests) through the entitlement cache, falling back to the RATE_LIMIT_* defaults.
+
+Backends, RATE_LIMIT_BACKEND:
+- memory: buckets in this process. Right for a single process; with N workers each one
+  allows the full rate.
+- postgres: one bucket per company in Postgres, shared by every worker. A process takes
+  tokens a few at a time (a lease covering RATE_LIMIT_LEASE_SECONDS of the rate), so most
+  requests don't touch the database.
+- auto (default): postgres when WEB_CONCURRENCY > 1 on Postgres, memory otherwise.
+
+The concurrency cap is per process on purpose: what it protects is the process's own
+connection pool. The plan's cap is split evenly over WEB_CONCURRENCY workers. Keep each
+share below the pool size (SQLAlchemy's default is 5 + 10 overflow): without a replica, read
+endpoints hold two sessions at once, so one company filling the pool can deadlock it.
+"""
+from sqlalchemy import create_engine, text
+from starlette.concurrency import run_in_threadpool
+from typing import Optional
+import asyncio
+import collections
+import logging
+import math
+import os
+import time
+
+import orjson
+
+from . import utils
+from .database import SessionLocal, engine
+from .services import entitlements
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_PER_SECOND = float(os.getenv("RATE_LIMIT_PER_SECOND", "20"))
+RATE_LIMIT_BURST = int(os.getenv("RATE_LIMIT_BURST", "40"))
+MAX_CONCURRENT_REQUESTS = int(os.getenv("MAX_CONCURRENT_REQUESTS", "8"))
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "auto")
+RATE_LIMIT_LEASE_SECONDS = float(os.getenv("RATE_LIMIT_LEASE_SECONDS", "0.25"))
+WEB_CONCURRENCY = max(int(os.getenv("WEB_CONCURRENCY", "1")), 1)
+
+# Long-lived streams would hold a concurrency slot for hours; they still count for the rate
+CONCURRENCY_EXEMPT_PREFIXES = ("/events/",)
+
+class MemoryBackend:
+    def __init__(self):
+        self._buckets = {}  # key -> [tokens, time.monotonic() of last update]
+
+    async def take(self, key: str, rate: float, burst: int) -> float:
+        """Takes one token. Returns 0 when allowed, otherwise the seconds until one is available."""
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [float(burst), now]
+        tokens = min(burst, bucket[0] + (now - bucket[1]) * rate)
+        bucket[1] = now
+        if tokens >= 1:
+            bucket[0] = tokens - 1
+            return 0.0
+        bucket[0] = tokens
+        return (1 - tokens) / rate
+
+# One statement refills the bucket for the time elapsed and grants up to :want whole tokens.
+# SET expressions all see the row as it was, so the refill is computed from the old values.
+_TAKE = text("""
+    INSERT INTO rate_limit_buckets AS b (key, tokens, granted, updated_at)
+    VALUES (:key, :burst - LEAST(:want, :burst), LEAST(:want, :burst), now())
+    ON CONFLICT (key) DO UPDATE SET
+        granted = LEAST(:want, FLOOR(LEAST(:burst, b.tokens + :rate * EXTRACT(EPOCH FROM now() - b.updated_at)))),
+        tokens = LEAST(:burst, b.tokens + :rate * EXTRACT(EPOCH FROM now() - b.updated_at))
+            - LEAST(:want, FLOOR(LEAST(:burst, b.tokens + :rate * EXTRACT(EPOCH FROM now() - b.updated_at)))),
+        updated_at = now()
+    RETURNING granted, tokens
+""")
+
+class PostgresBackend:
+    def __init__(self):
+        self._leases = {}  # key -> [tokens left, time.monotonic() when the lease lapses]
+        self._refills = collections.defaultdict(asyncio.Lock)  # One trip to the database per key at a time
+        # Its own connections: waiting behind requests for the app's pool would stall every request
+        self._engine = create_engine(engine.url, pool_size=2, max_overflow=0, isolation_level="AUTOCOMMIT")
+
+    def _take_shared(self, key: str, rate: float, burst: int, want: int):
+        with self._engine.connect() as conn:
+            granted, tokens = conn.execute(_TAKE, {"key": key, "rate": rate, "burst": burst, "want": want}).one()
+        return int(granted), float(tokens)
+
+    def _take_leased(self, key: str) -> bool:
+        lease = self._leases.get(key)
+        if lease is not None and lease[0] >= 1 and lease[1] > time.monotonic():
+            lease[0] -= 1
+            return True
+        return False
+
+    async def take(self, key: str, rate: float, burst: int) -> float:
+        if self._take_leased(key):
+            return 0.0
+        async with self._refills[key]:
+            # Another request may have refilled the lease while this one waited
+            if self._take_leased(key):
+                return 0.0
+            # Leases are small and short, so one process can't sit on tokens the others need
+            want = max(1, min(int(rate * RATE_LIMIT_LEASE_SECONDS), burst // (2 * WEB_CONCURRENCY)))
+            try:
+                granted, tokens = await run_in_threadpool(self._take_shared, key, rate, burst, want)
+            except Exception as e:
+                # Don't turn a database hiccup into an outage: let the request through
+                logger.error(f"Rate limit backend unavailable: {e}")
+                return 0.0
+            if granted < 1:
+                return (1 - tokens) / rate
+            self._leases[key] = [granted - 1, time.monotonic() + 4 * RATE_LIMIT_LEASE_SECONDS]
+            return 0.0
+
+def _backend():
+    name = RATE_LIMIT_BACKEND
+    if name == "auto":
+        name = "postgres" if WEB_CONCURRENCY > 1 and engine.dialect.name == "postgresql" else "memory"
+    return PostgresBackend() if name == "postgres" else MemoryBackend()
+
+def _company_id(scope) -> Optional[int]:
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            return utils.token_company_id(value.decode("latin-1"))
+    return None
+
+def _load_limits(company_id: int) -> dict:
+    db = SessionLocal()
+    try:
+        return entitlements.get(db, company_id).limits
+    finally:
+        db.close()
+
+class TenantRateLimitMiddleware:
+    def __init__(self, app):
+        self.app = app
+        self.backend = _backend()
+        self._active = {}  # company_id -> requests in flight in this process
+
+    async def _limits(self, company_id: int):
+        entitlement = entitlements.cached(company_id)
+        limits = entitlement.limits if entitlement is not None else await run_in_threadpool(_load_limits, company_id)
+        rate = float(limits.get("requests_per_second", RATE_LIMIT_PER_SECOND))
+        burst = int(limits.get("burst", max(RATE_LIMIT_BURST, rate)))
+        concurrent = int(limits.get("concurrent_requests", MAX_CONCURRENT_REQUESTS))
+        return rate, burst, max(1, math.ceil(concurrent / WEB_CONCURRENCY))
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        company_id = _company_id(scope)
+        if company_id is None:
+            return await self.app(scope, receive, send)
+
+        rate, burst, concurrent = await self._limits(company_id)
+        # The concurrency check goes first: it's local, and a request it turns away shouldn't use up a token
+        exempt = scope["path"].startswith(CONCURRENCY_EXEMPT_PREFIXES)
+        if not exempt and self._active.get(company_id, 0) >= concurrent:
+            return await _too_many(send, 1, "Demasiadas solicitudes simultáneas")
+        wait = await self.backend.take(f"company:{company_id}", rate, burst)
+        if wait > 0:
+            return await _too_many(send, wait, "Demasiadas solicitudes, intentá de nuevo en unos segundos")
+
+        if exempt:
+            return await self.app(scope, receive, send)
+        self._active[company_id] = self._active.get(company_id, 0) + 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self._active[company_id] -= 1
+            if not self._active[company_id]:
+                del self._active[company_id]
+
+async def _too_many(send, retry_after: float, detail: str):
+    body = orjson.dumps({"detail": detail})
+    await send({
+        "type": "http.response.start",
+        "status": 429,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
@@ -1,432 +1,499 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from typing import List, Annotated
+from typing import List, Annotated, Optional
 from .. import models, schemas_archives, crud
-from ..database import get_db
-from ..dependencies import get_current_active_user
+from ..dependencies import get_current_active_user, get_tenant, get_read_tenant
+from ..tenancy import TenantSession
+from ..serializers import Projection
+from ..services import asset_tree, entitlements, timeline, tools
 
 router = APIRouter(
     prefix="/archives",
     tags=["archives"],
 )
 
+# List responses skip ORM objects and per-row validation, see serializers.Projection
+SPARE_PART_LIST = Projection(schemas_archives.SparePartOut, models.SparePart)
+SUPPLIER_LIST = Projection(schemas_archives.SupplierOut, models.Supplier)
+
+MAX_TIMELINE_PAGE = 200
+MAX_BULK_TOOLS = 500
+MAX_ROLLUP_IDS = 500 # Past this, asset rollups are computed for the whole company instead of an IN list
+
 # --- SECTORS ---
 @router.post("/sectors", response_model=schemas_archives.Sector)
 def create_sector(
     sector: schemas_archives.SectorCreate,
-    current_user: Annotated[models.User, Depends(get_current_active_user)],
-    db: Session = Depends(get_db)
+    tenant: Annotated[TenantSession, Depends(get_tenant)]
 ):
-    db_sector = models.Sector(**sector.dict(), company_id=current_user.company_id)
-    db.add(db_sector)
-    db.commit()
-    db.refresh(db_sector)
+    db_sector = tenant.add(models.Sector(**sector.model_dump()))
+    tenant.db.commit()
+    tenant.db.refresh(db_sector)
     return db_sector
 
 @router.get("/sectors", response_model=List[schemas_archives.Sector])
 def read_sectors(
-    current_user: Annotated[models.User, Depends(get_current_active_user)],
-    db: Session = Depends(get_db)  
+    tenant: Annotated[TenantSession, Depends(get_tenant)]
 ):
-    return db.query(models.Sector).filter(models.Sector.company_id == current_user.company_id).all()
+    return tenant.query(models.Sector).all()
 
 @router.put("/sectors/{sector_id}", response_model=schemas_archives.Sector)
 def update_sector(
     sector_id: int,
-    sector_update: schemas_archives.SectorCreate,
-    current_user: Annotated[models.User, Depends(get_current_active_user)],
-    db: Session = Depends(get_db)
+    sector_update: schemas_archives.SectorUpdate,
+    tenant: Annotated[TenantSession, Depends(get_tenant)]
 ):
-    db_sector = db.query(models.Sector).filter(models.Sector.id == sector_id, models.Sector.company_id == current_user.company_id).first()
-    if not db_sector:
-        raise HTTPException(status_code=404, detail="Sector not found")
-    
+    db_sector = tenant.get_or_404(models.Sector, sector_id)
+    crud.claim_version(tenant.db, db_sector, sector_update.version, schemas_archives.Sector)
+
     db_sector.name = sector_update.name
     db_sector.description = sector_update.description
-    db.commit()
-    db.refresh(db_sector)
+    tenant.db.commit()
+    tenant.db.refresh(db_sector)
     return db_sector
 
 @router.delete("/sectors/{sector_id}")
 def delete_sector(
     sector_id: int,
-    current_user: Annotated[models.User, Depends(get_current_active_user)],
-    db: Session = Depends(get_db)
-):
-    db_sector = db.query(models.Sector).filter(models.Sector.id == sector_id, models.Sector.company_id == current_user.company_id).first()
-    if not db_sector:
-        raise HTTPException(status_code=404, detail="Sector not found")
-        
-    db.delete(db_sector)
-    db.commit()
+    tenant: Annotated[TenantSession, Depends(get_tenant)]
+):
+    db_sector = tenant.get_or_404(models.Sector, sector_id)
+
+    tenant.db.delete(db_sector)
+    tenant.db.commit()
     return {"status": "success"}
 
 # --- WORKERS ---
 @router.post("/workers", response_model=schemas_archives.Worker)
 def create_worker(
     worker: schemas_archives.WorkerCreate,
-    current_user: Annotated[models.User, Depends(get_current_active_user)],
-    db: Session = Depends(get_db)
+    tenant: Annotated[TenantSession, Depends(get_tenant)]
 ):
     # Verify sector belongs to company if provided
-    if worker.sector_id:
-        sector = db.query(models.Sector).filter(models.Sector.id == worker.sector_id, models.Sector.company_id == current_user.company_id).first()
-        if not sector:
-            raise HTTPException(status_code=400, detail="Invalid Sector ID")
-
-    db_worker = models.Worker(**worker.dict(), company_id=current_user.company_id)
-    db.add(db_worker)
-    db.commit()
-    db.refresh(db_worker)
+    tenant.validate_refs({models.Sector: [worker.sector_id]})
+    entitlements.check_limit(tenant, "max_workers", models.Worker)
+
+    db_worker = tenant.add(models.Worker(**worker.model_dump()))
+    tenant.db.commit()
+    tenant.db.refresh(db_worker)
     return db_worker
 
 @router.get("/workers", response_model=List[schemas_archives.Worker])
 def read_workers(
-    current_user: Annotated[models.User, Depends(get_current_active_user)],
-    db: Session = Depends(get_db)
+    tenant: Annotated[TenantSession, Depends(get_tenant)]
 ):
-    return db.query(models.Worker).filter(models.Worker.company_id == current_user.company_id).all()
+    return tenant.query(models.Worker).all()
 
 @router.put("/workers/{worker_id}", response_model=schemas_archives.Worker)
 def update_worker(
     worker_id: int,
-    worker_update: schemas_archives.WorkerCreate,
-    current_user: Annotated[models.User, Depends(get_current_active_user)],
-    db: Session = Depends(get_db)
+    worker_update: schemas_archives.WorkerUpdate,
+    tenant: Annotated[TenantSession, Depends(get_tenant)]
 ):
-    db_worker = db.query(models.Worker).filter(models.Worker.id == worker_id, models.Worker.company_id == current_user.company_id).first()
-    if not db_worker:
-        raise HTTPException(status_code=404, detail="Worker not found")
-    
+    db_worker = tenant.get_or_404(models.Worker, worker_id)
+
     # Validate Sector if provided
-    if worker_update.sector_id:
-         sector = db.query(models.Sector).filter(models.Sector.id == worker_update.sector_id, models.Sector.company_id == current_user.company_id).first()
-         if not sector:
-            raise HTTPException(status_code=400, detail="Invalid Sector ID")
+    tenant.validate_refs({models.Sector: [worker_update.sector_id]})
+    crud.claim_version(tenant.db, db_worker, worker_update.version, schemas_archives.Worker)
 
-    for key, value in worker_update.dict().items():
+    for key, value in worker_update.model_dump(exclude={"version"}).items():
         setattr(db_worker, key, value)
 
-    db.commit()
-    db.refresh(db_worker)
+    tenant.db.commit()
+    tenant.db.refresh(db_worker)
     return db_worker
 
 @router.delete("/workers/{worker_id}")
 def delete_worker(
     worker_id: int,
-    current_user: Annotated[models.User, Depends(get_current_active_user)],
-    db: Session = Depends(get_db)
-):
-    db_worker = db.query(models.Worker).filter(models.Worker.id == worker_id, models.Worker.company_id == current_user.company_id).first()
-    if not db_worker:
-        raise HTTPException(status_code=404, detail="Worker not found")
-        
-    db.delete(db_worker)
-    db.commit()
+    tenant: Annotated[TenantSession, Depends(get_tenant)]
+):
+    db_worker = tenant.get_or_404(models.Worker, worker_id)
+
+    tenant.db.delete(db_worker)
+    tenant.db.commit()
     return {"status": "success"}
 
 # --- ASSETS ---
 @router.post("/assets", response_model=schemas_archives.Asset)
 def create_asset(
     asset: schemas_archives.AssetCreate,
-    current_user: Annotated[models.User, Depends(get_current_active_user)],
-    db: Session = Depends(get_db)
+    tenant: Annotated[TenantSession, Depends(get_tenant)]
 ):
-    # Validate Sector (Mandatory)
-    sector = db.query(models.Sector).filter(models.Sector.id == asset.sector_id, models.Sector.company_id == current_user.company_id).first()
-    if not sector:
-        raise HTTPException(status_code=400, detail="Invalid Sector ID - Asset must belong to a valid sector")
-
-    db_asset = models.Asset(**asset.dict(), company_id=current_user.company_id)
-    db.add(db_asset)
-    db.commit()
-    db.refresh(db_asset)
+    # Validate Sector (Mandatory) and parent
+    tenant.validate_refs({models.Sector: [asset.sector_id], models.Asset: [asset.parent_id]})
+    entitlements.check_limit(tenant, "max_assets", models.Asset)
+
+    db_asset = tenant.add(models.Asset(**asset.model_dump()))
+    tenant.db.flush()
+    asset_tree.add(tenant, db_asset)
+    tenant.db.commit()
+    tenant.db.refresh(db_asset)
     return db_asset
 
 @router.get("/assets", response_model=List[schemas_archives.Asset])
 def read_assets(
-    current_user: Annotated[models.User, Depends(get_current_active_user)],
-    db: Session = Depends(get_db),
-    sector_id: int = None
+    tenant: Annotated[TenantSession, Depends(get_read_tenant)],
+    sector_id: int = None,
+    parent_id: Optional[int] = None,
+    roots_only: bool = False,
+    subtree_of: Optional[int] = None,
+    rollup: bool = False
 ):
-    query = db.query(models.Asset).filter(models.Asset.company_id == current_user.company_id)
+    """
+    parent_id lists an asset's direct components, roots_only the top-level assets (no parent),
+    subtree_of the asset and everything under it. With rollup, each asset carries its
+    subtree's work order counts and costs.
+    """
+    query = tenant.query(models.Asset)
     if sector_id:
         query = query.filter(models.Asset.sector_id == sector_id)
-    return query.all()
+    if parent_id:
+        query = query.filter(models.Asset.parent_id == parent_id)
+    if roots_only:
+        # Same (company_id, parent_id) index as the children lookup
+        query = query.filter(models.Asset.parent_id.is_(None))
+    if subtree_of:
+        query = query.filter(models.Asset.id.in_(asset_tree.subtree_ids(tenant, subtree_of)))
+    assets = query.all()
+    if not rollup:
+        return assets
+
+    totals = asset_tree.rollups(tenant, None if len(assets) > MAX_ROLLUP_IDS else [a.id for a in assets])
+    return [
+        schemas_archives.Asset.model_validate(a).model_copy(update={
+            "rollup": schemas_archives.AssetRollup(**totals.get(a.id, {}))
+        })
+        for a in assets
+    ]
+
+@router.get("/assets/{asset_id}/timeline", response_model=schemas_archives.AssetTimeline)
+def read_asset_timeline(
+    asset_id: int,
+    tenant: Annotated[TenantSession, Depends(get_read_tenant)],
+    limit: int = 50,
+    before: Optional[str] = None
+):
+    """
+    Maintenance history of an asset, newest first, with keyset pagination:
+    pass the returned next_cursor as `before` to get the next page.
+    """
+    tenant.get_or_404(models.Asset, asset_id)
+    limit = max(1, min(limit, MAX_TIMELINE_PAGE))
+    return timeline.read_timeline(tenant, asset_id, limit, before)
 
 @router.put("/assets/{asset_id}", response_model=schemas_archives.Asset)
 def update_asset(
     asset_id: int,
-    asset_update: schemas_archives.AssetCreate,
-    current_user: Annotated[models.User, Depends(get_current_active_user)],
-    db: Session = Depends(get_db)
+    asset_update: schemas_archives.AssetUpdate,
+    tenant: Annotated[TenantSession, Depends(get_tenant)]
 ):
-    db_asset = db.query(models.Asset).filter(models.Asset.id == asset_id, models.Asset.company_id == current_user.company_id).first()
-    if not db_asset:
-        raise HTTPException(status_code=404, detail="Asset not found")
-    
+    db_asset = tenant.get_or_404(models.Asset, asset_id)
+
     # Validate Sector if changed
     if asset_update.sector_id != db_asset.sector_id:
-         sector = db.query(models.Sector).filter(models.Sector.id == asset_update.sector_id, models.Sector.company_id == current_user.company_id).first()
-         if not sector:
-            raise HTTPException(status_code=400, detail="Invalid Sector ID")
-
-    for key, value in asset_update.dict().items():
+        tenant.validate_refs({models.Sector: [asset_update.sector_id]})
+    # Clients that don't know about the hierarchy leave the asset where it is
+    move = "parent_id" in asset_update.model_fields_set and asset_update.parent_id != db_asset.parent_id
+    if move:
+        tenant.validate_refs({models.Asset: [asset_update.parent_id]})
+    crud.claim_version(tenant.db, db_asset, asset_update.version, schemas_archives.Asset)
+
+    for key, value in asset_update.model_dump(exclude={"version", "parent_id"}).items():
         setattr(db_asset, key, value)
+    if move:
+        asset_tree.move(tenant, db_asset, asset_update.parent_id)
 
-    db.commit()
-    db.refresh(db_asset)
+    tenant.db.commit()
+    tenant.db.refresh(db_asset)
     return db_asset
 
 @router.delete("/assets/{asset_id}")
 def delete_asset(
     asset_id: int,
-    current_user: Annotated[models.User, Depends(get_current_active_user)],
-    db: Session = Depends(get_db)
-):
-    db_asset = db.query(models.Asset).filter(models.Asset.id == asset_id, models.Asset.company_id == current_user.company_id).first()
-    if not db_asset:
-        raise HTTPException(status_code=404, detail="Asset not found")
-        
-    db.delete(db_asset)
-    db.commit()
+    tenant: Annotated[TenantSession, Depends(get_tenant)]
+):
+    db_asset = tenant.get_or_404(models.Asset, asset_id)
+    # Its orders and booked costs are the asset's maintenance history: refuse rather than drop it
+    Cost = models.AssetMonthlyCost
+    costs = tenant.query(Cost).filter(Cost.asset_id == asset_id)
+    if tenant.query(models.WorkOrder).filter(models.WorkOrder.asset_id == asset_id).first() or costs.filter(
+        (Cost.parts_cost != 0) | (Cost.labor_cost != 0) | (Cost.labor_minutes != 0)
+    ).first():
+        raise HTTPException(status_code=409, detail="El activo tiene órdenes de trabajo o costos registrados, no se puede eliminar")
+
+    asset_tree.remove(tenant, db_asset)
+    costs.delete(synchronize_session=False) # Only months whose lines were all removed are left
+    tenant.db.delete(db_asset)
+    tenant.db.commit()
     return {"status": "success"}
 
 # --- TOOLS ---
+def _active_tool_or_404(tenant: TenantSession, tool_id: int) -> models.Tool:
+    db_tool = tenant.get_or_404(models.Tool, tool_id)
+    if db_tool.deleted_at is not None:
+        raise HTTPException(status_code=404, detail="Tool not found")
+    return db_tool
+
 @router.post("/tools", response_model=schemas_archives.Tool)
 def create_tool(
     tool: schemas_archives.ToolCreate,
     current_user: Annotated[models.User, Depends(get_current_active_user)],
-    db: Session = Depends(get_db)
+    tenant: Annotated[TenantSession, Depends(get_tenant)]
 ):
-    # Validation logic for assignment could go here
-    db_tool = models.Tool(**tool.dict(), company_id=current_user.company_id)
-    db.add(db_tool)
-    db.commit()
-    db.refresh(db_tool)
+    tenant.validate_refs({
+        models.Worker: [tool.current_worker_id],
+        models.Sector: [tool.current_sector_id],
+    })
+    data = tool.model_dump(exclude={"current_worker_id", "current_sector_id"})
+    db_tool = tenant.add(models.Tool(**data))
+    tenant.db.flush()
+    # A tool created already in someone's hands starts its ledger with that checkout
+    tools.reassign(tenant, db_tool, tool.current_worker_id, tool.current_sector_id, current_user.id)
+    tenant.db.commit()
+    tenant.db.refresh(db_tool)
     return db_tool
 
 @router.get("/tools", response_model=List[schemas_archives.Tool])
 def read_tools(
+    tenant: Annotated[TenantSession, Depends(get_read_tenant)],
+    worker_id: Optional[int] = None,
+    sector_id: Optional[int] = None
+):
+    # Filtering by holder answers "what does this worker/sector have" from the holder indexes
+    query = tools.active_query(tenant)
+    if worker_id:
+        query = query.filter(models.Tool.current_worker_id == worker_id)
+    if sector_id:
+        query = query.filter(models.Tool.current_sector_id == sector_id)
+    return query.all()
+
+@router.get("/tools/overdue", response_model=List[schemas_archives.Tool])
+def read_overdue_tools(
+    tenant: Annotated[TenantSession, Depends(get_read_tenant)],
+    limit: int = 100
+):
+    return tools.overdue_query(tenant).limit(min(max(limit, 1), MAX_BULK_TOOLS)).all()
+
+@router.post("/tools/checkout", response_model=List[schemas_archives.ToolBulkResult])
+def checkout_tools(
+    request: schemas_archives.ToolCheckout,
+    current_user: Annotated[models.User, Depends(get_current_active_user)],
+    tenant: Annotated[TenantSession, Depends(get_tenant)]
+):
+    if len(request.tool_ids) > MAX_BULK_TOOLS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BULK_TOOLS} tools per request")
+    results = tools.checkout(
+        tenant, request.tool_ids, request.worker_id, request.sector_id, request.work_order_id,
+        request.due_at, request.notes, current_user.id
+    )
+    tenant.db.commit()
+    return results
+
+@router.post("/tools/return", response_model=List[schemas_archives.ToolBulkResult])
+def return_tools(
+    request: schemas_archives.ToolReturn,
     current_user: Annotated[models.User, Depends(get_current_active_user)],
-    db: Session = Depends(get_db)
+    tenant: Annotated[TenantSession, Depends(get_tenant)]
 ):
-    return db.query(models.Tool).filter(models.Tool.company_id == current_user.company_id).all()
+    if len(request.tool_ids) > MAX_BULK_TOOLS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BULK_TOOLS} tools per request")
+    results = tools.return_tools(tenant, request.tool_ids, request.status.value, request.notes, current_user.id)
+    tenant.db.commit()
+    return results
+
+@router.get("/tools/{tool_id}/movements", response_model=List[schemas_archives.ToolMovement])
+def read_tool_movements(
+    tool_id: int,
+    tenant: Annotated[TenantSession, Depends(get_read_tenant)],
+    limit: int = 100
+):
+    tenant.get_or_404(models.Tool, tool_id)
+    Movement = models.ToolMovement
+    return tenant.query(Movement).filter(Movement.tool_id == tool_id).order_by(
+        Movement.created_at.desc(), Movement.id.desc()
+    ).limit(min(max(limit, 1), MAX_BULK_TOOLS)).all()
+
 @router.put("/tools/{tool_id}", response_model=schemas_archives.Tool)
 def update_tool(
     tool_id: int,
-    tool_update: schemas_archives.ToolCreate,
+    tool_update: schemas_archives.ToolUpdate,
     current_user: Annotated[models.User, Depends(get_current_active_user)],
-    db: Session = Depends(get_db)
+    tenant: Annotated[TenantSession, Depends(get_tenant)]
 ):
-    db_tool = db.query(models.Tool).filter(models.Tool.id == tool_id, models.Tool.company_id == current_user.company_id).first()
-    if not db_tool:
-        raise HTTPException(status_code=404, detail="Tool not found")
+    db_tool = _active_tool_or_404(tenant, tool_id)
 
     # Validate assignments (Worker OR Sector, not both ideally, or priority?)
     # Model allows both nullable, but business logic usually implies one holder.
     # For now, we trust the input but verify existence.
-    
-    if tool_update.current_worker_id:
-         worker = db.query(models.Worker).filter(models.Worker.id == tool_update.current_worker_id, models.Worker.company_id == current_user.company_id).first()
-         if not worker:
-            raise HTTPException(status_code=400, detail="Invalid Worker ID")
-            
-    if tool_update.current_sector_id:
-         sector = db.query(models.Sector).filter(models.Sector.id == tool_update.current_sector_id, models.Sector.company_id == current_user.company_id).first()
-         if not sector:
-            raise HTTPException(status_code=400, detail="Invalid Sector ID")
-
-    for key, value in tool_update.dict().items():
+    tenant.validate_refs({
+        models.Worker: [tool_update.current_worker_id],
+        models.Sector: [tool_update.current_sector_id],
+    })
+    crud.claim_version(tenant.db, db_tool, tool_update.version, schemas_archives.Tool)
+
+    for key, value in tool_update.model_dump(exclude={"version", "current_worker_id", "current_sector_id"}).items():
         setattr(db_tool, key, value)
+    # Holder changes go through the ledger like any checkout or return
+    tools.reassign(
+        tenant, db_tool, tool_update.current_worker_id, tool_update.current_sector_id, current_user.id
+    )
 
-    db.commit()
-    db.refresh(db_tool)
+    tenant.db.commit()
+    tenant.db.refresh(db_tool)
     return db_tool
 
 @router.delete("/tools/{tool_id}")
 def delete_tool(
     tool_id: int,
     current_user: Annotated[models.User, Depends(get_current_active_user)],
-    db: Session = Depends(get_db)
+    tenant: Annotated[TenantSession, Depends(get_tenant)]
 ):
-    db_tool = db.query(models.Tool).filter(models.Tool.id == tool_id, models.Tool.company_id == current_user.company_id).first()
-    if not db_tool:
-        raise HTTPException(status_code=404, detail="Tool not found")
-        
-    db.delete(db_tool)
-    db.commit()
+    db_tool = _active_tool_or_404(tenant, tool_id)
+    # Soft delete: the ledger is append-only and keeps the tool's history
+    tools.delete(tenant, db_tool, current_user.id)
+    tenant.db.commit()
     return {"status": "success"}
 
 # --- SPARE PARTS CATEGORIES ---
 @router.post("/categories", response_model=schemas_archives.SparePartCategoryOut)
 def create_category(
     category: schemas_archives.SparePartCategoryCreate,
-    current_user: Annotated[models.User, Depends(get_current_active_user)],
-    db: Session = Depends(get_db)
+    tenant: Annotated[TenantSession, Depends(get_tenant)]
 ):
-    db_category = models.SparePartCategory(**category.dict(), company_id=current_user.company_id)
-    db.add(db_category)
-    db.commit()
-    db.refresh(db_category)
+    db_category = tenant.add(models.SparePartCategory(**category.model_dump()))
+    tenant.db.commit()
+    tenant.db.refresh(db_category)
     return db_category
 
 @router.get("/categories", response_model=List[schemas_archives.SparePartCategoryOut])
 def read_categories(
-    current_user: Annotated[models.User, Depends(get_current_active_user)],
-    db: Session = Depends(get_db)
+    tenant: Annotated[TenantSession, Depends(get_tenant)]
 ):
-    return db.query(models.SparePartCategory).filter(models.SparePartCategory.company_id == current_user.company_id).all()
+    return tenant.query(models.SparePartCategory).all()
 
 @router.delete("/categories/{category_id}")
 def delete_category(
     category_id: int,
-    current_user: Annotated[models.User, Depends(get_current_active_user)],
-    db: Session = Depends(get_db)
-):
-    db_category = db.query(models.SparePartCategory).filter(models.SparePartCategory.id == category_id, models.SparePartCategory.company_id == current_user.company_id).first()
-    if not db_category:
-        raise HTTPException(status_code=404, detail="Category not found")
-        
-    db.delete(db_category)
-    db.commit()
+    tenant: Annotated[TenantSession, Depends(get_tenant)]
+):
+    db_category = tenant.get_or_404(models.SparePartCategory, category_id)
+
+    tenant.db.delete(db_category)
+    tenant.db.commit()
     return {"status": "success"}
 
 # --- SPARE PARTS ---
 @router.post("/spare-parts", response_model=schemas_archives.SparePartOut)
 def create_spare_part(
     spare_part: schemas_archives.SparePartCreate,
-    current_user: Annotated[models.User, Depends(get_current_active_user)],
-    db: Session = Depends(get_db)
+    tenant: Annotated[TenantSession, Depends(get_tenant)]
 ):
-    if spare_part.category_id:
-        category = db.query(models.SparePartCategory).filter(models.SparePartCategory.id == spare_part.category_id, models.SparePartCategory.company_id == current_user.company_id).first()
-        if not category:
-             raise HTTPException(status_code=400, detail="Invalid Category ID")
+    tenant.validate_refs({models.SparePartCategory: [spare_part.category_id]})
 
-    db_spare_part = models.SparePart(**spare_part.dict(), company_id=current_user.company_id)
-    db.add(db_spare_part)
-    db.commit()
-    db.refresh(db_spare_part)
+    db_spare_part = tenant.add(models.SparePart(**spare_part.model_dump()))
+    tenant.db.commit()
+    tenant.db.refresh(db_spare_part)
     return db_spare_part
 
 @router.get("/spare-parts", response_model=List[schemas_archives.SparePartOut])
 def read_spare_parts(
-    current_user: Annotated[models.User, Depends(get_current_active_user)],
-    db: Session = Depends(get_db)
+    tenant: Annotated[TenantSession, Depends(get_read_tenant)]
 ):
-    return db.query(models.SparePart).filter(models.SparePart.company_id == current_user.company_id).all()
+    return SPARE_PART_LIST.response(tenant.db, tenant.query(models.SparePart))
 
 @router.put("/spare-parts/{spare_part_id}", response_model=schemas_archives.SparePartOut)
 def update_spare_part(
     spare_part_id: int,
-    spare_part_update: schemas_archives.SparePartCreate,
-    current_user: Annotated[models.User, Depends(get_current_active_user)],
-    db: Session = Depends(get_db)
-):
-    db_spare_part = db.query(models.SparePart).filter(models.SparePart.id == spare_part_id, models.SparePart.company_id == current_user.company_id).first()
-    if not db_spare_part:
-        raise HTTPException(status_code=404, detail="Spare Part not found")
-    
-    if spare_part_update.category_id:
-        category = db.query(models.SparePartCategory).filter(models.SparePartCategory.id == spare_part_update.category_id, models.SparePartCategory.company_id == current_user.company_id).first()
-        if not category:
-             raise HTTPException(status_code=400, detail="Invalid Category ID")
-
-    for key, value in spare_part_update.dict().items():
+    spare_part_update: schemas_archives.SparePartUpdate,
+    tenant: Annotated[TenantSession, Depends(get_tenant)]
+):
+    db_spare_part = tenant.get_or_404(models.SparePart, spare_part_id)
+
+    tenant.validate_refs({models.SparePartCategory: [spare_part_update.category_id]})
+    crud.claim_version(tenant.db, db_spare_part, spare_part_update.version, schemas_archives.SparePartOut)
+
+    for key, value in spare_part_update.model_dump(exclude={"version"}).items():
         setattr(db_spare_part, key, value)
 
-    db.commit()
-    db.refresh(db_spare_part)
+    tenant.db.commit()
+    tenant.db.refresh(db_spare_part)
     return db_spare_part
 
 @router.delete("/spare-parts/{spare_part_id}")
 def delete_spare_part(
     spare_part_id: int,
-    current_user: Annotated[models.User, Depends(get_current_active_user)],
-    db: Session = Depends(get_db)
-):
-    db_spare_part = db.query(models.SparePart).filter(models.SparePart.id == spare_part_id, models.SparePart.company_id == current_user.company_id).first()
-    if not db_spare_part:
-        raise HTTPException(status_code=404, detail="Spare Part not found")
-        
-    db.delete(db_spare_part)
-    db.commit()
+    tenant: Annotated[TenantSession, Depends(get_tenant)]
+):
+    db_spare_part = tenant.get_or_404(models.SparePart, spare_part_id)
+
+    tenant.db.delete(db_spare_part)
+    tenant.db.commit()
     return {"status": "success"}
 
 # --- SUPPLIERS ---
 @router.post("/suppliers", response_model=schemas_archives.SupplierOut)
 def create_supplier(
     supplier: schemas_archives.SupplierCreate,
-    current_user: Annotated[models.User, Depends(get_current_active_user)],
-    db: Session = Depends(get_db)
+    tenant: Annotated[TenantSession, Depends(get_tenant)]
 ):
     # Fetch categories
     categories = []
     if supplier.category_ids:
-        categories = db.query(models.SparePartCategory).filter(
-            models.SparePartCategory.id.in_(supplier.category_ids),
-            models.SparePartCategory.company_id == current_user.company_id
+        categories = tenant.query(models.SparePartCategory).filter(
+            models.SparePartCategory.id.in_(supplier.category_ids)
         ).all()
-        
+
         if len(categories) != len(supplier.category_ids):
              raise HTTPException(status_code=400, detail="One or more Category IDs are invalid")
 
-    supplier_data = supplier.dict(exclude={"category_ids"})
-    db_supplier = models.Supplier(**supplier_data, company_id=current_user.company_id)
+    supplier_data = supplier.model_dump(exclude={"category_ids"})
+    db_supplier = tenant.add(models.Supplier(**supplier_data))
     db_supplier.categories = categories # Assign Many-to-Many
-    
-    db.add(db_supplier)
-    db.commit()
-    db.refresh(db_supplier)
+
+    tenant.db.commit()
+    tenant.db.refresh(db_supplier)
     return db_supplier
 
 @router.get("/suppliers", response_model=List[schemas_archives.SupplierOut])
 def read_suppliers(
-    current_user: Annotated[models.User, Depends(get_current_active_user)],
-    db: Session = Depends(get_db)
+    tenant: Annotated[TenantSession, Depends(get_read_tenant)]
 ):
-    return db.query(models.Supplier).filter(models.Supplier.company_id == current_user.company_id).all()
+    return SUPPLIER_LIST.response(tenant.db, tenant.query(models.Supplier))
 
 @router.put("/suppliers/{supplier_id}", response_model=schemas_archives.SupplierOut)
 def update_supplier(
     supplier_id: int,
-    supplier_update: schemas_archives.SupplierCreate,
-    current_user: Annotated[models.User, Depends(get_current_active_user)],
-    db: Session = Depends(get_db)
+    supplier_update: schemas_archives.SupplierUpdate,
+    tenant: Annotated[TenantSession, Depends(get_tenant)]
 ):
-    db_supplier = db.query(models.Supplier).filter(models.Supplier.id == supplier_id, models.Supplier.company_id == current_user.company_id).first()
-    if not db_supplier:
-        raise HTTPException(status_code=404, detail="Supplier not found")
-    
+    db_supplier = tenant.get_or_404(models.Supplier, supplier_id)
+    crud.claim_version(tenant.db, db_supplier, supplier_update.version, schemas_archives.SupplierOut)
+
     # Update categories
     if supplier_update.category_ids is not None:
-         categories = db.query(models.SparePartCategory).filter(
-            models.SparePartCategory.id.in_(supplier_update.category_ids),
-            models.SparePartCategory.company_id == current_user.company_id
+         categories = tenant.query(models.SparePartCategory).filter(
+            models.SparePartCategory.id.in_(supplier_update.category_ids)
         ).all()
          if len(categories) != len(supplier_update.category_ids):
              raise HTTPException(status_code=400, detail="One or more Category IDs are invalid")
          db_supplier.categories = categories
 
-    supplier_data = supplier_update.dict(exclude={"category_ids"})
+    supplier_data = supplier_update.model_dump(exclude={"category_ids", "version"})
     for key, value in supplier_data.items():
         setattr(db_supplier, key, value)
 
-    db.commit()
-    db.refresh(db_supplier)
+    tenant.db.commit()
+    tenant.db.refresh(db_supplier)
     return db_supplier
 
 @router.delete("/suppliers/{supplier_id}")
 def delete_supplier(
     supplier_id: int,
-    current_user: Annotated[models.User, Depends(get_current_active_user)],
-    db: Session = Depends(get_db)
-):
-    db_supplier = db.query(models.Supplier).filter(models.Supplier.id == supplier_id, models.Supplier.company_id == current_user.company_id).first()
-    if not db_supplier:
-        raise HTTPException(status_code=404, detail="Supplier not found")
-        
-    db.delete(db_supplier)
-    db.commit()
+    tenant: Annotated[TenantSession, Depends(get_tenant)]
+):
+    db_supplier = tenant.get_or_404(models.Supplier, supplier_id)
+
+    tenant.db.delete(db_supplier)
+    tenant.db.commit()
     return {"status": "success"}
@@ -0,0 +1,143 @@
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, RedirectResponse, Response
+from typing import List, Annotated, Optional
+import os
+
+from .. import models, schemas
+from ..dependencies import get_current_active_user, get_tenant
+from ..tenancy import TenantSession
+from ..services import images
+from ..services.storage import get_private_storage
+from ..services.uploads import receive_file
+
+router = APIRouter(
+    prefix="/attachments",
+    tags=["attachments"],
+)
+
+MAX_ATTACHMENT_BYTES = int(os.getenv("MAX_ATTACHMENT_BYTES", str(25 * 1024 * 1024)))
+# Behind nginx, set to the internal location mapped to PRIVATE_STORAGE_ROOT (e.g. "/_private/")
+# and nginx serves the file itself with sendfile instead of the app streaming it
+ACCEL_REDIRECT_PREFIX = os.getenv("ATTACHMENT_ACCEL_REDIRECT")
+
+def _storage_key(company_id: int, sha256: str) -> str:
+    return f"attachments/{company_id}/{sha256}"
+
+def _thumbnail_key(storage_key: str) -> str:
+    return f"{storage_key}_thumb.webp"
+
+def _serve(key: str, filename: str, content_type: str, inline: bool = False):
+    storage = get_private_storage()
+    path = storage.local_path(key)
+    if path is None:
+        return RedirectResponse(storage.download_url(key, filename))
+    if not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="File not found")
+
+    disposition = "inline" if inline else "attachment"
+    if ACCEL_REDIRECT_PREFIX:
+        return Response(headers={
+            "X-Accel-Redirect": ACCEL_REDIRECT_PREFIX.rstrip("/") + "/" + key,
+            "Content-Type": content_type,
+            "Content-Disposition": f'{disposition}; filename="{filename}"',
+        })
+    # FileResponse answers Range requests and streams from disk in chunks
+    # (zero-copy through the ASGI pathsend extension when the server supports it)
+    return FileResponse(path, media_type=content_type, filename=filename, content_disposition_type=disposition)
+
+@router.post("", response_model=schemas.Attachment)
+async def upload_attachment(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    current_user: Annotated[models.User, Depends(get_current_active_user)],
+    tenant: Annotated[TenantSession, Depends(get_tenant)],
+    work_order_id: Optional[int] = None,
+    asset_id: Optional[int] = None
+):
+    """
+    Multipart upload with a single file field. The target goes in the query string,
+    so the body can be streamed to disk without parsing it first.
+    """
+    if bool(work_order_id) == bool(asset_id):
+        raise HTTPException(status_code=400, detail="Attach to either a work order or an asset")
+    await run_in_threadpool(tenant.validate_refs, {models.WorkOrder: [work_order_id], models.Asset: [asset_id]})
+
+    received = await receive_file(request, MAX_ATTACHMENT_BYTES)
+    storage = get_private_storage()
+    key = _storage_key(tenant.company_id, received.sha256)
+    # put_file is a no-op for a hash the company already uploaded
+    await run_in_threadpool(storage.put_file, received.path, key, received.content_type)
+
+    attachment = tenant.add(models.Attachment(
+        work_order_id=work_order_id,
+        asset_id=asset_id,
+        uploaded_by_id=current_user.id,
+        filename=received.filename,
+        content_type=received.content_type,
+        size=received.size,
+        sha256=received.sha256,
+        storage_key=key
+    ))
+    await run_in_threadpool(tenant.db.commit)
+    await run_in_threadpool(tenant.db.refresh, attachment)
+
+    if attachment.has_thumbnail:
+        background_tasks.add_task(images.make_thumbnail, storage, key, _thumbnail_key(key))
+    return attachment
+
+@router.get("", response_model=List[schemas.Attachment])
+def read_attachments(
+    tenant: Annotated[TenantSession, Depends(get_tenant)],
+    work_order_id: Optional[int] = None,
+    asset_id: Optional[int] = None
+):
+    if not work_order_id and not asset_id:
+        raise HTTPException(status_code=400, detail="Filter by work_order_id or asset_id")
+    query = tenant.query(models.Attachment)
+    if work_order_id:
+        query = query.filter(models.Attachment.work_order_id == work_order_id)
+    if asset_id:
+        query = query.filter(models.Attachment.asset_id == asset_id)
+    return query.order_by(models.Attachment.id).all()
+
+@router.get("/{attachment_id}/download")
+def download_attachment(
+    attachment_id: int,
+    tenant: Annotated[TenantSession, Depends(get_tenant)]
+):
+    attachment = tenant.get_or_404(models.Attachment, attachment_id)
+    return _serve(attachment.storage_key, attachment.filename, attachment.content_type)
+
+@router.get("/{attachment_id}/thumbnail")
+def download_thumbnail(
+    attachment_id: int,
+    tenant: Annotated[TenantSession, Depends(get_tenant)]
+):
+    attachment = tenant.get_or_404(models.Attachment, attachment_id)
+    if not attachment.has_thumbnail:
+        raise HTTPException(status_code=404, detail="No thumbnail for this file")
+    key = _thumbnail_key(attachment.storage_key)
+    if not get_private_storage().exists(key):
+        # Still rendering; the client retries later
+        raise HTTPException(status_code=404, detail="Thumbnail not ready")
+    return _serve(key, f"{os.path.splitext(attachment.filename)[0]}.webp", "image/webp", inline=True)
+
+@router.delete("/{attachment_id}")
+def delete_attachment(
+    attachment_id: int,
+    tenant: Annotated[TenantSession, Depends(get_tenant)]
+):
+    attachment = tenant.get_or_404(models.Attachment, attachment_id)
+
+    key = attachment.storage_key
+    tenant.db.delete(attachment)
+    tenant.db.commit()
+
+    # The file may be shared with other attachments of the same company
+    if not tenant.query(models.Attachment).filter(models.Attachment.storage_key == key).first():
+        storage = get_private_storage()
+        storage.delete(key)
+        if storage.exists(_thumbnail_key(key)):
+            storage.delete(_thumbnail_key(key))
+    return {"status": "success"}
@@ -1,12 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from sqlalchemy import func, extract
-from typing import Annotated, List
-from datetime import datetime
+from typing import Annotated, List, Optional
+from datetime import datetime, date
 
 from .. import models, schemas
-from ..database import get_db
-from ..dependencies import get_current_active_user
+from ..dependencies import get_current_active_user, get_read_db, get_read_tenant
+from ..tenancy import TenantSession
+from ..services import costs
 
 router = APIRouter(
     prefix="/dashboard",
@@ -17,7 +18,7 @@ router = APIRouter(
 @router.get("/stats")
 async def get_dashboard_stats(
     current_user: Annotated[models.User, Depends(get_current_active_user)],
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     if not current_user.company_id:
         return {
@@ -55,18 +56,23 @@ async def get_dashboard_stats(
     # but reusing WorkOrder schema is fine if handled correctly.
     
     # 3. Yearly Stats (Current Year)
+    # Range on created_at instead of extract('year') so the (company_id, type, created_at) index is usable
     current_year = datetime.now().year
+    year_start = datetime(current_year, 1, 1)
+    next_year_start = datetime(current_year + 1, 1, 1)
     
     yearly_corrective = db.query(models.WorkOrder).filter(
         models.WorkOrder.company_id == current_user.company_id,
-        extract('year', models.WorkOrder.created_at) == current_year,
-        models.WorkOrder.type == models.WorkOrderType.CORRECTIVO
+        models.WorkOrder.type == models.WorkOrderType.CORRECTIVO,
+        models.WorkOrder.created_at >= year_start,
+        models.WorkOrder.created_at < next_year_start
     ).count()
     
     yearly_preventive = db.query(models.WorkOrder).filter(
         models.WorkOrder.company_id == current_user.company_id,
-        extract('year', models.WorkOrder.created_at) == current_year,
-        models.WorkOrder.type == models.WorkOrderType.PREVENTIVO
+        models.WorkOrder.type == models.WorkOrderType.PREVENTIVO,
+        models.WorkOrder.created_at >= year_start,
+        models.WorkOrder.created_at < next_year_start
     ).count()
     
     return {
@@ -82,3 +88,18 @@ async def get_dashboard_stats(
             "total": yearly_corrective + yearly_preventive
         }
     }
+
+@router.get("/costs", response_model=List[schemas.CostReportRow])
+def get_cost_report(
+    date_from: date,
+    date_to: date,
+    tenant: Annotated[TenantSession, Depends(get_read_tenant)],
+    group_by: schemas.CostGroupBy = schemas.CostGroupBy.ASSET,
+    sector_id: Optional[int] = None
+):
+    """
+    Parts and labor cost per asset, sector or month, by the month the cost was booked in.
+    """
+    if date_to < date_from:
+        raise HTTPException(status_code=400, detail="date_to must not be before date_from")
+    return costs.cost_report(tenant, date_from, date_to, group_by, sector_id=sector_id)
@@ -0,0 +1,84 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from datetime import timedelta
+from typing import Annotated, Optional
+import asyncio
+import os
+
+import orjson
+
+from .. import models, schemas, utils
+from ..database import SessionLocal
+from ..dependencies import get_current_active_user, get_entitled_user, user_for_token
+from ..services import entitlements, events
+
+router = APIRouter(
+    prefix="/events",
+    tags=["events"],
+)
+
+# Comment line sent when nothing happened, so proxies don't close an idle stream
+HEARTBEAT_SECONDS = float(os.getenv("EVENT_HEARTBEAT_SECONDS", "15"))
+# EventSource can't send headers, so browsers pass a token in the URL, where proxies and access
+# logs keep it. It's a stream-only token valid this long, enough to connect, never the API token.
+STREAM_TOKEN_SECONDS = int(os.getenv("EVENT_STREAM_TOKEN_SECONDS", "60"))
+STREAM_TOKEN_SCOPE = "events"
+
+def _sse(name: str, payload) -> str:
+    return f"event: {name}\ndata: {orjson.dumps(payload).decode()}\n\n"
+
+async def _stream(request: Request, company_id: int):
+    queue = events.broker.subscribe(company_id)
+    try:
+        # Anything before "ready" was missed: clients (re)load their list when they get it
+        yield f"retry: 3000\n{_sse('ready', {})}"
+        while not await request.is_disconnected():
+            try:
+                payload = await asyncio.wait_for(queue.get(), HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": ping\n\n"
+                continue
+            if payload is events.CLOSE:
+                return
+            yield _sse(payload["event"], payload)
+    finally:
+        events.broker.unsubscribe(company_id, queue)
+
+@router.post("/token", response_model=schemas.StreamToken)
+def create_stream_token(current_user: Annotated[models.User, Depends(get_entitled_user)]):
+    """Token for ?token= on the event streams, valid STREAM_TOKEN_SECONDS and for nothing else."""
+    token = utils.create_access_token(
+        {"sub": current_user.email, "scope": STREAM_TOKEN_SCOPE}, timedelta(seconds=STREAM_TOKEN_SECONDS)
+    )
+    return {"token": token, "expires_in": STREAM_TOKEN_SECONDS}
+
+@router.get("/work-orders")
+async def stream_work_order_events(request: Request, token: Optional[str] = None):
+    """
+    Server-sent events with the company's work order changes ("work_order" events, plus
+    "resync" when the client has to re-list). Authenticated with the usual Authorization
+    header, or with a token from POST /events/token as ?token= (EventSource can't send headers).
+    The token is only checked on connect: the stream outlives it, a reconnect needs a new one.
+    """
+    scope = STREAM_TOKEN_SCOPE
+    scheme, _, credentials = request.headers.get("Authorization", "").partition(" ")
+    if not token and scheme.lower() == "bearer":
+        token, scope = credentials, None
+    if not token:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
+
+    # Short-lived session: a stream can stay open for hours and mustn't hold a connection
+    db = SessionLocal()
+    try:
+        user = await get_current_active_user(await run_in_threadpool(user_for_token, db, token, scope))
+        await run_in_threadpool(entitlements.check, db, user.company_id)
+    finally:
+        db.close()
+
+    events.ensure_listener()
+    return StreamingResponse(
+        _stream(request, user.company_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
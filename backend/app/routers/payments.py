@@ -1,5 +1,3 @@
-import mercadopago
-import os
 from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.orm import Session
 from typing import List, Annotated
@@ -8,22 +6,33 @@ import logging
 from .. import models, schemas, crud
 from ..database import get_db
 from ..dependencies import get_current_active_user
+from ..services import entitlements, jobs
+from ..services.payment import sdk
 
 router = APIRouter(
     prefix="/payments",
     tags=["payments"],
 )
 
-# Initialize Mercado Pago SDK
-sdk = mercadopago.SDK(os.getenv("MERCADOPAGO_ACCESS_TOKEN", "TEST-YOUR-TOKEN"))
-# Note: For production use proper env loading or validation
-
 logger = logging.getLogger(__name__)
 
 @router.get("/plans", response_model=List[schemas.Plan])
 def read_plans(db: Session = Depends(get_db)):
     return db.query(models.Plan).all()
 
+@router.get("/entitlement", response_model=schemas.Entitlement)
+def read_entitlement(
+    current_user: Annotated[models.User, Depends(get_current_active_user)],
+    db: Session = Depends(get_db)
+):
+    """
+    The company's access: status, plan, limits and, when locked out, why. Available to
+    locked-out companies too, so the frontend can send them to billing.
+    """
+    if current_user.company_id is None:
+        raise HTTPException(status_code=400, detail="User has no company")
+    return entitlements.get(db, current_user.company_id)
+
 @router.post("/create-checkout-session")
 def create_checkout_session(
     plan_id: int, 
@@ -55,7 +64,7 @@ def create_checkout_session(
 
     try:
         # We create a "preapproval" (subscription) preference
-        preference_response = sdk.preapproval().create(subscription_data)
+        preference_response = sdk().preapproval().create(subscription_data)
         print(f"DEBUG MP RESPONSE: {preference_response}", flush=True) # Log full response
         preference = preference_response["response"]
         
@@ -85,59 +94,24 @@ def create_checkout_session(
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.post("/webhook")
-async def mp_webhook(request: Request, db: Session = Depends(get_db)):
+def mp_webhook(request: Request, db: Session = Depends(get_db)):
     # Mercado Pago Webhooks handling
     # Documentation: https://www.mercadopago.com.ar/developers/en/docs/your-integrations/notifications/webhooks
     
     # Simple logic for 'preapproval' (subscription) updates
     # Validation logic should be stricter in production (compare X-Signature, etc.)
+    # Plain def: the enqueue and commit block, so they run in the threadpool, not on the event loop
     
     params = request.query_params
     topic = params.get("topic") or params.get("type")
     
     if topic == "preapproval":
         preapproval_id = params.get("id") or params.get("data.id")
-        
-        # Get status from MP
-        try:
-            preapproval_info = sdk.preapproval().get(preapproval_id)
-            info = preapproval_info["response"]
-            
-            external_ref = info.get("external_reference")
-            status = info.get("status")
-            
-            if external_ref and status:
-                company_id = int(external_ref)
-                
-                # Update DB
-                sub = db.query(models.Subscription).filter(models.Subscription.company_id == company_id).first()
-                if not sub:
-                    # Retrieve Plan ID based on transaction amount or other metadata if strictly needed
-                    # For simplicity, assuming plan lookup or defaulting if creating new
-                    # NOTE: MP doesn't always return our plan ID easily unless in metadata. 
-                    # We might need to fetch the plan based on price matching or stored metadata
-                    
-                    # Fallback find plan by price/currency
-                    plan = db.query(models.Plan).filter(
-                        models.Plan.price == float(info["auto_recurring"]["transaction_amount"])
-                    ).first()
-                    
-                    sub = models.Subscription(
-                        company_id=company_id,
-                        plan_id=plan.id if plan else None,
-                        mp_preapproval_id=preapproval_id,
-                        status=status,
-                    )
-                    db.add(sub)
-                else:
-                    sub.mp_preapproval_id = preapproval_id
-                    sub.status = status
-                
-                db.commit()
-                
-        except Exception as e:
-            logger.error(f"Error processing webhook: {e}")
-            pass # Don't error out to MP to create retry loops unnecessarily in dev
+        if preapproval_id:
+            # Looked up in the worker, retried with backoff if Mercado Pago is unavailable,
+            # so the webhook answers right away
+            jobs.enqueue(db, "mp_preapproval", {"preapproval_id": preapproval_id}, priority=10)
+            db.commit()
 
     return {"status": "success"}
 
@@ -171,6 +145,7 @@ def mock_confirm_subscription(
         db.add(sub)
     else:
         sub.status = "authorized"
-        
+
+    entitlements.invalidate(db, current_user.company.id)
     db.commit()
     return {"status": "success", "message": "Subscription activated (MOCK)"}
@@ -0,0 +1,81 @@
+from fastapi import APIRouter, Depends
+from typing import Annotated
+from datetime import date
+
+from .. import models, schemas, crud
+from ..dependencies import get_tenant
+from ..tenancy import TenantSession
+from ..services import events, notifications, scheduling
+
+router = APIRouter(
+    prefix="/scheduling",
+    tags=["scheduling"],
+)
+
+HORIZON_DAYS = {
+    schemas.ScheduleHorizon.DAY: 1,
+    schemas.ScheduleHorizon.WEEK: 5,
+}
+
+def _plan(request: schemas.ScheduleRequest, tenant: TenantSession) -> scheduling.Schedule:
+    return scheduling.plan_schedule(
+        tenant, request.start_date or date.today(), HORIZON_DAYS[request.horizon], sector_id=request.sector_id
+    )
+
+def _drop_skipped(schedule: scheduling.Schedule, updated: set):
+    """Moves the assignments that weren't applied to unassigned, and off their worker's load."""
+    loads = {load["worker_id"]: load for load in schedule.workers}
+    applied = []
+    for assignment in schedule.assignments:
+        if assignment["work_order_id"] in updated:
+            applied.append(assignment)
+            continue
+        loads[assignment["worker_id"]]["scheduled_minutes"] -= assignment["estimated_minutes"]
+        schedule.unassigned.append({"work_order_id": assignment["work_order_id"], "reason": "Assigned or changed while planning"})
+    schedule.assignments = applied
+
+@router.post("/preview", response_model=schemas.Schedule)
+def preview_schedule(
+    request: schemas.ScheduleRequest,
+    tenant: Annotated[TenantSession, Depends(get_tenant)]
+):
+    """
+    Dry run: proposes who does which unassigned pending order and on which day, without saving.
+    """
+    return _plan(request, tenant)
+
+@router.post("/commit", response_model=schemas.Schedule)
+def commit_schedule(
+    request: schemas.ScheduleRequest,
+    tenant: Annotated[TenantSession, Depends(get_tenant)]
+):
+    """
+    Plans again and applies the result: orders get their worker, ASIGNADA status and scheduled date.
+    Returns what was applied, which may differ from an earlier preview if orders changed since.
+    Orders assigned or moved on by someone else while planning (another commit, a manual
+    assignment) are left as they are and listed as unassigned.
+    """
+    schedule = _plan(request, tenant)
+    changes = [
+        {
+            "id": assignment["work_order_id"],
+            "set_assignee": True,
+            "assigned_to_id": assignment["worker_id"],
+            "status": models.WorkOrderStatus.ASIGNADA,
+            "priority": None,
+            "scheduled_date": assignment["scheduled_date"],
+        }
+        for assignment in schedule.assignments
+    ]
+    # The UPDATE re-checks each row: on Postgres it waits for a concurrent writer and then skips
+    # the orders that writer assigned, instead of overwriting them
+    WorkOrder = models.WorkOrder
+    updated = set(crud.bulk_update_work_orders(tenant.db, tenant.company_id, changes, only_if=(
+        WorkOrder.assigned_to_id.is_(None), WorkOrder.status == models.WorkOrderStatus.PENDIENTE,
+    )))
+    changes = [c for c in changes if c["id"] in updated]
+    _drop_skipped(schedule, updated)
+    events.emit_bulk_changes(tenant.db, tenant.company_id, changes)
+    notifications.notify_assignments(tenant.db, tenant.company_id, [(c["id"], c["assigned_to_id"]) for c in changes])
+    tenant.db.commit()
+    return schedule
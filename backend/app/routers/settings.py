@@ -1,13 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from typing import Annotated
 import os
-import shutil
 from pathlib import Path
 
 from .. import models, schemas, crud
 from ..database import get_db
 from ..dependencies import get_current_active_user
+from ..services import images
+from ..services.storage import get_storage
+from ..services.uploads import receive_file
 
 router = APIRouter(
     prefix="/settings",
@@ -15,36 +18,40 @@ router = APIRouter(
     responses={404: {"description": "Not found"}},
 )
 
-UPLOAD_DIR = "static/uploads"
+MAX_LOGO_BYTES = int(os.getenv("MAX_LOGO_BYTES", str(2 * 1024 * 1024)))
+LOGO_TYPES = {
+    ".png": "image/png",
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".webp": "image/webp",
+    ".gif": "image/gif",
+    ".svg": "image/svg+xml",
+}
 
-@router.get("/general", response_model=schemas.Company)
-async def get_company_settings(
-    current_user: Annotated[models.User, Depends(get_current_active_user)],
-    db: Session = Depends(get_db)
-):
+def _company(db: Session, current_user: models.User) -> models.Company:
     if not current_user.company_id:
         raise HTTPException(status_code=404, detail="Company not found for user")
-    
     company = db.query(models.Company).filter(models.Company.id == current_user.company_id).first()
     if not company:
         raise HTTPException(status_code=404, detail="Company not found")
-        
     return company
 
+@router.get("/general", response_model=schemas.Company)
+def get_company_settings(
+    current_user: Annotated[models.User, Depends(get_current_active_user)],
+    db: Session = Depends(get_db)
+):
+    return _company(db, current_user)
+
 @router.put("/general", response_model=schemas.Company)
-async def update_company_settings(
+def update_company_settings(
     settings_update: schemas.CompanyUpdate,
     current_user: Annotated[models.User, Depends(get_current_active_user)],
     db: Session = Depends(get_db)
 ):
-    if not current_user.company_id:
-        raise HTTPException(status_code=404, detail="Company not found for user")
-        
-    company = db.query(models.Company).filter(models.Company.id == current_user.company_id).first()
-    if not company:
-        raise HTTPException(status_code=404, detail="Company not found")
-    
-    update_data = settings_update.dict(exclude_unset=True)
+    company = _company(db, current_user)
+    crud.claim_version(db, company, settings_update.version, schemas.Company)
+    update_data = settings_update.model_dump(exclude_unset=True, exclude={"version"})
     for key, value in update_data.items():
         setattr(company, key, value)
         
@@ -55,30 +62,42 @@ async def update_company_settings(
 @router.post("/logo")
 async def upload_logo(
     current_user: Annotated[models.User, Depends(get_current_active_user)],
-    db: Session = Depends(get_db),
-    file: UploadFile = File(...)
+    background_tasks: BackgroundTasks,
+    request: Request,
+    db: Session = Depends(get_db)
 ):
-    if not current_user.company_id:
-        raise HTTPException(status_code=404, detail="Company not found for user")
-        
-    company = db.query(models.Company).filter(models.Company.id == current_user.company_id).first()
-    if not company:
-        raise HTTPException(status_code=404, detail="Company not found")
-        
-    # Create upload dir if not exists
-    os.makedirs(UPLOAD_DIR, exist_ok=True)
-    
-    # Generate filename (company_id_filename)
-    file_extension = Path(file.filename).suffix
-    filename = f"company_{company.id}_logo{file_extension}"
-    file_path = os.path.join(UPLOAD_DIR, filename)
-    
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
-        
-    # Update DB URL (assuming static mount at /static)
-    logo_url = f"/static/uploads/{filename}"
+    """
+    Multipart upload with the image as its file part; the body is streamed, never buffered.
+    Async for the streaming: database and storage calls go through the threadpool.
+    """
+    company = await run_in_threadpool(_company, db, current_user)
+
+    # Written to a temp file and hashed as it arrives; 413 as soon as it crosses the limit
+    received = await receive_file(request, MAX_LOGO_BYTES)
+    try:
+        file_extension = Path(received.filename).suffix.lower()
+        if file_extension not in LOGO_TYPES:
+            raise HTTPException(status_code=400, detail="Unsupported image type")
+
+        # Content-addressed: same image, same name; a new logo always gets a new URL
+        key = f"logos/{received.sha256}{file_extension}"
+        storage = get_storage()
+        await run_in_threadpool(storage.put_file, received.path, key, LOGO_TYPES[file_extension])
+    finally:
+        if os.path.exists(received.path):
+            os.remove(received.path)
+
+    if file_extension != ".svg":
+        background_tasks.add_task(images.make_variants, storage, key)
+
+    logo_url = storage.url(key)
     company.logo_url = logo_url
-    db.commit()
+    await run_in_threadpool(db.commit)
     
-    return {"logo_url": logo_url}
+    # Variant URLs are known up front; the files show up once the background task is done
+    return {
+        "logo_url": logo_url,
+        "variants": {} if file_extension == ".svg" else {
+            name: storage.url(variant) for name, variant in images.variant_keys(key).items()
+        }
+    }
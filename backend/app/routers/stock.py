@@ -2,22 +2,33 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from typing import List, Annotated
 from .. import models, schemas, crud
-from ..database import get_db
-from ..dependencies import get_current_active_user
+from ..dependencies import get_tenant, get_read_tenant
+from ..idempotency import IdempotentRoute
+from ..tenancy import TenantSession
+from ..serializers import Projection
 
 router = APIRouter(
     prefix="/stock",
     tags=["stock"],
+    route_class=IdempotentRoute, # Retried creations replay the first response, see idempotency.py
 )
 
+# List responses skip ORM objects and per-row validation, see serializers.Projection
+PURCHASE_ORDER_LIST = Projection(schemas.PurchaseOrder, models.PurchaseOrder)
+
 # --- PURCHASE ORDERS ---
 
 @router.post("/purchase-orders", response_model=schemas.PurchaseOrder)
 def create_purchase_order(
     order: schemas.PurchaseOrderCreate,
-    current_user: Annotated[models.User, Depends(get_current_active_user)],
-    db: Session = Depends(get_db)
+    tenant: Annotated[TenantSession, Depends(get_tenant)]
 ):
+    db = tenant.db
+    tenant.validate_refs({
+        models.Supplier: [order.supplier_id],
+        models.SparePart: [item.spare_part_id for item in order.items],
+    })
+
     # 0. Auto-generate Order Number if missing
     final_order_number = order.order_number
     if not final_order_number:
@@ -27,8 +38,7 @@ def create_purchase_order(
         prefix = f"OC-{current_year}-"
         
         # Find last order with this prefix for this company
-        last_order = db.query(models.PurchaseOrder).filter(
-            models.PurchaseOrder.company_id == current_user.company_id,
+        last_order = tenant.query(models.PurchaseOrder).filter(
             models.PurchaseOrder.order_number.like(f"{prefix}%")
         ).order_by(models.PurchaseOrder.id.desc()).first()
         
@@ -47,8 +57,7 @@ def create_purchase_order(
         final_order_number = f"{prefix}{next_seq:04d}"
 
     # 1. Create Order
-    db_order = models.PurchaseOrder(
-        company_id=current_user.company_id,
+    db_order = tenant.add(models.PurchaseOrder(
         supplier_id=order.supplier_id,
         order_date=order.order_date,
         delivery_date=order.delivery_date,
@@ -56,8 +65,7 @@ def create_purchase_order(
         order_number=final_order_number,
         status=models.PurchaseOrderStatus.PENDIENTE,
         total_amount=0 # Will calc below
-    )
-    db.add(db_order)
+    ))
     db.commit()
     db.refresh(db_order)
 
@@ -89,12 +97,11 @@ def create_purchase_order(
 
 @router.get("/purchase-orders", response_model=List[schemas.PurchaseOrder])
 def read_purchase_orders(
-    current_user: Annotated[models.User, Depends(get_current_active_user)],
-    db: Session = Depends(get_db),
+    tenant: Annotated[TenantSession, Depends(get_read_tenant)],
     status: str = None, # Optional filter
     supplier_id: int = None
 ):
-    query = db.query(models.PurchaseOrder).filter(models.PurchaseOrder.company_id == current_user.company_id)
+    query = tenant.query(models.PurchaseOrder)
     
     if status is not None:
         if status == "PENDIENTES":
@@ -113,21 +120,14 @@ def read_purchase_orders(
         query = query.filter(models.PurchaseOrder.supplier_id == supplier_id)
 
     # Order by date desc
-    return query.order_by(models.PurchaseOrder.order_date.desc()).all()
+    return PURCHASE_ORDER_LIST.response(tenant.db, query.order_by(models.PurchaseOrder.order_date.desc()))
 
 @router.get("/purchase-orders/{order_id}", response_model=schemas.PurchaseOrder)
 def read_purchase_order(
     order_id: int,
-    current_user: Annotated[models.User, Depends(get_current_active_user)],
-    db: Session = Depends(get_db)
+    tenant: Annotated[TenantSession, Depends(get_tenant)]
 ):
-    db_order = db.query(models.PurchaseOrder).filter(
-        models.PurchaseOrder.id == order_id, 
-        models.PurchaseOrder.company_id == current_user.company_id
-    ).first()
-    if not db_order:
-        raise HTTPException(status_code=404, detail="Purchase Order not found")
-    return db_order
+    return tenant.get_or_404(models.PurchaseOrder, order_id)
 
 def recalculate_order_status(db_order: models.PurchaseOrder):
     """
@@ -161,16 +161,16 @@ def recalculate_order_status(db_order: models.PurchaseOrder):
 @router.put("/purchase-orders/{order_id}", response_model=schemas.PurchaseOrder)
 def update_purchase_order(
     order_id: int,
-    order_update: schemas.PurchaseOrderCreate, # reusing Create schema which has items
-    current_user: Annotated[models.User, Depends(get_current_active_user)],
-    db: Session = Depends(get_db)
+    order_update: schemas.PurchaseOrderUpdate, # reusing Create schema which has items
+    tenant: Annotated[TenantSession, Depends(get_tenant)]
 ):
-    db_order = db.query(models.PurchaseOrder).filter(
-        models.PurchaseOrder.id == order_id, 
-        models.PurchaseOrder.company_id == current_user.company_id
-    ).first()
-    if not db_order:
-        raise HTTPException(status_code=404, detail="Purchase Order not found")
+    db = tenant.db
+    db_order = tenant.get_or_404(models.PurchaseOrder, order_id)
+    tenant.validate_refs({
+        models.Supplier: [order_update.supplier_id],
+        models.SparePart: [item.spare_part_id for item in order_update.items],
+    })
+    crud.claim_version(db, db_order, order_update.version, schemas.PurchaseOrder)
 
     # Update Header
     db_order.supplier_id = order_update.supplier_id
@@ -237,16 +237,10 @@ def update_purchase_order(
 @router.delete("/purchase-orders/{order_id}")
 def delete_purchase_order(
     order_id: int,
-    current_user: Annotated[models.User, Depends(get_current_active_user)],
-    db: Session = Depends(get_db)
+    tenant: Annotated[TenantSession, Depends(get_tenant)]
 ):
-    db_order = db.query(models.PurchaseOrder).filter(
-        models.PurchaseOrder.id == order_id, 
-        models.PurchaseOrder.company_id == current_user.company_id
-    ).first()
-    if not db_order:
-        raise HTTPException(status_code=404, detail="Purchase Order not found")
-        
-    db.delete(db_order)
-    db.commit()
+    db_order = tenant.get_or_404(models.PurchaseOrder, order_id)
+
+    tenant.db.delete(db_order)
+    tenant.db.commit()
     return {"status": "success"}
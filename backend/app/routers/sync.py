@@ -0,0 +1,59 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+from typing import List, Annotated, Optional
+from datetime import datetime
+
+from .. import models, schemas, crud
+from ..dependencies import get_tenant
+from ..tenancy import TenantSession
+from ..services import sync
+
+router = APIRouter(
+    prefix="/sync",
+    tags=["sync"],
+)
+
+@router.get("", response_model=schemas.SyncChanges)
+def pull_changes(
+    tenant: Annotated[TenantSession, Depends(get_tenant)],
+    since: Optional[datetime] = None, # Watermark from the previous pull, None for a full download
+    worker_id: Optional[int] = None, # Only work orders assigned to this worker
+    limit: int = 200
+):
+    """
+    Returns every synced entity changed after `since`, plus tombstones for deleted ones.
+    """
+    limit = max(1, min(limit, 1000))
+    return sync.pull_changes(tenant, since, limit, worker_id=worker_id)
+
+@router.post("", response_model=List[schemas.SyncPushResult])
+def push_changes(
+    push: schemas.SyncPush,
+    tenant: Annotated[TenantSession, Depends(get_tenant)]
+):
+    """
+    Applies status changes queued by an offline client, in order, in one transaction.
+    Each change is reported individually so the client can drop the ones that were applied.
+    An unknown status fails validation for the whole push (422), before anything is applied.
+    """
+    ids = {change.work_order_id for change in push.changes}
+    work_orders = {}
+    if ids:
+        work_orders = {wo.id: wo for wo in tenant.query(models.WorkOrder).filter(
+            models.WorkOrder.id.in_(ids)
+        ).all()}
+
+    results = []
+    for change in push.changes:
+        db_wo = work_orders.get(change.work_order_id)
+        if not db_wo:
+            results.append(schemas.SyncPushResult(work_order_id=change.work_order_id, ok=False, detail="Work Order not found"))
+            continue
+        crud.apply_work_order_status(db_wo, change.status)
+        if change.observations is not None:
+            db_wo.observations = change.observations
+        db_wo.version = models.WorkOrder.version + 1
+        results.append(schemas.SyncPushResult(work_order_id=change.work_order_id, ok=True))
+
+    tenant.db.commit()
+    return results
@@ -1,27 +1,43 @@
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import or_
 from sqlalchemy.orm import Session
 from typing import List, Annotated, Optional
-from datetime import datetime
+from datetime import datetime, date, timedelta, timezone
 
 from .. import models, schemas, crud
 from ..database import get_db
-from ..dependencies import get_current_active_user
+from ..dependencies import get_current_active_user, get_tenant, get_read_tenant
+from ..idempotency import IdempotentRoute
+from ..tenancy import TenantSession
+from ..services import asset_tree, costs, events, notifications, partitions
+from ..serializers import Projection
 
 router = APIRouter(
     prefix="/work-orders",
     tags=["work-orders"],
+    route_class=IdempotentRoute, # Retried creations replay the first response, see idempotency.py
 )
 
+MAX_BULK_OPERATIONS = 500
+
+# List responses skip ORM objects and per-row validation, see serializers.Projection
+WORK_ORDER_LIST = Projection(schemas.WorkOrder, models.WorkOrder)
+
 @router.post("", response_model=schemas.WorkOrder)
 def create_work_order(
     work_order: schemas.WorkOrderCreate,
     current_user: Annotated[models.User, Depends(get_current_active_user)],
-    db: Session = Depends(get_db)
+    tenant: Annotated[TenantSession, Depends(get_tenant)]
 ):
-    ticket_number = f"WO-{datetime.now().strftime('%Y%m%d%H%M%S')}"
+    tenant.validate_refs({
+        models.Asset: [work_order.asset_id],
+        models.Sector: [work_order.sector_id],
+        models.Worker: [work_order.assigned_to_id],
+    })
+
+    ticket_number = crud.unique_ticket_number(tenant.db, f"WO-{datetime.now().strftime('%Y%m%d%H%M%S')}")
 
-    db_wo = models.WorkOrder(
-        company_id=current_user.company_id,
+    db_wo = tenant.add(models.WorkOrder(
         asset_id=work_order.asset_id,
         sector_id=work_order.sector_id,
         ticket_number=ticket_number,
@@ -32,69 +48,231 @@ def create_work_order(
         observations=work_order.observations,
         requested_by_id=current_user.id, # defaulting to creator
         assigned_to_id=work_order.assigned_to_id
-    )
-    db.add(db_wo)
-    db.commit()
-    db.refresh(db_wo)
+    ))
+    tenant.db.flush()
+    events.emit(tenant.db, tenant.company_id, events.work_order_event(db_wo, "created"))
+    notifications.notify_assignments(tenant.db, tenant.company_id, [(db_wo.id, db_wo.assigned_to_id)])
+    tenant.db.commit()
+    tenant.db.refresh(db_wo)
     return db_wo
 
 @router.get("", response_model=List[schemas.WorkOrder])
 def read_work_orders(
-    current_user: Annotated[models.User, Depends(get_current_active_user)],
-    db: Session = Depends(get_db),
-    status: Optional[str] = None,
-    asset_id: Optional[int] = None
+    tenant: Annotated[TenantSession, Depends(get_read_tenant)],
+    status: Optional[models.WorkOrderStatus] = None,
+    asset_id: Optional[int] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    include_components: bool = False
 ):
-    query = db.query(models.WorkOrder).filter(models.WorkOrder.company_id == current_user.company_id)
+    """
+    Without created_from, lists every open order and the closed ones of the live retention
+    window (WORK_ORDER_RETENTION_DAYS): older closed orders are in /work-orders/archive.
+    """
+    query = tenant.query(models.WorkOrder)
     
     if status:
         query = query.filter(models.WorkOrder.status == status)
-    if asset_id:
+    if asset_id and include_components:
+        # The asset's orders and those of everything under it
+        query = query.filter(models.WorkOrder.asset_id.in_(asset_tree.subtree_ids(tenant, asset_id)))
+    elif asset_id:
         query = query.filter(models.WorkOrder.asset_id == asset_id)
+    # Bounds on created_at let Postgres skip the monthly partitions outside the range
+    if created_from:
+        query = query.filter(models.WorkOrder.created_at >= created_from)
+    else:
+        # Only closed orders get archived: an order still open stays listed however old it is
+        cutoff = datetime.now(timezone.utc) - timedelta(days=partitions.RETENTION_DAYS)
+        query = query.filter(or_(
+            models.WorkOrder.status.not_in(partitions.CLOSED_STATUSES), models.WorkOrder.created_at >= cutoff
+        ))
+    if created_to:
+        query = query.filter(models.WorkOrder.created_at < created_to)
         
-    return query.order_by(models.WorkOrder.created_at.desc()).all()
+    return WORK_ORDER_LIST.response(tenant.db, query.order_by(models.WorkOrder.created_at.desc()))
+
+@router.post("/bulk", response_model=List[schemas.WorkOrderBulkResult])
+def bulk_update_work_orders(
+    bulk: schemas.WorkOrderBulk,
+    tenant: Annotated[TenantSession, Depends(get_tenant)]
+):
+    """
+    Applies a batch of assign / status / priority / cancel operations in one transaction.
+    Invalid operations are reported per item and skipped; the rest are written with a single UPDATE.
+    Operations on the same work order are merged in order, the last value of a field wins.
+    """
+    if len(bulk.operations) > MAX_BULK_OPERATIONS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BULK_OPERATIONS} operations per request")
+
+    Action = schemas.WorkOrderBulkAction
+    existing = tenant.existing_ids({
+        models.WorkOrder: [op.work_order_id for op in bulk.operations],
+        models.Worker: [op.assigned_to_id for op in bulk.operations if op.action == Action.ASSIGN],
+    })
+
+    changes = {}
+    results = []
+    for op in bulk.operations:
+        detail = None
+        if op.work_order_id not in existing[models.WorkOrder]:
+            detail = "Work Order not found"
+        elif op.action == Action.ASSIGN and op.assigned_to_id and op.assigned_to_id not in existing[models.Worker]:
+            detail = "Invalid Worker ID"
+        elif op.action == Action.STATUS and not op.status:
+            detail = "status is required"
+        elif op.action == Action.PRIORITY and not op.priority:
+            detail = "priority is required"
+        if detail:
+            results.append(schemas.WorkOrderBulkResult(work_order_id=op.work_order_id, ok=False, detail=detail))
+            continue
+
+        change = changes.setdefault(op.work_order_id, {
+            "id": op.work_order_id, "set_assignee": False, "assigned_to_id": None, "status": None, "priority": None
+        })
+        if op.action == Action.ASSIGN:
+            change["set_assignee"] = True
+            change["assigned_to_id"] = op.assigned_to_id
+        elif op.action == Action.STATUS:
+            change["status"] = op.status
+        elif op.action == Action.CANCEL:
+            change["status"] = models.WorkOrderStatus.CANCELADA
+        elif op.action == Action.PRIORITY:
+            change["priority"] = op.priority
+        results.append(schemas.WorkOrderBulkResult(work_order_id=op.work_order_id, ok=True))
+
+    crud.bulk_update_work_orders(tenant.db, tenant.company_id, list(changes.values()))
+    events.emit_bulk_changes(tenant.db, tenant.company_id, list(changes.values()))
+    notifications.notify_assignments(tenant.db, tenant.company_id, [
+        (c["id"], c["assigned_to_id"]) for c in changes.values() if c["set_assignee"]
+    ])
+    tenant.db.commit()
+    return results
+
+@router.get("/archive", response_model=List[schemas.WorkOrder])
+def read_archived_work_orders(
+    year: int,
+    month: int,
+    tenant: Annotated[TenantSession, Depends(get_read_tenant)]
+):
+    """
+    Closed work orders created in the given month that were moved out of the live table.
+    """
+    if not 1 <= month <= 12:
+        raise HTTPException(status_code=400, detail="Invalid month")
+    return partitions.read_archived_work_orders(tenant.db, tenant.company_id, date(year, month, 1))
 
 @router.get("/{wo_id}", response_model=schemas.WorkOrder)
 def read_work_order(
     wo_id: int,
-    current_user: Annotated[models.User, Depends(get_current_active_user)],
-    db: Session = Depends(get_db)
+    tenant: Annotated[TenantSession, Depends(get_tenant)]
 ):
-    wo = db.query(models.WorkOrder).filter(models.WorkOrder.id == wo_id, models.WorkOrder.company_id == current_user.company_id).first()
-    if not wo:
-        raise HTTPException(status_code=404, detail="Work Order not found")
-    return wo
+    return tenant.get_or_404(models.WorkOrder, wo_id)
 
 @router.put("/{wo_id}", response_model=schemas.WorkOrder)
 def update_work_order(
     wo_id: int,
-    wo_update: schemas.WorkOrderCreate, # Using Create schema but treating partial fields handling manually or simpler full update
-    current_user: Annotated[models.User, Depends(get_current_active_user)],
-    db: Session = Depends(get_db)
+    wo_update: schemas.WorkOrderUpdate,
+    tenant: Annotated[TenantSession, Depends(get_tenant)]
 ):
-    # Note: Using Create schema for update is lazy but works if we iterate. Ideally use a dedicated Update schema with Optional fields.
-    # For now, we assume the frontend sends the full object or what's needed.
-    # But wait, Create schema has required fields. We should probably use a dynamic approach or creating an update schema.
-    # Given the MVP constraint, I'll stick to manual updates of key fields or assume the frontend sends everything.
-    
-    db_wo = db.query(models.WorkOrder).filter(models.WorkOrder.id == wo_id, models.WorkOrder.company_id == current_user.company_id).first()
-    if not db_wo:
-        raise HTTPException(status_code=404, detail="Work Order not found")
+    # Full update of the editable fields: the client sends the whole order back
+    db_wo = tenant.get_or_404(models.WorkOrder, wo_id)
+    tenant.validate_refs({models.Worker: [wo_update.assigned_to_id]})
+    crud.claim_version(tenant.db, db_wo, wo_update.version, schemas.WorkOrder)
 
-    # Update logic - for simplicity, updating what's passed except IDs if they shouldn't change
     db_wo.description = wo_update.description
     db_wo.observations = wo_update.observations
     db_wo.priority = wo_update.priority
-    db_wo.status = wo_update.status
-    db_wo.assigned_to_id = wo_update.assigned_to_id
-    
-    # Handle status changes side effects (start_date, end_date) could be added here
-    # Handle status changes side effects (start_date, end_date) could be added here
-    if wo_update.status == "EN_PROGRESO" and not db_wo.start_date:
-        db_wo.start_date = datetime.now()
-    if wo_update.status == "COMPLETADA" and not db_wo.end_date:
-        db_wo.end_date = datetime.now()
-
-    db.commit()
-    db.refresh(db_wo)
+    # Same side effects (assigned_at, start_date, end_date) as the bulk path
+    reassigned = crud.apply_work_order_assignee(db_wo, wo_update.assigned_to_id)
+    crud.apply_work_order_status(db_wo, wo_update.status)
+    events.emit(tenant.db, tenant.company_id, events.work_order_event(db_wo, "updated"))
+    if reassigned:
+        notifications.notify_assignments(tenant.db, tenant.company_id, [(db_wo.id, db_wo.assigned_to_id)])
+
+    tenant.db.commit()
+    tenant.db.refresh(db_wo)
     return db_wo
+
+# --- PARTS & LABOR ---
+@router.post("/{wo_id}/parts", response_model=schemas.WorkOrderPart)
+def add_work_order_part(
+    wo_id: int,
+    part: schemas.WorkOrderPartCreate,
+    tenant: Annotated[TenantSession, Depends(get_tenant)]
+):
+    """
+    Records a spare part used by the order: takes it out of stock and adds its cost to the
+    order and asset totals.
+    """
+    db_wo = tenant.get_or_404(models.WorkOrder, wo_id)
+    spare_part = tenant.get(models.SparePart, part.spare_part_id)
+    if not spare_part:
+        raise HTTPException(status_code=400, detail="Invalid Spare Part ID")
+
+    line = costs.add_part(tenant, db_wo, spare_part, part.quantity, part.unit_cost)
+    tenant.db.commit()
+    tenant.db.refresh(line)
+    return line
+
+@router.get("/{wo_id}/parts", response_model=List[schemas.WorkOrderPart])
+def read_work_order_parts(
+    wo_id: int,
+    tenant: Annotated[TenantSession, Depends(get_tenant)]
+):
+    return tenant.query(models.WorkOrderPart).filter(
+        models.WorkOrderPart.work_order_id == wo_id
+    ).order_by(models.WorkOrderPart.id).all()
+
+@router.delete("/{wo_id}/parts/{line_id}")
+def delete_work_order_part(
+    wo_id: int,
+    line_id: int,
+    tenant: Annotated[TenantSession, Depends(get_tenant)]
+):
+    line = tenant.get_or_404(models.WorkOrderPart, line_id)
+    if line.work_order_id != wo_id:
+        raise HTTPException(status_code=404, detail="Part line not found")
+
+    costs.remove_part(tenant, line)
+    tenant.db.commit()
+    return {"status": "success"}
+
+@router.post("/{wo_id}/labor", response_model=schemas.WorkOrderLabor)
+def add_work_order_labor(
+    wo_id: int,
+    labor: schemas.WorkOrderLaborCreate,
+    tenant: Annotated[TenantSession, Depends(get_tenant)]
+):
+    db_wo = tenant.get_or_404(models.WorkOrder, wo_id)
+    worker = tenant.get(models.Worker, labor.worker_id)
+    if not worker:
+        raise HTTPException(status_code=400, detail="Invalid Worker ID")
+
+    line = costs.add_labor(tenant, db_wo, worker, labor.minutes, labor.hourly_rate, labor.work_date)
+    tenant.db.commit()
+    tenant.db.refresh(line)
+    return line
+
+@router.get("/{wo_id}/labor", response_model=List[schemas.WorkOrderLabor])
+def read_work_order_labor(
+    wo_id: int,
+    tenant: Annotated[TenantSession, Depends(get_tenant)]
+):
+    return tenant.query(models.WorkOrderLabor).filter(
+        models.WorkOrderLabor.work_order_id == wo_id
+    ).order_by(models.WorkOrderLabor.id).all()
+
+@router.delete("/{wo_id}/labor/{line_id}")
+def delete_work_order_labor(
+    wo_id: int,
+    line_id: int,
+    tenant: Annotated[TenantSession, Depends(get_tenant)]
+):
+    line = tenant.get_or_404(models.WorkOrderLabor, line_id)
+    if line.work_order_id != wo_id:
+        raise HTTPException(status_code=404, detail="Labor line not found")
+
+    costs.remove_labor(tenant, line)
+    tenant.db.commit()
+    return {"status": "success"}
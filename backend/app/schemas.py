@@ -1,7 +1,13 @@
-from pydantic import BaseModel, EmailStr
-from typing import Optional, List
+from pydantic import BaseModel, ConfigDict, EmailStr
+from typing import Dict, Optional, List
 from datetime import datetime, date
 from uuid import UUID
+from enum import Enum
+
+from .models import (
+    CompanyStatus, FrequencyType, PurchaseOrderStatus,
+    WorkOrderPriority, WorkOrderStatus, WorkOrderType,
+)
 
 # User Schemas
 class UserBase(BaseModel):
@@ -14,9 +20,8 @@ class User(UserBase):
     id: int
     is_active: bool
     company_id: Optional[int] = None
-    
-    class Config:
-        orm_mode = True
+
+    model_config = ConfigDict(from_attributes=True)
 
 # Company Schemas
 class CompanyBase(BaseModel):
@@ -37,13 +42,15 @@ class CompanyUpdate(BaseModel):
     phone: Optional[str] = None
     email_contact: Optional[str] = None
     logo_url: Optional[str] = None
+    version: Optional[int] = None
 
 class Company(CompanyBase):
     id: int
     code: str
-    status: str
+    status: CompanyStatus
     created_at: datetime
     last_payment_date: Optional[date] = None
+    version: int = 1
     
     first_name: Optional[str] = None
     last_name: Optional[str] = None
@@ -54,9 +61,8 @@ class Company(CompanyBase):
     phone: Optional[str] = None
     email_contact: Optional[str] = None
     logo_url: Optional[str] = None
-    
-    class Config:
-        orm_mode = True
+
+    model_config = ConfigDict(from_attributes=True)
 
 # Token Schemas
 class Token(BaseModel):
@@ -67,19 +73,36 @@ class TokenData(BaseModel):
     email: Optional[str] = None
     company_id: Optional[int] = None
 
+class StreamToken(BaseModel):
+    token: str
+    expires_in: int # Seconds
+
 # Plan & Subscription Schemas
 class PlanBase(BaseModel):
     name: str
     price: float
     currency: str
     interval: str
+    limits: Optional[Dict[str, int]] = None
 
 class Plan(PlanBase):
     id: int
     mp_preapproval_plan_id: str
-    
-    class Config:
-        orm_mode = True
+
+    model_config = ConfigDict(from_attributes=True)
+
+class Entitlement(BaseModel):
+    company_id: int
+    company_status: Optional[str] = None
+    subscription_status: Optional[str] = None
+    plan_id: Optional[int] = None
+    plan_name: Optional[str] = None
+    limits: Dict[str, int] = {}
+    trial_ends_at: Optional[datetime] = None
+    allowed: bool
+    denied: Optional[str] = None
+
+    model_config = ConfigDict(from_attributes=True)
 
 class SubscriptionBase(BaseModel):
     status: str
@@ -90,9 +113,8 @@ class Subscription(SubscriptionBase):
     company_id: int
     plan_id: int
     plan: Plan
-    
-    class Config:
-        orm_mode = True
+
+    model_config = ConfigDict(from_attributes=True)
 
 # --- Preventive Maintenance Schemas ---
 
@@ -107,12 +129,11 @@ class PreventiveTask(PreventiveTaskBase):
     id: int
     plan_id: int
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 class PreventivePlanBase(BaseModel):
     name: str
-    frequency_type: str # using str to avoid enum complexity in pydantic validation simple cases
+    frequency_type: FrequencyType
     frequency_value: int = 1
     is_active: bool = True
     asset_id: int
@@ -127,8 +148,7 @@ class PreventivePlan(PreventivePlanBase):
     next_run: Optional[date] = None
     tasks: List[PreventiveTask] = []
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 # --- Work Order Schemas ---
 
@@ -136,9 +156,9 @@ class WorkOrderBase(BaseModel):
     title: Optional[str] = None # Maybe ticket_number is generated
     description: str
     observations: Optional[str] = None
-    priority: str = "MEDIA"
-    status: str = "PENDIENTE"
-    type: str = "CORRECTIVO"
+    priority: WorkOrderPriority = WorkOrderPriority.MEDIA
+    status: WorkOrderStatus = WorkOrderStatus.PENDIENTE
+    type: WorkOrderType = WorkOrderType.CORRECTIVO
     asset_id: Optional[int] = None
     sector_id: Optional[int] = None
     assigned_to_id: Optional[int] = None
@@ -146,6 +166,9 @@ class WorkOrderBase(BaseModel):
 class WorkOrderCreate(WorkOrderBase):
     requested_by_id: int
 
+class WorkOrderUpdate(WorkOrderCreate):
+    version: Optional[int] = None # The one the client edited; None skips the check, see crud.claim_version
+
 class WorkOrder(WorkOrderBase):
     id: int
     ticket_number: str
@@ -155,14 +178,129 @@ class WorkOrder(WorkOrderBase):
     assigned_at: Optional[datetime] = None
     start_date: Optional[datetime] = None
     end_date: Optional[datetime] = None
+    scheduled_date: Optional[date] = None
     plan_id: Optional[int] = None
+    parts_cost: float = 0
+    labor_cost: float = 0
+    labor_minutes: int = 0
+    version: int = 1
     asset: Optional["Asset"] = None # Avoid circular import issues if any, or strict order
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 from .schemas_archives import Asset
-WorkOrder.update_forward_refs()
+WorkOrder.model_rebuild()
+
+# Compiled once; FastAPI builds the same for List[...] response models
+
+class WorkOrderBulkAction(str, Enum):
+    ASSIGN = "ASSIGN" # assigned_to_id, None unassigns
+    STATUS = "STATUS" # status
+    PRIORITY = "PRIORITY" # priority
+    CANCEL = "CANCEL"
+
+class WorkOrderBulkOperation(BaseModel):
+    work_order_id: int
+    action: WorkOrderBulkAction
+    assigned_to_id: Optional[int] = None
+    status: Optional[WorkOrderStatus] = None
+    priority: Optional[WorkOrderPriority] = None
+
+class WorkOrderBulk(BaseModel):
+    operations: List[WorkOrderBulkOperation]
+
+class WorkOrderBulkResult(BaseModel):
+    work_order_id: int
+    ok: bool
+    detail: Optional[str] = None
+
+
+# --- Work Order Cost Schemas ---
+
+class WorkOrderPartCreate(BaseModel):
+    spare_part_id: int
+    quantity: int
+    unit_cost: Optional[float] = None # Defaults to the spare part's cost
+
+class WorkOrderPart(BaseModel):
+    id: int
+    work_order_id: int
+    spare_part_id: int
+    description: Optional[str] = None
+    quantity: int
+    unit_cost: float
+    total_cost: float
+    created_at: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+class WorkOrderLaborCreate(BaseModel):
+    worker_id: int
+    minutes: int
+    hourly_rate: Optional[float] = None # Defaults to the worker's rate
+    work_date: Optional[date] = None # Defaults to today
+
+class WorkOrderLabor(BaseModel):
+    id: int
+    work_order_id: int
+    worker_id: int
+    work_date: date
+    minutes: int
+    hourly_rate: float
+    total_cost: float
+
+    model_config = ConfigDict(from_attributes=True)
+
+class CostGroupBy(str, Enum):
+    ASSET = "ASSET"
+    SECTOR = "SECTOR" # Through the asset's current sector
+    MONTH = "MONTH"
+
+class CostReportRow(BaseModel):
+    asset_id: Optional[int] = None
+    sector_id: Optional[int] = None
+    period: Optional[date] = None
+    parts_cost: float
+    labor_cost: float
+    labor_minutes: int
+    total_cost: float
+
+
+# --- Scheduling Schemas ---
+
+class ScheduleHorizon(str, Enum):
+    DAY = "DAY"
+    WEEK = "WEEK" # Five workdays
+
+class ScheduleRequest(BaseModel):
+    start_date: Optional[date] = None # Defaults to today
+    horizon: ScheduleHorizon = ScheduleHorizon.DAY
+    sector_id: Optional[int] = None # Only orders and workers of this sector
+
+class ScheduleAssignment(BaseModel):
+    work_order_id: int
+    worker_id: int
+    scheduled_date: date
+    estimated_minutes: int
+
+class ScheduleUnassigned(BaseModel):
+    work_order_id: int
+    reason: str
+
+class ScheduleWorkerLoad(BaseModel):
+    worker_id: int
+    existing_minutes: int
+    scheduled_minutes: int
+    capacity_minutes: int
+
+class Schedule(BaseModel):
+    days: List[date]
+    capacity_minutes: int
+    assignments: List[ScheduleAssignment] = []
+    unassigned: List[ScheduleUnassigned] = []
+    workers: List[ScheduleWorkerLoad] = []
+
+    model_config = ConfigDict(from_attributes=True)
 
 
 # --- Purchase Order Schemas ---
@@ -183,8 +321,7 @@ class PurchaseOrderItem(PurchaseOrderItemBase):
     purchase_order_id: int
     total_price: float # Computed or stored? Stored in DB, compute in app
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 class PurchaseOrderBase(BaseModel):
     supplier_id: int
@@ -197,18 +334,74 @@ class PurchaseOrderCreate(PurchaseOrderBase):
     order_number: Optional[str] = None
     items: List[PurchaseOrderItemCreate] = []
 
+class PurchaseOrderUpdate(PurchaseOrderCreate):
+    version: Optional[int] = None
+
 class PurchaseOrder(PurchaseOrderBase):
     id: int
     company_id: int
-    status: str
+    status: PurchaseOrderStatus
     total_amount: float
     created_at: datetime
+    version: int = 1
     items: List[PurchaseOrderItem] = []
     supplier: Optional["SupplierOut"] = None # Use SupplierOut for display details
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 # Import necessary at the end to avoid circular deps if they exist
 from .schemas_archives import SupplierOut
-PurchaseOrder.update_forward_refs()
+PurchaseOrder.model_rebuild()
+
+
+
+# --- Attachment Schemas ---
+
+class Attachment(BaseModel):
+    id: int
+    work_order_id: Optional[int] = None
+    asset_id: Optional[int] = None
+    filename: str
+    content_type: str
+    size: int
+    sha256: str
+    has_thumbnail: bool = False
+    created_at: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+# --- Offline Sync Schemas ---
+
+class SyncTombstone(BaseModel):
+    entity_type: str
+    entity_id: int
+    deleted_at: datetime
+
+    model_config = ConfigDict(from_attributes=True)
+
+class SyncChanges(BaseModel):
+    watermark: datetime # Pass back as `since` on the next pull
+    has_more: bool # True if a batch was truncated, pull again right away
+    work_orders: List[WorkOrder] = []
+    assets: List[Asset] = []
+    tools: List["Tool"] = []
+    spare_parts: List["SparePartOut"] = []
+    plans: List[PreventivePlan] = []
+    deleted: List[SyncTombstone] = []
+
+class WorkOrderStatusChange(BaseModel):
+    work_order_id: int
+    status: WorkOrderStatus
+    observations: Optional[str] = None
+
+class SyncPush(BaseModel):
+    changes: List[WorkOrderStatusChange] = []
+
+class SyncPushResult(BaseModel):
+    work_order_id: int
+    ok: bool
+    detail: Optional[str] = None
+
+from .schemas_archives import Tool, SparePartOut
+SyncChanges.model_rebuild()
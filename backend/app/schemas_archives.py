@@ -1,6 +1,6 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from typing import Optional, List
-from datetime import date
+from datetime import date, datetime
 from enum import Enum
 
 # --- Existing User/Company Schemas (Assuming they are imported or here) ---
@@ -18,6 +18,16 @@ class AssetStatus(str, Enum):
     INACTIVE = "INACTIVE"
     MAINTENANCE = "MAINTENANCE"
 
+class AssetEventKind(str, Enum):
+    WORK_ORDER = "WORK_ORDER"
+    PREVENTIVE_RUN = "PREVENTIVE_RUN" # Work order generated by a preventive plan
+    PART_CONSUMED = "PART_CONSUMED"
+    TOOL_CHECKOUT = "TOOL_CHECKOUT" # Tool checked out against one of the asset's work orders
+
+class ToolMovementAction(str, Enum):
+    CHECKOUT = "CHECKOUT"
+    RETURN = "RETURN"
+
 # --- SECTORS ---
 class SectorBase(BaseModel):
     name: str
@@ -26,12 +36,15 @@ class SectorBase(BaseModel):
 class SectorCreate(SectorBase):
     pass
 
+class SectorUpdate(SectorCreate):
+    version: Optional[int] = None # The one the client edited; None skips the check, see crud.claim_version
+
 class Sector(SectorBase):
     id: int
     company_id: int
+    version: int = 1
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 # --- WORKERS ---
 class WorkerBase(BaseModel):
@@ -42,17 +55,21 @@ class WorkerBase(BaseModel):
     phone: Optional[str] = None
     job_title: Optional[str] = None
     sector_id: Optional[int] = None
+    hourly_rate: Optional[float] = None
 
 class WorkerCreate(WorkerBase):
     pass
 
+class WorkerUpdate(WorkerCreate):
+    version: Optional[int] = None
+
 class Worker(WorkerBase):
     id: int
     company_id: int
+    version: int = 1
     is_active: bool
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 # --- ASSETS ---
 class AssetBase(BaseModel):
@@ -63,16 +80,46 @@ class AssetBase(BaseModel):
     serial_number: Optional[str] = None
     purchase_date: Optional[date] = None
     status: AssetStatus = AssetStatus.ACTIVE
+    parent_id: Optional[int] = None # Asset this one is part of
 
 class AssetCreate(AssetBase):
     pass
 
+class AssetUpdate(AssetCreate):
+    version: Optional[int] = None
+
+class AssetRollup(BaseModel):
+    # Totals of the asset and everything under it
+    work_orders: int = 0
+    open_work_orders: int = 0
+    parts_cost: float = 0
+    labor_cost: float = 0
+    labor_minutes: int = 0
+
 class Asset(AssetBase):
     id: int
     company_id: int
-
-    class Config:
-        orm_mode = True
+    version: int = 1
+    rollup: Optional[AssetRollup] = None # Only with ?rollup=true
+
+    model_config = ConfigDict(from_attributes=True)
+
+class AssetEvent(BaseModel):
+    kind: AssetEventKind
+    occurred_at: datetime
+    id: int # Of the source row, unique per kind
+    work_order_id: Optional[int] = None
+    title: Optional[str] = None
+    detail: Optional[str] = None
+    status: Optional[str] = None
+    worker_id: Optional[int] = None
+    plan_id: Optional[int] = None
+    quantity: Optional[int] = None
+    cost: Optional[float] = None # Parts and labor so far for work orders
+
+class AssetTimeline(BaseModel):
+    events: List[AssetEvent] = []
+    next_cursor: Optional[str] = None # Pass as `before` for the next (older) page
 
 # --- TOOLS ---
 class ToolBase(BaseModel):
@@ -86,12 +133,51 @@ class ToolBase(BaseModel):
 class ToolCreate(ToolBase):
     pass
 
+class ToolUpdate(ToolCreate):
+    version: Optional[int] = None
+
 class Tool(ToolBase):
     id: int
     company_id: int
+    version: int = 1
+    checked_out_at: Optional[datetime] = None
+    due_at: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
 
-    class Config:
-        orm_mode = True
+class ToolCheckout(BaseModel):
+    tool_ids: List[int]
+    worker_id: Optional[int] = None # Worker or sector taking the tools
+    sector_id: Optional[int] = None
+    work_order_id: Optional[int] = None
+    due_at: Optional[datetime] = None
+    notes: Optional[str] = None
+
+class ToolReturn(BaseModel):
+    tool_ids: List[int]
+    status: ToolStatus = ToolStatus.AVAILABLE # Condition the tools come back in
+    notes: Optional[str] = None
+
+class ToolBulkResult(BaseModel):
+    tool_id: int
+    ok: bool
+    detail: Optional[str] = None
+
+class ToolMovement(BaseModel):
+    id: int
+    tool_id: int
+    action: ToolMovementAction
+    worker_id: Optional[int] = None
+    sector_id: Optional[int] = None
+    work_order_id: Optional[int] = None
+    asset_id: Optional[int] = None
+    user_id: Optional[int] = None
+    due_at: Optional[datetime] = None
+    status: Optional[str] = None
+    notes: Optional[str] = None
+    created_at: datetime
+
+    model_config = ConfigDict(from_attributes=True)
 
 # --- SPARE PARTS ---
 class SparePartCategoryBase(BaseModel):
@@ -105,8 +191,7 @@ class SparePartCategoryOut(SparePartCategoryBase):
     id: int
     company_id: int
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 class SparePartBase(BaseModel):
     name: str
@@ -119,13 +204,16 @@ class SparePartBase(BaseModel):
 class SparePartCreate(SparePartBase):
     pass
 
+class SparePartUpdate(SparePartCreate):
+    version: Optional[int] = None
+
 class SparePartOut(SparePartBase):
     id: int
     company_id: int
+    version: int = 1
     category: Optional[SparePartCategoryOut] = None
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 # --- SUPPLIERS ---
 class SupplierBase(BaseModel):
@@ -140,10 +228,13 @@ class SupplierBase(BaseModel):
 class SupplierCreate(SupplierBase):
     category_ids: List[int] = []
 
+class SupplierUpdate(SupplierCreate):
+    version: Optional[int] = None
+
 class SupplierOut(SupplierBase):
     id: int
     company_id: int
+    version: int = 1
     categories: List[SparePartCategoryOut] = []
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
@@ -0,0 +1,146 @@
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from sqlalchemy import inspect, select
+from sqlalchemy.orm import Query, Session
+from sqlalchemy.orm.interfaces import MANYTOMANY, MANYTOONE
+from collections import defaultdict
+from decimal import Decimal
+from typing import Union, get_args, get_origin
+import orjson
+
+class ORJSONResponse(JSONResponse):
+    """JSON response rendered with orjson; datetimes, dates and enums are encoded natively."""
+
+    def render(self, content) -> bytes:
+        # UTC as "Z", like Pydantic
+        return orjson.dumps(content, default=_default, option=orjson.OPT_UTC_Z)
+
+def _default(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError
+
+def _unwrap(annotation):
+    """Optional[X] -> (X, False), List[X] -> (X, True), X -> (X, False)."""
+    if get_origin(annotation) is Union:
+        args = [arg for arg in get_args(annotation) if arg is not type(None)]
+        annotation = args[0] if len(args) == 1 else annotation
+    if get_origin(annotation) is list:
+        return get_args(annotation)[0], True
+    return annotation, False
+
+def _converter(annotation):
+    # orjson already encodes enums, dates and datetimes like the schemas do;
+    # only float fields backed by Numeric/Integer columns need coercing
+    kind, _ = _unwrap(annotation)
+    if kind is float:
+        return lambda value: None if value is None else float(value)
+    return None
+
+class Projection:
+    """
+    Serializes rows of `model` exactly as `schema` would, without building ORM objects or
+    validating them: selects only the columns the schema uses, loads nested schemas with
+    one batched query per relationship, and turns rows into plain dicts.
+    Built lazily on first use, once per schema.
+    """
+
+    def __init__(self, schema, model):
+        self.schema = schema
+        self.model = model
+        self._compiled = False
+
+    def _compile(self):
+        mapper = inspect(self.model)
+        columns = mapper.columns
+        self.fields = [] # (name, converter)
+        self.defaults = {}
+        self.nested = [] # (name, relationship, Projection)
+        needed = {mapper.primary_key[0].key}
+
+        for name, field in self.schema.model_fields.items():
+            kind, _ = _unwrap(field.annotation)
+            if isinstance(kind, type) and issubclass(kind, BaseModel) and name in mapper.relationships:
+                relationship = mapper.relationships[name]
+                self.nested.append((name, relationship, Projection(kind, relationship.mapper.class_)))
+                if relationship.direction is MANYTOONE:
+                    needed.update(local.key for local, _ in relationship.local_remote_pairs)
+            elif name in columns:
+                self.fields.append((name, _converter(field.annotation)))
+                needed.add(name)
+            else:
+                # Not stored (e.g. WorkOrder.title): from_orm falls back to the default too
+                self.defaults[name] = field.get_default(call_default_factory=True)
+
+        self.column_keys = sorted(needed)
+        self.columns = [columns[key] for key in self.column_keys]
+        self._compiled = True
+
+    def _to_dict(self, row: dict) -> dict:
+        data = dict(self.defaults)
+        for name, convert in self.fields:
+            value = row[name]
+            data[name] = convert(value) if convert else value
+        return data
+
+    def _serialize(self, db: Session, rows: list) -> list:
+        rows = [dict(zip(self.column_keys, row)) for row in rows]
+        results = [self._to_dict(row) for row in rows]
+        for name, relationship, projection in self.nested:
+            related = projection._load_related(db, relationship, rows)
+            local = relationship.local_remote_pairs[0][0]
+            for row, result in zip(rows, results):
+                if relationship.direction is MANYTOONE:
+                    result[name] = related.get(row[local.key])
+                else:
+                    result[name] = related.get(row[local.key], [])
+        return results
+
+    def _load_related(self, db: Session, relationship, parent_rows: list) -> dict:
+        """Loads this projection's rows for every parent at once, keyed by the parent join value."""
+        if not self._compiled:
+            self._compile()
+        if relationship.direction is MANYTOMANY:
+            # First pair: parent id -> association table column pointing at the parent
+            local, secondary_local = relationship.local_remote_pairs[0]
+            keys = {row[local.key] for row in parent_rows}
+            if not keys:
+                return {}
+            stmt = (
+                select(secondary_local, *self.columns)
+                .join_from(relationship.secondary, self.model)
+                .where(secondary_local.in_(keys))
+                .order_by(*inspect(self.model).primary_key)
+            )
+            fetched = db.execute(stmt).all()
+            items = self._serialize(db, [row[1:] for row in fetched])
+            grouped = defaultdict(list)
+            for row, item in zip(fetched, items):
+                grouped[row[0]].append(item)
+            return grouped
+
+        local, remote = relationship.local_remote_pairs[0]
+        keys = {row[local.key] for row in parent_rows if row[local.key] is not None}
+        if not keys:
+            return {}
+        # The join column goes last even if the schema also selects it
+        stmt = select(*self.columns, remote).where(remote.in_(keys)).order_by(*inspect(self.model).primary_key)
+        fetched = db.execute(stmt).all()
+        remote_values = [row[-1] for row in fetched]
+        items = self._serialize(db, [row[:-1] for row in fetched])
+
+        if relationship.direction is MANYTOONE:
+            return dict(zip(remote_values, items))
+        grouped = defaultdict(list)
+        for value, item in zip(remote_values, items):
+            grouped[value].append(item)
+        return grouped
+
+    def all(self, db: Session, query: Query) -> list:
+        """Runs `query` (an ORM query over the model, with its filters and ordering) projected."""
+        if not self._compiled:
+            self._compile()
+        return self._serialize(db, query.with_entities(*self.columns).all())
+
+    def response(self, db: Session, query: Query) -> ORJSONResponse:
+        return ORJSONResponse(self.all(db, query))
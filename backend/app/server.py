@@ -0,0 +1,37 @@
+"""
+Uvicorn worker for gunicorn (see gunicorn.conf.py) that drains on SIGTERM: it stops
+accepting connections, ends the server-sent event streams so their clients reconnect to a
+live worker, lets requests in flight finish and runs the app's lifespan shutdown, all
+within gunicorn's graceful_timeout.
+"""
+import sys
+
+from gunicorn.arbiter import Arbiter
+from uvicorn.server import Server
+from uvicorn_worker import UvicornWorker
+
+from .services import events
+
+# Kept back from graceful_timeout for the lifespan shutdown, before gunicorn kills the worker
+SHUTDOWN_MARGIN_SECONDS = 5
+
+class DrainingServer(Server):
+    async def shutdown(self, sockets=None):
+        # Streams never finish by themselves: without this, every drain would hit the timeout
+        events.broker.close_all()
+        await super().shutdown(sockets)
+
+class DrainingUvicornWorker(UvicornWorker):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Uvicorn waits forever by default; past this, requests still running are cancelled
+        self.config.timeout_graceful_shutdown = max(self.cfg.graceful_timeout - SHUTDOWN_MARGIN_SECONDS, 1)
+
+    async def _serve(self):
+        # UvicornWorker._serve with the draining server
+        self.config.app = self.wsgi
+        server = DrainingServer(config=self.config)
+        self._install_sigquit_handler()
+        await server.serve(sockets=self.sockets)
+        if not server.started:
+            sys.exit(Arbiter.WORKER_BOOT_ERROR)
@@ -0,0 +1,127 @@
+"""
+Asset hierarchy (plant > line > machine > component) kept in a closure table, asset_tree:
+a row for every ancestor/descendant pair, each asset paired with itself at depth 0. Reading
+a subtree is then one range scan on the primary key (ancestor_id, ...) whatever its depth,
+and the "everything under line 3" queries join it like any other table.
+
+Assets.parent_id is the source of truth for the shape, asset_tree is derived from it and
+only changed here:
+- add() files a new asset under its parent: its parent's ancestor rows plus its own.
+- move() re-parents an asset with its whole subtree in a fixed number of statements,
+  rewriting only the pairs that cross the subtree's boundary (depth x subtree size rows).
+- remove() refuses assets that still have components, so nothing is left orphaned.
+"""
+from fastapi import HTTPException
+from sqlalchemy import delete, func, insert, literal, select, text, true
+from sqlalchemy.orm import aliased
+from decimal import Decimal
+from typing import Dict, Iterable, Optional
+
+from .. import models
+from ..tenancy import TenantSession
+from .scheduling import OPEN_STATUSES
+
+AssetTreePath = models.AssetTreePath
+
+def _lock(tenant: TenantSession):
+    # Moves check for cycles before rewriting paths: two concurrent moves could each pass
+    # the check and together close a loop, so the company's tree changes one at a time
+    if tenant.db.get_bind().dialect.name == "postgresql":
+        tenant.db.execute(text("SELECT pg_advisory_xact_lock(hashtext('asset_tree:' || :cid))"),
+                          {"cid": str(tenant.company_id)})
+
+def subtree_ids(tenant: TenantSession, asset_id: int):
+    """Select of the IDs of the asset and everything under it, to use in an IN filter."""
+    return select(AssetTreePath.descendant_id).where(
+        AssetTreePath.ancestor_id == asset_id, AssetTreePath.company_id == tenant.company_id
+    )
+
+def _link(tenant: TenantSession, parent_id: int, subtree_of: int):
+    """Pairs every ancestor of parent_id (itself included) with every node of subtree_of's subtree."""
+    above = aliased(AssetTreePath)
+    below = aliased(AssetTreePath)
+    tenant.db.execute(insert(AssetTreePath).from_select(
+        ["ancestor_id", "descendant_id", "depth", "company_id"],
+        select(above.ancestor_id, below.descendant_id, above.depth + below.depth + 1, literal(tenant.company_id))
+        .join(below, true()) # Every pair: a cross join
+        .where(above.descendant_id == parent_id, below.ancestor_id == subtree_of)
+    ))
+
+def add(tenant: TenantSession, asset: models.Asset):
+    """Files a new, already flushed asset under its parent_id."""
+    if asset.parent_id:
+        _lock(tenant)
+    tenant.db.add(AssetTreePath(ancestor_id=asset.id, descendant_id=asset.id, depth=0, company_id=tenant.company_id))
+    tenant.db.flush()
+    if asset.parent_id:
+        _link(tenant, asset.parent_id, asset.id)
+
+def move(tenant: TenantSession, asset: models.Asset, parent_id: Optional[int]):
+    """Moves the asset, with its components, under parent_id (None for the top level)."""
+    if parent_id == asset.parent_id:
+        return
+    _lock(tenant)
+    if parent_id and tenant.db.execute(
+        subtree_ids(tenant, asset.id).where(AssetTreePath.descendant_id == parent_id)
+    ).first():
+        raise HTTPException(status_code=400, detail="Un activo no puede quedar debajo de sí mismo ni de sus componentes")
+
+    # Cut the subtree off its old ancestors; the pairs inside it stay as they are
+    subtree = subtree_ids(tenant, asset.id)
+    old_ancestors = select(AssetTreePath.ancestor_id).where(
+        AssetTreePath.descendant_id == asset.id, AssetTreePath.ancestor_id != asset.id
+    )
+    tenant.db.execute(
+        delete(AssetTreePath).where(
+            AssetTreePath.descendant_id.in_(subtree), AssetTreePath.ancestor_id.in_(old_ancestors)
+        ),
+        execution_options={"synchronize_session": False},
+    )
+    if parent_id:
+        _link(tenant, parent_id, asset.id)
+    asset.parent_id = parent_id
+
+def remove(tenant: TenantSession, asset: models.Asset):
+    """Drops a childless asset's paths, before the asset itself is deleted."""
+    _lock(tenant)
+    if tenant.query(models.Asset).filter(models.Asset.parent_id == asset.id).first():
+        raise HTTPException(status_code=400, detail="El activo tiene componentes, movelos o eliminalos primero")
+    tenant.db.execute(
+        delete(AssetTreePath).where(AssetTreePath.descendant_id == asset.id),
+        execution_options={"synchronize_session": False},
+    )
+
+def _empty_rollup() -> dict:
+    return {"work_orders": 0, "open_work_orders": 0, "parts_cost": Decimal(0), "labor_cost": Decimal(0), "labor_minutes": 0}
+
+def rollups(tenant: TenantSession, asset_ids: Optional[Iterable[int]] = None) -> Dict[int, dict]:
+    """
+    Totals of each asset's whole subtree: live work orders (all and still open) and the
+    maintenance cost booked so far, from the asset_monthly_costs counters.
+    Every asset of the company when asset_ids is None.
+    """
+    WorkOrder = models.WorkOrder
+    Cost = models.AssetMonthlyCost
+    tree = AssetTreePath
+    scope = [tree.company_id == tenant.company_id]
+    if asset_ids is not None:
+        scope.append(tree.ancestor_id.in_(list(asset_ids)))
+
+    totals = {}
+    for asset_id, count, open_count in tenant.db.execute(
+        select(tree.ancestor_id, func.count(WorkOrder.id),
+               func.count(WorkOrder.id).filter(WorkOrder.status.in_(OPEN_STATUSES)))
+        .join(WorkOrder, WorkOrder.asset_id == tree.descendant_id)
+        .where(*scope, WorkOrder.company_id == tenant.company_id)
+        .group_by(tree.ancestor_id)
+    ):
+        totals.setdefault(asset_id, _empty_rollup()).update(work_orders=count, open_work_orders=open_count)
+    for asset_id, parts_cost, labor_cost, labor_minutes in tenant.db.execute(
+        select(tree.ancestor_id, func.sum(Cost.parts_cost), func.sum(Cost.labor_cost), func.sum(Cost.labor_minutes))
+        .join(Cost, Cost.asset_id == tree.descendant_id)
+        .where(*scope, Cost.company_id == tenant.company_id)
+        .group_by(tree.ancestor_id)
+    ):
+        totals.setdefault(asset_id, _empty_rollup()).update(
+            parts_cost=parts_cost or Decimal(0), labor_cost=labor_cost or Decimal(0), labor_minutes=labor_minutes or 0)
+    return totals
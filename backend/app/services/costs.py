@@ -0,0 +1,143 @@
+from fastapi import HTTPException
+from sqlalchemy import func
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from typing import Optional
+
+from .. import models
+from ..tenancy import TenantSession
+
+CENTS = Decimal("0.01")
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+def _bump_asset_month(db: Session, company_id: int, asset_id: int, period: date,
+                      parts_cost: Decimal, labor_cost: Decimal, labor_minutes: int):
+    """Adds the deltas to the asset's row for the month, creating it on first use."""
+    table = models.AssetMonthlyCost.__table__
+    insert = postgresql.insert if db.get_bind().dialect.name == "postgresql" else sqlite.insert
+    stmt = insert(table).values(
+        asset_id=asset_id, period=period, company_id=company_id,
+        parts_cost=parts_cost, labor_cost=labor_cost, labor_minutes=labor_minutes
+    )
+    # Increments in SQL, so concurrent lines on the same asset never overwrite each other
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=[table.c.asset_id, table.c.period],
+        set_={
+            "parts_cost": table.c.parts_cost + stmt.excluded.parts_cost,
+            "labor_cost": table.c.labor_cost + stmt.excluded.labor_cost,
+            "labor_minutes": table.c.labor_minutes + stmt.excluded.labor_minutes,
+        }
+    ))
+
+def _bump_totals(tenant: TenantSession, work_order_id: int, asset_id: Optional[int], period: date,
+                 parts_cost: Decimal = Decimal(0), labor_cost: Decimal = Decimal(0), labor_minutes: int = 0):
+    WorkOrder = models.WorkOrder
+    tenant.query(WorkOrder).filter(WorkOrder.id == work_order_id).update({
+        WorkOrder.parts_cost: WorkOrder.parts_cost + parts_cost,
+        WorkOrder.labor_cost: WorkOrder.labor_cost + labor_cost,
+        WorkOrder.labor_minutes: WorkOrder.labor_minutes + labor_minutes,
+    }, synchronize_session=False)
+    if asset_id:
+        _bump_asset_month(tenant.db, tenant.company_id, asset_id, period, parts_cost, labor_cost, labor_minutes)
+
+def _move_stock(tenant: TenantSession, spare_part_id: int, quantity: int):
+    """Adds `quantity` (negative to take out) to the part's stock, refusing to go below zero."""
+    SparePart = models.SparePart
+    query = tenant.query(SparePart).filter(SparePart.id == spare_part_id)
+    if quantity < 0:
+        query = query.filter(SparePart.stock >= -quantity)
+    # A new version, so an edit form still showing the old stock can't write it back
+    if not query.update({SparePart.stock: SparePart.stock + quantity, SparePart.version: SparePart.version + 1},
+                        synchronize_session=False):
+        raise HTTPException(status_code=400, detail="Not enough stock")
+
+def add_part(tenant: TenantSession, work_order: models.WorkOrder, spare_part: models.SparePart,
+             quantity: int, unit_cost: Optional[float] = None) -> models.WorkOrderPart:
+    if quantity <= 0:
+        raise HTTPException(status_code=400, detail="quantity must be positive")
+    _move_stock(tenant, spare_part.id, -quantity)
+
+    unit_cost = Decimal(str(unit_cost)) if unit_cost is not None else Decimal(spare_part.cost or 0)
+    created_at = datetime.now(timezone.utc)
+    line = tenant.add(models.WorkOrderPart(
+        work_order_id=work_order.id,
+        asset_id=work_order.asset_id,
+        spare_part_id=spare_part.id,
+        description=spare_part.name,
+        quantity=quantity,
+        unit_cost=unit_cost,
+        total_cost=(unit_cost * quantity).quantize(CENTS),
+        created_at=created_at,
+    ))
+    _bump_totals(tenant, work_order.id, line.asset_id, month_start(created_at.date()), parts_cost=line.total_cost)
+    return line
+
+def remove_part(tenant: TenantSession, line: models.WorkOrderPart):
+    # The quantity goes back to stock and the costs come off the month they were booked in
+    _move_stock(tenant, line.spare_part_id, line.quantity)
+    _bump_totals(tenant, line.work_order_id, line.asset_id, month_start(line.created_at.date()),
+                 parts_cost=-line.total_cost)
+    tenant.db.delete(line)
+
+def add_labor(tenant: TenantSession, work_order: models.WorkOrder, worker: models.Worker, minutes: int,
+              hourly_rate: Optional[float] = None, work_date: Optional[date] = None) -> models.WorkOrderLabor:
+    if minutes <= 0:
+        raise HTTPException(status_code=400, detail="minutes must be positive")
+
+    hourly_rate = Decimal(str(hourly_rate)) if hourly_rate is not None else Decimal(worker.hourly_rate or 0)
+    work_date = work_date or date.today()
+    line = tenant.add(models.WorkOrderLabor(
+        work_order_id=work_order.id,
+        asset_id=work_order.asset_id,
+        worker_id=worker.id,
+        work_date=work_date,
+        minutes=minutes,
+        hourly_rate=hourly_rate,
+        total_cost=(hourly_rate * minutes / 60).quantize(CENTS),
+    ))
+    _bump_totals(tenant, work_order.id, line.asset_id, month_start(work_date),
+                 labor_cost=line.total_cost, labor_minutes=minutes)
+    return line
+
+def remove_labor(tenant: TenantSession, line: models.WorkOrderLabor):
+    _bump_totals(tenant, line.work_order_id, line.asset_id, month_start(line.work_date),
+                 labor_cost=-line.total_cost, labor_minutes=-line.minutes)
+    tenant.db.delete(line)
+
+# Report group -> (field name, column)
+REPORT_GROUPS = {
+    "ASSET": ("asset_id", models.AssetMonthlyCost.asset_id),
+    "SECTOR": ("sector_id", models.Asset.sector_id),
+    "MONTH": ("period", models.AssetMonthlyCost.period),
+}
+
+def cost_report(tenant: TenantSession, date_from: date, date_to: date, group_by, sector_id: Optional[int] = None) -> list:
+    """
+    Maintenance cost between two months (both included), grouped by asset, sector or month.
+    Reads only asset_monthly_costs, so the cost follows the number of asset-months in the
+    range, not the number of orders or lines behind them.
+    """
+    Cost = models.AssetMonthlyCost
+    label, key = REPORT_GROUPS[group_by.value]
+    query = tenant.query(
+        Cost, key, func.sum(Cost.parts_cost), func.sum(Cost.labor_cost), func.sum(Cost.labor_minutes)
+    ).filter(Cost.period >= month_start(date_from), Cost.period <= month_start(date_to))
+    if group_by.value == "SECTOR" or sector_id:
+        query = query.join(models.Asset, models.Asset.id == Cost.asset_id)
+    if sector_id:
+        query = query.filter(models.Asset.sector_id == sector_id)
+
+    rows = []
+    for value, parts_cost, labor_cost, labor_minutes in query.group_by(key).order_by(key):
+        rows.append({
+            label: value,
+            "parts_cost": parts_cost,
+            "labor_cost": labor_cost,
+            "labor_minutes": labor_minutes,
+            "total_cost": parts_cost + labor_cost,
+        })
+    return rows
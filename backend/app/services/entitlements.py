@@ -0,0 +1,150 @@
+"""
+What a company may do right now: its status, subscription, plan and the plan's limits,
+resolved with one query and cached per process. Changes that affect it call invalidate()
+in their transaction; on commit every process (API and workers alike) drops its copy,
+through Postgres NOTIFY when there is more than one.
+"""
+from fastapi import HTTPException
+from sqlalchemy import event, select, text
+from sqlalchemy.orm import Session
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+import os
+import time
+
+from .. import models
+from ..database import SessionLocal
+from ..tenancy import TenantSession
+from . import events
+
+CHANNEL = "mant_entitlements"
+# Companies without an authorized subscription can use the app this long after signing up
+TRIAL_DAYS = int(os.getenv("TRIAL_DAYS", "14"))
+# Safety net for missed invalidations (e.g. SQLite setups with several processes)
+CACHE_SECONDS = float(os.getenv("ENTITLEMENT_CACHE_SECONDS", "300"))
+
+ACTIVE_SUBSCRIPTION_STATUSES = {"authorized"}
+
+@dataclass(frozen=True)
+class Entitlement:
+    company_id: int
+    company_status: models.CompanyStatus
+    subscription_status: Optional[str]
+    plan_id: Optional[int]
+    plan_name: Optional[str]
+    limits: Dict[str, int] = field(default_factory=dict)
+    trial_ends_at: Optional[datetime] = None
+    # Why the company is locked out and the HTTP status to answer with; None when it's allowed in
+    denied: Optional[str] = None
+    denied_status: Optional[int] = None
+
+    @property
+    def allowed(self) -> bool:
+        return self.denied is None
+
+# company_id -> (Entitlement, time.monotonic() when it expires)
+_cache = {}
+# Bumped on every invalidation, so a lookup that raced with one doesn't cache stale data
+_generation = 0
+
+def resolve(db: Session, company_id: int) -> Entitlement:
+    """Reads the company's entitlement from the database (one query)."""
+    company, sub, plan = models.Company, models.Subscription, models.Plan
+    row = db.execute(select(
+        company.status, company.created_at, sub.status, plan.id, plan.name, plan.limits
+    ).select_from(company).outerjoin(sub, sub.company_id == company.id).outerjoin(
+        plan, plan.id == sub.plan_id
+    ).where(company.id == company_id)).first()
+    if row is None:
+        return Entitlement(company_id, None, None, None, None, denied="Empresa no encontrada", denied_status=403)
+
+    company_status, created_at, sub_status, plan_id, plan_name, limits = row
+    subscribed = sub_status in ACTIVE_SUBSCRIPTION_STATUSES
+    trial_ends_at = None
+    if not subscribed and created_at is not None:
+        if created_at.tzinfo is None:
+            created_at = created_at.replace(tzinfo=timezone.utc) # SQLite drops the zone
+        trial_ends_at = created_at + timedelta(days=TRIAL_DAYS)
+
+    denied, denied_status = None, None
+    if company_status == models.CompanyStatus.SUSPENDED:
+        denied, denied_status = "Empresa suspendida", 403
+    elif company_status == models.CompanyStatus.DELETED_PENDING:
+        denied, denied_status = "Empresa dada de baja", 403
+    elif not subscribed and (trial_ends_at is None or trial_ends_at < datetime.now(timezone.utc)):
+        denied, denied_status = "Suscripción inactiva", 402
+
+    return Entitlement(
+        company_id, company_status, sub_status, plan_id if subscribed else None, plan_name if subscribed else None,
+        dict(limits or {}) if subscribed else {}, trial_ends_at, denied, denied_status,
+    )
+
+def get(db: Session, company_id: int) -> Entitlement:
+    """The company's entitlement, from the cache when possible (no query on a hit)."""
+    entitlement = cached(company_id)
+    if entitlement is not None:
+        return entitlement
+    # The listener must be up before anything is cached, or invalidations could be missed
+    events.ensure_listener()
+    generation = _generation
+    entitlement = resolve(db, company_id)
+    if generation == _generation:
+        _cache[company_id] = (entitlement, time.monotonic() + CACHE_SECONDS)
+    return entitlement
+
+def cached(company_id: int) -> Optional[Entitlement]:
+    """The cached entitlement if there is a fresh one, without touching the database."""
+    hit = _cache.get(company_id)
+    return hit[0] if hit is not None and hit[1] > time.monotonic() else None
+
+def check(db: Session, company_id: int) -> Entitlement:
+    entitlement = get(db, company_id)
+    if not entitlement.allowed:
+        raise HTTPException(status_code=entitlement.denied_status, detail=entitlement.denied)
+    return entitlement
+
+def check_limit(tenant: TenantSession, limit: str, model):
+    """Refuses to create another `model` row once the plan's `limit` count is reached."""
+    maximum = get(tenant.db, tenant.company_id).limits.get(limit)
+    if maximum is not None and tenant.query(model).count() >= maximum:
+        raise HTTPException(status_code=403, detail=f"Límite del plan alcanzado ({limit}: {maximum})")
+
+# --- Invalidation ---
+def invalidate(db: Session, company_id: int):
+    """Drops the company's cached entitlement everywhere once the session commits."""
+    db.info.setdefault("entitlements", set()).add(company_id)
+
+def _evict(company_id: Optional[int] = None):
+    global _generation
+    _generation += 1
+    if company_id is None:
+        _cache.clear()
+    else:
+        _cache.pop(company_id, None)
+
+@event.listens_for(SessionLocal, "before_commit")
+def _notify(session):
+    if session.get_bind().dialect.name != "postgresql":
+        return
+    for company_id in session.info.get("entitlements", ()):
+        session.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": CHANNEL, "payload": str(company_id)})
+
+@event.listens_for(SessionLocal, "after_commit")
+def _evict_committed(session):
+    # Locally right away; other processes when the NOTIFY reaches them
+    for company_id in session.info.pop("entitlements", ()):
+        _evict(company_id)
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _drop_invalidations(session):
+    session.info.pop("entitlements", None)
+
+def _on_message(payload: str):
+    _evict(int(payload))
+
+def _on_connect():
+    # Whatever changed while the listener was down may be cached
+    _evict()
+
+events.listen(CHANNEL, _on_message, _on_connect)
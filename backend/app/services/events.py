@@ -0,0 +1,209 @@
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+from datetime import date, datetime
+import asyncio
+import logging
+import os
+import select
+import threading
+import time
+
+import orjson
+
+from .. import models
+from ..database import SessionLocal, engine
+
+logger = logging.getLogger(__name__)
+
+# Postgres channel shared by every worker; each one fans the events out to its own subscribers
+CHANNEL = "mant_events"
+# Events a slow client may fall behind by before it's told to re-list instead
+SUBSCRIBER_QUEUE_SIZE = int(os.getenv("EVENT_QUEUE_SIZE", "100"))
+
+RESYNC = {"event": "resync"}
+# Ends a stream: the worker is shutting down and the client should reconnect to another one
+CLOSE = {"event": "close"}
+
+# --- Payloads ---
+WORK_ORDER_FIELDS = [
+    "ticket_number", "status", "priority", "type", "asset_id", "sector_id", "assigned_to_id",
+    "scheduled_date", "plan_id",
+]
+
+def work_order_event(work_order: models.WorkOrder, op: str) -> dict:
+    """Compact change event: enough for a board to patch its row without re-listing."""
+    payload = {"event": "work_order", "op": op, "id": work_order.id}
+    for field in WORK_ORDER_FIELDS:
+        payload[field] = getattr(work_order, field)
+    return payload
+
+def _default(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError
+
+def _encode(payload) -> str:
+    return orjson.dumps(payload, default=_default).decode()
+
+# --- Emitting ---
+def emit(db: Session, company_id: int, payload: dict):
+    """
+    Queues an event on the session; it's only delivered if the transaction commits.
+    On Postgres it goes out as a NOTIFY in the same transaction, so every worker gets it.
+    """
+    db.info.setdefault("events", []).append((company_id, payload))
+
+def emit_bulk_changes(db: Session, company_id: int, changes: list):
+    """Events for crud.bulk_update_work_orders changes, carrying only the fields each one set."""
+    for change in changes:
+        payload = {"event": "work_order", "op": "updated", "id": change["id"]}
+        if change["set_assignee"]:
+            payload["assigned_to_id"] = change["assigned_to_id"]
+        for field in ("status", "priority", "scheduled_date"):
+            if change.get(field) is not None:
+                payload[field] = change[field]
+        emit(db, company_id, payload)
+
+@event.listens_for(SessionLocal, "before_commit")
+def _notify(session):
+    if session.get_bind().dialect.name != "postgresql":
+        return
+    for company_id, payload in session.info.pop("events", []):
+        session.execute(text("SELECT pg_notify(:channel, :payload)"), {
+            "channel": CHANNEL, "payload": _encode({"company_id": company_id, "event": payload})
+        })
+
+@event.listens_for(SessionLocal, "after_commit")
+def _publish_local(session):
+    # Without Postgres there is no bridge: only this process's subscribers hear about it
+    for company_id, payload in session.info.pop("events", []):
+        broker.publish(company_id, orjson.loads(_encode(payload)))
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _drop_events(session):
+    session.info.pop("events", None)
+
+# --- In-process pub/sub ---
+class Broker:
+    """
+    Subscribers are asyncio queues, one per open stream, grouped by company. publish()
+    may be called from any thread: the put is handed to the subscriber's event loop.
+    """
+
+    def __init__(self):
+        self._subscribers = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, company_id: int) -> asyncio.Queue:
+        queue = asyncio.Queue(SUBSCRIBER_QUEUE_SIZE)
+        with self._lock:
+            self._subscribers.setdefault(company_id, {})[queue] = asyncio.get_running_loop()
+        return queue
+
+    def unsubscribe(self, company_id: int, queue: asyncio.Queue):
+        with self._lock:
+            queues = self._subscribers.get(company_id, {})
+            queues.pop(queue, None)
+            if not queues:
+                self._subscribers.pop(company_id, None)
+
+    def publish(self, company_id: int, payload: dict):
+        with self._lock:
+            targets = list(self._subscribers.get(company_id, {}).items())
+        for queue, loop in targets:
+            loop.call_soon_threadsafe(_offer, queue, payload)
+
+    def publish_all(self, payload: dict):
+        with self._lock:
+            company_ids = list(self._subscribers)
+        for company_id in company_ids:
+            self.publish(company_id, payload)
+
+    def close_all(self):
+        """Ends every open stream, e.g. when the worker drains before exiting."""
+        with self._lock:
+            targets = [item for queues in self._subscribers.values() for item in queues.items()]
+        for queue, loop in targets:
+            loop.call_soon_threadsafe(_close, queue)
+
+def _offer(queue: asyncio.Queue, payload: dict):
+    try:
+        queue.put_nowait(payload)
+    except asyncio.QueueFull:
+        # The client missed events: drop the backlog and have it re-list
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(RESYNC)
+
+def _close(queue: asyncio.Queue):
+    # Whatever is still queued is dropped: the client re-lists when it reconnects anyway
+    while not queue.empty():
+        queue.get_nowait()
+    queue.put_nowait(CLOSE)
+
+broker = Broker()
+
+# --- LISTEN/NOTIFY bridge ---
+_listener = None
+_listener_lock = threading.Lock()
+# Other channels the listener relays: name -> (on_message(payload), on_connect())
+_channels = {}
+
+def listen(channel: str, on_message, on_connect):
+    """
+    Has the listener thread also LISTEN on `channel` and hand each payload to on_message.
+    on_connect runs on every (re)connection: anything sent while disconnected was missed.
+    Register at import time, before the listener starts.
+    """
+    _channels[channel] = (on_message, on_connect)
+
+def ensure_listener():
+    """Starts the thread relaying NOTIFYs to the broker, once per process (Postgres only)."""
+    global _listener
+    if engine.dialect.name != "postgresql":
+        return
+    with _listener_lock:
+        if _listener is None or not _listener.is_alive():
+            _listener = threading.Thread(target=_listen_forever, name="event-listener", daemon=True)
+            _listener.start()
+
+def _listen_forever():
+    delay = 1
+    connected_before = False
+    while True:
+        conn = None
+        try:
+            # A dedicated connection, taken out of the pool for good
+            conn = engine.raw_connection()
+            dbapi = conn.driver_connection
+            conn.detach()
+            dbapi.autocommit = True
+            cursor = dbapi.cursor()
+            for channel in [CHANNEL, *_channels]:
+                cursor.execute(f"LISTEN {channel}")
+            if connected_before:
+                # Anything sent while we were reconnecting is lost
+                broker.publish_all(RESYNC)
+            for _, on_connect in _channels.values():
+                on_connect()
+            connected_before, delay = True, 1
+            while True:
+                if select.select([dbapi], [], [], 30) == ([], [], []):
+                    continue
+                dbapi.poll()
+                while dbapi.notifies:
+                    notify = dbapi.notifies.pop(0)
+                    if notify.channel in _channels:
+                        _channels[notify.channel][0](notify.payload)
+                        continue
+                    message = orjson.loads(notify.payload)
+                    broker.publish(message["company_id"], message["event"])
+        except Exception as e:
+            logger.error(f"Event listener lost its connection: {e}")
+            if conn is not None:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+            time.sleep(delay)
+            delay = min(delay * 2, 30)
@@ -0,0 +1,111 @@
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from fastapi.concurrency import run_in_threadpool
+from io import BytesIO
+import asyncio
+import logging
+import multiprocessing
+import os
+import tempfile
+
+from .storage import Storage
+
+logger = logging.getLogger(__name__)
+
+# Longest side in pixels of each resized logo
+LOGO_SIZES = [64, 256]
+# Output formats: WebP for browsers, PNG for PDFs and e-mails that can't show WebP
+VARIANT_FORMATS = {"webp": "image/webp", "png": "image/png"}
+
+def variant_key(key: str, size: int, fmt: str) -> str:
+    base, _ = os.path.splitext(key)
+    return f"{base}_{size}.{fmt}"
+
+def variant_keys(key: str) -> dict:
+    return {f"{size}_{fmt}": variant_key(key, size, fmt) for size in LOGO_SIZES for fmt in VARIANT_FORMATS}
+
+def make_variants(storage: Storage, key: str):
+    """
+    Builds the resized WebP/PNG variants of an uploaded image.
+    Runs as a background task after the upload response has been sent.
+    """
+    from PIL import Image
+
+    try:
+        original = Image.open(BytesIO(storage.get_bytes(key)))
+        original.load()
+    except Exception as e:
+        logger.error(f"Could not read image {key}: {e}")
+        return
+
+    if original.mode not in ("RGB", "RGBA"):
+        original = original.convert("RGBA")
+
+    for size in LOGO_SIZES:
+        image = original.copy()
+        image.thumbnail((size, size))
+        for fmt, content_type in VARIANT_FORMATS.items():
+            target = variant_key(key, size, fmt)
+            if storage.exists(target):
+                continue
+            fd, tmp_path = tempfile.mkstemp(suffix=f".{fmt}")
+            with os.fdopen(fd, "wb") as f:
+                image.save(f, format=fmt.upper())
+            storage.put_file(tmp_path, target, content_type)
+
+THUMBNAIL_SIZE = 320
+THUMBNAIL_WORKERS = int(os.getenv("THUMBNAIL_WORKERS", "2"))
+
+_pool = None
+
+def _thumbnail_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # spawn, not fork: forking a threaded server process can deadlock the child
+        _pool = ProcessPoolExecutor(max_workers=THUMBNAIL_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+def render_thumbnail(src_path: str, dest_path: str, size: int = THUMBNAIL_SIZE):
+    """Runs in a pool process: decoding a 20 MB photo would otherwise hold the GIL for seconds."""
+    from PIL import Image, ImageOps
+
+    with Image.open(src_path) as image:
+        image.draft("RGB", (size, size)) # Lets JPEG decode at reduced scale
+        image = ImageOps.exif_transpose(image) # Phone photos come rotated through EXIF
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA")
+        image.thumbnail((size, size))
+        image.save(dest_path, format="WEBP")
+
+async def make_thumbnail(storage: Storage, key: str, thumbnail_key: str):
+    """
+    Background task: renders a WebP thumbnail of `key` in the process pool and stores it.
+    """
+    if storage.exists(thumbnail_key):
+        return
+
+    src_path = storage.local_path(key)
+    downloaded = None
+    if src_path is None:
+        fd, downloaded = tempfile.mkstemp()
+        with os.fdopen(fd, "wb") as f:
+            f.write(await run_in_threadpool(storage.get_bytes, key))
+        src_path = downloaded
+
+    fd, dest_path = tempfile.mkstemp(suffix=".webp")
+    os.close(fd)
+    try:
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(_thumbnail_pool(), render_thumbnail, src_path, dest_path)
+        await run_in_threadpool(storage.put_file, dest_path, thumbnail_key, "image/webp")
+    except BrokenProcessPool as e:
+        # A worker died (e.g. OOM on a huge image); start a fresh pool for the next upload
+        global _pool
+        _pool = None
+        logger.error(f"Could not make thumbnail of {key}: {e}")
+    except Exception as e:
+        logger.error(f"Could not make thumbnail of {key}: {e}")
+    finally:
+        for path in (dest_path, downloaded):
+            if path and os.path.exists(path):
+                os.remove(path)
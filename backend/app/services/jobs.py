@@ -0,0 +1,169 @@
+from sqlalchemy import and_, delete, func, select, update
+from sqlalchemy.orm import Session
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional
+import logging
+import os
+import random
+
+from .. import models
+
+logger = logging.getLogger(__name__)
+
+# Retry n waits BACKOFF_BASE * 2^(n-1) seconds, up to BACKOFF_MAX, give or take 10%
+BACKOFF_BASE = float(os.getenv("JOB_BACKOFF_BASE_SECONDS", "10"))
+BACKOFF_MAX = float(os.getenv("JOB_BACKOFF_MAX_SECONDS", "3600"))
+# Workers renew the lock of their running jobs this often, however long the job takes
+HEARTBEAT_SECONDS = float(os.getenv("JOB_HEARTBEAT_SECONDS", "60"))
+# A RUNNING job whose lock wasn't renewed in this long is assumed lost and retried.
+# Keep it several heartbeats long.
+LOCK_TIMEOUT = float(os.getenv("JOB_LOCK_TIMEOUT_SECONDS", "300"))
+# DONE jobs are deleted after this many days; DEAD ones are kept until handled
+RETENTION_DAYS = int(os.getenv("JOB_RETENTION_DAYS", "7"))
+MAX_ERROR_LENGTH = 4000
+
+Job = models.Job
+Status = models.JobStatus
+
+# --- Handlers ---
+HANDLERS: Dict[str, Callable[[dict], None]] = {}
+
+def handler(kind: str):
+    """Registers the function running jobs of this kind. It gets the payload dict."""
+    def register(fn):
+        HANDLERS[kind] = fn
+        return fn
+    return register
+
+def run(kind: str, payload: Optional[dict]):
+    # Module-level so process pools can pickle it; handlers live in services.tasks
+    from . import tasks # noqa: F401
+    fn = HANDLERS.get(kind)
+    if fn is None:
+        raise LookupError(f"No handler for job kind {kind!r}")
+    fn(payload or {})
+
+# --- Producing ---
+def enqueue(db: Session, kind: str, payload: Optional[dict] = None, company_id: Optional[int] = None,
+            queue: str = "default", priority: int = 100, delay: float = 0, max_attempts: int = 5) -> models.Job:
+    """
+    Adds a job in the caller's transaction: it only becomes visible to workers if that commits,
+    so a job never refers to rows that were rolled back. Does not commit.
+    """
+    job = models.Job(
+        kind=kind, payload=payload, company_id=company_id, queue=queue, priority=priority,
+        max_attempts=max_attempts, status=Status.QUEUED,
+    )
+    if delay:
+        job.run_at = datetime.now(timezone.utc) + timedelta(seconds=delay)
+    db.add(job)
+    return job
+
+# --- Consuming ---
+def claim(db: Session, worker: str, queues: List[str], limit: int) -> List[dict]:
+    """
+    Marks up to `limit` runnable jobs as RUNNING for this worker and returns them, most urgent
+    first. SKIP LOCKED lets workers claim concurrently without waiting on each other's rows.
+    """
+    if limit <= 0:
+        return []
+    ready = select(Job.id).where(
+        Job.status == Status.QUEUED, Job.run_at <= func.now(), Job.queue.in_(queues)
+    ).order_by(Job.priority, Job.run_at, Job.id).limit(limit).with_for_update(skip_locked=True)
+    stmt = update(Job).where(Job.id.in_(ready.scalar_subquery())).values(
+        status=Status.RUNNING, attempts=Job.attempts + 1, locked_by=worker,
+        locked_at=func.now(), started_at=func.now(),
+    ).returning(Job.id, Job.kind, Job.payload, Job.attempts, Job.max_attempts, Job.run_at, Job.started_at)
+    rows = [dict(row._mapping) for row in db.execute(stmt)]
+    db.commit()
+    return sorted(rows, key=lambda row: row["id"])
+
+def heartbeat(db: Session, worker: str, job_ids: List[int]) -> int:
+    """
+    Renews the lock on jobs this worker is still running so reap doesn't hand them to another
+    worker. A job already reaped isn't taken back. Returns the locks renewed.
+    """
+    if not job_ids:
+        return 0
+    count = db.execute(update(Job).where(
+        Job.id.in_(job_ids), Job.status == Status.RUNNING, Job.locked_by == worker
+    ).values(locked_at=func.now())).rowcount
+    db.commit()
+    return count
+
+def backoff(attempts: int) -> float:
+    return min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (attempts - 1)) * random.uniform(0.9, 1.1)
+
+def finish(db: Session, job_ids: List[int]):
+    db.execute(update(Job).where(Job.id.in_(job_ids)).values(
+        status=Status.DONE, finished_at=func.now(), locked_by=None, locked_at=None, last_error=None
+    ))
+    db.commit()
+
+def fail(db: Session, job: dict, error: str) -> bool:
+    """Schedules a retry, or dead-letters the job when it's out of attempts. True if retried."""
+    retry = job["attempts"] < job["max_attempts"]
+    values = {"locked_by": None, "locked_at": None, "last_error": error[-MAX_ERROR_LENGTH:]}
+    if retry:
+        values.update(status=Status.QUEUED, run_at=datetime.now(timezone.utc) + timedelta(seconds=backoff(job["attempts"])))
+    else:
+        values.update(status=Status.DEAD, finished_at=func.now())
+    db.execute(update(Job).where(Job.id == job["id"]).values(**values))
+    db.commit()
+    return retry
+
+def reap(db: Session) -> int:
+    """
+    Hands jobs left RUNNING by a dead worker back to the queue (or the dead letters if that
+    was their last attempt) and deletes DONE jobs past retention. Returns jobs recovered.
+    """
+    now = datetime.now(timezone.utc)
+    lost = and_(Job.status == Status.RUNNING, Job.locked_at < now - timedelta(seconds=LOCK_TIMEOUT))
+    released = {"locked_by": None, "locked_at": None, "last_error": "Worker lost"}
+    recovered = db.execute(update(Job).where(lost, Job.attempts < Job.max_attempts).values(
+        status=Status.QUEUED, run_at=func.now(), **released
+    )).rowcount
+    recovered += db.execute(update(Job).where(lost, Job.attempts >= Job.max_attempts).values(
+        status=Status.DEAD, finished_at=func.now(), **released
+    )).rowcount
+    db.execute(delete(Job).where(
+        Job.status == Status.DONE, Job.finished_at < now - timedelta(days=RETENTION_DAYS)
+    ))
+    db.commit()
+    if recovered:
+        logger.warning(f"Recovered {recovered} jobs from lost workers")
+    return recovered
+
+def retry_dead(db: Session, job_ids: List[int]) -> int:
+    """Puts dead-lettered jobs back in the queue with a fresh set of attempts."""
+    count = db.execute(update(Job).where(Job.id.in_(job_ids), Job.status == Status.DEAD).values(
+        status=Status.QUEUED, attempts=0, run_at=func.now(), finished_at=None
+    )).rowcount
+    db.commit()
+    return count
+
+# --- Metrics ---
+def queue_stats(db: Session) -> List[dict]:
+    """
+    Per queue: jobs by status, how many are runnable now, and how long the oldest runnable
+    one has been waiting (the queue's current latency).
+    """
+    now = datetime.now(timezone.utc)
+    due = and_(Job.status == Status.QUEUED, Job.run_at <= func.now())
+    rows = db.execute(select(
+        Job.queue,
+        func.count().filter(Job.status == Status.QUEUED),
+        func.count().filter(due),
+        func.count().filter(Job.status == Status.RUNNING),
+        func.count().filter(Job.status == Status.DEAD),
+        func.min(Job.run_at).filter(due),
+    ).where(Job.status != Status.DONE).group_by(Job.queue))
+    stats = []
+    for queue, queued, ready, running, dead, oldest in rows:
+        if oldest is not None and oldest.tzinfo is None:
+            oldest = oldest.replace(tzinfo=timezone.utc) # SQLite drops the zone
+        stats.append({
+            "queue": queue, "queued": queued, "ready": ready, "running": running, "dead": dead,
+            "oldest_ready_seconds": (now - oldest).total_seconds() if oldest else 0.0,
+        })
+    return stats
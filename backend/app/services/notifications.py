@@ -0,0 +1,357 @@
+"""
+Outbox of WhatsApp and email notifications. Producers add rows in the caller's transaction
+(nothing is sent for a change that rolls back); the dispatch_notifications job claims due
+recipients, folds everything pending for each one into a single digest and sends the digests
+concurrently, each provider behind its own rate limit.
+"""
+from abc import ABC, abstractmethod
+from sqlalchemy import String, cast, delete, exists, func, insert, literal, select, update
+from sqlalchemy.orm import Session
+from datetime import date, datetime, timedelta, timezone
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple
+import asyncio
+import logging
+import os
+import random
+import time
+
+from .. import models
+
+if TYPE_CHECKING:
+    import httpx # Imported where it's used: only the dispatcher sends, and the API imports this module
+
+logger = logging.getLogger(__name__)
+
+# Messages for a recipient wait this long so the ones that follow go out in the same digest
+DIGEST_SECONDS = float(os.getenv("NOTIFY_DIGEST_SECONDS", "300"))
+# Recipients claimed per round of the dispatcher
+BATCH_SIZE = int(os.getenv("NOTIFY_BATCH_SIZE", "500"))
+# Digests in flight at once, per provider
+CONCURRENCY = int(os.getenv("NOTIFY_CONCURRENCY", "20"))
+# Sends retried within a round on 429/5xx/network errors, then the digest waits for a later round
+SEND_RETRIES = int(os.getenv("NOTIFY_SEND_RETRIES", "3"))
+MAX_ATTEMPTS = int(os.getenv("NOTIFY_MAX_ATTEMPTS", "5"))
+RETRY_BASE_SECONDS = float(os.getenv("NOTIFY_RETRY_BASE_SECONDS", "60"))
+# SENDING rows older than this belong to a dispatcher that died and are sent again
+LOCK_TIMEOUT = float(os.getenv("NOTIFY_LOCK_TIMEOUT_SECONDS", "600"))
+RETENTION_DAYS = int(os.getenv("NOTIFY_RETENTION_DAYS", "30"))
+EXPIRY_NOTICE_DAYS = int(os.getenv("NOTIFY_EXPIRY_DAYS", "3"))
+# A dispatch job stops claiming after this long and leaves the rest to the next run
+ROUND_BUDGET_SECONDS = float(os.getenv("NOTIFY_ROUND_BUDGET_SECONDS", "50"))
+MAX_DIGEST_LINES = 20
+
+Notification = models.Notification
+Channel = models.NotificationChannel
+Status = models.NotificationStatus
+
+OPEN_STATUSES = [
+    models.WorkOrderStatus.PENDIENTE, models.WorkOrderStatus.ASIGNADA,
+    models.WorkOrderStatus.EN_PROGRESO, models.WorkOrderStatus.PAUSADA,
+]
+
+# --- Providers ---
+class PermanentError(Exception):
+    """The provider refused the message; sending it again won't help."""
+
+class TokenBucket:
+    """Allows `rate` sends per second on average and bursts of up to `burst`."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        # Waiters queue on the lock, so they're served in order
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+class Provider(ABC):
+    """An HTTP messaging API. Without a URL the messages are only logged (development)."""
+
+    def __init__(self, name: str, url: Optional[str], token: Optional[str], rate: float, burst: int):
+        self.name = name
+        self.url = url
+        self.token = token
+        self.rate = rate
+        self.burst = burst
+
+    @abstractmethod
+    def request_body(self, recipient: str, subject: Optional[str], body: str) -> dict:
+        """JSON body of the API request that sends one message."""
+
+    async def send(self, client: "httpx.AsyncClient", bucket: TokenBucket, recipient: str, subject: Optional[str], body: str):
+        import httpx
+        if not self.url:
+            logger.info(f"{self.name} to {recipient}: {subject or ''}\n{body}")
+            return
+        headers = {"Authorization": f"Bearer {self.token}"} if self.token else {}
+        for attempt in range(SEND_RETRIES + 1):
+            await bucket.acquire()
+            delay = 0.5 * 2 ** attempt * random.uniform(0.8, 1.2)
+            try:
+                response = await client.post(self.url, json=self.request_body(recipient, subject, body), headers=headers)
+            except httpx.TransportError as e:
+                error = f"{self.name}: {e!r}"
+            else:
+                if response.status_code < 300:
+                    return
+                error = f"{self.name}: HTTP {response.status_code} {response.text[:500]}"
+                if response.status_code == 429:
+                    retry_after = response.headers.get("Retry-After", "")
+                    delay = min(float(retry_after), 30.0) if retry_after.isdigit() else delay
+                elif response.status_code < 500:
+                    raise PermanentError(error)
+            if attempt < SEND_RETRIES:
+                await asyncio.sleep(delay)
+        raise RuntimeError(error)
+
+class WhatsAppProvider(Provider):
+    # WhatsApp Cloud API: WHATSAPP_API_URL is .../<phone-number-id>/messages
+    def request_body(self, recipient, subject, body):
+        text = f"*{subject}*\n{body}" if subject else body
+        return {"messaging_product": "whatsapp", "to": recipient, "type": "text", "text": {"body": text}}
+
+class EmailProvider(Provider):
+    # Any transactional email API taking JSON (from, to, subject, text)
+    def request_body(self, recipient, subject, body):
+        return {"from": os.getenv("EMAIL_FROM", "no-reply@mant.app"), "to": recipient,
+                "subject": subject or "Notificaciones", "text": body}
+
+def _provider(cls, channel: str, default_rate: float) -> Provider:
+    rate = float(os.getenv(f"{channel}_RATE_PER_SECOND", str(default_rate)))
+    return cls(channel.lower(), os.getenv(f"{channel}_API_URL"), os.getenv(f"{channel}_API_TOKEN"),
+               rate, int(os.getenv(f"{channel}_BURST", str(max(int(rate), 1)))))
+
+PROVIDERS: Dict[Channel, Provider] = {
+    Channel.WHATSAPP: _provider(WhatsAppProvider, "WHATSAPP", 20),
+    Channel.EMAIL: _provider(EmailProvider, "EMAIL", 10),
+}
+
+# --- Producing ---
+def contact(phone: Optional[str], email: Optional[str]) -> Optional[Tuple[Channel, str]]:
+    """WhatsApp when there's a phone number, email otherwise; None without either."""
+    if phone and phone.strip():
+        return Channel.WHATSAPP, "".join(c for c in phone if c.isdigit())
+    if email and email.strip():
+        return Channel.EMAIL, email.strip().lower()
+    return None
+
+def _row(company_id: int, to: Tuple[Channel, str], kind: str, subject: str, body: str,
+         dedupe_key: Optional[str] = None, send_after: Optional[datetime] = None) -> dict:
+    return {
+        "company_id": company_id, "channel": to[0], "recipient": to[1], "kind": kind, "subject": subject,
+        "body": body, "dedupe_key": dedupe_key, "status": Status.PENDING, "attempts": 0,
+        "send_after": send_after or datetime.now(timezone.utc) + timedelta(seconds=DIGEST_SECONDS),
+    }
+
+def notify_assignments(db: Session, company_id: int, assignments: Iterable[Tuple[int, Optional[int]]]):
+    """
+    Queues a notice to the worker of each (work_order_id, worker_id) assignment. Workers
+    without a phone or email are skipped. Does not commit.
+    """
+    assignments = [(wo_id, worker_id) for wo_id, worker_id in assignments if worker_id]
+    if not assignments:
+        return
+    orders = {row.id: row for row in db.execute(select(
+        models.WorkOrder.id, models.WorkOrder.ticket_number, models.WorkOrder.description, models.WorkOrder.priority
+    ).where(models.WorkOrder.company_id == company_id, models.WorkOrder.id.in_({a[0] for a in assignments})))}
+    workers = {row.id: row for row in db.execute(select(
+        models.Worker.id, models.Worker.phone, models.Worker.email
+    ).where(models.Worker.company_id == company_id, models.Worker.id.in_({a[1] for a in assignments})))}
+
+    rows = []
+    for wo_id, worker_id in assignments:
+        wo, worker = orders.get(wo_id), workers.get(worker_id)
+        to = worker and contact(worker.phone, worker.email)
+        if wo and to:
+            rows.append(_row(company_id, to, "work_order_assigned", "Orden de trabajo asignada",
+                             f"{wo.ticket_number} ({wo.priority}): {wo.description}"))
+    if rows:
+        db.execute(insert(Notification), rows)
+
+def queue_overdue_work_orders(db: Session, today: Optional[date] = None) -> int:
+    """
+    Queues a notice to the assignee of every open work order whose scheduled day has passed,
+    once per scheduled day. Commits; returns the notices queued.
+    """
+    today = today or date.today()
+    wo, worker = models.WorkOrder, models.Worker
+    key = literal("overdue:") + cast(wo.id, String) + ":" + cast(wo.scheduled_date, String)
+    rows = db.execute(select(
+        wo.company_id, wo.id, wo.ticket_number, wo.description, wo.scheduled_date, worker.phone, worker.email, key
+    ).join(worker, worker.id == wo.assigned_to_id).where(
+        wo.status.in_(OPEN_STATUSES), wo.scheduled_date < today,
+        ~exists().where(Notification.company_id == wo.company_id, Notification.dedupe_key == key),
+    ))
+    # Overdue notices go out with the next dispatch instead of waiting for a digest window
+    now = datetime.now(timezone.utc)
+    notices = []
+    for company_id, wo_id, ticket, description, scheduled, phone, email, dedupe_key in rows:
+        to = contact(phone, email)
+        if to:
+            notices.append(_row(company_id, to, "work_order_overdue", "Orden de trabajo vencida",
+                                f"{ticket}, prevista para el {scheduled:%d/%m/%Y}: {description}", dedupe_key, now))
+    if notices:
+        db.execute(insert(Notification), notices)
+    db.commit()
+    return len(notices)
+
+def queue_expiring_subscriptions(db: Session) -> int:
+    """
+    Queues a notice to the company contact of each subscription ending within
+    EXPIRY_NOTICE_DAYS, once per period. Commits; returns the notices queued.
+    """
+    now = datetime.now(timezone.utc)
+    sub, company = models.Subscription, models.Company
+    rows = db.execute(select(
+        sub.id, sub.company_id, sub.current_period_end, company.phone, company.email_contact
+    ).join(company, company.id == sub.company_id).where(
+        sub.current_period_end.between(now.replace(tzinfo=None), (now + timedelta(days=EXPIRY_NOTICE_DAYS)).replace(tzinfo=None)),
+        company.status == models.CompanyStatus.ACTIVE,
+    ))
+    notices = []
+    for sub_id, company_id, period_end, phone, email in rows:
+        to = contact(phone, email)
+        dedupe_key = f"expiry:{sub_id}:{period_end:%Y-%m-%d}"
+        exists_already = db.scalar(select(Notification.id).where(
+            Notification.company_id == company_id, Notification.dedupe_key == dedupe_key))
+        if to and not exists_already:
+            notices.append(_row(company_id, to, "subscription_expiring", "Tu suscripción está por vencer",
+                                f"La suscripción vence el {period_end:%d/%m/%Y}. Renovala para no perder el acceso.",
+                                dedupe_key, now))
+    if notices:
+        db.execute(insert(Notification), notices)
+    db.commit()
+    return len(notices)
+
+# --- Dispatching ---
+def claim(db: Session, limit: int) -> Dict[Tuple[Channel, str], List[dict]]:
+    """
+    Takes up to `limit` recipients with a due message and marks all their pending messages
+    SENDING, including ones still inside their digest window. Commits.
+    """
+    due = db.execute(select(Notification.channel, Notification.recipient).where(
+        Notification.status == Status.PENDING, Notification.send_after <= datetime.now(timezone.utc)
+    ).group_by(Notification.channel, Notification.recipient).order_by(func.min(Notification.send_after)).limit(limit)).all()
+    claimed = {}
+    for channel in {row.channel for row in due}:
+        recipients = [row.recipient for row in due if row.channel == channel]
+        pending = select(Notification.id).where(
+            Notification.status == Status.PENDING, Notification.channel == channel, Notification.recipient.in_(recipients)
+        ).with_for_update(skip_locked=True)
+        rows = db.execute(update(Notification).where(Notification.id.in_(pending.scalar_subquery())).values(
+            status=Status.SENDING, locked_at=func.now(), attempts=Notification.attempts + 1,
+        ).returning(Notification.id, Notification.recipient, Notification.subject, Notification.body,
+                    Notification.attempts, Notification.created_at))
+        for row in rows:
+            claimed.setdefault((channel, row.recipient), []).append(dict(row._mapping))
+    db.commit()
+    return claimed
+
+def digest(rows: List[dict]) -> Tuple[str, str]:
+    """Subject and text of one message carrying all of a recipient's notifications."""
+    rows = sorted(rows, key=lambda row: (row["created_at"] is None, row["created_at"], row["id"]))
+    if len(rows) == 1:
+        return rows[0]["subject"], rows[0]["body"]
+    subjects = {row["subject"] for row in rows}
+    if len(subjects) == 1:
+        subject, lines = subjects.pop(), [f"- {row['body']}" for row in rows[:MAX_DIGEST_LINES]]
+    else:
+        subject = f"{len(rows)} notificaciones"
+        lines = [f"- {row['subject']}: {row['body']}" for row in rows[:MAX_DIGEST_LINES]]
+    if len(rows) > MAX_DIGEST_LINES:
+        lines.append(f"... y {len(rows) - MAX_DIGEST_LINES} más")
+    return subject, "\n".join(lines)
+
+async def _send_all(client: "httpx.AsyncClient", claimed: dict, buckets: Dict[Channel, TokenBucket]) -> dict:
+    # Separate slots per provider, so one waiting on its rate limit doesn't hold up the other
+    limits = {channel: asyncio.Semaphore(CONCURRENCY) for channel in PROVIDERS}
+
+    async def send(key, rows):
+        channel, recipient = key
+        subject, body = digest(rows)
+        async with limits[channel]:
+            try:
+                await PROVIDERS[channel].send(client, buckets[channel], recipient, subject, body)
+                return key, None
+            except Exception as e:
+                return key, e
+
+    return dict(await asyncio.gather(*(send(key, rows) for key, rows in claimed.items())))
+
+def _record(db: Session, claimed: dict, outcomes: dict) -> Dict[str, int]:
+    sent, retry, failed = [], {}, {}
+    for key, rows in claimed.items():
+        error = outcomes[key]
+        ids = [row["id"] for row in rows]
+        attempts = max(row["attempts"] for row in rows)
+        if error is None:
+            sent += ids
+        elif isinstance(error, PermanentError) or attempts >= MAX_ATTEMPTS:
+            failed.setdefault(str(error)[:1000], []).extend(ids)
+        else:
+            logger.warning(f"Notification digest to {key[1]} failed, will retry: {error}")
+            retry.setdefault((str(error)[:1000], attempts), []).extend(ids)
+    if sent:
+        db.execute(update(Notification).where(Notification.id.in_(sent)).values(
+            status=Status.SENT, sent_at=func.now(), locked_at=None, last_error=None))
+    # A whole digest retries together, so it stays one message
+    now = datetime.now(timezone.utc)
+    for (error, attempts), ids in retry.items():
+        db.execute(update(Notification).where(Notification.id.in_(ids)).values(
+            status=Status.PENDING, locked_at=None, last_error=error,
+            send_after=now + timedelta(seconds=RETRY_BASE_SECONDS * 2 ** (attempts - 1))))
+    for error, ids in failed.items():
+        logger.error(f"Giving up on {len(ids)} notifications: {error}")
+        db.execute(update(Notification).where(Notification.id.in_(ids)).values(
+            status=Status.FAILED, locked_at=None, last_error=error))
+    db.commit()
+    return {"sent": len(sent), "retry": sum(map(len, retry.values())), "failed": sum(map(len, failed.values()))}
+
+def reap(db: Session):
+    """Sends again the messages of a dispatcher that died, and deletes old sent ones."""
+    now = datetime.now(timezone.utc)
+    db.execute(update(Notification).where(
+        Notification.status == Status.SENDING, Notification.locked_at < now - timedelta(seconds=LOCK_TIMEOUT)
+    ).values(status=Status.PENDING, locked_at=None, send_after=func.now()))
+    db.execute(delete(Notification).where(
+        Notification.status == Status.SENT, Notification.created_at < now - timedelta(days=RETENTION_DAYS)
+    ))
+    db.commit()
+
+def dispatch(db: Session, budget: float = ROUND_BUDGET_SECONDS) -> Dict[str, int]:
+    """
+    Sends digests round after round until no recipient is due or the time budget is spent.
+    Returns message counts: digests sent, and notifications sent / retried / failed.
+    """
+    reap(db)
+    return asyncio.run(_dispatch(db, budget))
+
+async def _dispatch(db: Session, budget: float) -> Dict[str, int]:
+    import httpx
+    totals = {"digests": 0, "sent": 0, "retry": 0, "failed": 0}
+    # The rate limits and connections carry over from round to round
+    buckets = {channel: TokenBucket(p.rate, p.burst) for channel, p in PROVIDERS.items()}
+    deadline = time.monotonic() + budget
+    async with httpx.AsyncClient(timeout=10, limits=httpx.Limits(max_connections=2 * CONCURRENCY)) as client:
+        while time.monotonic() < deadline:
+            # Database work happens between rounds, when no send is in flight
+            claimed = claim(db, BATCH_SIZE)
+            if not claimed:
+                break
+            outcomes = await _send_all(client, claimed, buckets)
+            counts = _record(db, claimed, outcomes)
+            totals["digests"] += sum(1 for error in outcomes.values() if error is None)
+            for name, count in counts.items():
+                totals[name] += count
+    return totals
@@ -0,0 +1,173 @@
+from sqlalchemy import select, delete, text, update
+from sqlalchemy.orm import Session
+from datetime import date, datetime, timedelta
+from itertools import groupby
+import gzip
+import json
+import logging
+import os
+
+from .. import models
+from ..database import SessionLocal
+from .sync import record_deleted
+
+logger = logging.getLogger(__name__)
+
+# How many months of empty partitions to keep ready ahead of today
+PARTITION_MONTHS_AHEAD = int(os.getenv("WORK_ORDER_PARTITION_MONTHS_AHEAD", "3"))
+# Closed work orders older than this move to work_orders_archive
+RETENTION_DAYS = int(os.getenv("WORK_ORDER_RETENTION_DAYS", "730"))
+ARCHIVE_CHUNK_SIZE = int(os.getenv("WORK_ORDER_ARCHIVE_CHUNK_SIZE", "1000"))
+
+# Catches rows whose month has no partition yet, see _create_partition
+DEFAULT_PARTITION = "work_orders_default"
+
+CLOSED_STATUSES = [models.WorkOrderStatus.COMPLETADA, models.WorkOrderStatus.CANCELADA]
+
+# Rows pointing at a work order. No FK can reach a partitioned table, so the archiver copies
+# them into the order's archived row under these keys. Part and labor lines go with the order;
+# tool movements are the tool's own ledger, so they stay and only lose the order reference.
+CHILD_TABLES = {
+    "parts": models.WorkOrderPart.__table__,
+    "labor": models.WorkOrderLabor.__table__,
+    "tool_movements": models.ToolMovement.__table__,
+}
+DETACHED_TABLES = {"tool_movements"}
+
+def _add_months(month: date, count: int) -> date:
+    year, month_index = divmod(month.month - 1 + count, 12)
+    return date(month.year + year, month_index + 1, 1)
+
+def is_partitioned(db: Session) -> bool:
+    if db.get_bind().dialect.name != "postgresql":
+        return False
+    return bool(db.execute(text(
+        "SELECT 1 FROM pg_partitioned_table WHERE partrelid = 'work_orders'::regclass"
+    )).scalar())
+
+def ensure_work_order_partitions(db: Session, months_ahead: int = PARTITION_MONTHS_AHEAD):
+    """
+    Creates the monthly work_orders partitions from the current month up to `months_ahead`.
+    Does nothing on databases where work_orders isn't partitioned (SQLite dev setups).
+    """
+    if not is_partitioned(db):
+        return
+
+    this_month = date.today().replace(day=1)
+    for offset in range(months_ahead + 1):
+        start = _add_months(this_month, offset)
+        end = _add_months(start, 1)
+        name = f"work_orders_p{start.strftime('%Y%m')}"
+        try:
+            _create_partition(db, name, start, end)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Could not create partition {name}: {e}")
+
+def _create_partition(db: Session, name: str, start: date, end: date):
+    """
+    Creates the partition for [start, end). Rows of that range that were inserted before it
+    existed sit in the DEFAULT partition, and would make a plain CREATE fail: those are moved
+    into the new partition, with the DEFAULT partition detached meanwhile (work_orders is
+    locked for the move). Runs in the caller's transaction.
+    """
+    # Names and bounds come from dates, never from user input
+    create = text(
+        f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF work_orders "
+        f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    )
+    bounds = {"start": start, "end": end}
+    in_range = "created_at >= :start AND created_at < :end"
+    stranded = db.execute(text(f"SELECT count(*) FROM {DEFAULT_PARTITION} WHERE {in_range}"), bounds).scalar()
+    if not stranded:
+        db.execute(create)
+        return
+
+    logger.warning(f"Moving {stranded} work orders from {DEFAULT_PARTITION} into the new partition {name}")
+    columns = ", ".join(column.name for column in models.WorkOrder.__table__.columns)
+    db.execute(text(f"ALTER TABLE work_orders DETACH PARTITION {DEFAULT_PARTITION}"))
+    db.execute(create)
+    db.execute(text(f"INSERT INTO {name} ({columns}) SELECT {columns} FROM {DEFAULT_PARTITION} WHERE {in_range}"), bounds)
+    db.execute(text(f"DELETE FROM {DEFAULT_PARTITION} WHERE {in_range}"), bounds)
+    db.execute(text(f"ALTER TABLE work_orders ATTACH PARTITION {DEFAULT_PARTITION} DEFAULT"))
+
+def _row_to_json(row) -> str:
+    return json.dumps(dict(row), default=str)
+
+def archive_closed_work_orders(db: Session, retention_days: int = RETENTION_DAYS) -> int:
+    """
+    Moves COMPLETADA/CANCELADA work orders created before the retention window into
+    work_orders_archive, one compressed batch per company and month, along with their
+    part, labor and tool movement lines (see CHILD_TABLES).
+    Works in chunks, each in its own transaction. Returns the number of orders archived.
+    """
+    table = models.WorkOrder.__table__
+    cutoff = datetime.now() - timedelta(days=retention_days)
+    archived = 0
+
+    while True:
+        rows = db.execute(
+            select(table)
+            .where(table.c.status.in_(CLOSED_STATUSES), table.c.created_at < cutoff)
+            .order_by(table.c.company_id, table.c.created_at)
+            .limit(ARCHIVE_CHUNK_SIZE)
+        ).mappings().all()
+        if not rows:
+            break
+        ids = [row["id"] for row in rows]
+
+        children = {}
+        for key, child in CHILD_TABLES.items():
+            for line in db.execute(select(child).where(child.c.work_order_id.in_(ids))).mappings():
+                children.setdefault(line["work_order_id"], {}).setdefault(key, []).append(dict(line))
+
+        batches = groupby(rows, key=lambda row: (row["company_id"], row["created_at"].date().replace(day=1)))
+        for (company_id, period), batch in batches:
+            batch = list(batch)
+            payload = "\n".join(_row_to_json({**row, **children.get(row["id"], {})}) for row in batch).encode("utf-8")
+            db.add(models.WorkOrderArchive(
+                company_id=company_id,
+                period=period,
+                order_count=len(batch),
+                data=gzip.compress(payload)
+            ))
+
+        for key, child in CHILD_TABLES.items():
+            lines = child.c.work_order_id.in_(ids)
+            if key in DETACHED_TABLES:
+                db.execute(update(child).where(lines).values(work_order_id=None))
+            else:
+                db.execute(delete(child).where(lines))
+        # Offline clients drop their copy of the archived orders
+        record_deleted(db, table, table.c.id.in_(ids))
+        db.execute(delete(table).where(table.c.id.in_(ids)))
+        db.commit()
+        archived += len(rows)
+
+    if archived:
+        logger.info(f"Archived {archived} closed work orders older than {cutoff.date()}")
+    return archived
+
+def read_archived_work_orders(db: Session, company_id: int, period: date) -> list:
+    batches = db.query(models.WorkOrderArchive).filter(
+        models.WorkOrderArchive.company_id == company_id,
+        models.WorkOrderArchive.period == period
+    ).order_by(models.WorkOrderArchive.id).all()
+
+    orders = []
+    for batch in batches:
+        for line in gzip.decompress(batch.data).decode("utf-8").splitlines():
+            orders.append(json.loads(line))
+    return orders
+
+def maintain_work_orders():
+    """
+    Scheduler entry point: keeps future partitions ready and archives old closed orders.
+    """
+    db = SessionLocal()
+    try:
+        ensure_work_order_partitions(db)
+        archive_closed_work_orders(db)
+    finally:
+        db.close()
@@ -1,3 +1,9 @@
+from sqlalchemy.orm import Session
+import os
+
+from .. import models
+from . import entitlements
+
 def create_payment_intent(amount: float, currency: str = "usd"):
     # Integration with Stripe/MercadoPago
     print(f"Creating payment intent for {amount} {currency}")
@@ -6,3 +12,53 @@ def create_payment_intent(amount: float, currency: str = "usd"):
 def confirm_payment(payment_id: str):
     print(f"Confirming payment {payment_id}")
     return True
+
+MERCADOPAGO_ACCESS_TOKEN = os.getenv("MERCADOPAGO_ACCESS_TOKEN", "TEST-YOUR-TOKEN")
+_sdk = None
+
+def sdk():
+    """
+    The Mercado Pago client, built on first use: importing the SDK (and requests with it)
+    is a good part of the app's import time, and only payment endpoints need it.
+    """
+    global _sdk
+    if _sdk is None:
+        import mercadopago
+        _sdk = mercadopago.SDK(MERCADOPAGO_ACCESS_TOKEN)
+    return _sdk
+
+def sync_preapproval(db: Session, preapproval_id: str):
+    """
+    Copies the status of a Mercado Pago preapproval (subscription) onto the company's
+    subscription, creating it on first notice. Raises if Mercado Pago can't be reached.
+    """
+    info = sdk().preapproval().get(preapproval_id)["response"]
+
+    external_ref = info.get("external_reference")
+    status = info.get("status")
+    if not (external_ref and status):
+        return
+
+    company_id = int(external_ref)
+    sub = db.query(models.Subscription).filter(models.Subscription.company_id == company_id).first()
+    if not sub:
+        # Retrieve Plan ID based on transaction amount or other metadata if strictly needed
+        # NOTE: MP doesn't always return our plan ID easily unless in metadata.
+        # Fallback find plan by price/currency
+        plan = db.query(models.Plan).filter(
+            models.Plan.price == float(info["auto_recurring"]["transaction_amount"])
+        ).first()
+
+        sub = models.Subscription(
+            company_id=company_id,
+            plan_id=plan.id if plan else None,
+            mp_preapproval_id=preapproval_id,
+            status=status,
+        )
+        db.add(sub)
+    else:
+        sub.mp_preapproval_id = preapproval_id
+        sub.status = status
+
+    entitlements.invalidate(db, company_id)
+    db.commit()
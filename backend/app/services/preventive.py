@@ -0,0 +1,74 @@
+from sqlalchemy.orm import Session
+from datetime import date, timedelta, datetime
+from typing import List, Optional
+
+from .. import crud, models
+from ..tenancy import TenantSession
+from . import events
+
+def calculate_next_run(last_run: date, frequency_type: str, frequency_value: int) -> date:
+    if frequency_type == "DIARIA":
+        return last_run + timedelta(days=frequency_value)
+    elif frequency_type == "SEMANAL":
+        return last_run + timedelta(weeks=frequency_value)
+    elif frequency_type == "MENSUAL":
+        # Rough estimation: 30 days * value
+        return last_run + timedelta(days=30 * frequency_value)
+    elif frequency_type == "ANUAL":
+        return last_run + timedelta(days=365 * frequency_value)
+    return last_run + timedelta(days=frequency_value)
+
+    return last_run + timedelta(days=frequency_value)
+
+def run_due_plans(tenant: TenantSession, requested_by_id: Optional[int] = None) -> List[models.WorkOrder]:
+    """
+    Generates a work order for every active plan of the company due today or earlier and
+    moves the plans to their next run. Does not commit.
+    """
+    db = tenant.db
+    # The scheduled job and the check-and-run endpoint can overlap: the plans stay locked until
+    # the caller commits, and a run that finds them locked leaves them to the other one, which
+    # moves them past today (no-op on SQLite)
+    plans = tenant.query(models.PreventivePlan).filter(
+        models.PreventivePlan.is_active == True,
+        models.PreventivePlan.next_run <= date.today()
+    ).with_for_update(skip_locked=True).all()
+
+    generated = []
+
+    for plan in plans:
+        # Generate OT
+        # Create ticket number
+        ticket_number = crud.unique_ticket_number(db, f"PM-{plan.id}-{datetime.now().strftime('%Y%m%d%H%M%S')}")
+
+        # Consolidate tasks into description
+        task_list = "\n".join([f"- [ ] {t.description}" for t in plan.tasks])
+        description = f"Mantenimiento Preventivo según Plan: {plan.name}\n\nTareas:\n{task_list}"
+
+        work_order = tenant.add(models.WorkOrder(
+            asset_id=plan.asset_id,
+            plan_id=plan.id, # Link back
+            ticket_number=ticket_number,
+            type=models.WorkOrderType.PREVENTIVO,
+            status=models.WorkOrderStatus.PENDIENTE,
+            priority="MEDIA",
+            description=description,
+            requested_by_id=requested_by_id # None when generated by the scheduled job
+            # assigned_to_id is None initially
+        ))
+        generated.append(work_order)
+
+        # Update Plan
+        plan.last_run = date.today()
+        plan.next_run = calculate_next_run(date.today(), plan.frequency_type, plan.frequency_value)
+
+    db.flush()
+    for work_order in generated:
+        events.emit(db, tenant.company_id, events.work_order_event(work_order, "created"))
+    return generated
+
+def companies_with_due_plans(db: Session) -> List[int]:
+    return [company_id for (company_id,) in db.query(models.PreventivePlan.company_id).filter(
+        models.PreventivePlan.is_active == True,
+        models.PreventivePlan.next_run <= date.today()
+    ).distinct()]
@@ -0,0 +1,197 @@
+from sqlalchemy import select, delete, func
+from sqlalchemy.orm import Session
+from datetime import datetime
+import gzip
+import json
+import logging
+import os
+import time
+
+from .. import models
+from ..database import Base, SessionLocal
+from .storage import get_private_storage
+from .sync import SYNCED_TABLES, record_deleted
+
+logger = logging.getLogger(__name__)
+
+EXPORT_DIR = os.getenv("TENANT_EXPORT_DIR", "exports")
+CHUNK_SIZE = int(os.getenv("PURGE_CHUNK_SIZE", "1000"))
+# Pause between chunks so a big purge doesn't hog the DB while tenants are working
+CHUNK_PAUSE = float(os.getenv("PURGE_CHUNK_PAUSE", "0.05"))
+
+# Tables in dependency order: children before parents, the company row last.
+# Every table holding company rows belongs here, except tenant_purges, which tracks the purge.
+PURGE_ORDER = [
+    "stock_purchase_order_items",
+    "stock_purchase_orders",
+    "attachments",
+    "work_order_parts",
+    "work_order_labor",
+    "asset_monthly_costs",
+    "work_orders",
+    "work_orders_archive",
+    "preventive_tasks",
+    "preventive_plans",
+    "supplier_categories",
+    "suppliers",
+    "spare_parts",
+    "spare_part_categories",
+    "tool_movements",
+    "tools",
+    "asset_tree",
+    "assets",
+    "workers",
+    "sectors",
+    "sync_tombstones",
+    "notifications",
+    "idempotency_keys",
+    "rate_limit_buckets",
+    "jobs",
+    "subscriptions",
+    "payments",
+    "users",
+    "companies",
+]
+
+def company_rows(table_name: str, company_id: int):
+    """
+    Returns (table, where clause) selecting the rows of `table_name` owned by the company.
+    Child tables without company_id are reached through their parent.
+    """
+    tables = Base.metadata.tables
+    table = tables[table_name]
+
+    if table_name == "companies":
+        return table, table.c.id == company_id
+    if table_name == "stock_purchase_order_items":
+        orders = tables["stock_purchase_orders"]
+        return table, table.c.purchase_order_id.in_(select(orders.c.id).where(orders.c.company_id == company_id))
+    if table_name == "preventive_tasks":
+        plans = tables["preventive_plans"]
+        return table, table.c.plan_id.in_(select(plans.c.id).where(plans.c.company_id == company_id))
+    if table_name == "rate_limit_buckets":
+        return table, table.c.key == f"company:{company_id}" # See ratelimit.RateLimitMiddleware
+    if table_name == "supplier_categories":
+        suppliers = tables["suppliers"]
+        return table, table.c.supplier_id.in_(select(suppliers.c.id).where(suppliers.c.company_id == company_id))
+    return table, table.c.company_id == company_id
+
+# Request bookkeeping, not company data: purged but left out of the export
+NOT_EXPORTED = {"idempotency_keys", "rate_limit_buckets"}
+
+# Tables without an id column are deleted a chunk of parents' rows at a time
+CHUNK_KEYS = {
+    "supplier_categories": "supplier_id",
+    "asset_monthly_costs": "asset_id",
+    "asset_tree": "descendant_id",
+    "idempotency_keys": "key",
+    "rate_limit_buckets": "key",
+}
+
+def _delete_chunk(db: Session, table, where) -> int:
+    if table.name in SYNCED_TABLES:
+        # Clients still syncing while the purge runs drop the rows too
+        ids = db.execute(select(table.c.id).where(where).limit(CHUNK_SIZE)).scalars().all()
+        record_deleted(db, table, table.c.id.in_(ids))
+        stmt = delete(table).where(table.c.id.in_(ids))
+    elif "id" in table.c:
+        ids = select(table.c.id).where(where).limit(CHUNK_SIZE)
+        stmt = delete(table).where(table.c.id.in_(ids))
+    else:
+        key = table.c[CHUNK_KEYS[table.name]]
+        ids = select(key).where(where).distinct().limit(CHUNK_SIZE)
+        # Keys aren't unique across companies (idempotency keys), so keep the company filter
+        stmt = delete(table).where(where, key.in_(ids))
+    return db.execute(stmt).rowcount
+
+def export_company(db: Session, company_id: int) -> str:
+    """
+    Streams every row of the company into a gzipped JSON-lines archive, one table at a time.
+    Rows are fetched with a server-side cursor so memory stays flat for big tenants.
+    """
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    path = os.path.join(EXPORT_DIR, f"company_{company_id}_{datetime.now().strftime('%Y%m%d%H%M%S')}.jsonl.gz")
+    tmp_path = path + ".part"
+
+    with gzip.open(tmp_path, "wt", encoding="utf-8") as archive:
+        for table_name in reversed(PURGE_ORDER): # Parents first reads better when restoring
+            if table_name in NOT_EXPORTED:
+                continue
+            table, where = company_rows(table_name, company_id)
+            result = db.execute(select(table).where(where).execution_options(stream_results=True, yield_per=CHUNK_SIZE))
+            for row in result.mappings():
+                archive.write(json.dumps({"table": table_name, "row": dict(row)}, default=str))
+                archive.write("\n")
+
+    # Only a complete archive gets the final name
+    os.replace(tmp_path, path)
+    return path
+
+def purge_company(db: Session, company_id: int) -> models.TenantPurge:
+    """
+    Exports and then deletes all data of a company with chunked, set-based DELETEs.
+    Progress is committed after every chunk, so calling it again after a crash resumes
+    from the table it was working on.
+    """
+    purge = db.query(models.TenantPurge).filter(models.TenantPurge.company_id == company_id).first()
+    if not purge:
+        purge = models.TenantPurge(company_id=company_id, status=models.PurgeStatus.PENDING, rows_deleted=0)
+        db.add(purge)
+        db.commit()
+
+    if purge.status == models.PurgeStatus.DONE:
+        return purge
+
+    if purge.status in (models.PurgeStatus.PENDING, models.PurgeStatus.EXPORTING):
+        purge.status = models.PurgeStatus.EXPORTING
+        db.commit()
+        purge.export_path = export_company(db, company_id)
+        purge.status = models.PurgeStatus.DELETING
+        db.commit()
+        logger.info(f"Exported company {company_id} to {purge.export_path}")
+
+    # Resume by name: a deploy may have added tables to PURGE_ORDER since the purge started.
+    # A table that's no longer listed restarts it from the top, deleting nothing twice.
+    start = PURGE_ORDER.index(purge.current_table) if purge.current_table in PURGE_ORDER else 0
+    for table_name in PURGE_ORDER[start:]:
+        purge.current_table = table_name
+        table, where = company_rows(table_name, company_id)
+        while True:
+            deleted = _delete_chunk(db, table, where)
+            purge.rows_deleted += deleted
+            # Short transactions: locks are released after every chunk
+            db.commit()
+            if not deleted:
+                break
+            if CHUNK_PAUSE:
+                time.sleep(CHUNK_PAUSE)
+
+    # Attachment files are keyed by company, see routers/attachments.py
+    get_private_storage().delete_prefix(f"attachments/{company_id}/")
+
+    purge.status = models.PurgeStatus.DONE
+    purge.finished_at = func.now()
+    db.commit()
+    logger.info(f"Purged company {company_id}: {purge.rows_deleted} rows")
+    return purge
+
+def purge_pending_companies():
+    """
+    Purges every company marked DELETED_PENDING, plus any purge left half-way by a crash.
+    """
+    db = SessionLocal()
+    try:
+        pending = {c.id for c in db.query(models.Company.id).filter(
+            models.Company.status == models.CompanyStatus.DELETED_PENDING
+        )}
+        pending.update(p.company_id for p in db.query(models.TenantPurge.company_id).filter(
+            models.TenantPurge.status != models.PurgeStatus.DONE
+        ))
+        for company_id in sorted(pending):
+            try:
+                purge_company(db, company_id)
+            except Exception as e:
+                db.rollback()
+                logger.error(f"Error purging company {company_id}: {e}")
+    finally:
+        db.close()
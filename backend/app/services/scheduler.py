@@ -1,19 +1,51 @@
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from sqlalchemy import text
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
-from . import models, database, crud
+from .. import models, database, crud
+from . import jobs
 
 scheduler = AsyncIOScheduler()
 
+def enqueue(kind: str):
+    # The scheduler only decides when; the work runs in `python -m app.worker`
+    db = database.SessionLocal()
+    try:
+        if db.get_bind().dialect.name == "postgresql":
+            # Every API process runs the scheduler: serialize the check below across them
+            db.execute(text("SELECT pg_advisory_xact_lock(hashtext(:kind))"), {"kind": kind})
+        # One waiting copy is enough: don't pile them up while the workers are down
+        waiting = db.query(models.Job.id).filter(
+            models.Job.kind == kind, models.Job.status == models.JobStatus.QUEUED
+        ).first()
+        if not waiting:
+            jobs.enqueue(db, kind)
+            db.commit()
+    finally:
+        db.close()
+
 def check_expiration_and_notify():
     # Logic to check expiration
     # This will be refined to use DB sessions
     print(f"Checking expirations at {datetime.now()}")
     # 1. Get DB Session
     # 2. Query companies expiring in 3 days -> Send WhatsApp
+    enqueue("notify_expiring_subscriptions")
     # 3. Query expired companies -> Suspend
-    # 4. Query deleted pending -> Delete
+    # 4. Query deleted pending -> Export and delete (resumes purges interrupted by a crash)
+    enqueue("purge_pending_companies")
 
 def start_scheduler():
-    scheduler.add_job(check_expiration_and_notify, 'interval', hours=24)
-    scheduler.start()
+    # Fixed ids: starting again (a second app lifespan in the same process) replaces the jobs instead of doubling them
+    scheduler.add_job(check_expiration_and_notify, 'interval', hours=24, id="check_expiration", replace_existing=True)
+    scheduler.add_job(enqueue, 'interval', hours=24, args=["maintain_work_orders"], id="maintain_work_orders", replace_existing=True)
+    scheduler.add_job(enqueue, 'interval', hours=24, args=["schedule_preventive_plans"], id="schedule_preventive_plans", replace_existing=True)
+    scheduler.add_job(enqueue, 'interval', hours=1, args=["notify_overdue_work_orders"], id="notify_overdue_work_orders", replace_existing=True)
+    scheduler.add_job(enqueue, 'interval', minutes=1, args=["dispatch_notifications"], id="dispatch_notifications", replace_existing=True)
+    scheduler.add_job(enqueue, 'interval', hours=1, args=["sweep_idempotency_keys"], id="sweep_idempotency_keys", replace_existing=True)
+    if not scheduler.running:
+        scheduler.start()
+
+def stop_scheduler():
+    if scheduler.running:
+        scheduler.shutdown(wait=False)
@@ -0,0 +1,169 @@
+from sqlalchemy import func, or_
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+import heapq
+import os
+
+from .. import models
+from ..tenancy import TenantSession
+
+WORKDAY_MINUTES = int(os.getenv("WORKDAY_MINUTES", "480"))
+# Corrective orders have no task list to estimate from
+DEFAULT_WORK_ORDER_MINUTES = int(os.getenv("DEFAULT_WORK_ORDER_MINUTES", "60"))
+
+PRIORITY_RANK = {
+    models.WorkOrderPriority.CRITICA.value: 0,
+    models.WorkOrderPriority.ALTA.value: 1,
+    models.WorkOrderPriority.MEDIA.value: 2,
+    models.WorkOrderPriority.BAJA.value: 3,
+}
+OPEN_STATUSES = [
+    models.WorkOrderStatus.PENDIENTE, models.WorkOrderStatus.ASIGNADA,
+    models.WorkOrderStatus.EN_PROGRESO, models.WorkOrderStatus.PAUSADA,
+]
+
+@dataclass
+class PendingOrder:
+    id: int
+    sector_id: Optional[int] # The order's sector, or its asset's
+    minutes: int
+    priority: str
+    created_at: datetime
+
+@dataclass
+class WorkerSlot:
+    id: int
+    sector_id: Optional[int] # None: can take orders of any sector
+    load: int = 0 # Minutes already committed inside the horizon
+
+@dataclass
+class Schedule:
+    days: List[date]
+    capacity_minutes: int # Per worker, over the whole horizon
+    assignments: List[dict] = field(default_factory=list)
+    unassigned: List[dict] = field(default_factory=list)
+    workers: List[dict] = field(default_factory=list)
+
+def workdays(start: date, count: int) -> List[date]:
+    days = []
+    day = start
+    while len(days) < count:
+        if day.weekday() < 5:
+            days.append(day)
+        day += timedelta(days=1)
+    return days
+
+def build_schedule(orders: List[PendingOrder], workers: List[WorkerSlot], days: List[date],
+                   day_minutes: int = WORKDAY_MINUTES) -> Schedule:
+    """
+    Greedy balancing: orders go most urgent first (priority, then oldest), each to the
+    least-loaded eligible worker that still has room. A worker is eligible when it has
+    the order's sector or no sector at all. Least-loaded lookups use one min-heap per
+    sector, one for sectorless workers and one over everybody, with stale entries skipped
+    lazily, so the whole run is O((orders + workers) log workers).
+    """
+    capacity = day_minutes * len(days)
+    schedule = Schedule(days=days, capacity_minutes=capacity)
+    loads = {worker.id: worker.load for worker in workers}
+    initial = dict(loads)
+    worker_sector = {worker.id: worker.sector_id for worker in workers}
+
+    heaps: Dict[object, list] = {"any": [], "generalists": []}
+    def push(worker_id):
+        entry = (loads[worker_id], worker_id)
+        sector_id = worker_sector[worker_id]
+        heapq.heappush(heaps["any"], entry)
+        heapq.heappush(heaps.setdefault(sector_id, []) if sector_id else heaps["generalists"], entry)
+    for worker in workers:
+        push(worker.id)
+
+    def least_loaded(key):
+        heap = heaps.get(key)
+        while heap and heap[0][0] != loads[heap[0][1]]:
+            heapq.heappop(heap) # Stale: the worker got more work since this entry
+        return heap[0] if heap else None
+
+    ordered = sorted(orders, key=lambda o: (PRIORITY_RANK.get(o.priority, 2), o.created_at, -o.minutes))
+    for order in ordered:
+        keys = [order.sector_id, "generalists"] if order.sector_id else ["any"]
+        candidates = [entry for entry in map(least_loaded, keys) if entry]
+        if not candidates:
+            schedule.unassigned.append({"work_order_id": order.id, "reason": "No worker for this sector"})
+            continue
+        load, worker_id = min(candidates)
+        if load + order.minutes > capacity and load > 0:
+            # An order longer than a whole horizon still goes to an idle worker
+            schedule.unassigned.append({"work_order_id": order.id, "reason": "No worker with free time"})
+            continue
+
+        day = days[min(load // day_minutes, len(days) - 1)]
+        loads[worker_id] = load + order.minutes
+        push(worker_id)
+        schedule.assignments.append({
+            "work_order_id": order.id,
+            "worker_id": worker_id,
+            "scheduled_date": day,
+            "estimated_minutes": order.minutes,
+        })
+
+    schedule.workers = [
+        {"worker_id": worker.id, "existing_minutes": initial[worker.id],
+         "scheduled_minutes": loads[worker.id] - initial[worker.id], "capacity_minutes": capacity}
+        for worker in workers
+    ]
+    return schedule
+
+def _plan_minutes(tenant: TenantSession, plan_ids) -> Dict[int, int]:
+    plan_ids = {id for id in plan_ids if id}
+    if not plan_ids:
+        return {}
+    rows = tenant.db.query(
+        models.PreventiveTask.plan_id, func.sum(models.PreventiveTask.estimated_time)
+    ).filter(models.PreventiveTask.plan_id.in_(plan_ids)).group_by(models.PreventiveTask.plan_id)
+    return {plan_id: int(total) for plan_id, total in rows if total}
+
+def plan_schedule(tenant: TenantSession, start: date, day_count: int, sector_id: Optional[int] = None) -> Schedule:
+    """
+    Loads the company's unassigned pending orders and active workers and runs build_schedule.
+    Orders already assigned and still open count as load unless planned after the horizon.
+    """
+    days = workdays(start, day_count)
+    horizon_end = days[-1] + timedelta(days=1)
+    WorkOrder = models.WorkOrder
+    order_sector = func.coalesce(WorkOrder.sector_id, models.Asset.sector_id)
+
+    pending_query = tenant.query(
+        WorkOrder, WorkOrder.id, order_sector, WorkOrder.plan_id, WorkOrder.priority, WorkOrder.created_at
+    ).outerjoin(models.Asset, models.Asset.id == WorkOrder.asset_id).filter(
+        WorkOrder.status == models.WorkOrderStatus.PENDIENTE,
+        WorkOrder.assigned_to_id.is_(None)
+    )
+    if sector_id:
+        pending_query = pending_query.filter(order_sector == sector_id)
+    pending = pending_query.all()
+
+    workers_query = tenant.query(models.Worker, models.Worker.id, models.Worker.sector_id).filter(
+        models.Worker.is_active.is_(True)
+    )
+    if sector_id:
+        workers_query = workers_query.filter(or_(models.Worker.sector_id == sector_id, models.Worker.sector_id.is_(None)))
+    workers = [WorkerSlot(id=id, sector_id=worker_sector) for id, worker_sector in workers_query]
+
+    assigned = tenant.query(WorkOrder, WorkOrder.assigned_to_id, WorkOrder.plan_id).filter(
+        WorkOrder.status.in_(OPEN_STATUSES),
+        WorkOrder.assigned_to_id.in_([worker.id for worker in workers]),
+        or_(WorkOrder.scheduled_date.is_(None), WorkOrder.scheduled_date < horizon_end)
+    ).all() if workers else []
+
+    minutes = _plan_minutes(tenant, [row.plan_id for row in pending] + [row.plan_id for row in assigned])
+    by_id = {worker.id: worker for worker in workers}
+    for worker_id, plan_id in assigned:
+        by_id[worker_id].load += minutes.get(plan_id, DEFAULT_WORK_ORDER_MINUTES)
+
+    orders = [
+        PendingOrder(id=id, sector_id=sector, minutes=minutes.get(plan_id, DEFAULT_WORK_ORDER_MINUTES),
+                     priority=priority, created_at=created_at)
+        for id, sector, plan_id, priority, created_at in pending
+    ]
+    return build_schedule(orders, workers, days)
@@ -0,0 +1,180 @@
+from fastapi.staticfiles import StaticFiles
+from abc import ABC, abstractmethod
+import os
+import shutil
+
+# Content-addressed files never change once written, so browsers and CDNs may keep them forever
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+class Storage(ABC):
+    """
+    Where uploaded files live. Keys are relative paths such as "logos/<sha256>.png";
+    since names are content hashes, writing an existing key is a no-op.
+    """
+
+    @abstractmethod
+    def exists(self, key: str) -> bool:
+        ...
+
+    @abstractmethod
+    def put_file(self, local_path: str, key: str, content_type: str = None):
+        """Stores the file at `local_path` under `key`. The local file is moved or removed."""
+
+    @abstractmethod
+    def get_bytes(self, key: str) -> bytes:
+        ...
+
+    @abstractmethod
+    def delete(self, key: str):
+        ...
+
+    @abstractmethod
+    def delete_prefix(self, prefix: str):
+        """Deletes every key under `prefix`, e.g. all files of a company."""
+
+    @abstractmethod
+    def url(self, key: str) -> str:
+        ...
+
+    def local_path(self, key: str):
+        """Path on this machine's disk, or None for remote backends."""
+        return None
+
+    def download_url(self, key: str, filename: str):
+        """Short-lived URL clients can be redirected to, or None when local_path serves the file."""
+        return None
+
+class LocalStorage(Storage):
+    def __init__(self, root: str, base_url: str = None):
+        self.root = root
+        self.base_url = base_url.rstrip("/") if base_url else None
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key)
+
+    def exists(self, key: str) -> bool:
+        return os.path.exists(self._path(key))
+
+    def put_file(self, local_path: str, key: str, content_type: str = None):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if os.path.exists(path):
+            os.remove(local_path)
+            return
+        # Write under a temp name first so a half-copied file is never served under its hash
+        tmp_path = path + ".part"
+        shutil.move(local_path, tmp_path)
+        os.replace(tmp_path, path)
+
+    def get_bytes(self, key: str) -> bytes:
+        with open(self._path(key), "rb") as f:
+            return f.read()
+
+    def delete(self, key: str):
+        if os.path.exists(self._path(key)):
+            os.remove(self._path(key))
+
+    def delete_prefix(self, prefix: str):
+        shutil.rmtree(self._path(prefix), ignore_errors=True)
+
+    def url(self, key: str) -> str:
+        return f"{self.base_url}/{key}"
+
+    def local_path(self, key: str):
+        return self._path(key)
+
+class S3Storage(Storage):
+    """
+    S3-compatible object storage (AWS, MinIO, R2...). Needs boto3, see requirements-s3.txt.
+    """
+
+    def __init__(self, bucket: str, public_url: str = None, endpoint_url: str = None):
+        import boto3
+        self.bucket = bucket
+        self.public_url = public_url.rstrip("/") if public_url else None
+        self.client = boto3.client("s3", endpoint_url=endpoint_url)
+
+    def exists(self, key: str) -> bool:
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=key)
+            return True
+        except self.client.exceptions.ClientError:
+            return False
+
+    def put_file(self, local_path: str, key: str, content_type: str = None):
+        if not self.exists(key):
+            extra = {"CacheControl": IMMUTABLE_CACHE_CONTROL}
+            if content_type:
+                extra["ContentType"] = content_type
+            self.client.upload_file(local_path, self.bucket, key, ExtraArgs=extra)
+        os.remove(local_path)
+
+    def get_bytes(self, key: str) -> bytes:
+        return self.client.get_object(Bucket=self.bucket, Key=key)["Body"].read()
+
+    def delete(self, key: str):
+        self.client.delete_object(Bucket=self.bucket, Key=key)
+
+    def delete_prefix(self, prefix: str):
+        for page in self.client.get_paginator("list_objects_v2").paginate(Bucket=self.bucket, Prefix=prefix):
+            keys = [{"Key": obj["Key"]} for obj in page.get("Contents", [])]
+            if keys:
+                self.client.delete_objects(Bucket=self.bucket, Delete={"Objects": keys})
+
+    def url(self, key: str) -> str:
+        return f"{self.public_url}/{key}"
+
+    def download_url(self, key: str, filename: str) -> str:
+        return self.client.generate_presigned_url("get_object", ExpiresIn=300, Params={
+            "Bucket": self.bucket,
+            "Key": key,
+            "ResponseContentDisposition": f'attachment; filename="{filename}"',
+        })
+
+class ImmutableStaticFiles(StaticFiles):
+    """StaticFiles for content-addressed files: adds long-lived immutable cache headers."""
+
+    def file_response(self, *args, **kwargs):
+        response = super().file_response(*args, **kwargs)
+        response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+        return response
+
+MEDIA_ROOT = os.getenv("MEDIA_ROOT", "static/media")
+MEDIA_URL = "/media"
+# Private files (attachments) are never mounted; they are only served by authenticated endpoints
+PRIVATE_ROOT = os.getenv("PRIVATE_STORAGE_ROOT", "private")
+
+_storage = None
+_private_storage = None
+
+def get_storage() -> Storage:
+    """
+    Backend chosen with STORAGE_BACKEND: "local" (default, served from /media) or "s3".
+    """
+    global _storage
+    if _storage is None:
+        if os.getenv("STORAGE_BACKEND", "local") == "s3":
+            _storage = S3Storage(
+                bucket=os.environ["S3_BUCKET"],
+                public_url=os.environ["S3_PUBLIC_URL"],
+                endpoint_url=os.getenv("S3_ENDPOINT_URL"),
+            )
+        else:
+            _storage = LocalStorage(MEDIA_ROOT, MEDIA_URL)
+    return _storage
+
+def get_private_storage() -> Storage:
+    """
+    Same backends as get_storage(), for files that must not be publicly reachable.
+    With S3, objects go to S3_PRIVATE_BUCKET and are downloaded through presigned URLs.
+    """
+    global _private_storage
+    if _private_storage is None:
+        if os.getenv("STORAGE_BACKEND", "local") == "s3":
+            _private_storage = S3Storage(
+                bucket=os.environ["S3_PRIVATE_BUCKET"],
+                endpoint_url=os.getenv("S3_ENDPOINT_URL"),
+            )
+        else:
+            _private_storage = LocalStorage(PRIVATE_ROOT)
+    return _private_storage
@@ -0,0 +1,99 @@
+from sqlalchemy import event, func, insert, literal, select
+from sqlalchemy.orm import Session, Query
+from datetime import datetime, timedelta
+from typing import Optional, Tuple, List
+
+from .. import models
+from ..tenancy import TenantSession
+from . import tools
+
+# Entities offline clients keep a local copy of. Deleting any of them leaves a tombstone.
+SYNCED_MODELS = (
+    models.WorkOrder,
+    models.Asset,
+    models.Tool,
+    models.SparePart,
+    models.PreventivePlan,
+)
+SYNCED_TABLES = {model.__tablename__ for model in SYNCED_MODELS}
+
+# Rows written by transactions that started before the watermark but committed after it
+# would be missed; pulling the watermark back a few seconds re-sends them instead.
+CLOCK_SKEW = timedelta(seconds=5)
+
+@event.listens_for(Session, "before_flush")
+def record_tombstones(session, flush_context, instances):
+    for obj in session.deleted:
+        if isinstance(obj, SYNCED_MODELS):
+            session.add(models.SyncTombstone(
+                company_id=obj.company_id,
+                entity_type=obj.__tablename__,
+                entity_id=obj.id
+            ))
+
+def record_deleted(db: Session, table, where):
+    """
+    Tombstones for the rows of `table` matching `where`, for set-based DELETEs, which the
+    before_flush hook never sees. Call it right before the DELETE, in the same transaction.
+    """
+    if table.name not in SYNCED_TABLES:
+        return
+    db.execute(insert(models.SyncTombstone).from_select(
+        ["company_id", "entity_type", "entity_id"],
+        select(table.c.company_id, literal(table.name), table.c.id).where(where)
+    ))
+
+def changed_since(query: Query, column, id_column, since: Optional[datetime], limit: int) -> Tuple[List, Optional[datetime]]:
+    """
+    Returns up to `limit` rows with `column` > since, oldest first.
+    If the batch was truncated, also returns the timestamp the next pull must resume from.
+    """
+    if since is not None:
+        query = query.filter(column > since)
+    rows = query.order_by(column, id_column).limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    high = getattr(rows[-1], column.key)
+    # Resuming with `> high` would skip the rows that share the last timestamp,
+    # so cut the batch at a timestamp boundary instead.
+    kept = [row for row in rows if getattr(row, column.key) != high]
+    if kept:
+        return kept, getattr(kept[-1], column.key)
+    # Whole batch shares one timestamp (e.g. written by one transaction): send all of them
+    return query.filter(column == high).order_by(id_column).all(), high
+
+def pull_changes(tenant: TenantSession, since: Optional[datetime], limit: int, worker_id: Optional[int] = None):
+    watermark = tenant.db.query(func.now()).scalar() - CLOCK_SKEW
+    has_more = False
+    result = {}
+
+    work_orders = tenant.query(models.WorkOrder)
+    if worker_id:
+        work_orders = work_orders.filter(models.WorkOrder.assigned_to_id == worker_id)
+
+    sources = {
+        "work_orders": (work_orders, models.WorkOrder),
+        "assets": (tenant.query(models.Asset), models.Asset),
+        "tools": (tools.active_query(tenant), models.Tool), # Deleted ones go out as tombstones
+        "spare_parts": (tenant.query(models.SparePart), models.SparePart),
+        "plans": (tenant.query(models.PreventivePlan), models.PreventivePlan),
+    }
+    for key, (query, model) in sources.items():
+        rows, resume_at = changed_since(query, model.updated_at, model.id, since, limit)
+        result[key] = rows
+        if resume_at is not None:
+            has_more = True
+            watermark = min(watermark, resume_at)
+
+    tombstones = tenant.query(models.SyncTombstone)
+    rows, resume_at = changed_since(tombstones, models.SyncTombstone.deleted_at, models.SyncTombstone.id, since, limit)
+    result["deleted"] = rows
+    if resume_at is not None:
+        has_more = True
+        watermark = min(watermark, resume_at)
+
+    result["watermark"] = watermark
+    result["has_more"] = has_more
+    return result
@@ -0,0 +1,76 @@
+"""
+Job handlers, looked up by kind when `python -m app.worker` runs a job. Each one opens its
+own session and raises to have the job retried.
+"""
+from .. import idempotency
+from ..database import SessionLocal
+from ..tenancy import TenantSession
+from . import jobs, notifications, partitions, payment, preventive, purge
+
+@jobs.handler("mp_preapproval")
+def sync_preapproval(payload: dict):
+    db = SessionLocal()
+    try:
+        payment.sync_preapproval(db, payload["preapproval_id"])
+    finally:
+        db.close()
+
+@jobs.handler("run_preventive_plans")
+def run_preventive_plans(payload: dict):
+    # One job per company, so one company's failure doesn't hold back the others
+    db = SessionLocal()
+    try:
+        preventive.run_due_plans(TenantSession(db, payload["company_id"]))
+        db.commit()
+    finally:
+        db.close()
+
+@jobs.handler("schedule_preventive_plans")
+def schedule_preventive_plans(payload: dict):
+    db = SessionLocal()
+    try:
+        for company_id in preventive.companies_with_due_plans(db):
+            jobs.enqueue(db, "run_preventive_plans", {"company_id": company_id}, company_id=company_id)
+        db.commit()
+    finally:
+        db.close()
+
+@jobs.handler("purge_pending_companies")
+def purge_pending_companies(payload: dict):
+    purge.purge_pending_companies()
+
+@jobs.handler("maintain_work_orders")
+def maintain_work_orders(payload: dict):
+    partitions.maintain_work_orders()
+
+@jobs.handler("dispatch_notifications")
+def dispatch_notifications(payload: dict):
+    db = SessionLocal()
+    try:
+        notifications.dispatch(db)
+    finally:
+        db.close()
+
+@jobs.handler("notify_overdue_work_orders")
+def notify_overdue_work_orders(payload: dict):
+    db = SessionLocal()
+    try:
+        notifications.queue_overdue_work_orders(db)
+    finally:
+        db.close()
+
+@jobs.handler("notify_expiring_subscriptions")
+def notify_expiring_subscriptions(payload: dict):
+    db = SessionLocal()
+    try:
+        notifications.queue_expiring_subscriptions(db)
+    finally:
+        db.close()
+
+@jobs.handler("sweep_idempotency_keys")
+def sweep_idempotency_keys(payload: dict):
+    db = SessionLocal()
+    try:
+        idempotency.sweep(db)
+    finally:
+        db.close()
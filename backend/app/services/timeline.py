@@ -0,0 +1,128 @@
+from fastapi import HTTPException
+from sqlalchemy import Integer, Numeric, String, and_, cast, literal, null, or_, select, union_all
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, List, Optional, Tuple
+import base64
+
+from .. import models, schemas_archives
+from ..tenancy import TenantSession
+
+Kind = schemas_archives.AssetEventKind
+
+# Every branch of the timeline UNION selects these, in this order. The types are for the
+# NULLs of branches without the column: Postgres reads an untyped NULL in a subquery as text.
+EVENT_COLUMNS = {
+    "kind": String, "occurred_at": None, "id": Integer, "work_order_id": Integer, "title": String,
+    "detail": String, "status": String, "worker_id": Integer, "plan_id": Integer, "quantity": Integer,
+    "cost": Numeric(12, 2),
+}
+
+@dataclass
+class TimelineSource:
+    """
+    One kind of asset event read straight from the table that owns it. `columns` gives the
+    expressions for the EVENT_COLUMNS after id (None for NULL), `filters` anything beyond
+    company and asset. The table needs an index on (asset, time, id) so each branch reads only one page.
+    """
+    kind: Kind
+    model: type
+    asset_id: object
+    occurred_at: object
+    columns: Callable[[], list]
+    filters: Callable[[], list] = lambda: []
+
+def _work_order_columns():
+    wo = models.WorkOrder
+    return [
+        wo.id, wo.ticket_number, wo.description, cast(wo.status, String), wo.assigned_to_id, wo.plan_id,
+        None, wo.parts_cost + wo.labor_cost
+    ]
+
+def _part_columns():
+    part = models.WorkOrderPart
+    return [part.work_order_id, part.description, None, None, None, None, part.quantity, part.total_cost]
+
+def _tool_checkout_columns():
+    movement = models.ToolMovement
+    tool_name = select(models.Tool.name).where(models.Tool.id == movement.tool_id).scalar_subquery()
+    return [movement.work_order_id, tool_name, movement.notes, None, movement.worker_id, None, None, None]
+
+SOURCES: List[TimelineSource] = [
+    TimelineSource(
+        Kind.WORK_ORDER, models.WorkOrder, models.WorkOrder.asset_id, models.WorkOrder.created_at,
+        _work_order_columns, lambda: [models.WorkOrder.plan_id.is_(None)]
+    ),
+    TimelineSource(
+        Kind.PREVENTIVE_RUN, models.WorkOrder, models.WorkOrder.asset_id, models.WorkOrder.created_at,
+        _work_order_columns, lambda: [models.WorkOrder.plan_id.is_not(None)]
+    ),
+    TimelineSource(
+        Kind.PART_CONSUMED, models.WorkOrderPart, models.WorkOrderPart.asset_id, models.WorkOrderPart.created_at,
+        _part_columns
+    ),
+    TimelineSource(
+        Kind.TOOL_CHECKOUT, models.ToolMovement, models.ToolMovement.asset_id, models.ToolMovement.created_at,
+        _tool_checkout_columns, lambda: [models.ToolMovement.action == models.ToolMovementAction.CHECKOUT]
+    ),
+]
+
+def encode_cursor(event: dict) -> str:
+    raw = f"{event['occurred_at'].isoformat()}|{event['kind']}|{event['id']}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        occurred_at, kind, id = raw.split("|")
+        return datetime.fromisoformat(occurred_at), Kind(kind).value, int(id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def _before(source: TimelineSource, cursor: Tuple[datetime, str, int]):
+    """Keyset condition: rows of this source that sort after the cursor (newest first)."""
+    occurred_at, kind, id = cursor
+    if source.kind.value < kind:
+        return source.occurred_at <= occurred_at
+    if source.kind.value > kind:
+        return source.occurred_at < occurred_at
+    # The plain <= bound is what the index range scan starts from; the OR alone is only a filter
+    return and_(
+        source.occurred_at <= occurred_at,
+        or_(source.occurred_at < occurred_at, source.model.id < id)
+    )
+
+def _branch(source: TimelineSource, tenant: TenantSession, asset_id: int, cursor, limit: int):
+    labels = list(EVENT_COLUMNS)
+    stmt = select(
+        literal(source.kind.value, String).label(labels[0]),
+        source.occurred_at.label(labels[1]),
+        source.model.id.label(labels[2]),
+        *[
+            (cast(null(), EVENT_COLUMNS[label]) if column is None else column).label(label)
+            for column, label in zip(source.columns(), labels[3:])
+        ]
+    ).where(
+        source.model.company_id == tenant.company_id, source.asset_id == asset_id, *source.filters()
+    )
+    if cursor:
+        stmt = stmt.where(_before(source, cursor))
+    # Each branch stops at one page, so the cost doesn't grow with the asset's history
+    return select(stmt.order_by(source.occurred_at.desc(), source.model.id.desc()).limit(limit).subquery())
+
+def read_timeline(tenant: TenantSession, asset_id: int, limit: int, before: Optional[str] = None) -> dict:
+    """
+    Newest first page of an asset's events merged from every source, plus the cursor for
+    the next page (None on the last one). Orders moved to the archive are not included.
+    """
+    cursor = decode_cursor(before) if before else None
+    branches = [_branch(source, tenant, asset_id, cursor, limit + 1) for source in SOURCES]
+    union = union_all(*branches).subquery() if len(branches) > 1 else branches[0].subquery()
+    stmt = select(union).order_by(union.c.occurred_at.desc(), union.c.kind.desc(), union.c.id.desc()).limit(limit + 1)
+    events = [dict(row._mapping) for row in tenant.db.execute(stmt)]
+
+    next_cursor = None
+    if len(events) > limit:
+        events = events[:limit]
+        next_cursor = encode_cursor(events[-1])
+    return {"events": events, "next_cursor": next_cursor}
@@ -0,0 +1,156 @@
+from fastapi import HTTPException
+from sqlalchemy import func, insert
+from datetime import datetime
+from typing import Iterable, List, Optional
+
+from .. import models
+from ..tenancy import TenantSession
+
+# A tool in one of these can't be checked out until someone changes its status
+UNAVAILABLE_STATUSES = {"BROKEN", "LOST"}
+
+def _lock_tools(tenant: TenantSession, tool_ids: Iterable[int]) -> dict:
+    # FOR UPDATE: two handovers of the same tool can't both see it free (no-op on SQLite)
+    Tool = models.Tool
+    rows = tenant.query(Tool, Tool.id, Tool.status, Tool.current_worker_id, Tool.current_sector_id).filter(
+        Tool.id.in_(set(tool_ids)), Tool.deleted_at.is_(None)
+    ).with_for_update()
+    return {row.id: row for row in rows}
+
+def active_query(tenant: TenantSession):
+    """Tools that weren't deleted. Deleted ones keep their row only so the ledger still names them."""
+    return tenant.query(models.Tool).filter(models.Tool.deleted_at.is_(None))
+
+def _result(tool_id: int, detail: Optional[str] = None) -> dict:
+    return {"tool_id": tool_id, "ok": detail is None, "detail": detail}
+
+def checkout(tenant: TenantSession, tool_ids: List[int], worker_id: Optional[int] = None,
+             sector_id: Optional[int] = None, work_order_id: Optional[int] = None,
+             due_at: Optional[datetime] = None, notes: Optional[str] = None, user_id: Optional[int] = None) -> List[dict]:
+    """
+    Hands a batch of tools to one worker or sector, e.g. at a shift handover. Tools that are
+    missing, already out or unavailable are reported per item; the rest get one ledger row
+    each and a single UPDATE of their current holder.
+    """
+    if not worker_id and not sector_id:
+        raise HTTPException(status_code=400, detail="worker_id or sector_id is required")
+    tenant.validate_refs({
+        models.Worker: [worker_id],
+        models.Sector: [sector_id],
+        models.WorkOrder: [work_order_id],
+    })
+    asset_id = None
+    if work_order_id:
+        WorkOrder = models.WorkOrder
+        asset_id = tenant.query(WorkOrder, WorkOrder.asset_id).filter(WorkOrder.id == work_order_id).scalar()
+
+    tools = _lock_tools(tenant, tool_ids)
+    results, done = [], []
+    for tool_id in tool_ids:
+        tool = tools.get(tool_id)
+        if not tool:
+            results.append(_result(tool_id, "Tool not found"))
+        elif tool_id in done or tool.current_worker_id or tool.current_sector_id:
+            results.append(_result(tool_id, "Tool already checked out"))
+        elif tool.status in UNAVAILABLE_STATUSES:
+            results.append(_result(tool_id, "Tool not available"))
+        else:
+            done.append(tool_id)
+            results.append(_result(tool_id))
+
+    if done:
+        tenant.db.execute(insert(models.ToolMovement), [{
+            "company_id": tenant.company_id, "tool_id": tool_id, "action": models.ToolMovementAction.CHECKOUT,
+            "worker_id": worker_id, "sector_id": sector_id, "work_order_id": work_order_id, "asset_id": asset_id,
+            "user_id": user_id, "due_at": due_at, "notes": notes,
+        } for tool_id in done])
+        Tool = models.Tool
+        tenant.query(Tool).filter(Tool.id.in_(done)).update({
+            Tool.current_worker_id: worker_id,
+            Tool.current_sector_id: sector_id,
+            Tool.checked_out_at: func.now(),
+            Tool.due_at: due_at,
+            Tool.status: "IN_USE",
+            Tool.version: Tool.version + 1,
+        }, synchronize_session=False)
+    return results
+
+def return_tools(tenant: TenantSession, tool_ids: List[int], status: str = "AVAILABLE",
+                 notes: Optional[str] = None, user_id: Optional[int] = None) -> List[dict]:
+    """
+    Takes a batch of tools back from whoever holds them. `status` is the condition they come
+    back in (AVAILABLE, or BROKEN/LOST to take them out of circulation).
+    """
+    tools = _lock_tools(tenant, tool_ids)
+    results, returned = [], {}
+    for tool_id in tool_ids:
+        tool = tools.get(tool_id)
+        if not tool:
+            results.append(_result(tool_id, "Tool not found"))
+        elif tool_id in returned or not (tool.current_worker_id or tool.current_sector_id):
+            results.append(_result(tool_id, "Tool is not checked out"))
+        else:
+            returned[tool_id] = tool
+            results.append(_result(tool_id))
+
+    if returned:
+        # The return row names the holder giving the tool back
+        tenant.db.execute(insert(models.ToolMovement), [{
+            "company_id": tenant.company_id, "tool_id": tool_id, "action": models.ToolMovementAction.RETURN,
+            "worker_id": tool.current_worker_id, "sector_id": tool.current_sector_id,
+            "user_id": user_id, "status": status, "notes": notes,
+        } for tool_id, tool in returned.items()])
+        Tool = models.Tool
+        tenant.query(Tool).filter(Tool.id.in_(list(returned))).update({
+            Tool.current_worker_id: None,
+            Tool.current_sector_id: None,
+            Tool.checked_out_at: None,
+            Tool.due_at: None,
+            Tool.status: status,
+            Tool.version: Tool.version + 1,
+        }, synchronize_session=False)
+    return results
+
+def overdue_query(tenant: TenantSession):
+    """Checked out tools past their due date, most overdue first."""
+    # due_at IS NOT NULL lets the planner use the partial index, which holds only tools that are out
+    Tool = models.Tool
+    return active_query(tenant).filter(Tool.due_at.is_not(None), Tool.due_at < func.now()).order_by(Tool.due_at, Tool.id)
+
+def reassign(tenant: TenantSession, tool: models.Tool, worker_id: Optional[int], sector_id: Optional[int],
+             user_id: Optional[int] = None):
+    """
+    Moves a tool edited by hand to a new holder (or none), recording the return from the
+    previous holder and the checkout to the new one. Like a checkout, a tool with a holder is
+    IN_USE; one left without a holder goes back to AVAILABLE. Does not commit.
+    """
+    if (tool.current_worker_id, tool.current_sector_id) == (worker_id, sector_id):
+        return
+    if tool.current_worker_id or tool.current_sector_id:
+        tenant.add(models.ToolMovement(
+            tool_id=tool.id, action=models.ToolMovementAction.RETURN, user_id=user_id,
+            worker_id=tool.current_worker_id, sector_id=tool.current_sector_id, status=tool.status
+        ))
+    if worker_id or sector_id:
+        tenant.add(models.ToolMovement(
+            tool_id=tool.id, action=models.ToolMovementAction.CHECKOUT, user_id=user_id,
+            worker_id=worker_id, sector_id=sector_id
+        ))
+    tool.current_worker_id = worker_id
+    tool.current_sector_id = sector_id
+    tool.checked_out_at = func.now() if worker_id or sector_id else None
+    tool.due_at = None
+    if worker_id or sector_id:
+        tool.status = "IN_USE"
+    elif tool.status == "IN_USE":
+        tool.status = "AVAILABLE"
+
+def delete(tenant: TenantSession, tool: models.Tool, user_id: Optional[int] = None):
+    """
+    Takes a tool out of circulation for good. The row stays, so the ledger keeps its history:
+    a tool still held gets its return recorded first. Does not commit.
+    """
+    reassign(tenant, tool, None, None, user_id)
+    tool.deleted_at = func.now()
+    # Not a real DELETE, so the before_flush hook won't leave the tombstone offline clients need
+    tenant.add(models.SyncTombstone(entity_type=models.Tool.__tablename__, entity_id=tool.id))
@@ -0,0 +1,113 @@
+from fastapi import HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from python_multipart.exceptions import MultipartParseError
+from python_multipart.multipart import MultipartParser, parse_options_header
+from dataclasses import dataclass
+import hashlib
+import os
+import tempfile
+
+@dataclass
+class ReceivedFile:
+    path: str # Temp file, the caller moves it into storage or removes it
+    filename: str
+    content_type: str
+    size: int
+    sha256: str
+
+class _FilePart:
+    """Collects the first file part of a multipart body as the parser walks through it."""
+
+    def __init__(self):
+        self.header_field = b""
+        self.header_value = b""
+        self.headers = {}
+        self.in_file = False
+        self.done = False
+        self.filename = None
+        self.content_type = "application/octet-stream"
+        self.pending = []
+
+    def callbacks(self):
+        return {
+            "on_part_begin": self.on_part_begin,
+            "on_header_field": self.on_header_field,
+            "on_header_value": self.on_header_value,
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished,
+            "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end,
+        }
+
+    def on_part_begin(self):
+        self.headers = {}
+
+    def on_header_field(self, data, start, end):
+        self.header_field += data[start:end]
+
+    def on_header_value(self, data, start, end):
+        self.header_value += data[start:end]
+
+    def on_header_end(self):
+        self.headers[self.header_field.lower()] = self.header_value
+        self.header_field = b""
+        self.header_value = b""
+
+    def on_headers_finished(self):
+        _, options = parse_options_header(self.headers.get(b"content-disposition", b""))
+        if not self.done and b"filename" in options:
+            self.in_file = True
+            self.filename = os.path.basename(options[b"filename"].decode("utf-8", "replace"))
+            self.content_type = self.headers.get(b"content-type", b"application/octet-stream").decode("latin-1")
+
+    def on_part_data(self, data, start, end):
+        if self.in_file:
+            self.pending.append(data[start:end])
+
+    def on_part_end(self):
+        if self.in_file:
+            self.in_file = False
+            self.done = True
+
+async def receive_file(request: Request, max_bytes: int) -> ReceivedFile:
+    """
+    Streams the first file of a multipart/form-data request straight into a temp file,
+    hashing it on the way. Nothing is spooled first, so memory stays at one network chunk
+    and oversized uploads are rejected with 413 as soon as they cross `max_bytes`.
+    """
+    content_type, options = parse_options_header(request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data" or b"boundary" not in options:
+        raise HTTPException(status_code=400, detail="Expected a multipart/form-data upload")
+
+    part = _FilePart()
+    parser = MultipartParser(options[b"boundary"], part.callbacks())
+    digest = hashlib.sha256()
+    size = 0
+    fd, path = tempfile.mkstemp()
+    try:
+        with os.fdopen(fd, "wb") as buffer:
+            async for chunk in request.stream():
+                parser.write(chunk)
+                if not part.pending:
+                    continue
+                data = b"".join(part.pending)
+                part.pending = []
+                size += len(data)
+                if size > max_bytes:
+                    raise HTTPException(status_code=413, detail=f"File larger than {max_bytes // (1024 * 1024)} MB")
+                digest.update(data)
+                await run_in_threadpool(buffer.write, data)
+            parser.finalize()
+
+        if not part.filename:
+            raise HTTPException(status_code=400, detail="No file in upload")
+        if not size:
+            raise HTTPException(status_code=400, detail="Empty file")
+    except MultipartParseError:
+        os.remove(path)
+        raise HTTPException(status_code=400, detail="Malformed multipart upload")
+    except Exception:
+        os.remove(path)
+        raise
+
+    return ReceivedFile(path, part.filename, part.content_type, size, digest.hexdigest())
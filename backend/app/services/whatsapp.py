@@ -1,7 +0,0 @@
-def send_whatsapp_notification(to: str, message: str):
-    # Integration with Twilio or Meta API would go here
-    print(f"------------")
-    print(f"Sending WhatsApp to {to}:")
-    print(f"{message}")
-    print(f"------------")
-    return True
@@ -0,0 +1,99 @@
+from fastapi import HTTPException
+from sqlalchemy import event, select, literal, union_all, text
+from sqlalchemy.orm import Session
+from typing import Dict, Iterable, Optional, Set
+import os
+
+from . import models
+
+# Set app.company_id on every transaction so Postgres row-level security policies
+# (USING company_id = current_setting('app.company_id')::int) can be enabled per table.
+SET_TENANT_GUC = os.getenv("DB_TENANT_GUC", "0") == "1"
+
+# Name used in "<X> not found" / "Invalid <X> ID" errors for each model
+LABELS = {
+    models.Sector: "Sector",
+    models.Worker: "Worker",
+    models.Asset: "Asset",
+    models.Tool: "Tool",
+    models.SparePartCategory: "Category",
+    models.SparePart: "Spare Part",
+    models.Supplier: "Supplier",
+    models.PreventivePlan: "Plan",
+    models.WorkOrder: "Work Order",
+    models.PurchaseOrder: "Purchase Order",
+    models.Attachment: "Attachment",
+    models.WorkOrderPart: "Part line",
+    models.WorkOrderLabor: "Labor line",
+}
+
+class TenantSession:
+    """
+    Wraps a Session for one company: queries are filtered by company_id and new rows
+    are stamped with it, so handlers don't repeat the filter by hand.
+    """
+
+    def __init__(self, db: Session, company_id: Optional[int]):
+        self.db = db
+        self.company_id = company_id
+        if SET_TENANT_GUC and company_id is not None and db.get_bind().dialect.name == "postgresql":
+            event.listen(db, "after_begin", self._set_guc)
+            # The user lookup during authentication already began this request's transaction
+            if db.in_transaction():
+                self._set_guc(db, None, db.connection())
+
+    def _set_guc(self, session, transaction, connection):
+        # Transaction-local, so a pooled connection never leaks the tenant to the next request
+        connection.execute(text("SELECT set_config('app.company_id', :cid, true)"), {"cid": str(self.company_id)})
+
+    def query(self, model, *entities):
+        query = self.db.query(*entities) if entities else self.db.query(model)
+        return query.filter(model.company_id == self.company_id)
+
+    def get(self, model, id: int):
+        return self.query(model).filter(model.id == id).first()
+
+    def get_or_404(self, model, id: int):
+        obj = self.get(model, id)
+        if not obj:
+            raise HTTPException(status_code=404, detail=f"{LABELS.get(model, model.__name__)} not found")
+        return obj
+
+    def add(self, obj):
+        obj.company_id = self.company_id
+        self.db.add(obj)
+        return obj
+
+    def existing_ids(self, refs: Dict[type, Iterable[Optional[int]]]) -> Dict[type, Set[int]]:
+        """
+        Returns, for each model in `refs`, which of the given IDs exist in the company.
+        Runs a single query whatever the number of models; None entries are ignored.
+        """
+        wanted = {model: {id for id in ids if id} for model, ids in refs.items()}
+        found = {model: set() for model in refs}
+        selects = [
+            select(literal(model.__tablename__).label("kind"), model.id.label("id")).where(
+                model.id.in_(ids), model.company_id == self.company_id
+            )
+            for model, ids in wanted.items() if ids
+        ]
+        if not selects:
+            return found
+
+        models_by_table = {model.__tablename__: model for model in refs}
+        stmt = selects[0] if len(selects) == 1 else union_all(*selects)
+        for kind, id in self.db.execute(stmt):
+            found[models_by_table[kind]].add(id)
+        return found
+
+    def validate_refs(self, refs: Dict[type, Iterable[Optional[int]]]):
+        """
+        Checks in a single query that every referenced ID belongs to the company.
+        `refs` maps a model to the IDs the request points at; None entries are ignored.
+        Raises 400 naming the first model with an unknown ID.
+        """
+        refs = {model: [id for id in ids if id] for model, ids in refs.items()}
+        found = self.existing_ids(refs)
+        for model, ids in refs.items():
+            if any(id not in found[model] for id in ids):
+                raise HTTPException(status_code=400, detail=f"Invalid {LABELS.get(model, model.__name__)} ID")
@@ -9,13 +9,20 @@ SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-change-it-in-prod")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
+_pwd_context = None
+
+def pwd_context() -> CryptContext:
+    # Built on first use, so importing the app doesn't load the argon2 backend
+    global _pwd_context
+    if _pwd_context is None:
+        _pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
+    return _pwd_context
 
 def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+    return pwd_context().verify(plain_password, hashed_password)
 
 def get_password_hash(password):
-    return pwd_context.hash(password)
+    return pwd_context().hash(password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
@@ -26,3 +33,16 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode.update({"exp": expire})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
+
+def token_company_id(authorization: Optional[str]) -> Optional[int]:
+    """
+    company_id claim of an "Authorization: Bearer <token>" header, with no query: enough to
+    key per-company limits before authentication runs. None when missing or invalid.
+    """
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer":
+        return None
+    try:
+        return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM]).get("company_id")
+    except JWTError:
+        return None # Rejected by the route's own authentication
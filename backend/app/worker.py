@@ -0,0 +1,208 @@
+"""
+Background job worker. Claims runnable jobs from the jobs table in batches and runs them in a
+thread (or process) pool; any number of workers can run side by side.
+
+    python -m app.worker [--queues default] [--concurrency 4] [--processes] [--metrics-port 9109]
+    python -m app.worker --stats    # print queue depth and latency, then exit
+
+SIGTERM/SIGINT stop claiming and exit once the running jobs are finished.
+"""
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import argparse
+import json
+import logging
+import os
+import signal
+import socket
+import threading
+import time
+import traceback
+
+from .database import SessionLocal, engine
+from .services import jobs, tasks # tasks registers the job handlers
+
+logger = logging.getLogger("app.worker")
+
+# How long an idle worker waits before looking for jobs again
+POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "1"))
+# How often lost jobs are recovered and old ones cleaned up
+REAP_SECONDS = float(os.getenv("JOB_REAP_SECONDS", "60"))
+
+class Metrics:
+    """Counters of this worker, served with the queue stats in Prometheus text format."""
+
+    def __init__(self, concurrency: int):
+        self.concurrency = concurrency
+        self.busy = 0
+        self.outcomes = {"done": 0, "retried": 0, "dead": 0}
+        self.run_seconds = [0.0, 0]  # sum, count
+        self.wait_seconds = [0.0, 0]  # From runnable to started
+        self._lock = threading.Lock()
+
+    def started(self, wait_seconds: float):
+        with self._lock:
+            self.wait_seconds[0] += max(wait_seconds, 0.0)
+            self.wait_seconds[1] += 1
+
+    def finished(self, outcome: str, run_seconds: float):
+        with self._lock:
+            self.outcomes[outcome] += 1
+            self.run_seconds[0] += run_seconds
+            self.run_seconds[1] += 1
+
+    def render(self, queue_stats: list) -> str:
+        lines = []
+        for field in ("queued", "ready", "running", "dead", "oldest_ready_seconds"):
+            lines.append(f"# TYPE mant_jobs_{field} gauge")
+            lines += [f'mant_jobs_{field}{{queue="{row["queue"]}"}} {row[field]}' for row in queue_stats]
+        with self._lock:
+            lines += [
+                "# TYPE mant_worker_jobs_total counter",
+                *[f'mant_worker_jobs_total{{outcome="{name}"}} {count}' for name, count in self.outcomes.items()],
+                "# TYPE mant_worker_job_run_seconds summary",
+                f"mant_worker_job_run_seconds_sum {self.run_seconds[0]:.6f}",
+                f"mant_worker_job_run_seconds_count {self.run_seconds[1]}",
+                "# TYPE mant_worker_job_wait_seconds summary",
+                f"mant_worker_job_wait_seconds_sum {self.wait_seconds[0]:.6f}",
+                f"mant_worker_job_wait_seconds_count {self.wait_seconds[1]}",
+                "# TYPE mant_worker_busy gauge",
+                f"mant_worker_busy {self.busy}",
+                f"mant_worker_concurrency {self.concurrency}",
+            ]
+        return "\n".join(lines) + "\n"
+
+def _queue_stats() -> list:
+    db = SessionLocal()
+    try:
+        return jobs.queue_stats(db)
+    finally:
+        db.close()
+
+def serve_metrics(metrics: Metrics, port: int):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path != "/metrics":
+                self.send_error(404)
+                return
+            body = metrics.render(_queue_stats()).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("0.0.0.0", port), Handler)
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    return server
+
+def _init_process():
+    # Forked children must not share the parent's pooled connections
+    engine.dispose(close=False)
+
+class Worker:
+    def __init__(self, queues: list, concurrency: int, processes: bool = False):
+        self.name = f"{socket.gethostname()}:{os.getpid()}"
+        self.queues = queues
+        self.concurrency = concurrency
+        if processes:
+            self.pool = ProcessPoolExecutor(concurrency, initializer=_init_process)
+        else:
+            self.pool = ThreadPoolExecutor(concurrency, thread_name_prefix="job")
+        self.metrics = Metrics(concurrency)
+        self.running = {}  # future -> (job, time.monotonic() at start)
+        self.stopping = threading.Event()
+
+    def stop(self, *args):
+        if not self.stopping.is_set():
+            logger.info(f"Worker {self.name} draining {len(self.running)} running jobs")
+        self.stopping.set()
+
+    def run(self):
+        logger.info(f"Worker {self.name} on {','.join(self.queues)} with {self.concurrency} slots")
+        db = SessionLocal()
+        last_reap = last_heartbeat = 0.0
+        try:
+            while not (self.stopping.is_set() and not self.running):
+                claimed = []
+                try:
+                    # Also while draining: a long job must not look lost just because we're stopping
+                    if self.running and time.monotonic() - last_heartbeat > jobs.HEARTBEAT_SECONDS:
+                        jobs.heartbeat(db, self.name, [job["id"] for job, _ in self.running.values()])
+                        last_heartbeat = time.monotonic()
+                    if not self.stopping.is_set():
+                        if time.monotonic() - last_reap > REAP_SECONDS:
+                            jobs.reap(db)
+                            last_reap = time.monotonic()
+                        claimed = jobs.claim(db, self.name, self.queues, self.concurrency - len(self.running))
+                    for job in claimed:
+                        self._start(job)
+                    # Back to claiming as soon as a slot frees up, or after a poll interval
+                    if self.running:
+                        done, _ = wait(list(self.running), timeout=POLL_SECONDS, return_when=FIRST_COMPLETED)
+                        self._finish(db, done)
+                    else:
+                        self.stopping.wait(POLL_SECONDS)
+                except Exception as e:
+                    # Database gone for a moment: keep the running jobs and try again
+                    logger.error(f"Worker loop error: {e}")
+                    db.rollback()
+                    self.stopping.wait(POLL_SECONDS)
+        finally:
+            self.pool.shutdown(wait=True)
+            db.close()
+        logger.info(f"Worker {self.name} stopped")
+
+    def _start(self, job: dict):
+        if job["run_at"] is not None and job["started_at"] is not None:
+            self.metrics.started((job["started_at"] - job["run_at"]).total_seconds())
+        future = self.pool.submit(jobs.run, job["kind"], job["payload"])
+        self.running[future] = (job, time.monotonic())
+        self.metrics.busy = len(self.running)
+
+    def _finish(self, db, futures):
+        succeeded = []
+        for future in futures:
+            job, started = self.running.pop(future)
+            elapsed = time.monotonic() - started
+            error = future.exception()
+            if error is None:
+                succeeded.append(job["id"])
+                self.metrics.finished("done", elapsed)
+                continue
+            message = "".join(traceback.format_exception(error))
+            retried = jobs.fail(db, job, message)
+            self.metrics.finished("retried" if retried else "dead", elapsed)
+            logger.error(f"Job {job['id']} ({job['kind']}) failed, attempt {job['attempts']}/{job['max_attempts']}"
+                         f"{'' if retried else ', dead-lettered'}: {error}")
+        # One statement for every job that finished together
+        if succeeded:
+            jobs.finish(db, succeeded)
+        self.metrics.busy = len(self.running)
+
+def main():
+    parser = argparse.ArgumentParser(description="Runs background jobs from the jobs table.")
+    parser.add_argument("--queues", default=os.getenv("JOB_QUEUES", "default"), help="Comma-separated queue names")
+    parser.add_argument("--concurrency", type=int, default=int(os.getenv("JOB_CONCURRENCY", "4")))
+    parser.add_argument("--processes", action="store_true", help="Run jobs in processes instead of threads")
+    parser.add_argument("--metrics-port", type=int, default=int(os.getenv("JOB_METRICS_PORT", "0")))
+    parser.add_argument("--stats", action="store_true", help="Print queue stats and exit")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    if args.stats:
+        print(json.dumps(_queue_stats(), indent=2))
+        return
+
+    worker = Worker([q.strip() for q in args.queues.split(",") if q.strip()], max(args.concurrency, 1), args.processes)
+    signal.signal(signal.SIGTERM, worker.stop)
+    signal.signal(signal.SIGINT, worker.stop)
+    if args.metrics_port:
+        serve_metrics(worker.metrics, args.metrics_port)
+    worker.run()
+
+if __name__ == "__main__":
+    main()
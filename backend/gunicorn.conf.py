@@ -0,0 +1,93 @@
+"""
+Production server: gunicorn managing uvicorn workers.
+
+    gunicorn -c gunicorn.conf.py app.main:app
+
+- Workers: WEB_CONCURRENCY, or 2 x CPUs + 1 (CPUs as the container's quota allows), fewer
+  if the database can't give each one a useful pool.
+- The app is imported once in the master and the workers fork from it, sharing its memory
+  copy-on-write (GUNICORN_PRELOAD=0 to import it in each worker instead).
+- Each worker's pool (DB_POOL_SIZE + DB_MAX_OVERFLOW) is its share of the database's
+  max_connections, after DB_RESERVED_CONNECTIONS for the job workers, migrations and psql.
+- SIGTERM drains: see app/server.py. Give the container a longer stop timeout than
+  GRACEFUL_TIMEOUT.
+"""
+import gc
+import logging
+import math
+import os
+
+logger = logging.getLogger("gunicorn.error")
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+worker_class = "app.server.DrainingUvicornWorker"
+preload_app = os.getenv("GUNICORN_PRELOAD", "1") == "1"
+graceful_timeout = int(os.getenv("GRACEFUL_TIMEOUT", "30"))
+timeout = int(os.getenv("WORKER_TIMEOUT", "60"))
+keepalive = int(os.getenv("KEEPALIVE", "5"))
+accesslog = os.getenv("ACCESS_LOG", "-")
+
+# Connections per worker beyond its pool: the LISTEN bridge and the rate limiter's two
+PER_WORKER_EXTRA_CONNECTIONS = 3
+# A worker with a smaller pool would mostly wait for connections
+MIN_POOL = 5
+# Used when the database can't be asked (down at boot, or not Postgres); Postgres' default
+DEFAULT_MAX_CONNECTIONS = 100
+
+def cpu_count() -> int:
+    """CPUs this process may use: the cgroup quota (v2, then v1) if any, else the affinity mask."""
+    for quota_file, period_file in [("/sys/fs/cgroup/cpu.max", None),
+                                    ("/sys/fs/cgroup/cpu/cpu.cfs_quota_us", "/sys/fs/cgroup/cpu/cpu.cfs_period_us")]:
+        try:
+            with open(quota_file) as f:
+                values = f.read().split()
+            if period_file:
+                with open(period_file) as f:
+                    values.append(f.read().strip())
+            quota, period = values[0], values[1]
+            if quota not in ("max", "-1"):
+                return max(1, math.ceil(int(quota) / int(period)))
+        except (OSError, ValueError, IndexError):
+            continue
+    return len(os.sched_getaffinity(0))
+
+def database_max_connections() -> int:
+    if os.getenv("DB_MAX_CONNECTIONS"):
+        return int(os.environ["DB_MAX_CONNECTIONS"])
+    url = os.getenv("DATABASE_URL", "")
+    if url.startswith("postgresql"):
+        from sqlalchemy import create_engine, text
+        from sqlalchemy.pool import NullPool
+        try:
+            probe = create_engine(url, poolclass=NullPool, connect_args={"connect_timeout": 3})
+            with probe.connect() as conn:
+                return int(conn.execute(text("SHOW max_connections")).scalar())
+        except Exception as e:
+            logger.warning(f"Couldn't read max_connections ({e.__class__.__name__}), assuming {DEFAULT_MAX_CONNECTIONS}")
+    return DEFAULT_MAX_CONNECTIONS
+
+available = database_max_connections() - int(os.getenv("DB_RESERVED_CONNECTIONS", "20"))
+if os.getenv("WEB_CONCURRENCY"):
+    workers = int(os.environ["WEB_CONCURRENCY"])
+else:
+    workers = max(1, min(2 * cpu_count() + 1, available // (MIN_POOL + PER_WORKER_EXTRA_CONNECTIONS)))
+per_worker = max(available // workers - PER_WORKER_EXTRA_CONNECTIONS, 2)
+# A steady pool of half the share, the rest as overflow closed again after a burst
+os.environ.setdefault("DB_POOL_SIZE", str(max(per_worker // 2, 1)))
+os.environ.setdefault("DB_MAX_OVERFLOW", str(per_worker - int(os.environ["DB_POOL_SIZE"])))
+# Read by the app (rate limits, concurrency caps): must be set before it's preloaded
+os.environ["WEB_CONCURRENCY"] = str(workers)
+
+def when_ready(server):
+    server.log.info(f"{workers} workers, {os.environ['DB_POOL_SIZE']}+{os.environ['DB_MAX_OVERFLOW']} connections each")
+    if preload_app:
+        # Objects from the import never get collected; keeping the collector off them keeps
+        # their pages shared with the workers instead of copied on the first collection
+        gc.freeze()
+
+def post_fork(server, worker):
+    if preload_app:
+        # Nothing connects at import, but a forked pool must never reuse the master's connections
+        from app.database import engine, read_engine
+        engine.dispose(close=False)
+        read_engine.dispose(close=False)
@@ -0,0 +1,169 @@
+"""
+Benchmark of the asset hierarchy (services.asset_tree) on a synthetic plant > line >
+machine > component tree with work orders and monthly costs, in a throwaway company that's
+deleted afterwards. Times the "everything under line 3" reads through the closure table
+against a recursive CTE over assets.parent_id, the rollups, and moving machines and whole
+lines, and prints the plan of the subtree query to show it's read off the closure table's
+primary key.
+
+Run from backend/:  DATABASE_URL=postgresql+psycopg2://... python -m scripts.bench_asset_tree [lines_per_plant] [machines_per_line] [rounds]
+"""
+import statistics
+import sys
+import time
+import uuid
+from datetime import date
+from decimal import Decimal
+
+from sqlalchemy import delete, func, insert, select, text
+
+from app import models
+from app.database import SessionLocal
+from app.services import asset_tree, partitions
+from app.tenancy import TenantSession
+
+PLANTS = 5
+COMPONENTS_PER_MACHINE = 10
+ORDERS_PER_COMPONENT = 3
+COST_MONTHS = 6
+
+def timed(fn, rounds):
+    times = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1000, result
+
+def build(tenant: TenantSession, sector_id: int, lines_per_plant: int, machines_per_line: int):
+    """Creates the tree through asset_tree.add, like the API does. Returns (plants, lines, machines, components)."""
+    def asset(name, parent_id):
+        db_asset = tenant.add(models.Asset(name=name, sector_id=sector_id, parent_id=parent_id))
+        tenant.db.flush()
+        asset_tree.add(tenant, db_asset)
+        return db_asset.id
+
+    plants, lines, machines, components = [], [], [], []
+    for p in range(PLANTS):
+        plant = asset(f"Planta {p}", None)
+        plants.append(plant)
+        for l in range(lines_per_plant):
+            lines.append(asset(f"Linea {p}.{l}", plant))
+            for m in range(machines_per_line):
+                machines.append(asset(f"Maquina {p}.{l}.{m}", lines[-1]))
+                for c in range(COMPONENTS_PER_MACHINE):
+                    components.append(asset(f"Componente {p}.{l}.{m}.{c}", machines[-1]))
+    return plants, lines, machines, components
+
+def fill(tenant: TenantSession, components):
+    statuses = list(models.WorkOrderStatus)
+    tenant.db.execute(insert(models.WorkOrder), [
+        {"company_id": tenant.company_id, "asset_id": asset_id, "ticket_number": f"B-{asset_id}-{n}",
+         "type": models.WorkOrderType.CORRECTIVO, "status": statuses[(asset_id + n) % len(statuses)],
+         "description": "bench"}
+        for asset_id in components for n in range(ORDERS_PER_COMPONENT)
+    ])
+    tenant.db.execute(insert(models.AssetMonthlyCost), [
+        {"company_id": tenant.company_id, "asset_id": asset_id, "period": date(2026, month, 1),
+         "parts_cost": Decimal("12.50"), "labor_cost": Decimal("30.00"), "labor_minutes": 45}
+        for asset_id in components for month in range(1, COST_MONTHS + 1)
+    ])
+
+def recursive_subtree(tenant: TenantSession, asset_id: int):
+    """The same subtree walking assets.parent_id, what a query would do without the closure table."""
+    Asset = models.Asset
+    tree = select(Asset.id).where(Asset.id == asset_id).cte(recursive=True)
+    tree = tree.union_all(select(Asset.id).where(Asset.parent_id == tree.c.id, Asset.company_id == tenant.company_id))
+    return select(tree.c.id)
+
+def orders_under(tenant: TenantSession, subtree) -> int:
+    return tenant.query(models.WorkOrder, func.count(models.WorkOrder.id)).filter(
+        models.WorkOrder.asset_id.in_(subtree)).scalar()
+
+def main():
+    lines_per_plant = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    machines_per_line = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    rounds = int(sys.argv[3]) if len(sys.argv) > 3 else 20
+
+    db = SessionLocal()
+    company = models.Company(name="Asset tree benchmark", code=f"bench-{uuid.uuid4().hex[:8]}")
+    db.add(company)
+    db.flush()
+    tenant = TenantSession(db, company.id)
+    sector = tenant.add(models.Sector(name="Bench"))
+    db.commit()
+    ok = False
+    try:
+        if db.get_bind().dialect.name == "postgresql":
+            partitions.ensure_work_order_partitions(db)
+        start = time.perf_counter()
+        plants, lines, machines, components = build(tenant, sector.id, lines_per_plant, machines_per_line)
+        db.commit()
+        built = time.perf_counter() - start
+        fill(tenant, components)
+        db.commit()
+        if db.get_bind().dialect.name == "postgresql":
+            db.execute(text("ANALYZE assets, asset_tree, work_orders, asset_monthly_costs"))
+        assets = len(plants) + len(lines) + len(machines) + len(components)
+        paths = tenant.query(models.AssetTreePath, func.count()).scalar()
+        print(f"{assets} assets ({PLANTS} plants > {len(lines)} lines > {len(machines)} machines > "
+              f"{len(components)} components), {paths} closure rows, built in {built:.1f} s")
+
+        line = lines[len(lines) // 2]
+        consistent = True
+        for label, asset_id in (("line", line), ("plant", plants[0])):
+            closure_ms, closure_count = timed(lambda: orders_under(tenant, asset_tree.subtree_ids(tenant, asset_id)), rounds)
+            cte_ms, cte_count = timed(lambda: orders_under(tenant, recursive_subtree(tenant, asset_id)), rounds)
+            consistent = consistent and closure_count == cte_count
+            print(f"  work orders under a {label + ':':<7} closure {closure_ms:7.2f} ms, recursive CTE {cte_ms:7.2f} ms ({closure_count} orders)")
+        line_ms, totals = timed(lambda: asset_tree.rollups(tenant, [line]), rounds)
+        print(f"  rollup of a line:           {line_ms:7.2f} ms ({totals[line]['work_orders']} orders, "
+              f"{totals[line]['parts_cost'] + totals[line]['labor_cost']} cost)")
+        all_ms, totals = timed(lambda: asset_tree.rollups(tenant), max(1, rounds // 5))
+        print(f"  rollup of every asset:      {all_ms:7.2f} ms ({len(totals)} subtrees)")
+
+        # Machines and lines back and forth between two lines of the same plant
+        targets = [lines[0], lines[1]]
+        def move_each(ids):
+            times = []
+            for n, asset_id in enumerate(ids):
+                asset = tenant.get(models.Asset, asset_id)
+                start = time.perf_counter()
+                asset_tree.move(tenant, asset, targets[n % 2])
+                db.commit()
+                times.append(time.perf_counter() - start)
+            return statistics.median(times) * 1000
+        machine_move_ms = move_each(machines[2 * machines_per_line:][:rounds])
+        print(f"  move a machine:             {machine_move_ms:7.2f} ms ({COMPONENTS_PER_MACHINE + 1} assets)")
+        line_move_ms = move_each(lines[2:][:max(1, rounds // 5)])
+        print(f"  move a line under a line:   {line_move_ms:7.2f} ms ({machines_per_line * (COMPONENTS_PER_MACHINE + 1) + 1} assets)")
+
+        # The tree must still match parent_id: every asset's depth-1 ancestor is its parent
+        mismatched = tenant.query(models.Asset, func.count(models.Asset.id)).outerjoin(
+            models.AssetTreePath,
+            (models.AssetTreePath.descendant_id == models.Asset.id) & (models.AssetTreePath.depth == 1)
+        ).filter(func.coalesce(models.AssetTreePath.ancestor_id, 0) != func.coalesce(models.Asset.parent_id, 0)).scalar()
+        ok = mismatched == 0 and consistent
+
+        if db.get_bind().dialect.name == "postgresql":
+            query = select(func.count()).select_from(models.WorkOrder).where(
+                models.WorkOrder.company_id == company.id, models.WorkOrder.asset_id.in_(asset_tree.subtree_ids(tenant, line)))
+            compiled = query.compile(db.get_bind(), compile_kwargs={"literal_binds": True})
+            print("  plan of the subtree query:")
+            for (row,) in db.execute(text(f"EXPLAIN {compiled}")):
+                print(f"    {row}")
+        print("  tree consistent" if ok else f"  MISMATCH ({mismatched} assets off their parent, consistent counts: {consistent})")
+    finally:
+        db.rollback()
+        db.execute(delete(models.AssetMonthlyCost).where(models.AssetMonthlyCost.company_id == company.id))
+        db.execute(delete(models.WorkOrder).where(models.WorkOrder.company_id == company.id))
+        db.execute(delete(models.AssetTreePath).where(models.AssetTreePath.company_id == company.id))
+        db.execute(delete(models.Asset).where(models.Asset.company_id == company.id))
+        db.execute(delete(models.Sector).where(models.Sector.company_id == company.id))
+        db.execute(delete(models.Company).where(models.Company.id == company.id))
+        db.commit()
+        db.close()
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Concurrent retries against POST /stock/purchase-orders on a running API, ideally several
+worker processes. For each round a burst of identical requests goes out at once, first
+without an Idempotency-Key (to show the duplicates it creates) and then all sharing one key:
+with the key, every request must get the same purchase order back, and exactly one must have
+been created. A throwaway company on a plan with lifted rate limits sends them; it's deleted
+afterwards through the server's database.
+
+Run from backend/:  DATABASE_URL=postgresql+psycopg2://... python -m scripts.bench_idempotency [url] [rounds] [duplicates]
+"""
+import asyncio
+import statistics
+import sys
+import time
+import uuid
+
+import httpx
+from sqlalchemy import delete, func, select
+
+from app import models
+from app.database import SessionLocal
+from app.services import entitlements
+
+async def burst(client: httpx.AsyncClient, body: dict, duplicates: int, key: str = None):
+    headers = {"Idempotency-Key": key} if key else {}
+
+    async def post():
+        start = time.perf_counter()
+        r = await client.post("/stock/purchase-orders", json=body, headers=headers)
+        return r, time.perf_counter() - start
+
+    return await asyncio.gather(*[post() for _ in range(duplicates)])
+
+def created(db, company_id: int, observations: str) -> int:
+    return db.execute(select(func.count()).select_from(models.PurchaseOrder).where(
+        models.PurchaseOrder.company_id == company_id, models.PurchaseOrder.observations == observations
+    )).scalar()
+
+async def run(url: str, token: str, supplier_id: int, company_id: int, rounds: int, duplicates: int):
+    without_key, with_key, errors = [], [], 0
+    first_latencies, replay_latencies = [], []
+    async with httpx.AsyncClient(base_url=url, headers={"Authorization": f"Bearer {token}"}, timeout=60) as client:
+        for n in range(rounds):
+            for key in (None, uuid.uuid4().hex):
+                observations = f"bench {n} {'with' if key else 'without'} key"
+                body = {"supplier_id": supplier_id, "observations": observations,
+                        "items": [{"description": "Rodamiento", "quantity": 2, "unit_price": 10}]}
+                results = await burst(client, body, duplicates, key)
+                errors += sum(r.status_code != 200 for r, _ in results)
+                with SessionLocal() as db:
+                    count = created(db, company_id, observations)
+                if key is None:
+                    without_key.append(count)
+                    continue
+                ids = {r.json()["id"] for r, _ in results if r.status_code == 200}
+                with_key.append((count, len(ids)))
+                for r, latency in results:
+                    replayed = r.headers.get("idempotent-replayed") == "true"
+                    (replay_latencies if replayed else first_latencies).append(latency)
+    return without_key, with_key, errors, first_latencies, replay_latencies
+
+def main():
+    url = sys.argv[1] if len(sys.argv) > 1 else "http://127.0.0.1:8000"
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    duplicates = int(sys.argv[3]) if len(sys.argv) > 3 else 8
+
+    email = f"bench-{uuid.uuid4().hex[:8]}@example.com"
+    r = httpx.post(f"{url}/register", json={"name": "Idempotency benchmark", "admin_email": email, "admin_password": "bench"})
+    r.raise_for_status()
+    company_id = r.json()["id"]
+
+    ok = False
+    db = SessionLocal()
+    plan = models.Plan(name=f"Bench {company_id}", limits={
+        "requests_per_second": 100000, "burst": 100000, "concurrent_requests": 10000})
+    db.add(plan)
+    db.flush()
+    db.add(models.Subscription(company_id=company_id, plan_id=plan.id, status="authorized"))
+    entitlements.invalidate(db, company_id)
+    supplier = models.Supplier(company_id=company_id, name="Bench supplier")
+    db.add(supplier)
+    db.commit()
+    try:
+        token = httpx.post(f"{url}/token", data={"username": email, "password": "bench"}).json()["access_token"]
+        without_key, with_key, errors, first, replays = asyncio.run(run(url, token, supplier.id, company_id, rounds, duplicates))
+
+        print(f"{rounds} rounds of {duplicates} identical concurrent POST /stock/purchase-orders to {url}")
+        print(f"  without a key: {sum(without_key)} purchase orders created, {sum(without_key) / rounds:.1f} per round")
+        print(f"  with a key:    {sum(count for count, _ in with_key)} purchase orders created, "
+              f"{sum(ids > 1 for _, ids in with_key)} rounds answered with more than one")
+        print(f"  latency p50: first attempt {statistics.median(first) * 1000:.1f} ms, "
+              f"replays {statistics.median(replays) * 1000:.1f} ms ({len(replays)} replayed)")
+        ok = errors == 0 and all(count == 1 and ids == 1 for count, ids in with_key)
+        print("  one purchase order per key" if ok else f"  MISMATCH ({errors} errors)")
+    finally:
+        db.rollback()
+        db.execute(delete(models.IdempotencyKey).where(models.IdempotencyKey.company_id == company_id))
+        orders = select(models.PurchaseOrder.id).where(models.PurchaseOrder.company_id == company_id)
+        db.execute(delete(models.PurchaseOrderItem).where(models.PurchaseOrderItem.purchase_order_id.in_(orders)))
+        db.execute(delete(models.PurchaseOrder).where(models.PurchaseOrder.company_id == company_id))
+        db.execute(delete(models.Supplier).where(models.Supplier.company_id == company_id))
+        db.execute(delete(models.Subscription).where(models.Subscription.company_id == company_id))
+        db.execute(delete(models.Plan).where(models.Plan.id == plan.id))
+        db.execute(delete(models.User).where(models.User.company_id == company_id))
+        db.execute(delete(models.Company).where(models.Company.id == company_id))
+        db.commit()
+        db.close()
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
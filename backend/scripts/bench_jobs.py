@@ -0,0 +1,98 @@
+"""
+Stress test of the job queue (services.jobs): enqueues a batch of no-op jobs plus a few that
+always fail, runs several workers against them in threads, and checks every job ran exactly
+once and the failing ones were retried and then dead-lettered. Reports throughput and latency.
+Needs a migrated database; the benchmark's jobs are deleted at the end.
+
+Run from backend/:  DATABASE_URL=postgresql+psycopg2://... python -m scripts.bench_jobs [jobs] [workers] [concurrency]
+"""
+import collections
+import sys
+import threading
+import time
+
+from sqlalchemy import delete, func, insert, select
+
+from app import models, worker as job_worker
+from app.database import SessionLocal
+from app.services import jobs
+
+QUEUE = "bench"
+FAILING = 20
+
+runs = collections.Counter()
+runs_lock = threading.Lock()
+
+@jobs.handler("bench_noop")
+def noop(payload: dict):
+    with runs_lock:
+        runs[payload["n"]] += 1
+
+@jobs.handler("bench_fail")
+def always_fail(payload: dict):
+    with runs_lock:
+        runs[payload["n"]] += 1
+    raise RuntimeError("Benchmark failure")
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    concurrency = int(sys.argv[3]) if len(sys.argv) > 3 else 8
+    # Retries come back almost at once so the failing jobs finish with the rest
+    jobs.BACKOFF_BASE = 0.01
+    job_worker.POLL_SECONDS = 0.05
+
+    db = SessionLocal()
+    db.execute(delete(models.Job).where(models.Job.queue == QUEUE))
+    db.execute(insert(models.Job), [
+        {"kind": "bench_fail" if n < FAILING else "bench_noop", "payload": {"n": n}, "queue": QUEUE,
+         "status": "QUEUED", "max_attempts": 3}
+        for n in range(count)
+    ])
+    db.commit()
+
+    pool = [job_worker.Worker([QUEUE], concurrency) for _ in range(workers)]
+    for i, w in enumerate(pool):
+        w.name = f"bench-{i}"
+    threads = [threading.Thread(target=w.run) for w in pool]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    try:
+        while True:
+            left = db.scalar(select(func.count()).select_from(models.Job).where(
+                models.Job.queue == QUEUE, models.Job.status.in_(["QUEUED", "RUNNING"])
+            ))
+            db.rollback()
+            if not left:
+                break
+            time.sleep(0.05)
+        elapsed = time.perf_counter() - start
+    finally:
+        for w in pool:
+            w.stop()
+        for thread in threads:
+            thread.join()
+
+    by_status = dict(db.execute(select(models.Job.status, func.count()).where(
+        models.Job.queue == QUEUE).group_by(models.Job.status)).all())
+    wait = [w.metrics.wait_seconds for w in pool]
+    mean_wait = sum(s for s, _ in wait) / max(sum(n for _, n in wait), 1)
+    print(f"{count} jobs, {workers} workers x {concurrency} slots on {db.get_bind().dialect.name}")
+    print(f"  {elapsed:.2f} s, {count / elapsed:,.0f} jobs/s, mean wait {mean_wait * 1000:.1f} ms")
+    print(f"  status: {', '.join(f'{status.name}={n}' for status, n in by_status.items())}")
+    print(f"  per worker: {', '.join(str(sum(w.metrics.outcomes.values())) for w in pool)}")
+
+    twice = [n for n in range(FAILING, count) if runs[n] != 1]
+    retries = [runs[n] for n in range(FAILING)]
+    ok = not twice and all(r == 3 for r in retries) and by_status.get(models.JobStatus.DEAD) == FAILING
+    print("  every job ran once, failing ones 3 times and dead-lettered" if ok else
+          f"  MISMATCH: {len(twice)} no-op jobs not run exactly once, failing runs {collections.Counter(retries)}")
+
+    db.execute(delete(models.Job).where(models.Job.queue == QUEUE))
+    db.commit()
+    db.close()
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
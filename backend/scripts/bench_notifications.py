@@ -0,0 +1,139 @@
+"""
+Load test of the notification dispatcher (services.notifications) against a local fake
+WhatsApp/email provider. A throwaway company gets many workers and work orders assigned to
+them; the dispatcher must send one digest per worker, stay within each provider's rate limit
+(the fake answers 429 past it), retry the fake's random 503s and give up on the numbers it
+rejects. Needs a migrated database; the company and its rows are deleted at the end.
+
+Run from backend/:  DATABASE_URL=postgresql+psycopg2://... python -m scripts.bench_notifications [workers] [orders]
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import collections
+import json
+import random
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+
+from sqlalchemy import delete, func, insert, select, update
+
+from app import models
+from app.database import SessionLocal
+from app.services import notifications
+
+RATES = {"whatsapp": 200, "email": 100}
+FLAKY = 0.05 # Share of requests answered with 503
+REJECTED_SUFFIX = "000" # Phone numbers the fake refuses with 400
+
+class FakeProvider(BaseHTTPRequestHandler):
+    received = collections.defaultdict(list) # path -> request bodies
+    recent = collections.defaultdict(collections.deque) # path -> times of accepted requests, last second
+    statuses = collections.Counter()
+    lock = threading.Lock()
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        name = self.path.strip("/")
+        with self.lock:
+            now = time.monotonic()
+            window = self.recent[name]
+            while window and window[0] < now - 1:
+                window.popleft()
+            if len(window) >= RATES[name] * 2: # rate + burst
+                status = 429
+            elif body["to"].endswith(REJECTED_SUFFIX):
+                status = 400
+            elif random.random() < FLAKY:
+                status = 503
+            else:
+                status = 200
+                window.append(now)
+                self.received[name].append(body)
+            self.statuses[status] += 1
+        self.send_response(status)
+        if status == 429:
+            self.send_header("Retry-After", "1")
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"{}")
+
+    def log_message(self, *args):
+        pass
+
+def main():
+    worker_count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    order_count = int(sys.argv[2]) if len(sys.argv) > 2 else 6000
+    rng = random.Random(7)
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeProvider)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    for channel, provider in notifications.PROVIDERS.items():
+        provider.url = f"http://127.0.0.1:{server.server_port}/{provider.name}"
+        provider.rate = provider.burst = RATES[provider.name]
+
+    ok = False
+    db = SessionLocal()
+    company = models.Company(name="Notifications benchmark")
+    db.add(company)
+    db.commit()
+    try:
+        # Two thirds reachable on WhatsApp, the rest by email; a few numbers get rejected
+        workers = db.execute(insert(models.Worker).returning(models.Worker.id), [
+            {"company_id": company.id, "first_name": f"W{i}", "last_name": "Bench",
+             "phone": (f"+54 9 11 {i:04d}-{'0000' if i % 250 == 0 else f'{i:04d}'}" if i % 3 else None),
+             "email": f"w{i}@bench.test"}
+            for i in range(worker_count)
+        ]).scalars().all()
+        orders = db.execute(insert(models.WorkOrder).returning(models.WorkOrder.id), [
+            {"company_id": company.id, "ticket_number": f"WO-B{i}", "type": "CORRECTIVO", "status": "ASIGNADA",
+             "priority": "MEDIA", "description": f"Orden {i}"}
+            for i in range(order_count)
+        ]).scalars().all()
+        assignments = [(wo_id, rng.choice(workers)) for wo_id in orders]
+        start = time.perf_counter()
+        for i in range(0, len(assignments), 500):
+            notifications.notify_assignments(db, company.id, assignments[i:i + 500])
+        db.commit()
+        queued = time.perf_counter() - start
+
+        # Skip the digest window
+        db.execute(update(models.Notification).where(models.Notification.company_id == company.id).values(
+            send_after=datetime.now(timezone.utc)))
+        db.commit()
+
+        start = time.perf_counter()
+        totals = notifications.dispatch(db, budget=600)
+        elapsed = time.perf_counter() - start
+
+        by_status = dict(db.execute(select(models.Notification.status, func.count()).where(
+            models.Notification.company_id == company.id).group_by(models.Notification.status)).all())
+        recipients = db.scalar(select(func.count(func.distinct(models.Notification.recipient))).where(
+            models.Notification.company_id == company.id))
+        rejected = db.scalar(select(func.count(func.distinct(models.Notification.recipient))).where(
+            models.Notification.company_id == company.id, models.Notification.recipient.like(f"%{REJECTED_SUFFIX}")))
+        delivered = {name: len(bodies) for name, bodies in FakeProvider.received.items()}
+
+        print(f"{order_count} assignments to {worker_count} workers on {db.get_bind().dialect.name}")
+        print(f"  queued in {queued:.2f} s, dispatched in {elapsed:.2f} s")
+        print(f"  dispatcher: {totals}")
+        print(f"  notifications: {', '.join(f'{status.name}={n}' for status, n in by_status.items())}")
+        print(f"  provider: delivered {delivered}, responses {dict(FakeProvider.statuses)}")
+
+        ok = (sum(delivered.values()) == recipients - rejected == totals["digests"]
+              and FakeProvider.statuses[429] == 0
+              and by_status.get(models.NotificationStatus.PENDING, 0) == 0)
+        print("  one digest per recipient, no 429s, nothing left pending" if ok else "  MISMATCH")
+    finally:
+        db.rollback()
+        db.execute(delete(models.Notification).where(models.Notification.company_id == company.id))
+        db.execute(delete(models.WorkOrder).where(models.WorkOrder.company_id == company.id))
+        db.execute(delete(models.Worker).where(models.Worker.company_id == company.id))
+        db.execute(delete(models.Company).where(models.Company.id == company.id))
+        db.commit()
+        db.close()
+        server.shutdown()
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
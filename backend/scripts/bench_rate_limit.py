@@ -0,0 +1,93 @@
+"""
+Load test of the per-company rate limit (ratelimit.py) against a running API, ideally
+several worker processes with RATE_LIMIT_BACKEND=postgres. A throwaway company on a plan
+with a known rate hammers one endpoint from many connections; the accepted requests must
+add up to about burst + rate x seconds across all workers together, and every 429 must
+carry a Retry-After. Uses the server's database directly to set up the plan and clean up.
+
+Run from backend/:  DATABASE_URL=postgresql+psycopg2://... python -m scripts.bench_rate_limit [url] [seconds] [connections]
+"""
+import asyncio
+import collections
+import sys
+import time
+import uuid
+
+import httpx
+from sqlalchemy import delete
+
+from app import models
+from app.database import SessionLocal
+from app.services import entitlements
+
+RATE = 50
+BURST = 100
+CONCURRENT = 16 # Split over the server's workers; more connections than this also get 429s
+TOLERANCE = 0.1 # Allowed overshoot/undershoot of the accepted count
+
+async def hammer(url: str, token: str, seconds: float, connections: int):
+    statuses = collections.Counter() # status code, or the 429's detail
+    missing_retry_after = 0
+    deadline = time.monotonic() + seconds
+
+    async def client_loop(client):
+        nonlocal missing_retry_after
+        while time.monotonic() < deadline:
+            r = await client.get("/archives/sectors")
+            if r.status_code == 429:
+                statuses[r.json()["detail"]] += 1
+                missing_retry_after += not r.headers.get("retry-after", "").isdigit()
+            else:
+                statuses[r.status_code] += 1
+
+    limits = httpx.Limits(max_connections=connections)
+    async with httpx.AsyncClient(base_url=url, headers={"Authorization": f"Bearer {token}"}, limits=limits) as client:
+        await asyncio.gather(*[client_loop(client) for _ in range(connections)])
+    return statuses, missing_retry_after
+
+def main():
+    url = sys.argv[1] if len(sys.argv) > 1 else "http://127.0.0.1:8000"
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 10
+    connections = int(sys.argv[3]) if len(sys.argv) > 3 else 16
+
+    email = f"bench-{uuid.uuid4().hex[:8]}@example.com"
+    r = httpx.post(f"{url}/register", json={"name": "Rate limit benchmark", "admin_email": email, "admin_password": "bench"})
+    r.raise_for_status()
+    company_id = r.json()["id"]
+
+    ok = False
+    db = SessionLocal()
+    plan = models.Plan(name=f"Bench {company_id}", limits={
+        "requests_per_second": RATE, "burst": BURST, "concurrent_requests": CONCURRENT})
+    db.add(plan)
+    db.flush()
+    db.add(models.Subscription(company_id=company_id, plan_id=plan.id, status="authorized"))
+    entitlements.invalidate(db, company_id)
+    db.commit()
+    try:
+        token = httpx.post(f"{url}/token", data={"username": email, "password": "bench"}).json()["access_token"]
+        start = time.perf_counter()
+        statuses, missing_retry_after = asyncio.run(hammer(url, token, seconds, connections))
+        elapsed = time.perf_counter() - start
+
+        accepted = statuses[200]
+        expected = BURST + RATE * elapsed
+        print(f"{sum(statuses.values())} requests in {elapsed:.1f} s from {connections} connections to {url}")
+        print(f"  responses: {dict(statuses)}")
+        print(f"  accepted {accepted} ({accepted / elapsed:.1f}/s), expected about {expected:.0f} (burst {BURST} + {RATE}/s)")
+        ok = (abs(accepted - expected) <= expected * TOLERANCE and missing_retry_after == 0
+              and all(key == 200 or isinstance(key, str) for key in statuses))
+        print("  within the limit, every 429 has a Retry-After" if ok else "  MISMATCH")
+    finally:
+        db.rollback()
+        db.execute(delete(models.RateLimitBucket).where(models.RateLimitBucket.key == f"company:{company_id}"))
+        db.execute(delete(models.Subscription).where(models.Subscription.company_id == company_id))
+        db.execute(delete(models.Plan).where(models.Plan.id == plan.id))
+        db.execute(delete(models.User).where(models.User.company_id == company_id))
+        db.execute(delete(models.Company).where(models.Company.id == company_id))
+        db.commit()
+        db.close()
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
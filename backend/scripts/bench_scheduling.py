@@ -0,0 +1,53 @@
+"""
+Benchmark of the scheduling engine (services.scheduling.build_schedule) on synthetic
+orders and workers spread across sectors. The database is never touched.
+
+Run from backend/:  DATABASE_URL=sqlite:// python -m scripts.bench_scheduling [orders] [workers] [rounds]
+"""
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+from app.services.scheduling import PRIORITY_RANK, PendingOrder, WorkerSlot, build_schedule, workdays
+
+SECTORS = 20
+
+def make_orders(count, rng):
+    start = datetime(2026, 1, 1)
+    return [
+        PendingOrder(
+            id=i, sector_id=rng.choice([None] + list(range(1, SECTORS + 1))), minutes=rng.choice([30, 60, 90, 120, 240]),
+            priority=rng.choice(list(PRIORITY_RANK)), created_at=start + timedelta(minutes=rng.randrange(100000))
+        )
+        for i in range(count)
+    ]
+
+def make_workers(count, rng):
+    # About one in five workers has no sector and can take anything
+    return [
+        WorkerSlot(id=i, sector_id=rng.choice([None] + list(range(1, SECTORS + 1)) * 4), load=rng.choice([0, 0, 60, 240]))
+        for i in range(count)
+    ]
+
+def main():
+    orders_count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    workers_count = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+    rounds = int(sys.argv[3]) if len(sys.argv) > 3 else 10
+    rng = random.Random(42)
+    orders = make_orders(orders_count, rng)
+
+    for label, day_count in (("day", 1), ("week", 5)):
+        days = workdays(date(2026, 3, 2), day_count)
+        # build_schedule takes the starting load from the slots, fresh ones per round
+        worker_sets = [make_workers(workers_count, random.Random(7)) for _ in range(rounds + 1)]
+        build_schedule(orders, worker_sets.pop(), days) # Warm up
+        start = time.perf_counter()
+        for workers in worker_sets:
+            schedule = build_schedule(orders, workers, days)
+        elapsed = (time.perf_counter() - start) / rounds
+        print(f"{label:<5} {orders_count} orders x {workers_count} workers: {elapsed * 1000:8.2f} ms "
+              f"({len(schedule.assignments)} assigned, {len(schedule.unassigned)} left)")
+
+if __name__ == "__main__":
+    main()
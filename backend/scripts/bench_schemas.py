@@ -0,0 +1,74 @@
+"""
+Micro-benchmark of Pydantic validation and JSON serialization for the WorkOrder and
+PurchaseOrder response schemas. Uses transient ORM objects, the database is never touched.
+
+Run from backend/:  DATABASE_URL=sqlite:// python -m scripts.bench_schemas [rows] [rounds]
+"""
+import json
+import sys
+import time
+from datetime import date, datetime
+from typing import List
+
+from pydantic import TypeAdapter
+
+from app import models, schemas
+
+def make_work_orders(count):
+    asset = models.Asset(id=1, company_id=1, sector_id=1, name="Compresor", brand="Atlas", status="ACTIVE", version=1)
+    return [
+        models.WorkOrder(
+            id=i, company_id=1, ticket_number=f"WO-{i:08d}", description="Cambio de filtro y revisión general",
+            priority="ALTA", status=models.WorkOrderStatus.EN_PROGRESO, type=models.WorkOrderType.CORRECTIVO,
+            asset_id=1, asset=asset, requested_by_id=1, created_at=datetime(2026, 1, 1, 8, 30), start_date=datetime(2026, 1, 2),
+            parts_cost=120.0, labor_cost=80.0, labor_minutes=90, version=1
+        )
+        for i in range(count)
+    ]
+
+def make_purchase_orders(count):
+    category = models.SparePartCategory(id=1, company_id=1, name="Filtros")
+    supplier = models.Supplier(id=1, company_id=1, name="Proveedor SA", city="Rosario", categories=[category], version=1)
+    return [
+        models.PurchaseOrder(
+            id=i, company_id=1, supplier_id=1, supplier=supplier, order_number=f"OC-2026-{i:04d}",
+            order_date=date(2026, 1, 1), status=models.PurchaseOrderStatus.PENDIENTE, total_amount=1500.0,
+            created_at=datetime(2026, 1, 1), version=1,
+            items=[
+                models.PurchaseOrderItem(id=i * 10 + j, purchase_order_id=i, spare_part_id=1, description="Filtro",
+                                         quantity=3, unit_price=100.0, total_price=300.0, received_quantity=0)
+                for j in range(5)
+            ]
+        )
+        for i in range(count)
+    ]
+
+def bench(label, rounds, func):
+    func() # Warm up
+    start = time.perf_counter()
+    for _ in range(rounds):
+        func()
+    elapsed = (time.perf_counter() - start) / rounds
+    print(f"  {label:<34} {elapsed * 1000:8.2f} ms")
+    return elapsed
+
+def run(name, schema, objects, rounds):
+    print(f"{name} x {len(objects)}")
+    adapter = TypeAdapter(List[schema])
+    validated = adapter.validate_python(objects, from_attributes=True)
+
+    bench("validate (TypeAdapter)", rounds, lambda: adapter.validate_python(objects, from_attributes=True))
+    bench("validate (model_validate per row)", rounds, lambda: [schema.model_validate(obj) for obj in objects])
+    bench("serialize (dump_json)", rounds, lambda: adapter.dump_json(validated))
+    bench("serialize (model_dump + json.dumps)", rounds, lambda: json.dumps([obj.model_dump(mode="json") for obj in validated]))
+    total = bench("validate + dump_json", rounds, lambda: adapter.dump_json(adapter.validate_python(objects, from_attributes=True)))
+    print(f"  {'throughput':<34} {len(objects) / total:8.0f} rows/s")
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    run("WorkOrder", schemas.WorkOrder, make_work_orders(rows), rounds)
+    run("PurchaseOrder", schemas.PurchaseOrder, make_purchase_orders(rows), rounds)
+
+if __name__ == "__main__":
+    main()
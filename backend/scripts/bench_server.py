@@ -0,0 +1,125 @@
+"""
+Throughput of the production server (gunicorn.conf.py) with one worker and with the
+worker count it picks by itself, plus the memory the whole server takes, to see what
+preloading saves. Each setup is started with gunicorn on a free port, loaded with
+concurrent keep-alive clients against one endpoint as a throwaway company (deleted
+afterwards), and stopped with SIGTERM. Rate limits are lifted for the run. Needs a
+migrated database.
+
+Run from backend/:  DATABASE_URL=postgresql+psycopg2://... python -m scripts.bench_server [seconds] [connections] [path]
+"""
+import asyncio
+import os
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+from typing import Optional
+
+import httpx
+from sqlalchemy import delete
+
+from app import models
+from app.database import SessionLocal
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def pss_mb(pids) -> float:
+    """Proportional set size: shared pages are split among the processes sharing them."""
+    total = 0
+    for pid in pids:
+        try:
+            with open(f"/proc/{pid}/smaps_rollup") as f:
+                total += sum(int(line.split()[1]) for line in f if line.startswith("Pss:"))
+        except OSError:
+            pass
+    return total / 1024
+
+def server_pids(master: int):
+    children = subprocess.run(["pgrep", "-P", str(master)], capture_output=True, text=True).stdout.split()
+    return [master] + [int(pid) for pid in children]
+
+async def load(url: str, token: str, path: str, seconds: float, connections: int):
+    latencies, errors = [], 0
+    deadline = time.monotonic() + seconds
+
+    async def client_loop(client):
+        nonlocal errors
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            r = await client.get(path)
+            if r.status_code == 200:
+                latencies.append(time.perf_counter() - start)
+            else:
+                errors += 1
+
+    limits = httpx.Limits(max_connections=connections)
+    async with httpx.AsyncClient(base_url=url, headers={"Authorization": f"Bearer {token}"}, limits=limits, timeout=30) as client:
+        await asyncio.gather(*[client_loop(client) for _ in range(connections)])
+    return latencies, errors
+
+def run(workers: Optional[int], preload: bool, seconds: float, connections: int, path: str) -> dict:
+    """workers=None leaves the count to gunicorn.conf.py."""
+    port = free_port()
+    url = f"http://127.0.0.1:{port}"
+    env = {k: v for k, v in os.environ.items() if k != "WEB_CONCURRENCY"}
+    if workers is not None:
+        env["WEB_CONCURRENCY"] = str(workers)
+    env.update(GUNICORN_PRELOAD="1" if preload else "0",
+               BIND=f"127.0.0.1:{port}", ACCESS_LOG="/dev/null", RUN_SCHEDULER="0",
+               RATE_LIMIT_PER_SECOND="100000", RATE_LIMIT_BURST="100000", MAX_CONCURRENT_REQUESTS="10000")
+    email = f"bench-{uuid.uuid4().hex[:8]}@example.com"
+    server = subprocess.Popen(["gunicorn", "-c", "gunicorn.conf.py", "app.main:app"], env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        for _ in range(100):
+            try:
+                if httpx.get(f"{url}/health").status_code == 200:
+                    break
+            except httpx.TransportError:
+                pass
+            time.sleep(0.2)
+        httpx.post(f"{url}/register", json={"name": "Server benchmark", "admin_email": email, "admin_password": "bench"}).raise_for_status()
+        token = httpx.post(f"{url}/token", data={"username": email, "password": "bench"}).json()["access_token"]
+
+        asyncio.run(load(url, token, path, 1, connections)) # Warm up every worker
+        latencies, errors = asyncio.run(load(url, token, path, seconds, connections))
+        pids = server_pids(server.pid)
+        memory = pss_mb(pids)
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=60)
+        with SessionLocal() as db:
+            db.execute(delete(models.User).where(models.User.email == email))
+            db.execute(delete(models.Company).where(models.Company.name == "Server benchmark"))
+            db.commit()
+    latencies.sort()
+    return {
+        "workers": len(pids) - 1,
+        "rps": len(latencies) / seconds,
+        "p50": statistics.median(latencies) * 1000,
+        "p99": latencies[int(len(latencies) * 0.99)] * 1000,
+        "errors": errors,
+        "memory": memory,
+    }
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 10
+    connections = int(sys.argv[2]) if len(sys.argv) > 2 else 32
+    path = sys.argv[3] if len(sys.argv) > 3 else "/archives/sectors"
+
+    print(f"GET {path}, {connections} connections, {seconds:.0f} s each, {len(os.sched_getaffinity(0))} CPUs")
+    for workers, preload in [(1, True), (None, True), (None, False)]:
+        r = run(workers, preload, seconds, connections, path)
+        label = f"{r['workers']} worker{'s' if r['workers'] > 1 else ''}{'' if preload else ', no preload'}"
+        print(f"  {label:<24} {r['rps']:8.1f} req/s  p50 {r['p50']:6.1f} ms  p99 {r['p99']:6.1f} ms  "
+              f"errors {r['errors']}  memory {r['memory']:6.1f} MB")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Cold start of the API: importing app.main and answering the first request, each measured
+in fresh interpreters (median of several runs), against a time budget. Also checks that
+the modules deferred to first use stay out of the import and that the app comes up and
+answers /health while the database is unreachable. Exits 1 when any check fails, so it can
+gate a build.
+
+Run from backend/:  python -m scripts.bench_startup [runs] [budget seconds]
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# Only needed by some endpoints or the background jobs, so importing the app mustn't load them
+DEFERRED = ["mercadopago", "requests", "httpx", "apscheduler", "alembic", "PIL"]
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import app.main
+imported = time.perf_counter() - start
+loaded = [m for m in %r if m in sys.modules]
+from fastapi.testclient import TestClient
+with TestClient(app.main.app) as client:
+    response = client.get("/health")
+    ready = time.perf_counter() - start
+print(json.dumps({"import": imported, "ready": ready, "loaded": loaded,
+                  "status": response.status_code, "health": response.json()}))
+""" % DEFERRED
+
+def probe(database_url: str) -> dict:
+    env = dict(os.environ, DATABASE_URL=database_url, RUN_SCHEDULER="0", PYTHONDONTWRITEBYTECODE="1")
+    out = subprocess.run([sys.executable, "-c", PROBE], env=env, capture_output=True, text=True, timeout=120)
+    if out.returncode:
+        raise RuntimeError(out.stderr)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 7
+    budget = float(sys.argv[2]) if len(sys.argv) > 2 else float(os.getenv("STARTUP_BUDGET_SECONDS", "2.0"))
+    database_url = os.getenv("DATABASE_URL", "sqlite:////tmp/bench_startup.db")
+
+    probe(database_url) # Warm the bytecode and OS caches
+    results = [probe(database_url) for _ in range(runs)]
+    imported = statistics.median(r["import"] for r in results)
+    ready = statistics.median(r["ready"] for r in results)
+    loaded = sorted({m for r in results for m in r["loaded"]})
+    # A port nothing listens on: the app must still start and report the database as unavailable
+    down = probe("postgresql+psycopg2://postgres@127.0.0.1:1/none?connect_timeout=1")
+
+    print(f"{runs} cold starts, median: import {imported:.2f} s, first response {ready:.2f} s (budget {budget:.2f} s)")
+    print(f"  deferred modules loaded at import: {loaded or 'none'}")
+    print(f"  database down: /health {down['status']} {down['health']}")
+    ok = ready <= budget and not loaded and down["status"] == 200
+    print("  within budget" if ok else "  FAILED")
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Benchmark of the tool holder and overdue queries (services.tools) on a throwaway company
+with many tools, a fifth of them checked out and some of those overdue. Needs a migrated
+database; the company and its rows are deleted at the end. On Postgres the plans are printed too.
+
+Run from backend/:  DATABASE_URL=postgresql+psycopg2://... python -m scripts.bench_tools_overdue [tools] [rounds]
+"""
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import insert, text
+
+from app import models
+from app.database import SessionLocal
+from app.services import tools
+from app.tenancy import TenantSession
+
+WORKERS = 200
+
+def populate(db, company_id, count, rng):
+    workers = db.execute(insert(models.Worker).returning(models.Worker.id), [
+        {"company_id": company_id, "first_name": f"W{i}", "last_name": "Bench"} for i in range(WORKERS)
+    ]).scalars().all()
+    now = datetime.now(timezone.utc)
+    rows = []
+    for i in range(count):
+        row = {"company_id": company_id, "name": f"Tool {i}", "status": "AVAILABLE"}
+        if rng.random() < 0.2:
+            # Due dates from two weeks ago to two weeks ahead, so about half the checked out tools are late
+            row.update(status="IN_USE", current_worker_id=rng.choice(workers), checked_out_at=now,
+                       due_at=now + timedelta(hours=rng.randrange(-336, 336)))
+        rows.append(row)
+    db.execute(insert(models.Tool), rows)
+    db.commit()
+    return workers
+
+def timed(label, run, rounds):
+    run() # Warm up
+    start = time.perf_counter()
+    for _ in range(rounds):
+        result = run()
+    elapsed = (time.perf_counter() - start) / rounds
+    print(f"{label:<24} {elapsed * 1000:8.2f} ms ({len(result)} rows)")
+
+def explain(db, query):
+    compiled = query.statement.compile(db.get_bind(), compile_kwargs={"literal_binds": True})
+    for (line,) in db.execute(text(f"EXPLAIN (ANALYZE, BUFFERS) {compiled}")):
+        print("   ", line)
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    db = SessionLocal()
+    company = models.Company(name="Tools benchmark")
+    db.add(company)
+    db.commit()
+    try:
+        workers = populate(db, company.id, count, random.Random(42))
+        db.execute(text("ANALYZE tools") if db.get_bind().dialect.name == "postgresql" else text("ANALYZE"))
+        tenant = TenantSession(db, company.id)
+        print(f"{count} tools")
+
+        overdue = tools.overdue_query(tenant).limit(100)
+        held = tenant.query(models.Tool).filter(models.Tool.current_worker_id == workers[0])
+        timed("overdue, first 100", overdue.all, rounds)
+        timed("held by one worker", held.all, rounds)
+        if db.get_bind().dialect.name == "postgresql":
+            print("overdue plan:")
+            explain(db, overdue)
+            print("held plan:")
+            explain(db, held)
+    finally:
+        db.rollback()
+        for model in (models.Tool, models.Worker):
+            db.query(model).filter(model.company_id == company.id).delete(synchronize_session=False)
+        db.delete(company)
+        db.commit()
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Lost update stress test for the versioned edits (crud.claim_version) against a running API,
+ideally several worker processes. Many clients increment a counter kept in a sector's
+description, each with read-modify-write cycles: GET, add one, PUT. Run twice:
+- without sending the version, the way clients edited before: increments get lost;
+- sending it and retrying on 409 from the returned current state: the counter must end at
+  clients x increments exactly, with the version bumped once per increment.
+A throwaway company on a plan with lifted rate limits runs it; it's deleted afterwards
+through the server's database.
+
+Run from backend/:  DATABASE_URL=postgresql+psycopg2://... python -m scripts.stress_versions [url] [clients] [increments]
+"""
+import asyncio
+import collections
+import sys
+import time
+import uuid
+
+import httpx
+from sqlalchemy import delete
+
+from app import models
+from app.database import SessionLocal
+from app.services import entitlements
+
+async def increment(client: httpx.AsyncClient, sector_id: int, increments: int, versioned: bool, stats: collections.Counter):
+    for _ in range(increments):
+        sector = next(s for s in (await client.get("/archives/sectors")).json() if s["id"] == sector_id)
+        while True:
+            body = {"name": sector["name"], "description": str(int(sector["description"]) + 1)}
+            if versioned:
+                body["version"] = sector["version"]
+            r = await client.put(f"/archives/sectors/{sector_id}", json=body)
+            if r.status_code == 409:
+                stats["conflicts"] += 1
+                sector = r.json()["detail"]["current"] # Retry on top of the winner's edit
+                continue
+            r.raise_for_status()
+            stats["saved"] += 1
+            break
+
+async def run(url: str, token: str, sector_id: int, clients: int, increments: int, versioned: bool):
+    stats = collections.Counter()
+    limits = httpx.Limits(max_connections=clients)
+    async with httpx.AsyncClient(base_url=url, headers={"Authorization": f"Bearer {token}"}, limits=limits, timeout=60) as client:
+        r = await client.put(f"/archives/sectors/{sector_id}", json={"name": "Stress", "description": "0"})
+        r.raise_for_status()
+        start_version = r.json()["version"]
+        start = time.perf_counter()
+        await asyncio.gather(*[increment(client, sector_id, increments, versioned, stats) for _ in range(clients)])
+        elapsed = time.perf_counter() - start
+        final = next(s for s in (await client.get("/archives/sectors")).json() if s["id"] == sector_id)
+    return int(final["description"]), final["version"] - start_version, stats, elapsed
+
+def main():
+    url = sys.argv[1] if len(sys.argv) > 1 else "http://127.0.0.1:8000"
+    clients = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+    increments = int(sys.argv[3]) if len(sys.argv) > 3 else 25
+    expected = clients * increments
+
+    email = f"stress-{uuid.uuid4().hex[:8]}@example.com"
+    r = httpx.post(f"{url}/register", json={"name": "Version stress test", "admin_email": email, "admin_password": "stress"})
+    r.raise_for_status()
+    company_id = r.json()["id"]
+
+    ok = False
+    db = SessionLocal()
+    plan = models.Plan(name=f"Stress {company_id}", limits={
+        "requests_per_second": 100000, "burst": 100000, "concurrent_requests": 10000})
+    db.add(plan)
+    db.flush()
+    db.add(models.Subscription(company_id=company_id, plan_id=plan.id, status="authorized"))
+    entitlements.invalidate(db, company_id)
+    db.commit()
+    try:
+        token = httpx.post(f"{url}/token", data={"username": email, "password": "stress"}).json()["access_token"]
+        sector_id = httpx.post(f"{url}/archives/sectors", json={"name": "Stress"},
+                               headers={"Authorization": f"Bearer {token}"}).json()["id"]
+
+        print(f"{clients} clients x {increments} read-modify-write increments of one sector on {url}")
+        for versioned in (False, True):
+            value, bumps, stats, elapsed = asyncio.run(run(url, token, sector_id, clients, increments, versioned))
+            lost = expected - value
+            print(f"  {'with version' if versioned else 'without version':<16} counter {value}/{expected}, "
+                  f"{lost} lost, {stats['conflicts']} conflicts retried, {bumps} versions, "
+                  f"{stats['saved'] / elapsed:.0f} saves/s")
+            if versioned:
+                ok = lost == 0 and bumps == expected
+        print("  no lost updates" if ok else "  LOST UPDATES")
+    finally:
+        db.rollback()
+        db.execute(delete(models.Sector).where(models.Sector.company_id == company_id))
+        db.execute(delete(models.Subscription).where(models.Subscription.company_id == company_id))
+        db.execute(delete(models.Plan).where(models.Plan.id == plan.id))
+        db.execute(delete(models.User).where(models.User.company_id == company_id))
+        db.execute(delete(models.Company).where(models.Company.id == company_id))
+        db.commit()
+        db.close()
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+The app reads its database URL at import: point it at a throwaway SQLite file before any test
+imports it. Each test registers its own company, so tests don't see each other's rows.
+"""
+import os
+import tempfile
+import uuid
+
+import pytest
+
+_dir = tempfile.mkdtemp(prefix="mant-tests-")
+PRIMARY_PATH = os.path.join(_dir, "primary.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{PRIMARY_PATH}"
+os.environ["RUN_SCHEDULER"] = "0"
+os.makedirs("static", exist_ok=True) # Mounted by app.main
+
+@pytest.fixture(scope="session", autouse=True)
+def schema():
+    from app import models # Registers the tables on Base
+    from app.database import Base, engine
+    Base.metadata.create_all(bind=engine)
+
+@pytest.fixture
+def make_client():
+    """Registers a new company and returns a TestClient logged in as its admin."""
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    def make_client(name: str = "Test"):
+        client = TestClient(app)
+        email = f"{uuid.uuid4().hex[:12]}@test.com"
+        response = client.post("/register", json={"name": name, "admin_email": email, "admin_password": "pw"})
+        assert response.status_code == 200, response.text
+        token = client.post("/token", data={"username": email, "password": "pw"}).json()["access_token"]
+        client.headers["Authorization"] = f"Bearer {token}"
+        client.company_id = response.json()["id"]
+        return client
+    return make_client
+
+@pytest.fixture
+def client(make_client):
+    return make_client()
+
+@pytest.fixture
+def db():
+    from app.database import SessionLocal
+    session = SessionLocal()
+    yield session
+    session.close()
+
+@pytest.fixture
+def subscribe(db):
+    """Puts a company on an authorized subscription to a new plan with these limits."""
+    from app import models
+    from app.services import entitlements
+
+    def subscribe(company_id: int, limits: dict = None, status: str = "authorized"):
+        plan = models.Plan(name=f"Plan {uuid.uuid4().hex[:6]}", price=10, limits=limits or {})
+        db.add(plan)
+        db.flush()
+        db.add(models.Subscription(company_id=company_id, plan_id=plan.id, status=status))
+        entitlements.invalidate(db, company_id)
+        db.commit()
+        return plan
+    return subscribe
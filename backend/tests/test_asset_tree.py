@@ -0,0 +1,59 @@
+"""
+Asset hierarchy: top-level assets, direct components, subtrees, moves and roll-ups over the
+closure table.
+
+Run from backend/:  python -m pytest -q tests/test_asset_tree.py
+"""
+import pytest
+
+@pytest.fixture
+def tree(client):
+    """Planta 1 > Linea 3 > Prensa > Motor, Planta 1 > Linea 4, and a separate Planta 2."""
+    sector = client.post("/archives/sectors", json={"name": "Planta"}).json()
+    def asset(name, parent=None):
+        response = client.post("/archives/assets", json={"name": name, "sector_id": sector["id"], "parent_id": parent})
+        assert response.status_code == 200, response.text
+        return response.json()
+    plant = asset("Planta 1")
+    line3 = asset("Linea 3", plant["id"])
+    press = asset("Prensa", line3["id"])
+    motor = asset("Motor", press["id"])
+    line4 = asset("Linea 4", plant["id"])
+    other = asset("Planta 2")
+    return {a["name"]: a for a in (plant, line3, press, motor, line4, other)} | {"sector": sector}
+
+def _names(client, **params):
+    return sorted(a["name"] for a in client.get("/archives/assets", params=params).json())
+
+def test_listing_levels(client, tree):
+    assert _names(client, roots_only=True) == ["Planta 1", "Planta 2"]
+    assert _names(client, parent_id=tree["Planta 1"]["id"]) == ["Linea 3", "Linea 4"]
+    assert _names(client, subtree_of=tree["Linea 3"]["id"]) == ["Linea 3", "Motor", "Prensa"]
+
+def test_rollup_follows_moves(client, tree):
+    client.post("/work-orders", json={"description": "d", "requested_by_id": 1, "asset_id": tree["Motor"]["id"]})
+    rollup = lambda: {a["name"]: a["rollup"]["work_orders"] for a in client.get("/archives/assets", params={"rollup": True}).json()}
+    assert rollup()["Planta 1"] == rollup()["Linea 3"] == 1
+
+    press = tree["Prensa"]
+    moved = client.put(f"/archives/assets/{press['id']}", json={"name": "Prensa", "sector_id": tree["sector"]["id"], "parent_id": tree["Linea 4"]["id"]})
+    assert moved.status_code == 200
+    after = rollup()
+    assert (after["Linea 3"], after["Linea 4"], after["Planta 1"]) == (0, 1, 1)
+
+    # Moving it to the top makes it a root
+    client.put(f"/archives/assets/{press['id']}", json={"name": "Prensa", "sector_id": tree["sector"]["id"], "parent_id": None})
+    assert _names(client, roots_only=True) == ["Planta 1", "Planta 2", "Prensa"]
+
+def test_cycles_are_rejected(client, tree):
+    line3 = tree["Linea 3"]
+    response = client.put(f"/archives/assets/{line3['id']}", json={"name": "Linea 3", "sector_id": tree["sector"]["id"], "parent_id": tree["Motor"]["id"]})
+    assert response.status_code == 400
+    assert _names(client, parent_id=tree["Planta 1"]["id"]) == ["Linea 3", "Linea 4"]
+
+def test_other_company_cannot_attach(client, make_client, tree):
+    other = make_client("Other")
+    sector = other.post("/archives/sectors", json={"name": "S"}).json()
+    response = other.post("/archives/assets", json={"name": "x", "sector_id": sector["id"], "parent_id": tree["Planta 1"]["id"]})
+    assert response.status_code in (400, 404)
+    assert _names(other, roots_only=True) == []
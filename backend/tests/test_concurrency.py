@@ -0,0 +1,80 @@
+"""
+Concurrent edits of the same row: of two writers that read the same version, the second one
+gets a 409 (edit forms, crud.claim_version) or is skipped (guarded bulk updates), never
+silently overwriting the first.
+
+Run from backend/:  python -m pytest -q tests/test_concurrency.py
+"""
+import pytest
+from fastapi import HTTPException
+
+from app import crud, models, schemas, schemas_archives
+from app.database import SessionLocal
+
+@pytest.fixture
+def sessions():
+    first, second = SessionLocal(), SessionLocal()
+    yield first, second
+    first.close()
+    second.close()
+
+def _order(client):
+    response = client.post("/work-orders", json={"description": "x", "requested_by_id": 1})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+def test_stale_edit_gets_409(client, sessions):
+    sector = client.post("/archives/sectors", json={"name": "Planta"}).json()
+    first, second = sessions
+    mine, theirs = first.get(models.Sector, sector["id"]), second.get(models.Sector, sector["id"])
+
+    # Both read version 1, the first one saves
+    crud.claim_version(first, mine, None, schemas_archives.Sector)
+    mine.name = "Planta A"
+    first.commit()
+
+    with pytest.raises(HTTPException) as conflict:
+        crud.claim_version(second, theirs, None, schemas_archives.Sector)
+    assert conflict.value.status_code == 409
+    assert conflict.value.detail["current"]["name"] == "Planta A"
+    assert client.get("/archives/sectors").json()[0]["name"] == "Planta A"
+
+def test_stale_form_over_http_gets_409(client):
+    sector = client.post("/archives/sectors", json={"name": "Planta"}).json()
+    saved = client.put(f"/archives/sectors/{sector['id']}", json={"name": "Planta A", "version": sector["version"]})
+    assert saved.status_code == 200
+    stale = client.put(f"/archives/sectors/{sector['id']}", json={"name": "Planta B", "version": sector["version"]})
+    assert stale.status_code == 409
+    assert stale.json()["detail"]["current"]["version"] == saved.json()["version"]
+
+def test_bulk_update_invalidates_open_forms(client, sessions):
+    wo = _order(client)
+    first, second = sessions
+    form = second.get(models.WorkOrder, wo["id"]) # An edit form opened before the bulk change
+
+    crud.bulk_update_work_orders(first, client.company_id, [{
+        "id": wo["id"], "set_assignee": False, "assigned_to_id": None,
+        "status": models.WorkOrderStatus.EN_PROGRESO, "priority": None,
+    }])
+    first.commit()
+
+    with pytest.raises(HTTPException) as conflict:
+        crud.claim_version(second, form, None, schemas.WorkOrder)
+    assert conflict.value.status_code == 409
+    assert conflict.value.detail["current"]["status"] == "EN_PROGRESO"
+
+def test_guarded_bulk_update_skips_rows_changed_meanwhile(client, sessions):
+    wo = _order(client)
+    workers = [client.post("/archives/workers", json={"first_name": name, "last_name": "X"}).json()["id"] for name in "AB"]
+    first, second = sessions
+    assign = lambda db, worker_id: crud.bulk_update_work_orders(db, client.company_id, [{
+        "id": wo["id"], "set_assignee": True, "assigned_to_id": worker_id,
+        "status": models.WorkOrderStatus.ASIGNADA, "priority": None,
+    }], only_if=(models.WorkOrder.assigned_to_id.is_(None),))
+
+    # Two schedulers planned from the same snapshot, where the order was unassigned
+    assert assign(first, workers[0]) == [wo["id"]]
+    first.commit()
+    assert assign(second, workers[1]) == []
+    second.commit()
+    assert client.get(f"/work-orders/{wo['id']}").json()["assigned_to_id"] == workers[0]
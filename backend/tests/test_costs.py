@@ -0,0 +1,71 @@
+"""
+Maintenance costs: part and labor lines roll up into their work order and the asset's monthly
+counters, which the cost report reads.
+
+Run from backend/:  python -m pytest -q tests/test_costs.py
+"""
+import pytest
+
+REPORT = {"date_from": "2026-01-01", "date_to": "2030-12-31"}
+
+@pytest.fixture
+def plant(client):
+    sector = client.post("/archives/sectors", json={"name": "A"}).json()
+    asset = client.post("/archives/assets", json={"name": "M1", "sector_id": sector["id"]}).json()
+    worker = client.post("/archives/workers", json={"first_name": "W", "last_name": "X", "hourly_rate": 1200}).json()
+    part = client.post("/archives/spare-parts", json={"name": "Filtro", "cost": 1500.5, "stock": 10}).json()
+    order = client.post("/work-orders", json={"description": "x", "requested_by_id": worker["id"], "asset_id": asset["id"]}).json()
+    return {"sector": sector, "asset": asset, "worker": worker, "part": part, "order": order}
+
+def _stock(client, part_id):
+    return next(part["stock"] for part in client.get("/archives/spare-parts").json() if part["id"] == part_id)
+
+def _asset_ids(client):
+    return [asset["id"] for asset in client.get("/archives/assets").json()]
+
+def test_lines_roll_up_into_order_and_report(client, plant):
+    order = plant["order"]
+    part = client.post(f"/work-orders/{order['id']}/parts", json={"spare_part_id": plant["part"]["id"], "quantity": 3}).json()
+    assert part["total_cost"] == 4501.5
+    labor = client.post(f"/work-orders/{order['id']}/labor", json={"worker_id": plant["worker"]["id"], "minutes": 90}).json()
+    assert labor["total_cost"] == 1800.0 # The worker's hourly rate
+    assert _stock(client, plant["part"]["id"]) == 7
+
+    totals = client.get(f"/work-orders/{order['id']}").json()
+    assert (totals["parts_cost"], totals["labor_cost"], totals["labor_minutes"]) == (4501.5, 1800.0, 90)
+    report = client.get("/dashboard/costs", params={**REPORT, "group_by": "ASSET"}).json()
+    assert report == [{"asset_id": plant["asset"]["id"], "sector_id": None, "period": None, "parts_cost": 4501.5,
+                       "labor_cost": 1800.0, "labor_minutes": 90, "total_cost": 6301.5}]
+
+    # Removing the lines takes their cost back out and returns the parts to stock
+    client.delete(f"/work-orders/{order['id']}/parts/{part['id']}")
+    client.delete(f"/work-orders/{order['id']}/labor/{labor['id']}")
+    assert _stock(client, plant["part"]["id"]) == 10
+    totals = client.get(f"/work-orders/{order['id']}").json()
+    assert (totals["parts_cost"], totals["labor_cost"], totals["labor_minutes"]) == (0, 0, 0)
+    assert client.get("/dashboard/costs", params=REPORT).json()[0]["total_cost"] == 0
+
+def test_part_line_needs_stock(client, plant):
+    response = client.post(f"/work-orders/{plant['order']['id']}/parts", json={"spare_part_id": plant["part"]["id"], "quantity": 11})
+    assert response.status_code == 400
+    assert _stock(client, plant["part"]["id"]) == 10
+
+def test_other_company_sees_no_costs(client, make_client, plant):
+    client.post(f"/work-orders/{plant['order']['id']}/parts", json={"spare_part_id": plant["part"]["id"], "quantity": 1})
+    other = make_client("Other")
+    response = other.post(f"/work-orders/{plant['order']['id']}/parts", json={"spare_part_id": plant["part"]["id"], "quantity": 1})
+    assert response.status_code == 404
+    assert other.get("/dashboard/costs", params=REPORT).json() == []
+
+def test_asset_with_history_is_not_deleted(client, plant):
+    asset_id = plant["asset"]["id"]
+    client.post(f"/work-orders/{plant['order']['id']}/labor", json={"worker_id": plant["worker"]["id"], "minutes": 30})
+    response = client.delete(f"/archives/assets/{asset_id}")
+    assert response.status_code == 409
+    assert asset_id in _asset_ids(client)
+
+def test_asset_without_history_is_deleted(client):
+    sector = client.post("/archives/sectors", json={"name": "A"}).json()
+    asset = client.post("/archives/assets", json={"name": "M1", "sector_id": sector["id"]}).json()
+    assert client.delete(f"/archives/assets/{asset['id']}").status_code == 200
+    assert asset["id"] not in _asset_ids(client)
@@ -0,0 +1,58 @@
+"""
+Entitlements: companies in their trial or with an authorized subscription get in, the rest are
+turned away, and the plan's limits cap what they can create.
+
+Run from backend/:  python -m pytest -q tests/test_entitlements.py
+"""
+from datetime import datetime, timedelta, timezone
+import uuid
+
+from app import models
+from app.services import entitlements
+
+def _change(db, company_id, **fields):
+    company = db.get(models.Company, company_id)
+    for key, value in fields.items():
+        setattr(company, key, value)
+    entitlements.invalidate(db, company_id)
+    db.commit()
+
+def test_trial_lets_new_company_in(client):
+    assert client.get("/archives/sectors").status_code == 200
+    entitlement = client.get("/payments/entitlement").json()
+    assert entitlement["denied"] is None
+    assert entitlement["trial_ends_at"] is not None
+
+def test_expired_trial_is_turned_away(client, db):
+    _change(db, client.company_id, created_at=datetime.now(timezone.utc) - timedelta(days=entitlements.TRIAL_DAYS + 1))
+    response = client.get("/archives/sectors")
+    assert (response.status_code, response.json()["detail"]) == (402, "Suscripción inactiva")
+    # Still answered, so the frontend can send them to billing
+    assert client.get("/payments/entitlement").json()["denied"] == "Suscripción inactiva"
+
+def test_subscription_outlives_trial(client, db, subscribe):
+    _change(db, client.company_id, created_at=datetime.now(timezone.utc) - timedelta(days=entitlements.TRIAL_DAYS + 1))
+    plan = subscribe(client.company_id)
+    assert client.get("/archives/sectors").status_code == 200
+    assert client.get("/payments/entitlement").json()["plan_id"] == plan.id
+
+def test_suspended_company_is_forbidden(client, db, subscribe):
+    subscribe(client.company_id)
+    _change(db, client.company_id, status=models.CompanyStatus.SUSPENDED)
+    response = client.get("/work-orders")
+    assert (response.status_code, response.json()["detail"]) == (403, "Empresa suspendida")
+
+def test_plan_limit_caps_creation(client, subscribe):
+    subscribe(client.company_id, limits={"max_workers": 1})
+    worker = {"first_name": "a", "last_name": "b"}
+    assert client.post("/archives/workers", json=worker).status_code == 200
+    response = client.post("/archives/workers", json=worker)
+    assert response.status_code == 403
+    assert "max_workers" in response.json()["detail"]
+
+def test_webhook_queues_lookup(client, db):
+    preapproval_id = uuid.uuid4().hex
+    response = client.post("/payments/webhook", params={"topic": "preapproval", "id": preapproval_id})
+    assert response.status_code == 200
+    jobs = db.query(models.Job).filter(models.Job.kind == "mp_preapproval").all()
+    assert {"preapproval_id": preapproval_id} in [job.payload for job in jobs]
@@ -0,0 +1,77 @@
+"""
+Idempotency-Key: a retried POST gets the first response back instead of running again.
+
+Run from backend/:  python -m pytest -q tests/test_idempotency.py
+"""
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+import json
+
+from sqlalchemy import update
+
+from app import idempotency, models
+
+BODY = {"description": "Bomba", "requested_by_id": 1}
+
+def _post(client, key, body=BODY):
+    return client.post("/work-orders", json=body, headers={"Idempotency-Key": key})
+
+def _count(client):
+    return len(client.get("/work-orders").json())
+
+def _key_row(db, company_id, key, fingerprint="other request", locked_for=0, expires_in=3600):
+    now = datetime.now(timezone.utc)
+    db.add(models.IdempotencyKey(company_id=company_id, key=key, fingerprint=fingerprint,
+                                 locked_until=now + timedelta(seconds=locked_for), expires_at=now + timedelta(seconds=expires_in)))
+    db.commit()
+
+def test_retry_replays_first_response(client):
+    first = _post(client, "k1")
+    assert first.status_code == 200
+    retry = _post(client, "k1")
+    assert (retry.status_code, retry.headers["idempotent-replayed"]) == (200, "true")
+    assert retry.json() == first.json()
+    assert _count(client) == 1
+
+def test_keys_are_per_company(client, make_client):
+    _post(client, "k1")
+    other = make_client("Other")
+    response = _post(other, "k1")
+    assert response.status_code == 200
+    assert "idempotent-replayed" not in response.headers
+
+def test_key_reused_for_other_request_is_rejected(client):
+    _post(client, "k1")
+    assert _post(client, "k1", {**BODY, "description": "x"}).status_code == 422
+    assert _post(client, "x" * 256).status_code == 400
+
+def test_errors_are_not_stored(client):
+    failing = {**BODY, "asset_id": 999999}
+    assert _post(client, "k2", failing).status_code == 400
+    retry = _post(client, "k2", failing)
+    assert retry.status_code == 400
+    assert "idempotent-replayed" not in retry.headers # Ran again
+    assert _post(client, "k2").status_code == 200 # Released, so the key is free for a fixed request
+
+def test_duplicate_of_running_request_gets_409(client, db, monkeypatch):
+    monkeypatch.setattr(idempotency, "IDEMPOTENCY_WAIT_SECONDS", 0.2)
+    body = json.dumps(BODY).encode()
+    request = SimpleNamespace(method="POST", url=SimpleNamespace(path="/work-orders", query=""))
+    # The first attempt with this same request is still running
+    _key_row(db, client.company_id, "busy", fingerprint=idempotency._fingerprint(request, body), locked_for=60)
+    response = client.post("/work-orders", content=body, headers={"Idempotency-Key": "busy", "Content-Type": "application/json"})
+    assert response.status_code == 409
+    assert _count(client) == 0
+
+def test_abandoned_claim_is_taken_over(client, db):
+    _key_row(db, client.company_id, "stale", locked_for=-1)
+    assert _post(client, "stale").status_code == 200
+    assert _count(client) == 1
+
+def test_sweep_deletes_expired_keys(client, db):
+    _post(client, "old")
+    db.execute(update(models.IdempotencyKey).where(models.IdempotencyKey.company_id == client.company_id).values(
+        expires_at=datetime.now(timezone.utc) - timedelta(seconds=1)))
+    db.commit()
+    assert idempotency.sweep(db, batch_size=1) >= 1
+    assert db.query(models.IdempotencyKey).filter(models.IdempotencyKey.company_id == client.company_id).count() == 0
@@ -0,0 +1,47 @@
+"""
+Job queue: claiming, heartbeats and recovery of jobs whose worker went away.
+
+Run from backend/:  python -m pytest -q tests/test_jobs.py
+"""
+from datetime import datetime, timedelta, timezone
+import uuid
+
+import pytest
+from sqlalchemy import update
+
+from app import models
+from app.services import jobs
+
+@pytest.fixture
+def queue():
+    return uuid.uuid4().hex # Claims in other tests' queues can't pick up these jobs
+
+def _claim(db, queue, worker="w1"):
+    jobs.enqueue(db, "noop", queue=queue)
+    db.commit()
+    (job,) = jobs.claim(db, worker, [queue], 1)
+    return job
+
+def _age_lock(db, job_id, seconds):
+    db.execute(update(models.Job).where(models.Job.id == job_id).values(
+        locked_at=datetime.now(timezone.utc) - timedelta(seconds=seconds)))
+    db.commit()
+
+def _status(db, job_id):
+    db.expire_all()
+    return db.get(models.Job, job_id).status
+
+def test_running_job_with_heartbeat_is_not_reaped(db, queue):
+    job = _claim(db, queue)
+    _age_lock(db, job["id"], jobs.LOCK_TIMEOUT + 60)
+    assert jobs.heartbeat(db, "w1", [job["id"]]) == 1
+    assert jobs.reap(db) == 0
+    assert _status(db, job["id"]) == models.JobStatus.RUNNING
+
+def test_job_without_heartbeat_is_requeued(db, queue):
+    job = _claim(db, queue)
+    _age_lock(db, job["id"], jobs.LOCK_TIMEOUT + 60)
+    assert jobs.reap(db) == 1
+    assert _status(db, job["id"]) == models.JobStatus.QUEUED
+    # The worker that lost it can't take it back by renewing the lock
+    assert jobs.heartbeat(db, "w1", [job["id"]]) == 0
@@ -0,0 +1,82 @@
+"""
+Tenant purge: a deleted company's rows are exported, then deleted in chunks, resuming where a
+crashed purge stopped, without touching other companies.
+
+Run from backend/:  python -m pytest -q tests/test_purge.py
+"""
+import gzip
+import json
+
+import pytest
+from sqlalchemy import func, select
+
+from app import models
+from app.database import Base
+from app.services import purge
+
+@pytest.fixture(autouse=True)
+def small_chunks(monkeypatch, tmp_path):
+    monkeypatch.setattr(purge, "CHUNK_SIZE", 2)
+    monkeypatch.setattr(purge, "CHUNK_PAUSE", 0)
+    monkeypatch.setattr(purge, "EXPORT_DIR", str(tmp_path))
+
+def _seed(client):
+    sector = client.post("/archives/sectors", json={"name": "S"}).json()
+    for i in range(5):
+        client.post("/archives/assets", json={"name": f"A{i}", "sector_id": sector["id"]})
+    category = client.post("/archives/categories", json={"name": "C"}).json()
+    for i in range(3):
+        client.post("/archives/suppliers", json={"name": f"S{i}", "category_ids": [category["id"]]})
+    client.post("/work-orders", json={"description": "x", "requested_by_id": 1})
+
+def _counts(db, company_id):
+    counts = {}
+    for table_name in purge.PURGE_ORDER:
+        table, where = purge.company_rows(table_name, company_id)
+        counts[table_name] = db.execute(select(func.count()).select_from(table).where(where)).scalar()
+    return counts
+
+def test_every_company_table_is_purged():
+    owned = {table.name for table in Base.metadata.sorted_tables if "company_id" in table.c}
+    assert owned - {"tenant_purges"} <= set(purge.PURGE_ORDER)
+
+def test_purge_exports_then_deletes(client, make_client, db):
+    _seed(client)
+    other = make_client("Other")
+    _seed(other)
+    before = _counts(db, other.company_id)
+
+    done = purge.purge_company(db, client.company_id)
+    assert done.status == models.PurgeStatus.DONE
+    assert not any(_counts(db, client.company_id).values())
+    assert _counts(db, other.company_id) == before
+
+    with gzip.open(done.export_path, "rt") as archive:
+        exported = [json.loads(line)["table"] for line in archive]
+    assert exported.count("assets") == 5
+    assert exported.count("supplier_categories") == 3
+    assert done.rows_deleted >= len(exported)
+
+def test_purge_resumes_after_crash(client, db, monkeypatch):
+    _seed(client)
+    delete_chunk = purge._delete_chunk
+    def crash_on_assets(db, table, where):
+        if table.name == "assets":
+            raise RuntimeError("worker killed")
+        return delete_chunk(db, table, where)
+    monkeypatch.setattr(purge, "_delete_chunk", crash_on_assets)
+    with pytest.raises(RuntimeError):
+        purge.purge_company(db, client.company_id)
+    db.rollback()
+    crashed = db.query(models.TenantPurge).filter(models.TenantPurge.company_id == client.company_id).one()
+    assert crashed.status == models.PurgeStatus.DELETING
+    # Chunks before the crash stay deleted
+    counts = _counts(db, client.company_id)
+    assert counts["suppliers"] == 0 and counts["assets"] == 5
+    export_path = crashed.export_path
+
+    monkeypatch.setattr(purge, "_delete_chunk", delete_chunk)
+    done = purge.purge_company(db, client.company_id)
+    assert done.status == models.PurgeStatus.DONE
+    assert done.export_path == export_path # Not exported again
+    assert not any(_counts(db, client.company_id).values())
@@ -0,0 +1,57 @@
+"""
+Per-company rate limit and concurrent request cap, with limits from the company's plan.
+
+Run from backend/:  python -m pytest -q tests/test_ratelimit.py
+"""
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from app import ratelimit
+from app.main import app
+
+def test_bucket_refills_over_time(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(ratelimit.time, "monotonic", lambda: now[0])
+    backend = ratelimit.MemoryBackend()
+    take = lambda: asyncio.run(backend.take("k", rate=2, burst=3))
+    assert [take() for _ in range(3)] == [0, 0, 0]
+    assert take() == 0.5 # One token at 2/s
+    now[0] += 0.5
+    assert take() == 0
+
+def test_company_over_its_plan_rate_gets_429(client, make_client, subscribe):
+    subscribe(client.company_id, limits={"requests_per_second": 0.01, "burst": 3})
+    codes = [client.get("/archives/sectors").status_code for _ in range(4)]
+    assert codes == [200, 200, 200, 429]
+    response = client.get("/archives/sectors")
+    assert response.status_code == 429
+    assert int(response.headers["retry-after"]) >= 1
+    # Other companies and requests without a token have their own budget
+    assert make_client("Other").get("/archives/sectors").status_code == 200
+    assert TestClient(app).get("/health").status_code == 200
+
+def test_concurrent_requests_are_capped(client, subscribe):
+    subscribe(client.company_id, limits={"requests_per_second": 100, "burst": 100, "concurrent_requests": 2})
+
+    async def slow(scope, receive, send):
+        await asyncio.sleep(0.1)
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    middleware = ratelimit.TenantRateLimitMiddleware(slow)
+    token = client.headers["Authorization"].encode()
+
+    async def request():
+        statuses = []
+        async def send(message):
+            if message["type"] == "http.response.start":
+                statuses.append(message["status"])
+        await middleware({"type": "http", "path": "/x", "headers": [(b"authorization", token)]}, None, send)
+        return statuses[0]
+
+    async def burst():
+        return await asyncio.gather(*[request() for _ in range(3)])
+
+    assert sorted(asyncio.run(burst())) == [200, 200, 429]
+    assert middleware._active == {} # Slots are given back
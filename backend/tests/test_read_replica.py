@@ -0,0 +1,71 @@
+"""
+Read-your-writes with a read replica: list endpoints read from the replica, except right after
+the client's own write, which it proves with the X-Last-Write header it got back. The replica is
+a second SQLite file that lags until the test copies the primary over it.
+
+Run from backend/:  python -m pytest -q tests/test_read_replica.py
+"""
+import os
+import shutil
+import time
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import database
+from app.database import LAST_WRITE_HEADER, READ_STICKY_SECONDS
+from conftest import PRIMARY_PATH
+
+REPLICA_PATH = os.path.join(os.path.dirname(PRIMARY_PATH), "replica.db")
+
+@pytest.fixture(scope="module")
+def replica():
+    """Read sessions on a second SQLite file, as with READ_DATABASE_URL set."""
+    replica_engine = create_engine(f"sqlite:///{REPLICA_PATH}")
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(database, "ReadSessionLocal", sessionmaker(bind=replica_engine, info={"read_only": True}))
+        yield replica_engine
+    replica_engine.dispose()
+
+@pytest.fixture
+def client(make_client, replica):
+    client = make_client("Replica")
+    replicate(replica)
+    return client
+
+def replicate(replica):
+    """The replica catches up: a copy of the primary as it is now."""
+    replica.dispose()
+    shutil.copyfile(PRIMARY_PATH, REPLICA_PATH)
+
+def test_write_returns_last_write(client):
+    before = time.time()
+    response = client.post("/work-orders", json={"description": "stamped", "requested_by_id": 1})
+    assert response.status_code == 200, response.text
+    assert before <= float(response.headers[LAST_WRITE_HEADER]) <= time.time()
+
+def test_read_does_not_return_last_write(client):
+    response = client.get("/work-orders")
+    assert response.status_code == 200
+    assert LAST_WRITE_HEADER not in response.headers
+
+def test_read_after_write_sees_it(client):
+    response = client.post("/work-orders", json={"description": "fresh", "requested_by_id": 1})
+    last_write = response.headers[LAST_WRITE_HEADER]
+
+    # Without the header the read goes to the replica, which doesn't have it yet
+    stale = client.get("/work-orders").json()
+    assert "fresh" not in [wo["description"] for wo in stale]
+    # Any worker honors the header: it carries the write's time, not per-process state
+    fresh = client.get("/work-orders", headers={LAST_WRITE_HEADER: last_write}).json()
+    assert "fresh" in [wo["description"] for wo in fresh]
+
+def test_old_or_bad_last_write_reads_replica(client, replica):
+    client.post("/work-orders", json={"description": "lagging", "requested_by_id": 1})
+    for value in (str(time.time() - READ_STICKY_SECONDS - 1), "not-a-time"):
+        orders = client.get("/work-orders", headers={LAST_WRITE_HEADER: value}).json()
+        assert "lagging" not in [wo["description"] for wo in orders]
+
+    replicate(replica)
+    assert "lagging" in [wo["description"] for wo in client.get("/work-orders").json()]
@@ -0,0 +1,63 @@
+"""
+Scheduling: pending orders go most urgent first to the least-loaded worker of their sector (or
+a generalist) with time left in the horizon.
+
+Run from backend/:  python -m pytest -q tests/test_scheduling.py
+"""
+from datetime import date, datetime, timedelta
+
+from app.services.scheduling import PendingOrder, WorkerSlot, build_schedule, workdays
+
+MONDAY = date(2026, 10, 19)
+T0 = datetime(2026, 10, 1)
+
+def _order(id, minutes=60, priority="MEDIA", sector_id=None, age=0):
+    return PendingOrder(id=id, sector_id=sector_id, minutes=minutes, priority=priority, created_at=T0 - timedelta(days=age))
+
+def _assigned(schedule):
+    return {a["work_order_id"]: a["worker_id"] for a in schedule.assignments}
+
+def test_workdays_skip_weekends():
+    assert workdays(date(2026, 10, 23), 2) == [date(2026, 10, 23), date(2026, 10, 26)]
+
+def test_urgent_first_to_least_loaded():
+    orders = [_order(1, priority="BAJA"), _order(2, priority="CRITICA"), _order(3), _order(4, age=1)]
+    schedule = build_schedule(orders, [WorkerSlot(1, None), WorkerSlot(2, None, load=30)], [MONDAY])
+    assert [a["work_order_id"] for a in schedule.assignments] == [2, 4, 3, 1]
+    assert _assigned(schedule) == {2: 1, 4: 2, 3: 1, 1: 2}
+
+def test_sector_orders_go_to_sector_or_generalists():
+    orders = [_order(1, sector_id=10), _order(2, sector_id=20)]
+    schedule = build_schedule(orders, [WorkerSlot(1, sector_id=10), WorkerSlot(2, sector_id=30, load=0)], [MONDAY])
+    assert _assigned(schedule) == {1: 1}
+    assert schedule.unassigned == [{"work_order_id": 2, "reason": "No worker for this sector"}]
+
+def test_capacity_spills_to_next_days_then_unassigned():
+    orders = [_order(i, minutes=300, age=-i) for i in range(4)]
+    schedule = build_schedule(orders, [WorkerSlot(1, None)], [MONDAY, MONDAY + timedelta(days=1)], day_minutes=480)
+    # The day is the one the worker's load reaches when the order starts
+    assert [(a["work_order_id"], a["scheduled_date"]) for a in schedule.assignments] == [
+        (0, MONDAY), (1, MONDAY), (2, MONDAY + timedelta(days=1))
+    ]
+    assert schedule.unassigned == [{"work_order_id": 3, "reason": "No worker with free time"}]
+    assert schedule.workers == [{"worker_id": 1, "existing_minutes": 0, "scheduled_minutes": 900, "capacity_minutes": 960}]
+
+def test_commit_assigns_and_counts_as_load(client):
+    sector = client.post("/archives/sectors", json={"name": "A"}).json()
+    worker = client.post("/archives/workers", json={"first_name": "W", "last_name": "X", "sector_id": sector["id"]}).json()
+    orders = [client.post("/work-orders", json={"description": f"d{i}", "requested_by_id": worker["id"], "sector_id": sector["id"]}).json()
+              for i in range(2)]
+    request = {"horizon": "DAY", "start_date": MONDAY.isoformat()}
+
+    preview = client.post("/scheduling/preview", json=request).json()
+    assert len(preview["assignments"]) == 2
+    assert all(wo["assigned_to_id"] is None for wo in client.get("/work-orders").json()) # Dry run
+
+    committed = client.post("/scheduling/commit", json=request).json()
+    assert committed["assignments"] == preview["assignments"]
+    for wo in client.get("/work-orders").json():
+        assert (wo["status"], wo["assigned_to_id"], wo["scheduled_date"]) == ("ASIGNADA", worker["id"], MONDAY.isoformat())
+
+    again = client.post("/scheduling/preview", json=request).json()
+    assert again["assignments"] == []
+    assert again["workers"][0]["existing_minutes"] == 120
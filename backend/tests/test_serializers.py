@@ -0,0 +1,66 @@
+"""
+The projected list serializers (app/serializers.py) must return exactly what the Pydantic
+response schemas would for the same rows, nested lists and defaults included.
+
+Run from backend/:  python -m pytest -q tests/test_serializers.py
+"""
+import json
+
+import pytest
+
+from app.routers.archives import SPARE_PART_LIST, SUPPLIER_LIST
+from app.routers.stock import PURCHASE_ORDER_LIST
+from app.routers.work_orders import WORK_ORDER_LIST
+
+PROJECTIONS = {
+    "work_orders": WORK_ORDER_LIST,
+    "purchase_orders": PURCHASE_ORDER_LIST,
+    "spare_parts": SPARE_PART_LIST,
+    "suppliers": SUPPLIER_LIST,
+}
+
+def normalize(value):
+    # Lazy-loaded relationships have no ORDER BY, the projection sorts by id: compare nested lists by id
+    if isinstance(value, dict):
+        return {key: normalize(item) for key, item in value.items()}
+    if isinstance(value, list):
+        items = [normalize(item) for item in value]
+        return sorted(items, key=lambda item: item["id"]) if items and isinstance(items[0], dict) else items
+    return value
+
+@pytest.fixture
+def company(client):
+    """A company with a bit of everything the list endpoints return, nulls and empty lists included."""
+    sector = client.post("/archives/sectors", json={"name": "S"}).json()
+    assets = [client.post("/archives/assets", json={"name": f"A{i}", "sector_id": sector["id"], "brand": "B" if i % 2 else None}).json()
+              for i in range(3)]
+    categories = [client.post("/archives/categories", json={"name": f"C{i}"}).json() for i in range(2)]
+    suppliers = [client.post("/archives/suppliers", json={"name": f"S{i}", "category_ids": [c["id"] for c in categories[:i]]}).json()
+                 for i in range(3)]
+    parts = [client.post("/archives/spare-parts", json={"name": f"P{i}", "cost": 10.5 * i, "stock": i,
+                                                       "category_id": categories[0]["id"] if i % 2 else None}).json()
+             for i in range(4)]
+    for i in range(4):
+        client.post("/work-orders", json={"description": f"d{i}", "requested_by_id": 1, "priority": "ALTA",
+                                          "asset_id": assets[0]["id"] if i % 2 else None})
+    for i in range(3):
+        response = client.post("/stock/purchase-orders", json={
+            "supplier_id": suppliers[i]["id"], "order_date": "2026-10-01",
+            "items": [{"description": "x", "quantity": 2, "unit_price": 3.3, "spare_part_id": parts[1]["id"]}] * i,
+        })
+        assert response.status_code == 200, response.text
+    return client.company_id
+
+@pytest.mark.parametrize("name", PROJECTIONS)
+def test_projection_matches_schema(name, company, db):
+    projection = PROJECTIONS[name]
+    model = projection.model
+    query = db.query(model).filter(model.company_id == company).order_by(model.id)
+
+    expected = [normalize(projection.schema.model_validate(obj, from_attributes=True).model_dump(mode="json"))
+                for obj in query.all()]
+    db.expire_all()
+    actual = [normalize(row) for row in json.loads(projection.response(db, query).body)]
+
+    assert expected
+    assert actual == expected
@@ -0,0 +1,34 @@
+"""
+Cold start of the API, in fresh interpreters: the deferred modules stay out of the import, the
+first response comes within the budget and the app answers /health with the database down.
+The same probes as scripts/bench_startup.py, which reports the timings in more detail.
+
+Run from backend/:  python -m pytest -q tests/test_startup.py
+"""
+import os
+import statistics
+
+import pytest
+
+from scripts import bench_startup
+
+BUDGET = float(os.getenv("STARTUP_BUDGET_SECONDS", "2.0"))
+
+@pytest.fixture(scope="module")
+def database_url(tmp_path_factory):
+    return f"sqlite:///{tmp_path_factory.mktemp('startup') / 'startup.db'}"
+
+def test_import_leaves_deferred_modules_out(database_url):
+    assert bench_startup.probe(database_url)["loaded"] == []
+
+def test_first_response_within_budget(database_url):
+    bench_startup.probe(database_url) # Warm the bytecode and OS caches
+    ready = statistics.median(bench_startup.probe(database_url)["ready"] for _ in range(3))
+    assert ready <= BUDGET
+
+def test_health_answers_with_database_down():
+    # A port nothing listens on
+    result = bench_startup.probe("postgresql+psycopg2://postgres@127.0.0.1:1/none?connect_timeout=1")
+    assert result["status"] == 200
+    assert result["health"]["status"] == "ok"
+    assert result["health"]["schema"] in ("unknown", "unavailable")
@@ -0,0 +1,90 @@
+"""
+Contract tests for the storage backends. S3Storage runs against moto's in-process S3,
+a local stand-in for the real service, so no credentials or network are needed.
+
+Run from backend/:  pip install -r requirements-dev.txt && python -m pytest -q tests
+"""
+import os
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from app.services.storage import IMMUTABLE_CACHE_CONTROL, LocalStorage, S3Storage, Storage
+
+BUCKET = "media-test"
+
+@pytest.fixture
+def s3(monkeypatch):
+    pytest.importorskip("boto3")
+    moto = pytest.importorskip("moto")
+    for name, value in (("AWS_ACCESS_KEY_ID", "test"), ("AWS_SECRET_ACCESS_KEY", "test"),
+                        ("AWS_DEFAULT_REGION", "us-east-1")):
+        monkeypatch.setenv(name, value)
+    with moto.mock_aws():
+        storage = S3Storage(BUCKET, public_url="https://cdn.example.com/")
+        storage.client.create_bucket(Bucket=BUCKET)
+        yield storage
+
+@pytest.fixture
+def local(tmp_path):
+    return LocalStorage(str(tmp_path / "media"), "/media")
+
+@pytest.fixture(params=["local", "s3"])
+def storage(request):
+    return request.getfixturevalue(request.param)
+
+def _upload(tmp_path, data: bytes, name: str = "upload") -> str:
+    path = tmp_path / name
+    path.write_bytes(data)
+    return str(path)
+
+def test_storage_is_abstract():
+    with pytest.raises(TypeError):
+        Storage()
+
+def test_put_get_delete(storage, tmp_path):
+    local_file = _upload(tmp_path, b"logo bytes")
+    storage.put_file(local_file, "logos/abc.png", "image/png")
+
+    assert not os.path.exists(local_file)
+    assert storage.exists("logos/abc.png")
+    assert storage.get_bytes("logos/abc.png") == b"logo bytes"
+
+    storage.delete("logos/abc.png")
+    assert not storage.exists("logos/abc.png")
+
+def test_put_existing_key_keeps_first_file(storage, tmp_path):
+    storage.put_file(_upload(tmp_path, b"first", "a"), "logos/same.png")
+    second = _upload(tmp_path, b"second", "b")
+    storage.put_file(second, "logos/same.png")
+
+    assert not os.path.exists(second)
+    assert storage.get_bytes("logos/same.png") == b"first"
+
+def test_delete_prefix(storage, tmp_path):
+    for n in range(3):
+        storage.put_file(_upload(tmp_path, b"x", f"f{n}"), f"attachments/1/{n}")
+    storage.put_file(_upload(tmp_path, b"y", "other"), "attachments/2/0")
+
+    storage.delete_prefix("attachments/1/")
+
+    assert not any(storage.exists(f"attachments/1/{n}") for n in range(3))
+    assert storage.exists("attachments/2/0")
+
+def test_s3_object_metadata_and_urls(s3, tmp_path):
+    s3.put_file(_upload(tmp_path, b"png"), "logos/abc.png", "image/png")
+
+    head = s3.client.head_object(Bucket=BUCKET, Key="logos/abc.png")
+    assert head["ContentType"] == "image/png"
+    assert head["CacheControl"] == IMMUTABLE_CACHE_CONTROL
+    assert s3.url("logos/abc.png") == "https://cdn.example.com/logos/abc.png"
+    assert s3.local_path("logos/abc.png") is None
+
+    url = urlparse(s3.download_url("logos/abc.png", "logo.png"))
+    assert url.path.endswith("/logos/abc.png")
+    assert parse_qs(url.query)["response-content-disposition"] == ['attachment; filename="logo.png"']
+
+def test_local_urls(local):
+    assert local.url("logos/abc.png") == "/media/logos/abc.png"
+    assert local.local_path("logos/abc.png").endswith(os.path.join("media", "logos", "abc.png"))
+    assert local.download_url("logos/abc.png", "logo.png") is None
@@ -0,0 +1,73 @@
+"""
+Offline sync: pulls page through changes by watermark, deletions come back as tombstones and
+queued status changes are pushed in one go.
+
+Run from backend/:  python -m pytest -q tests/test_sync.py
+"""
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import update
+
+from app import models
+
+def _order(client, description):
+    response = client.post("/work-orders", json={"description": description, "requested_by_id": 1})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+def _pull_all(client, limit):
+    ids, since, pulls = [], None, 0
+    while True:
+        params = {"limit": limit, **({"since": since} if since else {})}
+        page = client.get("/sync", params=params).json()
+        ids += [wo["id"] for wo in page["work_orders"]]
+        since, pulls = page["watermark"], pulls + 1
+        if not page["has_more"]:
+            return ids, pulls
+
+def test_pull_pages_through_changes(client, db):
+    orders = [_order(client, f"d{i}")["id"] for i in range(5)]
+    # Distinct timestamps, as written over time
+    for i, wo_id in enumerate(orders):
+        db.execute(update(models.WorkOrder).where(models.WorkOrder.id == wo_id).values(
+            updated_at=datetime.now(timezone.utc) - timedelta(days=10 - i)))
+    db.commit()
+
+    ids, pulls = _pull_all(client, limit=2)
+    assert pulls > 1
+    assert sorted(set(ids)) == orders
+
+def test_pull_only_sees_own_company(client, make_client):
+    own = _order(client, "own")
+    other = make_client("Other")
+    _order(other, "other")
+    assert [wo["id"] for wo in client.get("/sync").json()["work_orders"]] == [own["id"]]
+
+def test_deleted_rows_come_back_as_tombstones(client):
+    sector = client.post("/archives/sectors", json={"name": "S"}).json()
+    asset = client.post("/archives/assets", json={"name": "A", "sector_id": sector["id"]}).json()
+    since = client.get("/sync").json()["watermark"]
+    assert client.delete(f"/archives/assets/{asset['id']}").status_code == 200
+
+    page = client.get("/sync", params={"since": since}).json()
+    assert [(d["entity_type"], d["entity_id"]) for d in page["deleted"]] == [("assets", asset["id"])]
+
+def test_push_applies_changes_in_order(client):
+    wo = _order(client, "x")
+    results = client.post("/sync", json={"changes": [
+        {"work_order_id": wo["id"], "status": "EN_PROGRESO"},
+        {"work_order_id": 999999, "status": "PAUSADA"},
+        {"work_order_id": wo["id"], "status": "COMPLETADA", "observations": "listo"},
+    ]}).json()
+    assert [r["ok"] for r in results] == [True, False, True]
+    pushed = client.get(f"/work-orders/{wo['id']}").json()
+    assert (pushed["status"], pushed["observations"]) == ("COMPLETADA", "listo")
+
+def test_push_with_unknown_status_applies_nothing(client):
+    wo = _order(client, "x")
+    response = client.post("/sync", json={"changes": [
+        {"work_order_id": wo["id"], "status": "EN_PROGRESO"},
+        {"work_order_id": wo["id"], "status": "BAD"},
+    ]})
+    assert response.status_code == 422
+    assert client.get(f"/work-orders/{wo['id']}").json()["status"] == "PENDIENTE"
@@ -0,0 +1,61 @@
+"""
+Asset timeline: the asset's work orders, preventive runs, parts and tool checkouts in one
+newest-first feed, paged with an opaque keyset cursor.
+
+Run from backend/:  python -m pytest -q tests/test_timeline.py
+"""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app import models
+
+@pytest.fixture
+def asset(client):
+    sector = client.post("/archives/sectors", json={"name": "A"}).json()
+    return client.post("/archives/assets", json={"name": "M", "sector_id": sector["id"]}).json()
+
+def _timeline(client, asset_id, **params):
+    response = client.get(f"/archives/assets/{asset_id}/timeline", params=params)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+def test_pages_cover_every_event_once(client, db, asset):
+    plan = client.post("/preventive-plans", json={"name": "P", "frequency_type": "DIARIA", "asset_id": asset["id"]}).json()
+    base = datetime(2020, 1, 1, tzinfo=timezone.utc)
+    for i in range(11):
+        # Ties in threes, so pages have to break them by id
+        db.add(models.WorkOrder(
+            company_id=client.company_id, asset_id=asset["id"], ticket_number=f"T{i}-{asset['id']}", description=f"d{i}",
+            type="PREVENTIVO" if i % 2 else "CORRECTIVO", plan_id=plan["id"] if i % 2 else None,
+            status="PENDIENTE", created_at=base + timedelta(days=i // 3),
+        ))
+    db.commit()
+
+    seen, before = [], None
+    while True:
+        page = _timeline(client, asset["id"], limit=4, **({"before": before} if before else {}))
+        seen += [(e["occurred_at"], e["kind"], e["id"]) for e in page["events"]]
+        before = page["next_cursor"]
+        if not before:
+            break
+    assert len(seen) == len(set(seen)) == 11
+    assert seen == sorted(seen, reverse=True)
+    assert {kind for _, kind, _ in seen} == {"WORK_ORDER", "PREVENTIVE_RUN"}
+
+def test_parts_and_tools_show_up(client, asset):
+    worker = client.post("/archives/workers", json={"first_name": "W", "last_name": "X"}).json()
+    part = client.post("/archives/spare-parts", json={"name": "Filtro", "cost": 10, "stock": 5}).json()
+    tool = client.post("/archives/tools", json={"name": "Llave"}).json()
+    order = client.post("/work-orders", json={"description": "x", "requested_by_id": worker["id"], "asset_id": asset["id"]}).json()
+    client.post(f"/work-orders/{order['id']}/parts", json={"spare_part_id": part["id"], "quantity": 2})
+    client.post("/archives/tools/checkout", json={"tool_ids": [tool["id"]], "worker_id": worker["id"], "work_order_id": order["id"]})
+
+    events = _timeline(client, asset["id"])["events"]
+    assert sorted(e["kind"] for e in events) == ["PART_CONSUMED", "TOOL_CHECKOUT", "WORK_ORDER"]
+    assert {e["work_order_id"] for e in events} == {order["id"]}
+    assert next(e for e in events if e["kind"] == "PART_CONSUMED")["quantity"] == 2
+
+def test_bad_cursor_and_foreign_asset(client, make_client, asset):
+    assert client.get(f"/archives/assets/{asset['id']}/timeline", params={"before": "garbage!"}).status_code == 400
+    assert make_client("Other").get(f"/archives/assets/{asset['id']}/timeline").status_code == 404
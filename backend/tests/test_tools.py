@@ -0,0 +1,71 @@
+"""
+Tool checkouts and returns: the holder lives on the tool, every handover adds a ledger row.
+
+Run from backend/:  python -m pytest -q tests/test_tools.py
+"""
+import pytest
+
+@pytest.fixture
+def worker(client):
+    return client.post("/archives/workers", json={"first_name": "W", "last_name": "X"}).json()
+
+def _tool(client, **fields):
+    response = client.post("/archives/tools", json={"name": "Llave", **fields})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+def _movements(client, tool_id):
+    return [(m["action"], m["worker_id"]) for m in reversed(client.get(f"/archives/tools/{tool_id}/movements").json())]
+
+def test_checkout_and_return(client, worker):
+    tools = [_tool(client), _tool(client)]
+    ids = [tool["id"] for tool in tools]
+    results = client.post("/archives/tools/checkout", json={"tool_ids": ids + ids[:1] + [999999], "worker_id": worker["id"]}).json()
+    assert [r["ok"] for r in results] == [True, True, False, False]
+
+    held = client.get("/archives/tools", params={"worker_id": worker["id"]}).json()
+    assert sorted(tool["id"] for tool in held) == ids
+    assert {tool["status"] for tool in held} == {"IN_USE"}
+
+    results = client.post("/archives/tools/return", json={"tool_ids": ids[:1], "status": "BROKEN"}).json()
+    assert results[0]["ok"]
+    assert _movements(client, ids[0]) == [("CHECKOUT", worker["id"]), ("RETURN", worker["id"])]
+    # A broken tool can't go back out until someone fixes its status
+    results = client.post("/archives/tools/checkout", json={"tool_ids": ids[:1], "worker_id": worker["id"]}).json()
+    assert results[0]["detail"] == "Tool not available"
+
+def test_reassign_by_hand_marks_tool_in_use(client, worker):
+    tool = _tool(client)
+    updated = client.put(f"/archives/tools/{tool['id']}", json={"name": "Llave", "current_worker_id": worker["id"], "version": tool["version"]}).json()
+    assert (updated["current_worker_id"], updated["status"]) == (worker["id"], "IN_USE")
+
+    updated = client.put(f"/archives/tools/{tool['id']}", json={"name": "Llave", "status": "IN_USE", "version": updated["version"]}).json()
+    assert (updated["current_worker_id"], updated["status"]) == (None, "AVAILABLE")
+    assert _movements(client, tool["id"]) == [("CHECKOUT", worker["id"]), ("RETURN", worker["id"])]
+
+def test_tool_created_in_hand_starts_in_use(client, worker):
+    tool = _tool(client, current_worker_id=worker["id"])
+    assert tool["status"] == "IN_USE"
+    assert _movements(client, tool["id"]) == [("CHECKOUT", worker["id"])]
+
+def test_delete_keeps_ledger(client, worker):
+    tool = _tool(client, current_worker_id=worker["id"])
+    assert client.delete(f"/archives/tools/{tool['id']}").status_code == 200
+
+    assert tool["id"] not in [t["id"] for t in client.get("/archives/tools").json()]
+    assert _movements(client, tool["id"]) == [("CHECKOUT", worker["id"]), ("RETURN", worker["id"])]
+    results = client.post("/archives/tools/checkout", json={"tool_ids": [tool["id"]], "worker_id": worker["id"]}).json()
+    assert results[0]["detail"] == "Tool not found"
+    assert client.delete(f"/archives/tools/{tool['id']}").status_code == 404
+
+    pulled = client.get("/sync").json()
+    assert tool["id"] not in [t["id"] for t in pulled["tools"]]
+    assert {"entity_type": "tools", "entity_id": tool["id"]}.items() <= next(
+        d for d in pulled["deleted"] if d["entity_id"] == tool["id"]).items()
+
+def test_other_company_cannot_check_out(client, make_client, worker):
+    tool = _tool(client)
+    other = make_client("Other")
+    other_worker = other.post("/archives/workers", json={"first_name": "O", "last_name": "X"}).json()
+    results = other.post("/archives/tools/checkout", json={"tool_ids": [tool["id"]], "worker_id": other_worker["id"]}).json()
+    assert results[0]["detail"] == "Tool not found"
@@ -0,0 +1,85 @@
+"""
+Work order list and edits.
+
+Run from backend/:  python -m pytest -q tests/test_work_orders.py
+"""
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import update
+
+from app import models
+from app.services import partitions
+
+def _order(client, description, **fields):
+    response = client.post("/work-orders", json={"description": description, "requested_by_id": 1, **fields})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+def _backdate(db, wo_id, days):
+    db.execute(update(models.WorkOrder).where(models.WorkOrder.id == wo_id).values(
+        created_at=datetime.now(timezone.utc) - timedelta(days=days)))
+    db.commit()
+
+def _listed(client, **params):
+    return [wo["description"] for wo in client.get("/work-orders", params=params).json()]
+
+def test_old_open_order_is_listed(client, db):
+    old_open = _order(client, "old open")
+    old_closed = _order(client, "old closed", status="COMPLETADA")
+    _order(client, "recent closed", status="COMPLETADA")
+    for wo in (old_open, old_closed):
+        _backdate(db, wo["id"], partitions.RETENTION_DAYS + 30)
+
+    listed = _listed(client)
+    # Closed orders past the retention window belong to the archive, open ones never do
+    assert "old open" in listed
+    assert "recent closed" in listed
+    assert "old closed" not in listed
+
+def test_created_from_bounds_every_order(client, db):
+    old_open = _order(client, "old open")
+    _backdate(db, old_open["id"], 10)
+    since = (datetime.now(timezone.utc) - timedelta(days=5)).isoformat()
+    assert "old open" not in _listed(client, created_from=since)
+
+def _bulk(client, *operations):
+    response = client.post("/work-orders/bulk", json={"operations": list(operations)})
+    assert response.status_code == 200, response.text
+    return [(r["work_order_id"], r["ok"], r["detail"]) for r in response.json()]
+
+def test_bulk_applies_valid_operations(client, make_client):
+    worker = client.post("/archives/workers", json={"first_name": "W", "last_name": "X"}).json()
+    other_worker = make_client("Other").post("/archives/workers", json={"first_name": "O", "last_name": "X"}).json()
+    a, b, c = (_order(client, name)["id"] for name in "abc")
+
+    results = _bulk(
+        client,
+        {"work_order_id": a, "action": "ASSIGN", "assigned_to_id": worker["id"]},
+        {"work_order_id": a, "action": "STATUS", "status": "EN_PROGRESO"},
+        {"work_order_id": b, "action": "PRIORITY", "priority": "CRITICA"},
+        {"work_order_id": b, "action": "CANCEL"},
+        {"work_order_id": c, "action": "ASSIGN", "assigned_to_id": other_worker["id"]},
+        {"work_order_id": c, "action": "STATUS"},
+        {"work_order_id": 999999, "action": "CANCEL"},
+    )
+    assert results == [
+        (a, True, None), (a, True, None), (b, True, None), (b, True, None),
+        (c, False, "Invalid Worker ID"), (c, False, "status is required"), (999999, False, "Work Order not found"),
+    ]
+
+    orders = {wo["id"]: wo for wo in client.get("/work-orders").json()}
+    assert (orders[a]["status"], orders[a]["assigned_to_id"]) == ("EN_PROGRESO", worker["id"])
+    assert orders[a]["assigned_at"] and orders[a]["start_date"]
+    assert (orders[b]["status"], orders[b]["priority"]) == ("CANCELADA", "CRITICA")
+    # Skipped operations leave the order untouched
+    assert (orders[c]["status"], orders[c]["assigned_to_id"]) == ("PENDIENTE", None)
+
+def test_bulk_skips_other_company_orders(client, make_client):
+    foreign = _order(make_client("Other"), "foreign")
+    assert _bulk(client, {"work_order_id": foreign["id"], "action": "CANCEL"}) == [
+        (foreign["id"], False, "Work Order not found")
+    ]
+
+def test_bulk_is_capped(client):
+    response = client.post("/work-orders/bulk", json={"operations": [{"work_order_id": 1, "action": "CANCEL"}] * 501})
+    assert response.status_code == 400
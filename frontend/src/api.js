@@ -9,12 +9,20 @@ const api = axios.create({
     },
 });
 
+// Time of this tab's last write, from the backend. Sent back so the reads right after it go to
+// the primary database instead of a replica that may not have the change yet
+const LAST_WRITE_HEADER = 'X-Last-Write';
+
 api.interceptors.request.use(
     (config) => {
         const token = localStorage.getItem('token');
         if (token) {
             config.headers['Authorization'] = `Bearer ${token}`;
         }
+        const lastWrite = sessionStorage.getItem('lastWrite');
+        if (lastWrite) {
+            config.headers[LAST_WRITE_HEADER] = lastWrite;
+        }
         return config;
     },
     (error) => {
@@ -22,6 +30,50 @@ api.interceptors.request.use(
     }
 );
 
+// 402: the company's trial ended or its subscription lapsed, send it to pick a plan
+api.interceptors.response.use(
+    (response) => {
+        const lastWrite = response.headers[LAST_WRITE_HEADER.toLowerCase()];
+        if (lastWrite) {
+            sessionStorage.setItem('lastWrite', lastWrite);
+        }
+        return response;
+    },
+    (error) => {
+        if (error.response && error.response.status === 402 && window.location.pathname !== '/pricing') {
+            window.location.assign('/pricing');
+        }
+        // 409 on an edit: someone saved the record first. The detail becomes the message to show,
+        // and error.conflict holds the record as it is now
+        const detail = error.response && error.response.data && error.response.data.detail;
+        if (error.response && error.response.status === 409 && detail && detail.message) {
+            error.conflict = detail.current;
+            error.response.data.detail = detail.message;
+        }
+        return Promise.reject(error);
+    }
+);
+
+// Creations that must not run twice: the request is retried on network errors with the
+// same Idempotency-Key, so a retry whose first attempt did go through gets that response back
+const IDEMPOTENT_RETRIES = 3;
+
+const postIdempotent = async (url, data) => {
+    const headers = { 'Idempotency-Key': crypto.randomUUID() };
+    for (let attempt = 0; ; attempt++) {
+        try {
+            return await api.post(url, data, { headers });
+        } catch (error) {
+            // 409: the first attempt is still running on the server
+            const retryable = !error.response || error.response.status === 409 || error.response.status >= 502;
+            if (!retryable || attempt >= IDEMPOTENT_RETRIES) {
+                throw error;
+            }
+            await new Promise((resolve) => setTimeout(resolve, 1000 * 2 ** attempt));
+        }
+    }
+};
+
 export const login = async (email, password) => {
     const response = await api.post('/token', { username: email, password }, {
         headers: {
@@ -75,8 +127,9 @@ export const deleteSector = async (id) => {
     return response.data;
 };
 
-export const getAssets = async () => {
-    const response = await api.get('/archives/assets');
+export const getAssets = async (params = {}) => {
+    // params: { sector_id, parent_id, subtree_of, rollup } - rollup adds each subtree's OT counts and costs
+    const response = await api.get('/archives/assets', { params });
     return response.data;
 };
 
@@ -85,6 +138,12 @@ export const createAsset = async (data) => {
     return response.data;
 };
 
+export const getAssetTimeline = async (id, params = {}) => {
+    // params: { limit, before } - pass the previous page's next_cursor as before
+    const response = await api.get(`/archives/assets/${id}/timeline`, { params });
+    return response.data;
+};
+
 export const updateAsset = async (id, data) => {
     const response = await api.put(`/archives/assets/${id}`, data);
     return response.data;
@@ -115,8 +174,31 @@ export const deleteWorker = async (id) => {
     return response.data;
 };
 
-export const getTools = async () => {
-    const response = await api.get('/archives/tools');
+export const getTools = async (params = {}) => {
+    // params: { worker_id, sector_id } to list what a holder has
+    const response = await api.get('/archives/tools', { params });
+    return response.data;
+};
+
+export const getOverdueTools = async (params = {}) => {
+    const response = await api.get('/archives/tools/overdue', { params });
+    return response.data;
+};
+
+export const checkoutTools = async (data) => {
+    // data: { tool_ids, worker_id | sector_id, work_order_id, due_at, notes }
+    const response = await api.post('/archives/tools/checkout', data);
+    return response.data;
+};
+
+export const returnTools = async (data) => {
+    // data: { tool_ids, status, notes }
+    const response = await api.post('/archives/tools/return', data);
+    return response.data;
+};
+
+export const getToolMovements = async (id, params = {}) => {
+    const response = await api.get(`/archives/tools/${id}/movements`, { params });
     return response.data;
 };
 
@@ -209,13 +291,13 @@ export const deletePreventivePlan = async (id) => {
 };
 
 export const checkAndRunPreventivePlans = async () => {
-    const response = await api.post('/preventive-plans/check-and-run');
+    const response = await postIdempotent('/preventive-plans/check-and-run');
     return response.data;
 };
 
 // --- WORK ORDERS ---
 export const getWorkOrders = async (params = {}) => {
-    // params can be { status, asset_id }
+    // params can be { status, asset_id, include_components }
     const response = await api.get('/work-orders', { params });
     return response.data;
 };
@@ -226,7 +308,7 @@ export const getWorkOrder = async (id) => {
 };
 
 export const createWorkOrder = async (data) => {
-    const response = await api.post('/work-orders', data);
+    const response = await postIdempotent('/work-orders', data);
     return response.data;
 };
 
@@ -235,6 +317,100 @@ export const updateWorkOrder = async (id, data) => {
     return response.data;
 };
 
+export const bulkUpdateWorkOrders = async (operations) => {
+    // operations: [{ work_order_id, action: 'ASSIGN' | 'STATUS' | 'PRIORITY' | 'CANCEL', assigned_to_id, status, priority }]
+    const response = await api.post('/work-orders/bulk', { operations });
+    return response.data;
+};
+
+export const getWorkOrderParts = async (id) => {
+    const response = await api.get(`/work-orders/${id}/parts`);
+    return response.data;
+};
+
+export const addWorkOrderPart = async (id, data) => {
+    // data: { spare_part_id, quantity, unit_cost } - takes the quantity out of stock
+    const response = await api.post(`/work-orders/${id}/parts`, data);
+    return response.data;
+};
+
+export const deleteWorkOrderPart = async (id, lineId) => {
+    const response = await api.delete(`/work-orders/${id}/parts/${lineId}`);
+    return response.data;
+};
+
+export const getWorkOrderLabor = async (id) => {
+    const response = await api.get(`/work-orders/${id}/labor`);
+    return response.data;
+};
+
+export const addWorkOrderLabor = async (id, data) => {
+    // data: { worker_id, minutes, hourly_rate, work_date }
+    const response = await api.post(`/work-orders/${id}/labor`, data);
+    return response.data;
+};
+
+export const deleteWorkOrderLabor = async (id, lineId) => {
+    const response = await api.delete(`/work-orders/${id}/labor/${lineId}`);
+    return response.data;
+};
+
+export const getCostReport = async (params) => {
+    // params: { date_from, date_to, group_by: 'ASSET' | 'SECTOR' | 'MONTH', sector_id }
+    const response = await api.get('/dashboard/costs', { params });
+    return response.data;
+};
+
+export const subscribeWorkOrderEvents = ({ onChange, onResync }) => {
+    // Server-sent work order changes for the company; returns a function that closes the stream.
+    // onResync is called on connect and whenever events were missed: re-list then.
+    // EventSource can't send headers: each connection gets a short-lived stream-only token for its
+    // URL, so the login token never shows up in proxy logs. When the browser's own reconnect is
+    // refused (the token expired meanwhile) a new token is fetched and the stream reopened.
+    let source = null;
+    let closed = false;
+    const connect = async () => {
+        try {
+            const { token } = (await api.post('/events/token')).data;
+            if (closed) {
+                return;
+            }
+            source = new EventSource(`${API_URL}/events/work-orders?token=${encodeURIComponent(token)}`);
+        } catch (error) {
+            if (!closed) {
+                setTimeout(connect, 3000);
+            }
+            return;
+        }
+        source.addEventListener('ready', () => onResync && onResync());
+        source.addEventListener('resync', () => onResync && onResync());
+        source.addEventListener('work_order', (e) => onChange(JSON.parse(e.data)));
+        source.onerror = () => {
+            if (source.readyState === EventSource.CLOSED && !closed) {
+                setTimeout(connect, 3000);
+            }
+        };
+    };
+    connect();
+    return () => {
+        closed = true;
+        if (source) {
+            source.close();
+        }
+    };
+};
+
+export const previewSchedule = async (request = {}) => {
+    // request: { start_date, horizon: 'DAY' | 'WEEK', sector_id }
+    const response = await api.post('/scheduling/preview', request);
+    return response.data;
+};
+
+export const commitSchedule = async (request = {}) => {
+    const response = await api.post('/scheduling/commit', request);
+    return response.data;
+};
+
 export const getCompanySettings = async () => {
     const response = await api.get('/settings/general');
     return response.data;
@@ -276,7 +452,7 @@ export const getPurchaseOrder = async (id) => {
 };
 
 export const createPurchaseOrder = async (data) => {
-    const response = await api.post('/stock/purchase-orders', data);
+    const response = await postIdempotent('/stock/purchase-orders', data);
     return response.data;
 };
 
@@ -16,7 +16,8 @@ export default function Assets({ navigate }) {
         serial_number: '',
         purchase_date: '',
         status: 'ACTIVE',
-        sector_id: ''
+        sector_id: '',
+        parent_id: ''
     };
     const [formData, setFormData] = useState(initialForm);
 
@@ -26,7 +27,7 @@ export default function Assets({ navigate }) {
 
     const loadData = async () => {
         try {
-            const [assetsData, sectorsData] = await Promise.all([getAssets(), getSectors()]);
+            const [assetsData, sectorsData] = await Promise.all([getAssets({ rollup: true }), getSectors()]);
             setAssets(assetsData);
             setSectors(sectorsData);
         } catch (error) {
@@ -41,11 +42,20 @@ export default function Assets({ navigate }) {
         return s ? s.name : '-';
     };
 
+    const getAssetName = (id) => {
+        const a = assets.find(asset => asset.id === id);
+        return a ? a.name : '-';
+    };
+
     const handleSubmit = async (e) => {
         e.preventDefault();
         try {
             // Ensure sector_id is int
-            const payload = { ...formData, sector_id: parseInt(formData.sector_id) };
+            const payload = {
+                ...formData,
+                sector_id: parseInt(formData.sector_id),
+                parent_id: formData.parent_id ? parseInt(formData.parent_id) : null
+            };
 
             if (editingAsset) {
                 await updateAsset(editingAsset.id, payload);
@@ -57,7 +67,7 @@ export default function Assets({ navigate }) {
             setFormData(initialForm);
 
             // Reload assets only
-            const refreshedAssets = await getAssets();
+            const refreshedAssets = await getAssets({ rollup: true });
             setAssets(refreshedAssets);
         } catch (error) {
             console.error("Error saving asset", error);
@@ -74,7 +84,9 @@ export default function Assets({ navigate }) {
             serial_number: asset.serial_number || '',
             purchase_date: asset.purchase_date || '',
             status: asset.status,
-            sector_id: asset.sector_id
+            sector_id: asset.sector_id,
+            parent_id: asset.parent_id || '',
+            version: asset.version
         });
         setShowModal(true);
     };
@@ -86,6 +98,7 @@ export default function Assets({ navigate }) {
                 setAssets(assets.filter(a => a.id !== id));
             } catch (error) {
                 console.error("Error deleting asset", error);
+                alert("Error al eliminar activo: " + (error.response?.data?.detail || error.message));
             }
         }
     };
@@ -124,7 +137,9 @@ export default function Assets({ navigate }) {
                             <tr>
                                 <th className="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">Nombre</th>
                                 <th className="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">Sector</th>
+                                <th className="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">Pertenece a</th>
                                 <th className="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">Marca/Modelo</th>
+                                <th className="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">OTs abiertas</th>
                                 <th className="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">Estado</th>
                                 <th className="px-6 py-3 text-right text-xs font-medium text-gray-500 uppercase tracking-wider">Acciones</th>
                             </tr>
@@ -132,7 +147,7 @@ export default function Assets({ navigate }) {
                         <tbody className="bg-white divide-y divide-gray-200">
                             {assets.length === 0 ? (
                                 <tr>
-                                    <td colSpan="5" className="px-6 py-4 text-center text-gray-500">
+                                    <td colSpan="7" className="px-6 py-4 text-center text-gray-500">
                                         No hay activos registrados.
                                     </td>
                                 </tr>
@@ -144,7 +159,11 @@ export default function Assets({ navigate }) {
                                             <div className="text-xs text-gray-500">{asset.serial_number}</div>
                                         </td>
                                         <td className="px-6 py-4 whitespace-nowrap text-sm text-gray-500">{getSectorName(asset.sector_id)}</td>
+                                        <td className="px-6 py-4 whitespace-nowrap text-sm text-gray-500">{asset.parent_id ? getAssetName(asset.parent_id) : '-'}</td>
                                         <td className="px-6 py-4 whitespace-nowrap text-sm text-gray-500">{asset.brand} {asset.model}</td>
+                                        <td className="px-6 py-4 whitespace-nowrap text-sm text-gray-500" title="Incluye sus componentes">
+                                            {asset.rollup ? `${asset.rollup.open_work_orders} / ${asset.rollup.work_orders}` : '-'}
+                                        </td>
                                         <td className="px-6 py-4 whitespace-nowrap text-sm">
                                             <span className={`px-2 inline-flex text-xs leading-5 font-semibold rounded-full ${asset.status === 'ACTIVE' ? 'bg-green-100 text-green-800' : 'bg-red-100 text-red-800'}`}>
                                                 {asset.status}
@@ -231,6 +250,17 @@ export default function Assets({ navigate }) {
                                 </div>
                             </div>
 
+                            <div>
+                                <label className="block text-sm font-medium text-gray-700">Pertenece a</label>
+                                <select
+                                    className="mt-1 block w-full rounded-md border-gray-300 shadow-sm border p-2"
+                                    value={formData.parent_id} onChange={(e) => setFormData({ ...formData, parent_id: e.target.value })}
+                                >
+                                    <option value="">Ninguno (nivel superior)</option>
+                                    {assets.filter(a => !editingAsset || a.id !== editingAsset.id).map(a => <option key={a.id} value={a.id}>{a.name}</option>)}
+                                </select>
+                            </div>
+
                             <div>
                                 <label className="block text-sm font-medium text-gray-700">Fecha Compra</label>
                                 <input
@@ -37,13 +37,13 @@ export default function Sectors({ navigate }) {
             loadSectors();
         } catch (error) {
             console.error("Error saving sector", error);
-            alert("Error al guardar el sector");
+            alert(error.conflict ? error.response.data.detail : "Error al guardar el sector");
         }
     };
 
     const handleEdit = (sector) => {
         setEditingSector(sector);
-        setFormData({ name: sector.name, description: sector.description || '' });
+        setFormData({ name: sector.name, description: sector.description || '', version: sector.version });
         setShowModal(true);
     };
 
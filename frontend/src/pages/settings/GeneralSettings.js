@@ -42,7 +42,8 @@ const GeneralSettings = () => {
                 email_contact: data.email_contact || '',
                 // logo_url is handled via context for display now, but might need it here if we want to show it?
                 // Actually let's use context for display
-                logo_url: data.logo_url || ''
+                logo_url: data.logo_url || '',
+                version: data.version
             });
         } catch (error) {
             console.error("Error loading settings:", error);
@@ -78,12 +79,13 @@ const GeneralSettings = () => {
         setLoading(true);
         setMessage({ type: '', text: '' });
         try {
-            await updateCompanySettings(formData);
+            const saved = await updateCompanySettings(formData);
+            setFormData(prev => ({ ...prev, version: saved.version }));
             refreshCompanyData(); // Update global state
             setMessage({ type: 'success', text: 'Configuración guardada correctamente.' });
         } catch (error) {
             console.error("Error updating settings:", error);
-            setMessage({ type: 'error', text: 'Error al guardar la configuración.' });
+            setMessage({ type: 'error', text: error.conflict ? error.response.data.detail : 'Error al guardar la configuración.' });
         } finally {
             setLoading(false);
         }
@@ -67,6 +67,7 @@ const PurchaseOrderEditor = ({ navigate }) => {
                 delivery_date: data.delivery_date || '',
                 supplier_id: data.supplier_id,
                 observations: data.observations || '',
+                version: data.version,
                 items: data.items.map(item => ({
                     ...item,
                     // Ensure numeric fields are numbers for inputs
@@ -169,7 +170,7 @@ const PurchaseOrderEditor = ({ navigate }) => {
             navigate('/stock/purchase-orders');
         } catch (error) {
             console.error("Error saving order:", error);
-            alert("Error al guardar la orden");
+            alert(error.conflict ? error.response.data.detail : "Error al guardar la orden");
         } finally {
             setSaving(false);
         }
@@ -114,7 +114,8 @@ export default function WorkOrderList({ navigate }) {
             requested_by_id: wo.requested_by_id || '',
             assigned_to_id: wo.assigned_to_id || '',
             type: wo.type || 'CORRECTIVO',
-            status: wo.status || 'PENDIENTE'
+            status: wo.status || 'PENDIENTE',
+            version: wo.version
         });
         setShowModal(true);
     };